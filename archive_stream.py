@@ -0,0 +1,142 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+from contextlib import contextmanager
+from hashlib import new as hashlib_new
+from os import path as os_path
+from subprocess import Popen, PIPE, DEVNULL
+from typing import BinaryIO, Callable, Iterator, Optional, Tuple
+
+
+ARCHIVE_EXTENSIONS: Tuple[str, ...] = ('.zip', '.7z')
+
+
+def get_member_name(archive_path: str) -> str:
+    """
+    Возвращает имя файла копии внутри архива (имя архива без расширения архива).
+
+    :param archive_path: Путь к архиву или к копии без архива.
+    :return: Имя файла копии, например 'DB_2025.01.01_10.00.DBX'.
+    """
+    file_name = os_path.basename(archive_path)
+    for extension in ARCHIVE_EXTENSIONS:
+        if file_name.lower().endswith(extension):
+            return file_name[:-len(extension)]
+    return file_name
+
+
+def read_recorded_hash(backup_dir: str, archive_path: str, hash_type: str = 'sha256') -> Optional[str]:
+    """
+    Читает хэш копии, записанный при архивации (`<backup_dir>/<имя копии>.<hash_type>`).
+
+    :param backup_dir: Корневой каталог резервных копий.
+    :param archive_path: Путь к архиву.
+    :param hash_type: Алгоритм хэширования (расширение хэш-файла).
+    :return: Хэш в шестнадцатеричном виде или None, если хэш-файл отсутствует.
+    """
+    hash_file_path = os_path.join(backup_dir, f'{get_member_name(archive_path)}.{hash_type}')
+    try:
+        with open(hash_file_path, 'r') as hash_file:
+            return hash_file.read().strip() or None
+    except OSError:
+        return None
+
+
+@contextmanager
+def open_archive_stream(archive_path: str, seven_zip_path: Optional[str] = None) -> Iterator[BinaryIO]:
+    """
+    Открывает поток распакованного содержимого резервной копии без записи промежуточных файлов.
+
+    zip распаковывается средствами `zipfile`, 7z - утилитой 7z в режиме вывода в stdout (`e -so`),
+    копия без архива читается как есть.
+
+    :param archive_path: Путь к архиву (.zip, .7z) или к копии без архива.
+    :param seven_zip_path: Путь к исполняемому файлу 7z.
+    :return: Поток для чтения распакованных данных.
+    :raises Exception: Если архив не удалось открыть или 7z завершился с ошибкой.
+    """
+    lower_path = archive_path.lower()
+    if lower_path.endswith('.zip'):
+        from zipfile import ZipFile
+
+        with ZipFile(archive_path, 'r') as archive:
+            names = archive.namelist()
+            member_name = get_member_name(archive_path)
+            with archive.open(member_name if member_name in names else names[0], 'r') as stream:
+                yield stream
+    elif lower_path.endswith('.7z'):
+        if not seven_zip_path:
+            raise Exception(f'7z executable is not configured to unpack "{archive_path}".')
+        process = Popen([seven_zip_path, 'e', '-so', archive_path], stdout=PIPE, stderr=DEVNULL)
+        try:
+            yield process.stdout
+        finally:
+            process.stdout.close()
+            return_code = process.wait()
+        if return_code != 0:
+            raise Exception(f'7z failed to unpack "{archive_path}" (exit code {return_code}).')
+    else:
+        with open(archive_path, 'rb') as stream:
+            yield stream
+
+
+def write_all(sink: BinaryIO, data: bytes) -> None:
+    """
+    Записывает блок целиком: небуферизованный поток (`FileIO`) может записать только часть блока.
+
+    :param sink: Поток для записи.
+    :param data: Блок данных.
+    :raises OSError: Если поток не принял ни одного байта.
+    """
+    view = memoryview(data)
+    while view:
+        written = sink.write(view)
+        if not written:
+            raise OSError(f'short write: {len(view)} byte(s) were not written')
+        view = view[written:]
+
+
+def stream_archive(
+        archive_path: str, sink: Optional[BinaryIO] = None, seven_zip_path: Optional[str] = None,
+        buffer_size: int = 4 * 1024 ** 2, hash_type: str = 'sha256',
+        on_chunk: Optional[Callable[[int], None]] = None) -> Tuple[str, int]:
+    """
+    Распаковывает резервную копию потоком, одновременно вычисляя хэш распакованных данных.
+
+    :param archive_path: Путь к архиву или к копии без архива.
+    :param sink: Поток для записи распакованных данных; None - только вычислить хэш (проверка целостности).
+    :param seven_zip_path: Путь к исполняемому файлу 7z.
+    :param buffer_size: Размер буфера чтения (байт).
+    :param hash_type: Алгоритм хэширования.
+    :param on_chunk: Функция, вызываемая с размером каждого обработанного блока.
+    :return: Кортеж (хэш в шестнадцатеричном виде, размер распакованных данных в байтах).
+    """
+    hasher = hashlib_new(hash_type)
+    total = 0
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    with open_archive_stream(archive_path, seven_zip_path) as stream:
+        read_into = getattr(stream, 'readinto', None)
+        while True:
+            if read_into is not None:
+                size = read_into(buffer)
+                chunk = view[:size]
+            else:
+                chunk = stream.read(buffer_size)
+                size = len(chunk)
+            if not size:
+                break
+            hasher.update(chunk)
+            if sink is not None:
+                write_all(sink, chunk)
+            total += size
+            if on_chunk is not None:
+                on_chunk(size)
+    return hasher.hexdigest(), total
@@ -8,35 +8,49 @@
 # __status__ = 'Production'  # 'Production / Development'
 # __version__ = '1.0.6.0'
 
-from asyncio import subprocess, create_subprocess_exec, Event as aio_Event
+from asyncio import subprocess, create_subprocess_exec, Event as aio_Event, Semaphore, gather, to_thread
+from asyncio import create_task, sleep
+from collections import deque
+from contextlib import nullcontext
+from functools import partial
+from time import monotonic
 from os import makedirs as os_makedirs, path as os_path, walk as os_walk, remove as os_remove
-from os import stat as os_stat, utime as os_utime
-from re import search as re_search, sub as re_sub
+from os import stat as os_stat, utime as os_utime, replace as os_replace, listdir as os_listdir
+from re import search as re_search, sub as re_sub, compile as re_compile
 from hashlib import sha256
-from zipfile import ZipFile, ZIP_DEFLATED
 from shutil import disk_usage as shutil_disk_usage
 from aiofiles import open as aio_open
 from datetime import datetime
 from typing import Tuple, Optional, List, Dict, Any
 
 from config import Config
-from logger import logging, setup_logger
+from logging import DEBUG
+from logger import logging
+from report import RunReport
+from scheduler import CopyScheduler, InUseRetryQueue, ScheduleState, DowntimeBudgetExceeded, find_last_backup_time
+from planner import select_backups_to_delete, preallocate_file
+from journal import JobJournal
+from archive_stream import get_member_name, read_recorded_hash, stream_archive
+from verify import VerifyState, order_for_verification
+from catalog import BackupCatalog
+from metrics import Metrics, get_metrics, current_span, timed
+from governor import ResourceGovernor, create_governor
+from bulkio import resolve_io_mode, open_bulk, aio_open_bulk, drop_file_cache
+from sparse import SparseMap, SparseReader, AsyncSparseReader, AsyncSparseWriter, has_holes
+from netio import NetworkIO, create_network_io
+from durability import Durability, create_durability
+from replication import MANIFEST_NAME, ReplicationTarget, ArchiveStream, ArchiveTee
+from storage import open_storage
+from stats import RunStats, build_run_record
+from progress import ProgressPublisher, create_publisher
+from messages import get_messages
 
 
-setup_logger()
 logging = logging.getLogger(__name__)
 
 
 # TODO: Проверить в чем проблема если в пути до файла базы данных присутствуют пробелы (или в имени БД).
 
-# TODO: Проверить использование self._files_dir и self._files_backup_dir, особенно с учетом присвоения
-#  self._files_dir = self._files_backup_dir в self.perform_copy_files()
-
-# TODO: Проверить и исправить возможность вызова self.perform_file_archiving() без предварительного вызова
-#  self.perform_copy_files() что приводит к архивированию файлов в директории self._files_dir и удалению файлов,
-#  нужна проверка что мы не в self._files_dir, либо что более правильно, использование именно self._files_backup_dir,
-#  а не self._files_dir в методах архивации.
-
 
 class BackupManager:
     """
@@ -47,6 +61,9 @@ class BackupManager:
     :ivar _files_backup_dir (str): Директория для хранения резервных копий.
     :ivar _files_extensions (List[str]): Список расширений файлов для резервного копирования.
     :ivar _files_in_use_extensions (List[str]): Список расширений файлов, которые используются в данный момент.
+    :ivar _files_in_use_retry_seconds (float): Первый интервал повторной проверки занятой БД (сек).
+    :ivar _files_in_use_retry_max_seconds (float): Максимальный интервал повторной проверки занятой БД (сек).
+    :ivar _files_in_use_wait_seconds (float): Максимальное ожидание освобождения одной БД (сек).
     :ivar _files_ignore_backup_files (bool): Игнорировать файлы резервных копий (с датами в имени).
     :ivar _files_min_required_space_gb (float): Минимально необходимое свободное место на диске в Гб.
     :ivar _files_archive_format (str): Формат архивирования (например, zip, 7z).
@@ -57,16 +74,50 @@ class BackupManager:
     :ivar _file_times (Dict[str, Dict[str, Optional[datetime]]]): Словарь с метаданными файлов.
     :ivar _metadata_date_format (str): Формат даты метаданных файла.
     :ivar _language (str): Язык логов ("en", "ru" и т.д.).
+    :ivar _files_max_downtime_seconds (int): Максимальное окно простоя сервера (сек); 0 - без ограничения.
+    :ivar _files_default_throughput_mbps (float): Скорость копирования для прогноза, пока нет истории (МБ/с).
+    :ivar _copy_chunk_size (int): Размер блока при копировании файла (байт).
+    :ivar _files_io_mode (str): Режим ввода-вывода при копировании, хэшировании и архивации (см. `bulkio.py`).
+    :ivar _files_preallocate (bool): Резервировать место под копии до остановки сервера.
+    :ivar _copy_plan (Dict[str, Dict[str, Any]]): Подготовленные до остановки сервера файлы копий по пути к БД.
+    :ivar _created_directories (set): Каталоги резервных копий, уже созданные в этом запуске.
+    :ivar _journal (Optional[JobJournal]): Журнал заданий текущего запуска.
+    :ivar _journal_block_size (int): Шаг записи прогресса копирования в журнал (байт).
+    :ivar _files_restore_parallel (int): Количество БД, восстанавливаемых одновременно.
+    :ivar _restore_buffer_size (int): Размер буфера распаковки при восстановлении (байт).
+    :ivar _files_verify_time_budget_seconds (int): Бюджет времени проверки целостности за запуск (сек).
+    :ivar _files_verify_io_budget_gb (float): Бюджет объема чтения при проверке целостности за запуск (Гб).
+    :ivar _files_verify_workers (int): Количество рабочих потоков проверки целостности.
+    :ivar _seven_zip_available (Optional[bool]): Результат проверки 7z (None - еще не проверялся).
+    :ivar _governor (ResourceGovernor): Ограничитель ресурсов фоновых фаз (архивация и проверка архивов).
+    :ivar _governor_chunk_size (int): Размер блока чтения при ограничении скорости (байт).
+    :ivar _network (NetworkIO): Ввод-вывод с каталогом резервных копий на сетевом ресурсе (см. `netio.py`).
+    :ivar _durability (Durability): Сброс записанных копий, хэш-файлов и архивов на диск (см. `durability.py`).
+    :ivar _pending_deletes (List[str]): Заархивированные копии, удаляемые после пакетного сброса архивов на диск.
+    :ivar _replication_targets (List[str]): Цели репликации архивов: каталоги и бакеты `s3://` (см. `replication.py`).
+    :ivar _replication_parallel (int): Количество одновременных передач при репликации.
+    :ivar _replication_bandwidth_mbps (float): Скорость передачи на каждую цель репликации (МБ/с); 0 - без ограничения.
+    :ivar _replication_stream_archives (bool): Передавать zip-архивы на цели репликации во время сжатия.
+    :ivar _stream_targets (Optional[List[ReplicationTarget]]): Цели, на которые передаются архивы во время сжатия
+                                                              (открываются при первой архивации).
+    :ivar report (Optional[RunReport]): Отчет о запуске.
+    :ivar instance (Optional[str]): Имя экземпляра сервера (см. `orchestrator.py`); None - общий блок `FILES_*`.
     """
     
-    def __init__(self, language: Optional[str] = 'en') -> None:
+    def __init__(
+            self, language: Optional[str] = 'en', report: Optional[RunReport] = None,
+            progress: Optional[ProgressPublisher] = None, instance: Optional[str] = None) -> None:
         """Инициализирует экземпляр BackupManager с настройками и конфигурацией."""
-        self.env: Dict[str, Any] = Config().get_config('files')
+        self.instance: Optional[str] = instance
+        self.env: Dict[str, Any] = Config().get_config('files', instance=instance)
 
         self._files_dir: str = self.env.get('files_dir')
         self._files_backup_dir: str = self.env.get('files_backup_dir')
         self._files_extensions: List[str] = self.env.get('files_extensions')
         self._files_in_use_extensions: List[str] = self.env.get('files_in_use_extensions')
+        self._files_in_use_retry_seconds: float = self.env.get('files_in_use_retry_seconds', 2.0)
+        self._files_in_use_retry_max_seconds: float = self.env.get('files_in_use_retry_max_seconds', 30.0)
+        self._files_in_use_wait_seconds: float = self.env.get('files_in_use_wait_seconds', 600.0)
         self._files_ignore_backup_files: bool = self.env.get('files_ignore_backup_files', False)
         self._files_min_required_space_gb: float = self.env.get('files_min_required_space_gb')
         self._files_archive_format: str = self.env.get('files_archive_format')
@@ -77,6 +128,47 @@ class BackupManager:
         self._file_times: Dict[str, Dict[str, Optional[datetime]]] = dict()
         self._metadata_date_format: str = '%Y-%m-%d %H:%M:%S'
         self._language: str = language if isinstance(language, str) else 'en'
+        self._messages: Dict[str, str] = get_messages(self._language)
+        files_io_mode = self.env.get('files_io_mode', 'buffered')
+        self._files_io_mode: str = resolve_io_mode(files_io_mode)
+        if self._files_io_mode != files_io_mode:
+            logging.warning(self._messages['io_mode_unsupported'], {
+                'io_mode': files_io_mode, 'fallback': self._files_io_mode})
+        self._files_max_downtime_seconds: int = self.env.get('files_max_downtime_seconds', 0)
+        self._files_default_throughput_mbps: float = self.env.get('files_default_throughput_mbps', 50.0)
+        self._copy_pattern: str = r'\s*[-—]\s*копия'
+        self._backup_timestamp_pattern = re_compile(r'_(\d{4}\.\d{2}\.\d{2}_\d{2}\.\d{2})')
+        self._copy_chunk_size: int = 8 * 1024 ** 2
+        self._schedule_state: Optional[ScheduleState] = None
+        self._files_preallocate: bool = self.env.get('files_preallocate', True)
+        self._copy_plan: Dict[str, Dict[str, Any]] = dict()
+        self._journal: Optional[JobJournal] = None
+        self._journal_block_size: int = 64 * 1024 ** 2
+        self._pending_hashes: Dict[str, Tuple[str, str]] = dict()
+        self._files_restore_parallel: int = self.env.get('files_restore_parallel', 2)
+        self._restore_buffer_size: int = 4 * 1024 ** 2
+        self._files_verify_time_budget_seconds: int = self.env.get('files_verify_time_budget_seconds', 0)
+        self._files_verify_io_budget_gb: float = self.env.get('files_verify_io_budget_gb', 0.0)
+        self._files_verify_workers: int = self.env.get('files_verify_workers', 2)
+        self._created_directories: set = set()
+        self._catalog: Optional[BackupCatalog] = None
+        self._run_stats: Optional[RunStats] = None
+        self._seven_zip_available: Optional[bool] = None
+        self._files_stats_window: int = self.env.get('files_stats_window', 30)
+        self._files_stats_min_runs: int = self.env.get('files_stats_min_runs', 5)
+        self._governor: ResourceGovernor = create_governor(instance)
+        self._governor_chunk_size: int = 1024 ** 2
+        self._network: NetworkIO = create_network_io(instance)
+        self._durability: Durability = create_durability(instance)
+        self._pending_deletes: List[str] = []
+        replication_env = Config().get_config('replication', instance=instance)
+        self._replication_targets: List[str] = replication_env.get('replication_targets', [])
+        self._replication_parallel: int = max(replication_env.get('replication_parallel', 2), 1)
+        self._replication_bandwidth_mbps: float = replication_env.get('replication_bandwidth_mbps', 0.0)
+        self._replication_stream_archives: bool = replication_env.get('replication_stream_archives', True)
+        self._stream_targets: Optional[List[ReplicationTarget]] = None
+        self.report: Optional[RunReport] = report
+        self.progress: ProgressPublisher = progress if progress is not None else create_publisher(instance)
         self.copy_finished_event: aio_Event = aio_Event()
     
     # async def get_file_times(self, backup_file_path: str) -> Optional[float]:
@@ -113,13 +205,58 @@ class BackupManager:
     #         logging.error(log_message.get(self._language, 'en').format(backup_file_path=backup_file_path, error=e))
     #         return None
     
-    async def run_backup(self) -> None:
+    @property
+    def max_downtime_seconds(self) -> int:
+        """Максимальное окно простоя сервера (сек); 0 - без ограничения."""
+        return self._files_max_downtime_seconds
+
+    async def run_backup(self, deadline: Optional[float] = None) -> None:
+        """
+        Выполняет копирование и последующую архивацию файлов.
+
+        Стадии обработки файлов записываются в журнал заданий `<FILES_BACKUP_DIR>/.journal.jsonl`. Если предыдущий
+        запуск был прерван, завершенные копии, хэши и архивы пропускаются, а прерванное копирование продолжается
+        с последнего завершенного блока.
+
+        :param deadline: Момент (по `time.monotonic()`), к которому копирование должно быть завершено.
+        """
         # Перед началом копирования сбрасываем событие
         self.copy_finished_event.clear()
-        await self.perform_copy_files()
-        # После завершения копирования устанавливаем событие
-        self.copy_finished_event.set()
-        await self.perform_file_archiving()
+        self._journal = JobJournal(os_path.join(self._files_backup_dir, '.journal.jsonl'))
+        completed = False
+        copy_sync = None
+        try:
+            try:
+                os_makedirs(self._files_backup_dir, exist_ok=True)
+                if self._journal.open():
+                    logging.warning(self._messages['run_resume_journal'], {'journal_path': self._journal.journal_path})
+                if self.report is not None:
+                    self.report.set('resumed', self._journal.resumed)
+                    # Режим записывается и без сброса на диск: запуск с 'none' отличим от запуска до его появления
+                    self.report.set('durability', {'mode': self._durability.mode})
+                await self.perform_copy_files(deadline=deadline)
+            finally:
+                # После завершения копирования устанавливаем событие (в том числе при ошибке, чтобы сервер был запущен)
+                self.copy_finished_event.set()
+            # Копии сбрасываются на диск после запуска сервера, параллельно с архивацией
+            copy_sync = create_task(self._sync_durable('copy', self._durability.take()))
+            await self.perform_file_archiving()
+            completed = True
+        finally:
+            await self._flush_file_times()
+            if copy_sync is not None:
+                await copy_sync
+            # Журнал удаляется только после сброса на диск всего, что в нем отмечено завершенным
+            await self._sync_durable('archive')
+            self._journal.close(completed=completed)
+            self._journal = None
+            self._compact_catalog()
+        if self._files_verify_time_budget_seconds or self._files_verify_io_budget_gb:
+            # Проверяем очередную порцию архивов (сервер уже запущен)
+            await self.perform_integrity_check()
+        if self._replication_targets:
+            await self.perform_replication()
+        self._record_governor()
     
     async def wait_for_copy_completion(self) -> None:
         await self.copy_finished_event.wait()
@@ -140,32 +277,17 @@ class BackupManager:
             }
             self._file_times[file_path.upper()] = file_info
             
-            log_message = {
-                'en': 'Metadata from the file "{file_path}". '
-                      'Time of the last modification: {mod_time}; Last access time: {acc_time}.',
-                'ru': 'Получены метаданные из файла "{file_path}". '
-                      'Время последней модификации: {mod_time}; Время последнего доступа: {acc_time}.',
-            }
-            logging.debug(
-                log_message.get(self._language, 'en').format(
-                    file_path=file_path,
-                    mod_time=file_info['modification_time'].strftime(self._metadata_date_format),
-                    # cre_time=file_info['creation_time'].strftime(self._metadata_date_format),
-                    acc_time=file_info['access_time'].strftime(self._metadata_date_format),
-                )
-            )
+            # Форматирование дат выполняется, только если запись DEBUG будет выведена
+            if logging.isEnabledFor(DEBUG):
+                logging.debug(self._messages['file_times_read'], {
+                    'file_path': file_path,
+                    'mod_time': file_info['modification_time'].strftime(self._metadata_date_format),
+                    # 'cre_time': file_info['creation_time'].strftime(self._metadata_date_format),
+                    'acc_time': file_info['access_time'].strftime(self._metadata_date_format)})
         except FileNotFoundError:
-            log_message = {
-                'en': 'File not found:"{file_path}". No data was added to "_file_times".',
-                'ru': 'Файл не найден: "{file_path}". В переменную "_file_times" ничего не добавлено.',
-            }
-            logging.warning(log_message.get(self._language, 'en').format(file_path=file_path))
+            logging.warning(self._messages['file_times_not_found'], {'file_path': file_path})
         except Exception as e:
-            log_message = {
-                'en': 'Error getting file times of "{file_path}": {error}',
-                'ru': 'Ошибка при получении временных меток файла "{file_path}": {error}',
-            }
-            logging.error(log_message.get(self._language, 'en').format(file_path=file_path, error=e))
+            logging.error(self._messages['file_times_error'], {'file_path': file_path, 'error': e})
 
     async def set_file_times(self, original_path: str, target_path: str, params: Optional[List[str]] = None) -> None:
         """
@@ -178,17 +300,20 @@ class BackupManager:
 
         """
         if original_path.upper() not in self._file_times:
-            log_message = {
-                'en': 'No time data available for source file: {file_path}.',
-                'ru': 'Нет данных о времени исходного файла: {file_path}.',
-            }
-            logging.error(log_message.get(self._language, 'en').format(file_path=original_path))
+            logging.error(self._messages['file_times_missing'], {'file_path': original_path})
             await self.get_file_times(original_path)
 
         source_file_times = self._file_times[original_path.upper()]
         if params is None:
             params = ['modification_time', 'access_time']
 
+        if self._network.is_remote(target_path) and set(params) >= {'modification_time', 'access_time'}:
+            # Сетевой ресурс: даты задаются пакетом в конце фазы (`_flush_file_times`), текущие даты копии не нужны
+            self._network.defer_utime(target_path, (
+                source_file_times['access_time'].timestamp(), source_file_times['modification_time'].timestamp()))
+            self._file_times[target_path.upper()] = dict(source_file_times)
+            return
+
         try:
             # Получаем текущие метки времени целевого файла
             await self.get_file_times(target_path)
@@ -209,93 +334,635 @@ class BackupManager:
                 'access_time': source_file_times.get('access_time', datetime.fromtimestamp(target_atime)),
             }
         except Exception as e:
-            log_message = {
-                'en': 'Error setting file times for "{target_path}": "{error}".',
-                'ru': 'Ошибка установки времени файла для "{target_path}": "{error}".',
-            }
-            logging.error(log_message.get(self._language, 'en').format(target_path=target_path, error=e))
+            logging.error(self._messages['file_times_set_error'], {'target_path': target_path, 'error': e})
+
+    @timed('copy')
+    async def perform_copy_files(self, deadline: Optional[float] = None) -> None:
+        """
+        Копирует файлы БД в директорию резервных копий в пределах окна простоя.
+
+        Сначала собираются кандидаты на копирование, затем планировщик выбирает БД, которые укладываются в
+        оставшееся время (по прогнозу скорости копирования), в порядке давности их последней копии. Остальные
+        БД откладываются до следующего окна. Если копирование файла не укладывается в срок, оно прерывается,
+        незавершенная копия удаляется, а БД откладывается. БД, занятые клиентами, ставятся в очередь повторных
+        проверок (`InUseRetryQueue`) и копируются сразу после освобождения, пока копируются остальные файлы; не
+        освободившиеся в пределах ожидания и окна откладываются (время ожидания записывается в отчет). Без окна
+        простоя (`deadline` равен None) занятые БД не ожидаются и откладываются сразу.
+
+        :param deadline: Момент (по `time.monotonic()`), к которому копирование должно быть завершено;
+                         None - без ограничения.
+        """
+        os_makedirs(self._files_backup_dir, exist_ok=True)
+        state = self._get_schedule_state()
+        # До накопления замеров по файлам скорость берется из статистики запусков, затем из настроек
+        history_throughput = self._get_run_stats().throughput('copy')
+        scheduler = CopyScheduler(
+            state, default_throughput_mbps=(
+                history_throughput / 1024 ** 2 if history_throughput else self._files_default_throughput_mbps))
+
+        candidates = await self._collect_copy_candidates()
+        await self._fill_last_backup_times(candidates)
+        budget_seconds = None if deadline is None else max(deadline - monotonic(), 0.0)
+        selected, deferred = scheduler.plan(candidates, budget_seconds)
+        planned_throughput = scheduler.throughput()
+
+        logging.warning(self._messages['copy_plan'], {
+            'budget': '-' if budget_seconds is None else f'{budget_seconds:.0f}',
+            'throughput': planned_throughput / 1024 ** 2, 'selected': len(selected), 'deferred': len(deferred)})
+
+        self.progress.start_phase(
+            'copy', total_bytes=sum(candidate['size'] for candidate in selected), total_files=len(selected))
+        await self._create_backup_directories(selected)
+        # Ожидание занятых БД продлевает простой сервера: без окна простоя они откладываются сразу
+        queue = InUseRetryQueue(
+            self._files_in_use_retry_seconds, self._files_in_use_retry_max_seconds,
+            self._files_in_use_wait_seconds if deadline is not None else 0.0, deadline)
+        pending = deque(selected)
+        while pending or queue:
+            if pending:
+                candidate = pending.popleft()
+                if candidate.get('in_use'):
+                    # Клиент еще не закрыл БД: повторяем проверку, пока копируются остальные файлы
+                    queue.add(candidate, monotonic())
+                else:
+                    await self._copy_candidate(candidate, state, deadline)
+            elif queue.next_check() > monotonic():
+                await sleep(queue.next_check() - monotonic())
+            for entry in queue.due(monotonic()):
+                candidate, now = entry['candidate'], monotonic()
+                if not await self._check_file_in_use(candidate['file_path']):
+                    # БД освободилась: копируем следующей
+                    self._record_in_use_wait(candidate, queue.remove(entry, now), entry['checks'], released=True)
+                    await self._refresh_candidate(candidate, scheduler)
+                    pending.appendleft(candidate)
+                elif queue.expired(entry, now):
+                    self._record_in_use_wait(candidate, queue.remove(entry, now), entry['checks'], released=False)
+                    await self._defer_copy(candidate, state, reason='in_use')
+                    self.progress.skip(candidate['size'], files=1)
+                else:
+                    queue.retry_later(entry, now)
+
+        await self._flush_file_times()
+        self.progress.finish_phase()
+
+        for candidate in deferred:
+            await self._defer_copy(candidate, state, reason='plan')
+        await self._discard_copy_plan()
+
+        try:
+            state.save()
+        except OSError as e:
+            logging.error(self._messages['copy_state_save_error'], {'state_path': state.state_path, 'error': e})
+
+        if self.report is not None:
+            self.report.set('copy_plan', {
+                'budget_seconds': None if budget_seconds is None else round(budget_seconds, 3),
+                'throughput_mbps': round(planned_throughput / 1024 ** 2, 3),
+                'candidates': [
+                    {key: candidate.get(key) for key in (
+                        'clean_name', 'size', 'predicted_seconds', 'last_backup', 'decision', 'blocked_seconds')}
+                    for candidate in candidates],
+            })
+
+        logging.warning(self._messages['copy_completed'])
+
+    async def _copy_candidate(self, candidate: Dict[str, Any], state: ScheduleState, deadline: Optional[float]) -> None:
+        """
+        Копирует файл БД, выбранный планировщиком (или откладывает его, если копирование не укладывается в окно).
+
+        :param candidate: Кандидат на копирование.
+        :param state: Состояние планировщика.
+        :param deadline: Момент (по `time.monotonic()`), к которому копирование должно быть завершено;
+                         None - без ограничения.
+        """
+        file_path = candidate['file_path']
+        clean_file_name = candidate['clean_name']
+
+        if deadline is not None and monotonic() + candidate['predicted_seconds'] > deadline:
+            # Фактическая скорость ниже прогнозной: файл уже не укладывается в оставшееся окно
+            await self._defer_copy(candidate, state, reason='budget')
+            self.progress.skip(candidate['size'], files=1)
+            return
+
+        _, file_extension = os_path.splitext(file_path)
+        backup_file_name = f'{clean_file_name}_{candidate["modified_date"]}{file_extension}'
+
+        backup_directory = await self._prepare_backup_directory(unique_name=clean_file_name, file_path=file_path)
+        backup_file_path = os_path.join(backup_directory, backup_file_name)
+
+        # Продолжение прерванного запуска: пропускаем завершенные копии и докопируем прерванные
+        resume_offset = 0
+        copy_state = None if self._journal is None else self._journal.get_copy(
+            file_path, candidate['size'], candidate['mtime'])
+        if copy_state is not None and copy_state['dst'] == backup_file_path:
+            if copy_state['done'] and os_path.exists(backup_file_path):
+                logging.warning(self._messages['copy_already_done'], {
+                    'file_path': file_path, 'backup_path': backup_file_path})
+                self._take_preallocated_file(file_path)
+                state.mark_backed_up(clean_file_name)
+                self.progress.skip(candidate['size'], files=1)
+                return
+            resume_offset = copy_state['offset']
+        # Место под файлы, подготовленные до остановки сервера, уже освобождено и зарезервировано
+        preallocated_path = self._take_preallocated_file(file_path)
+        if preallocated_path is None and not resume_offset:
+            await self._ensure_sufficient_space(backup_directory, file_path)
+
+        # Копируем файл БД
+        logging.warning(self._messages['copy_file'], {'file_path': file_path, 'backup_path': backup_file_path})
+
+        copy_started = monotonic()
+        try:
+            # Копируем файл в папку с архивами
+            _ = await self._copy_file(
+                file_path=file_path, backup_file_path=backup_file_path, deadline=deadline,
+                preallocated_path=preallocated_path, resume_offset=resume_offset)
+        except DowntimeBudgetExceeded:
+            await self._defer_copy(candidate, state, reason='timeout')
+            return
+        copy_seconds = monotonic() - copy_started
+
+        state.add_sample(candidate['size'], copy_seconds)
+        state.mark_backed_up(clean_file_name)
+        get_metrics().add('files_copied')
+        if self.report is not None:
+            self.report.append('copied', {
+                'db': clean_file_name, 'file': file_path, 'size': candidate['size'],
+                'predicted_seconds': candidate['predicted_seconds'], 'seconds': round(copy_seconds, 3)})
+
+        if clean_file_name != candidate['filename_without_ext']:
+            logging.warning(self._messages['copy_name_changed'], {
+                'file_name': clean_file_name, 'file_path': file_path})
+            await self._delete_file(file_path)
+
+    def _record_in_use_wait(
+            self, candidate: Dict[str, Any], blocked_seconds: float, checks: int, released: bool) -> None:
+        """
+        Записывает в журнал, метрики и отчет ожидание освобождения занятой БД.
+
+        :param candidate: Кандидат на копирование.
+        :param blocked_seconds: Время, в течение которого БД была занята (сек).
+        :param checks: Количество проверок, при которых БД была занята.
+        :param released: БД освободилась (иначе ожидание прекращено).
+        """
+        candidate['in_use'] = False
+        candidate['blocked_seconds'] = round(blocked_seconds, 3)
+        get_metrics().add('in_use_blocked_seconds', blocked_seconds, outcome='released' if released else 'deferred')
+        logging.warning(self._messages['file_in_use_released' if released else 'file_in_use_timeout'], {
+            'file_path': candidate['file_path'], 'seconds': blocked_seconds, 'checks': checks})
+        if self.report is not None:
+            self.report.append('in_use', {
+                'db': candidate['clean_name'], 'file': candidate['file_path'],
+                'blocked_seconds': candidate['blocked_seconds'], 'checks': checks, 'released': released})
+
+    async def _refresh_candidate(self, candidate: Dict[str, Any], scheduler: CopyScheduler) -> None:
+        """
+        Обновляет размер, дату изменения и прогноз времени копирования освободившейся БД (клиент мог изменить ее
+        перед закрытием).
+
+        :param candidate: Кандидат на копирование.
+        :param scheduler: Планировщик, по скорости которого пересчитывается прогноз.
+        """
+        file_path = candidate['file_path']
+        previous_size = candidate['size']
+        _, candidate['modified_date'], _ = await self._get_backup_name_and_date(file_path=file_path)
+        candidate['size'] = os_path.getsize(file_path)
+        candidate['mtime'] = self._file_times[file_path.upper()]['modification_time'].timestamp()
+        candidate['predicted_seconds'] = round(scheduler.predict_seconds(candidate['size']), 3)
+        # Объем фазы копирования учитывает новый размер (выросшая БД увеличивает объем)
+        self.progress.skip(previous_size - candidate['size'])
+
+    async def _collect_copy_candidates(self, check_in_use: bool = True) -> List[Dict[str, Any]]:
+        """
+        Собирает список файлов БД, которые требуется скопировать.
 
-    async def perform_copy_files(self) -> None:
-        copy_pattern = r'\s*[-—]\s*копия'
+        Пропускает (при `FILES_IGNORE_BACKUP_FILES`) файлы резервных копий и отмечает используемые в данный момент.
+
+        :param check_in_use: Проверять, используются ли файлы. До остановки сервера используются все БД, поэтому
+                             предварительное планирование вызывает метод с False.
+
+        :return: Список кандидатов с ключами 'file_path', 'filename_without_ext', 'clean_name', 'modified_date',
+                 'size', 'mtime', 'in_use'.
+        """
+        candidates: List[Dict[str, Any]] = []
 
         # Обход всех файлов в указанной директории
         for root, _, files in os_walk(self._files_dir):
             # Фильтруем файлы по расширениям заранее
             filtered_files = [file for file in files if file.endswith(tuple(self._files_extensions))]
-            
+
             for file in filtered_files:
                 file_path = os_path.join(root, file)
-                log_message = {
-                    'en': 'Processing file path: "{file_path}". File: "{file}".',
-                    'ru': 'Обработка пути к файлу: "{file_path}". Файл: "{file}".',
-                }
-                logging.info(log_message.get(self._language, 'en').format(file_path=file_path, file=file))
-                
-                if await self._check_file_in_use(file_path):
-                    log_message = {
-                        'en': 'File "{file_path}" is in use, skipping backup.',
-                        'ru': 'Файл "{file_path}" используется, резервное копирование пропускается.',
-                    }
-                    logging.warning(log_message.get(self._language, 'en').format(file_path=file_path))
-                    continue  # Пропускаем используемые в данный момент файлы
-                
+                logging.info(self._messages['processing_file'], {'file_path': file_path, 'file': file})
+
+                in_use = check_in_use and await self._check_file_in_use(file_path)
+                if in_use:
+                    # Используемые в данный момент файлы копируются после освобождения (см. `perform_copy_files`)
+                    logging.warning(self._messages['file_in_use'], {'file_path': file_path})
+
                 filename_without_ext, file_modified_date, is_original = await self._get_backup_name_and_date(
                     file_path=file_path)
-                log_message = {
-                    'en': 'File is original (not a copy): "{is_original}". '
-                          'Ignore backup files: "{ignore_backup}". File "{file_path}".',
-                    'ru': 'Файл является оригиналом (не копией): "{is_original}". '
-                          'Игнорировать файлы резервных копий: "{ignore_backup}". Файл "{file_path}".',
-                }
-                logging.info(log_message.get(self._language, 'en').format(
-                    is_original=is_original, ignore_backup=self._files_ignore_backup_files, file_path=file_path))
+                logging.info(self._messages['file_is_original'], {
+                    'is_original': is_original, 'ignore_backup': self._files_ignore_backup_files,
+                    'file_path': file_path})
 
                 if not is_original and self._files_ignore_backup_files:
                     # Пропускаем резервные копии файлов БД (файлы с датой в имени)
-                    log_message = {
-                        'en': 'This file "{file_path}" is a backup, skipping backup.',
-                        'ru': 'Этот файл "{file_path}" является резервной копией, резервное копирование пропускается.',
-                    }
-                    logging.warning(log_message.get(self._language, 'en').format(file_path=file_path))
+                    logging.warning(self._messages['file_is_backup'], {'file_path': file_path})
                     continue
-                
-                # Очищаем имя файла от суффикса "копия", при его наличии
-                clean_file_name = re_sub(copy_pattern, '', filename_without_ext)
-                _, file_extension = os_path.splitext(file_path)
-                backup_file_name = f'{clean_file_name}_{file_modified_date}{file_extension}'
-                
-                backup_directory = await self._prepare_backup_directory(unique_name=clean_file_name, file_path=file_path)
-                backup_file_path = os_path.join(backup_directory, backup_file_name)
-                await self._ensure_sufficient_space(backup_directory, file_path)
-                
-                # Копируем файл БД
-                log_message = {
-                    'en': 'Copy file: {file_path} to {backup_path}.',
-                    'ru': 'Копируем файл: {file_path} в {backup_path}.',
-                }
-                logging.warning(log_message.get(self._language, 'en').format(
-                    file_path=file_path, backup_path=backup_file_path))
-                # Копируем файл в папку с архивами
-                _ = await self._copy_file(file_path=file_path, backup_file_path=backup_file_path)
-                
-                if clean_file_name != filename_without_ext:
-                    log_message = {
-                        'en': 'The new file name "{file_path}" is not equal to the old "{file_name}". '
-                              'Deleting file: "{file_path}".',
-                        'ru': 'Новое имя файла "{file_path}" не равно старому "{file_name}". '
-                              'Удаляем файл: "{file_path}".',
-                    }
-                    logging.warning(log_message.get(self._language, 'en').format(
-                        clean_file_name=clean_file_name, file_path=file_path))
-                    await self._delete_file(file_path)
-
-        self._files_dir = self._files_backup_dir
-
-        log_message = {
-            'en': 'Copying is completed.',
-            'ru': 'Копирование завершено.',
+
+                candidates.append({
+                    'file_path': file_path,
+                    'filename_without_ext': filename_without_ext,
+                    # Очищаем имя файла от суффикса "копия", при его наличии
+                    'clean_name': re_sub(self._copy_pattern, '', filename_without_ext),
+                    'modified_date': file_modified_date,
+                    'size': os_path.getsize(file_path),
+                    'mtime': self._file_times[file_path.upper()]['modification_time'].timestamp(),
+                    'in_use': in_use,
+                })
+
+        return candidates
+
+    async def _fill_last_backup_times(self, candidates: List[Dict[str, Any]]) -> None:
+        """
+        Дополняет состояние планировщика временем последней копии для БД, о которых в нем еще нет данных.
+
+        Время определяется один раз по каталогу резервных копий (`BackupCatalog.latest`) и далее берется из
+        состояния. Если каталог недоступен, время определяется по именам файлов в каталоге резервных копий БД.
+
+        :param candidates: Список кандидатов на копирование.
+        """
+        state = self._get_schedule_state()
+        catalog: Optional[BackupCatalog] = None
+        catalog_opened = False
+        for candidate in candidates:
+            db_name = candidate['clean_name']
+            if db_name in state.last_backup:
+                continue
+            if not catalog_opened:
+                catalog_opened = True
+                try:
+                    catalog = self._get_catalog()
+                except (ValueError, OSError) as e:
+                    logging.error(self._messages['catalog_open_error'], {
+                        'backup_dir': self._files_backup_dir, 'error': e})
+            if catalog is not None:
+                latest = catalog.latest(db_name)
+                last_backup = None if latest is None else latest['timestamp']
+            else:
+                last_backup = find_last_backup_time(self._files_backup_dir, db_name, self._backup_timestamp_pattern)
+            if last_backup is not None:
+                state.last_backup[db_name] = last_backup.isoformat(timespec='seconds')
+
+    async def _defer_copy(self, candidate: Dict[str, Any], state: ScheduleState, reason: str) -> None:
+        """
+        Откладывает копирование БД до следующего окна простоя.
+
+        :param candidate: Кандидат на копирование.
+        :param state: Состояние планировщика.
+        :param reason: Причина: 'plan' - не уместилась в план, 'budget' - не уместилась в остаток окна,
+                       'timeout' - копирование прервано по истечении окна, 'in_use' - БД не освободилась клиентами.
+        """
+        state.mark_deferred(candidate['clean_name'])
+        get_metrics().add('files_deferred', reason=reason)
+        candidate['decision'] = 'deferred'
+        candidate['deferred_reason'] = reason
+
+        logging.warning(self._messages['copy_deferred'], {
+            'file_path': candidate['file_path'], 'size_mb': candidate['size'] / 1024 ** 2,
+            'predicted': candidate.get('predicted_seconds'), 'reason': reason,
+            'last_backup': candidate.get('last_backup')})
+
+        if self.report is not None:
+            self.report.append('deferred', {
+                'db': candidate['clean_name'], 'file': candidate['file_path'], 'size': candidate['size'],
+                'predicted_seconds': candidate.get('predicted_seconds'), 'last_backup': candidate.get('last_backup'),
+                'reason': reason, 'deferred_since': state.deferred.get(candidate['clean_name'])})
+
+    @timed('prepare')
+    async def prepare_copy_plan(self) -> Dict[str, Any]:
+        """
+        Готовит копирование до остановки сервера, чтобы окно простоя содержало только перенос данных.
+
+        Перечисляет БД для резервного копирования и суммирует их размеры, одним пакетом удаляет самые старые
+        резервные копии (оставляя самую новую копию каждой БД), если места не хватает, создает каталоги
+        `<db>/<YYYY>/<YYYY.MM>` и резервирует место под файлы копий (`fallocate`). Зарезервированные файлы имеют
+        суффикс `.part` и переименовываются после копирования; неиспользованные удаляются в конце копирования.
+
+        :return: Сводка подготовки (также записывается в отчет о запуске).
+        """
+        started = monotonic()
+        os_makedirs(self._files_backup_dir, exist_ok=True)
+        self._copy_plan.clear()
+
+        candidates = await self._collect_copy_candidates(check_in_use=False)
+        total_bytes = sum(candidate['size'] for candidate in candidates)
+        required_bytes = total_bytes + int(self._files_min_required_space_gb * 1024 ** 3)
+        free_bytes = shutil_disk_usage(self._files_backup_dir).free
+
+        logging.warning(self._messages['preflight'], {
+            'count': len(candidates), 'total_gb': total_bytes / 1024 ** 3, 'required_gb': required_bytes / 1024 ** 3,
+            'free_gb': free_bytes / 1024 ** 3})
+
+        deleted, freed_bytes, free_bytes = await self._free_space(required_bytes, free_bytes)
+
+        await self._create_backup_directories(candidates)
+        preallocated = 0
+        for candidate in candidates:
+            file_path = candidate['file_path']
+            _, file_extension = os_path.splitext(file_path)
+            backup_directory = await self._prepare_backup_directory(
+                unique_name=candidate['clean_name'], file_path=file_path)
+            backup_file_path = os_path.join(
+                backup_directory, f'{candidate["clean_name"]}_{candidate["modified_date"]}{file_extension}')
+            plan_entry = {'backup_file_path': backup_file_path, 'size': candidate['size'], 'preallocated_path': None}
+
+            if self._files_preallocate:
+                preallocated_path = f'{backup_file_path}.part'
+                try:
+                    plan_entry['preallocation'] = preallocate_file(preallocated_path, candidate['size'])
+                    plan_entry['preallocated_path'] = preallocated_path
+                    preallocated += 1
+                except OSError as e:
+                    logging.error(self._messages['preallocate_error'], {'file_path': preallocated_path, 'error': e})
+            self._copy_plan[file_path] = plan_entry
+
+        summary = {
+            'files': len(candidates), 'total_bytes': total_bytes, 'required_bytes': required_bytes,
+            'free_bytes': free_bytes, 'freed_bytes': freed_bytes, 'deleted': deleted, 'preallocated': preallocated,
+            'seconds': round(monotonic() - started, 3),
         }
-        logging.warning(log_message.get(self._language, 'en'))
+        logging.warning(self._messages['preflight_completed'], {
+            'seconds': summary['seconds'], 'deleted': len(deleted), 'freed_gb': freed_bytes / 1024 ** 3,
+            'preallocated': preallocated})
+        if self.report is not None:
+            self.report.set('preflight', summary)
+        return summary
+
+    async def _free_space(self, required_bytes: int, free_bytes: int) -> Tuple[List[str], int, int]:
+        """
+        Одним пакетом удаляет самые старые резервные копии (оставляя самую новую копию каждой БД), пока свободного
+        места меньше `required_bytes`.
+
+        :param required_bytes: Требуемое свободное место (байт).
+        :param free_bytes: Свободное место до удаления (байт).
+        :return: Удаленные копии, освобожденный объем и свободное место после удаления (байт).
+        """
+        deleted: List[str] = []
+        freed_bytes = 0
+        if free_bytes >= required_bytes:
+            return deleted, freed_bytes, free_bytes
+
+        backups = self._get_catalog().list()
+        for backup in select_backups_to_delete(backups, required_bytes - free_bytes):
+            try:
+                await self._delete_file(backup['path'])
+            except Exception:
+                continue
+            deleted.append(backup['path'])
+            freed_bytes += backup['size']
+            get_metrics().add('backups_deleted')
+
+        free_bytes = shutil_disk_usage(self._files_backup_dir).free
+        if free_bytes < required_bytes:
+            logging.error(self._messages['preflight_no_space'], {
+                'free_gb': free_bytes / 1024 ** 3, 'required_gb': required_bytes / 1024 ** 3})
+        return deleted, freed_bytes, free_bytes
+
+    async def perform_retention(self) -> Dict[str, Any]:
+        """
+        Удаляет самые старые резервные копии, пока свободного места меньше `FILES_MIN_REQUIRED_SPACE_GB`.
+
+        Отдельная фаза для режима службы (см. `daemon.py`): при запуске резервного копирования место освобождается
+        в `prepare_copy_plan` с учетом размера копируемых БД.
+
+        :return: Сводка: 'deleted', 'freed_bytes', 'free_bytes', 'required_bytes'.
+        """
+        os_makedirs(self._files_backup_dir, exist_ok=True)
+        required_bytes = int(self._files_min_required_space_gb * 1024 ** 3)
+        deleted, freed_bytes, free_bytes = await self._free_space(
+            required_bytes, shutil_disk_usage(self._files_backup_dir).free)
+        logging.warning(self._messages['retention_completed'], {
+            'deleted': len(deleted), 'freed_gb': freed_bytes / 1024 ** 3, 'free_gb': free_bytes / 1024 ** 3})
+        return {
+            'deleted': deleted, 'freed_bytes': freed_bytes, 'free_bytes': free_bytes, 'required_bytes': required_bytes}
+
+    async def run_phase(self, phase: str) -> Any:
+        """
+        Выполняет отдельную фазу без остановки сервера (режим службы, см. `daemon.py`).
+
+        :param phase: 'archive' - архивация копий, 'retention' - удаление старых копий, 'verify' - проверка
+                      очередной порции архивов, 'replicate' - репликация архивов на цели `REPLICATION_TARGETS`.
+        :return: Результат фазы (сводка для 'retention', 'verify' и 'replicate').
+        :raises ValueError: Если фаза неизвестна.
+        """
+        phases = {
+            'archive': self.perform_file_archiving, 'retention': self.perform_retention,
+            'verify': self.perform_integrity_check, 'replicate': self.perform_replication}
+        if phase not in phases:
+            raise ValueError(f'Unknown phase: "{phase}".')
+        try:
+            return await phases[phase]()
+        finally:
+            await self._flush_file_times()
+            await self._sync_durable(phase)
+            self._compact_catalog()
+            self._record_governor()
+
+    def begin_run(self, report: Optional[RunReport] = None) -> None:
+        """
+        Сбрасывает состояние предыдущего запуска, сохраняя кэши (режим службы, см. `daemon.py`).
+
+        Каталог резервных копий, состояние планировщика, статистика запусков и результат проверки 7z остаются
+        загруженными; план копирования, созданные каталоги, метаданные файлов и отложенные хэши сбрасываются.
+
+        :param report: Отчет о новом запуске.
+        """
+        self._copy_plan.clear()
+        self._created_directories.clear()
+        self._file_times.clear()
+        self._pending_hashes.clear()
+        self._pending_deletes.clear()
+        self.copy_finished_event = aio_Event()
+        self.report = report
+
+    def reuse_caches(self, previous: 'BackupManager') -> None:
+        """
+        Переносит кэши из менеджера, созданного до перечитывания конфигурации, если они остались действительны.
+
+        Каталог, состояние планировщика и статистика переносятся при том же `FILES_BACKUP_DIR`, результат проверки
+        7z - при том же `FILES_7Z_PATH`.
+
+        :param previous: Прежний менеджер резервного копирования.
+        """
+        if previous._files_backup_dir == self._files_backup_dir:
+            self._catalog, previous._catalog = previous._catalog, None
+            self._schedule_state = previous._schedule_state
+            self._run_stats = previous._run_stats
+        else:
+            previous._compact_catalog()
+        if previous._files_7z_path == self._files_7z_path:
+            self._seven_zip_available = previous._seven_zip_available
+        previous._governor.close()
+        previous._network.close()
+
+    async def _sync_durable(self, phase: str, paths: Optional[List[str]] = None) -> None:
+        """
+        Сбрасывает на диск файлы, записанные в режиме `FILES_DURABILITY=batch`, и удаляет копии, архивы которых
+        теперь сброшены.
+
+        :param phase: Фаза, к которой относится сброс (метка метрики).
+        :param paths: Файлы, отобранные заранее (`Durability.take`); None - все несброшенные файлы. Копии удаляются
+                      только во втором случае: тогда в пакет гарантированно попадают их архивы.
+        """
+        deletes = []
+        if paths is None:
+            deletes, self._pending_deletes = self._pending_deletes, []
+        seconds = self._durability.seconds
+        try:
+            await self._durability.flush(paths)
+        except OSError as e:
+            # Копии не удаляем: архивы могут быть не сброшены
+            logging.error(self._messages['durability_sync_error'], {'mode': self._durability.mode, 'error': e})
+            self._pending_deletes[:0] = deletes
+            return
+        if self._durability.seconds > seconds:
+            get_metrics().add('durability_sync_seconds', self._durability.seconds - seconds, phase=phase)
+        for backup_file_path in deletes:
+            await self._delete_file(backup_file_path)
+            self._journal_record('delete_done', file=backup_file_path)
+        if self.report is not None and self._durability.seconds:
+            self.report.set('durability', self._durability.summary())
+
+    def _record_governor(self) -> None:
+        """Записывает сводку ограничителя ресурсов в метрики и отчет о запуске."""
+        if not self._governor.enabled:
+            return
+        summary = self._governor.summary()
+        metrics = get_metrics()
+        metrics.set('governor_rate_mbps', summary['rate_mbps'])
+        metrics.set('governor_backoffs', summary['backoffs'])
+        metrics.set('governor_throttled_seconds', summary['throttled_seconds'])
+        metrics.set('governor_suspended_seconds', summary['suspended_seconds'])
+        if self.report is not None:
+            self.report.set('governor', summary)
+
+    def _take_preallocated_file(self, file_path: str) -> Optional[str]:
+        """
+        Извлекает из плана подготовленный файл копии для БД.
+
+        :param file_path: Путь к файлу БД.
+        :return: Путь к зарезервированному файлу или None, если файл не подготовлен.
+        """
+        plan_entry = self._copy_plan.pop(file_path, None)
+        if plan_entry is None or not plan_entry['preallocated_path']:
+            return None
+        if not os_path.exists(plan_entry['preallocated_path']):
+            return None
+        return plan_entry['preallocated_path']
+
+    async def _discard_copy_plan(self) -> None:
+        """Удаляет зарезервированные файлы, которые не понадобились (отложенные или пропущенные БД)."""
+        for plan_entry in self._copy_plan.values():
+            preallocated_path = plan_entry.get('preallocated_path')
+            if preallocated_path and os_path.exists(preallocated_path):
+                try:
+                    await self._delete_file(preallocated_path)
+                except Exception:
+                    pass
+        self._copy_plan.clear()
+
+    def _journal_record(self, stage: str, **data: Any) -> None:
+        """Записывает стадию в журнал заданий, если запуск ведется с журналом."""
+        if self._journal is not None:
+            self._journal.record(stage, **data)
+
+    def _get_schedule_state(self) -> ScheduleState:
+        """Возвращает состояние планировщика копирования (загружается при первом обращении)."""
+        if self._schedule_state is None:
+            self._schedule_state = ScheduleState(os_path.join(self._files_backup_dir, '.schedule_state.json'))
+        return self._schedule_state
+
+    def _get_catalog(self) -> BackupCatalog:
+        """
+        Возвращает каталог резервных копий; при первом обращении строит его обходом дерева, если индекса нет.
+
+        :return: Открытый каталог резервных копий.
+        """
+        if self._catalog is None:
+            os_makedirs(self._files_backup_dir, exist_ok=True)
+            self._catalog = BackupCatalog(self._files_backup_dir).open()
+            if not self._catalog.exists():
+                count = self._catalog.rebuild(self._backup_timestamp_pattern)
+                logging.info(self._messages['catalog_built'], {'count': count, 'index_path': self._catalog.index_path})
+        return self._catalog
+
+    def _get_run_stats(self) -> RunStats:
+        """Возвращает хранилище статистики запусков `<FILES_BACKUP_DIR>/.run_stats.jsonl`."""
+        if self._run_stats is None:
+            self._run_stats = RunStats(os_path.join(self._files_backup_dir, '.run_stats.jsonl'))
+        return self._run_stats
+
+    def record_run_stats(self, metrics: Metrics) -> List[Dict[str, Any]]:
+        """
+        Сохраняет статистику завершенного запуска и проверяет ее на регрессии производительности.
+
+        Фаза считается регрессией, если она длилась дольше p95 последних `FILES_STATS_WINDOW` запусков с набором
+        данных того же размера (в пределах степени двойки); сравнение начинается после `FILES_STATS_MIN_RUNS`
+        таких запусков.
+
+        :param metrics: Метрики запуска.
+        :return: Список регрессий (также записывается в отчет о запуске и в метрики).
+        """
+        run_stats = self._get_run_stats()
+        record = build_run_record(metrics, self.report)
+        regressions = run_stats.check_regressions(
+            record, window=self._files_stats_window, min_runs=self._files_stats_min_runs)
+        record['regressions'] = [regression['metric'] for regression in regressions]
+        try:
+            run_stats.append(record)
+        except OSError as e:
+            logging.error(self._messages['stats_save_error'], {'stats_path': run_stats.store_path, 'error': e})
+
+        for regression in regressions:
+            logging.error(self._messages['regression'], regression)
+            metrics.set('regression', 1, metric=regression['metric'])
+        if self.report is not None:
+            self.report.set('regressions', regressions)
+        return regressions
+
+    def _catalog_add(self, file_path: str) -> None:
+        """Добавляет резервную копию или архив в каталог резервных копий."""
+        timestamp_match = self._backup_timestamp_pattern.search(os_path.basename(file_path))
+        if not timestamp_match:
+            return
+        try:
+            timestamp = datetime.strptime(timestamp_match.group(1), self._date_format)
+            self._get_catalog().add(
+                file_path, self._get_db_name(file_path), timestamp, os_path.getsize(file_path))
+        except (ValueError, OSError) as e:
+            logging.error(self._messages['catalog_add_error'], {'file_path': file_path, 'error': e})
+
+    def _catalog_remove(self, file_path: str) -> None:
+        """Удаляет резервную копию или архив из каталога резервных копий (прочие файлы пропускаются)."""
+        if file_path.endswith('.part') or not self._backup_timestamp_pattern.search(os_path.basename(file_path)):
+            return
+        relative_path = os_path.relpath(file_path, self._files_backup_dir)
+        if relative_path.startswith(os_path.pardir) or os_path.sep not in relative_path:
+            # Файл вне дерева копий или служебный файл в корне (хэши, состояние)
+            return
+        self._get_catalog().remove(file_path)
+
+    def _compact_catalog(self) -> None:
+        """Сливает изменения текущего запуска с индексом каталога резервных копий."""
+        if self._catalog is None:
+            return
+        try:
+            self._catalog.compact()
+        except OSError as e:
+            # Изменения остаются в журнале каталога и будут слиты в следующем запуске
+            logging.error(self._messages['catalog_compact_error'], {'index_path': self._catalog.index_path, 'error': e})
 
     async def _check_file_in_use(self, db_path: str) -> bool:
         """
@@ -321,11 +988,7 @@ class BackupManager:
         date_pattern = self._date_pattern
         file_name = os_path.basename(file_path)
         
-        log_message = {
-            'en': 'Getting backup name and date for "{file_path}": {date_pattern}',
-            'ru': 'Получение имени и даты резервной копии для "{file_path}": {date_pattern}',
-        }
-        logging.info(log_message.get(self._language, 'en').format(file_path=file_path, date_pattern=date_pattern))
+        logging.info(self._messages['backup_name_date'], {'file_path': file_path, 'date_pattern': date_pattern})
     
         await self.get_file_times(file_path)
 
@@ -338,21 +1001,13 @@ class BackupManager:
             # file_name_without_date = file_name.rsplit('.', 1)[0]
             file_name_without_date, _ = os_path.splitext(file_name)
             is_original = True
-            log_message = {
-                'en': 'Date not found in file name: "{old_file_name}". New file name: "{new_file_name}".',
-                'ru': 'Дата не найдена в имени файла: "{old_file_name}". Новое имя файла: "{new_file_name}".',
-            }
-            logging.info(log_message.get(self._language, 'en').format(
-                old_file_name=file_name, new_file_name=file_name_without_date))
+            logging.info(self._messages['backup_name_no_date'], {
+                'old_file_name': file_name, 'new_file_name': file_name_without_date})
         else:
             file_name_without_date = file_name.split(match.group(0))[0]
             is_original = False
-            log_message = {
-                'en': 'Date found in file name: "{old_file_name}". File name without date: "{new_file_name}"',
-                'ru': 'Дата найдена в имени файла: "{old_file_name}". Имя файла без даты: "{new_file_name}"',
-            }
-            logging.warning(log_message.get(self._language, 'en').format(
-                old_file_name=file_name, new_file_name=file_name_without_date))
+            logging.warning(self._messages['backup_name_with_date'], {
+                'old_file_name': file_name, 'new_file_name': file_name_without_date})
         
         return file_name_without_date, modified_date, is_original
 
@@ -364,23 +1019,62 @@ class BackupManager:
         :param file_path: Путь до файла.
         :return: Путь к директории, в которую будет сохранена резервная копия.
         """
+        backup_path = self._get_backup_path(unique_name, file_path)
+        logging.info(self._messages['directory_created'], {'backup_path': backup_path})
+        if backup_path not in self._created_directories:
+            os_makedirs(backup_path, exist_ok=True)
+            self._created_directories.add(backup_path)
+        
+        return backup_path
+
+    def _get_backup_path(self, unique_name: str, file_path: str) -> str:
+        """
+        Возвращает директорию резервной копии (`<FILES_BACKUP_DIR>/<имя>/<YYYY>/<YYYY.MM>`) по дате изменения файла.
+
+        :param unique_name: Уникальное имя файла.
+        :param file_path: Путь до файла.
+        :return: Путь к директории резервной копии.
+        """
         modification_timestamp = self._file_times.get(file_path.upper(), {}).get('modification_time', None)
 
-        backup_path = os_path.join(
+        return os_path.join(
             self._files_backup_dir,
             unique_name,
             modification_timestamp.strftime('%Y'),
             modification_timestamp.strftime('%Y.%m'),
             # modification_timestamp.strftime('%Y.%m.%d')
         )
-        log_message = {
-            'en': 'Create directory: "{backup_path}".',
-            'ru': 'Создаем каталог: "{backup_path}".',
-        }
-        logging.info(log_message.get(self._language, 'en').format(backup_path=backup_path))
-        os_makedirs(backup_path, exist_ok=True)
-        
-        return backup_path
+
+    async def _create_backup_directories(self, candidates: List[Dict[str, Any]]) -> None:
+        """
+        Создает директории резервных копий кандидатов одним пакетом, если каталог резервных копий - сетевой ресурс
+        (локальные директории создаются по одной в `_prepare_backup_directory`).
+
+        :param candidates: Кандидаты на копирование.
+        """
+        if not self._network.enabled:
+            return
+        directories = {
+            self._get_backup_path(candidate['clean_name'], candidate['file_path']) for candidate in candidates
+        } - self._created_directories
+        await self._network.makedirs(sorted(directories))
+        self._created_directories.update(directories)
+
+    async def _get_file_sizes(self, file_paths: List[str]) -> Dict[str, int]:
+        """
+        Возвращает размеры файлов (на сетевом ресурсе - одним пакетом).
+
+        :param file_paths: Пути к файлам.
+        :return: Размеры: {путь: байт}.
+        """
+        if self._network.enabled:
+            return dict(zip(file_paths, await self._network.getsizes(file_paths)))
+        return {file_path: os_path.getsize(file_path) for file_path in file_paths}
+
+    async def _flush_file_times(self) -> None:
+        """Устанавливает даты файлов, отложенные на сетевом ресурсе (см. `set_file_times`)."""
+        for target_path, error in await self._network.flush_utimes():
+            logging.error(self._messages['file_times_set_error'], {'target_path': target_path, 'error': error})
 
     async def _ensure_sufficient_space(self, backup_path: str, db_path: str) -> None:
         """
@@ -396,36 +1090,109 @@ class BackupManager:
         :raises Exception: В случае ошибки при удалении старых копий.
         """
         while not await self._has_sufficient_space(backup_path, db_path):
-            await self._delete_oldest_backup(db_path)
-
-    async def _copy_file(self, file_path: str, backup_file_path: str) -> str:
+            try:
+                deleted = await self._delete_oldest_backup(db_path)
+            except FileNotFoundError:
+                deleted = False
+            if not deleted:
+                logging.error(self._messages['space_free_failed'], {'file_path': db_path})
+                break
+
+    @timed('copy_file', file_arg='file_path')
+    async def _copy_file(
+            self, file_path: str, backup_file_path: str, deadline: Optional[float] = None,
+            preallocated_path: Optional[str] = None, resume_offset: int = 0) -> str:
         """
         Копирует файл в директорию для бэкапа.
 
-        Метод открывает указанный файл для чтения и копирует его содержимое в директорию резервного копирования.
-        После успешного завершения операции возвращается путь к созданному резервному файлу. В процессе копирования
-        записывается информационное сообщение в лог.
+        Метод копирует содержимое файла блоками по `_copy_chunk_size` байт во временный файл `<копия>.part` и после
+        каждого блока проверяет, не истекло ли окно простоя. Дыры исходного файла не читаются, а участки из нулей
+        не записываются: в копии они остаются дырами (см. `sparse.py`). Прогресс записывается в журнал заданий каждые
+        `_journal_block_size` байт, поэтому прерванное копирование продолжается с последнего записанного блока.
+        В каталог резервных копий на сетевом ресурсе копия записывается блоками `FILES_NETWORK_CHUNK_MB` с
+        несколькими записями в работе (см. `netio.py`). После завершения временный файл атомарно переименовывается,
+        так что под итоговым именем никогда не оказывается недописанная копия.
 
         :param file_path: Путь к исходному файлу, который необходимо скопировать.
         :param backup_file_path: Путь к директории, в которую будет скопирован файл.
+        :param deadline: Момент (по `time.monotonic()`), после которого копирование прерывается.
+        :param preallocated_path: Заранее созданный файл с зарезервированным местом; данные записываются в него,
+                                  после чего он обрезается до размера копии и переименовывается в `backup_file_path`.
+        :param resume_offset: Смещение, с которого продолжается прерванное копирование (в `<копия>.part`).
         :return: Путь к созданному резервному файлу.
+        :raises DowntimeBudgetExceeded: Если копирование не завершено до `deadline` (незавершенная копия удаляется).
         :raises Exception: В случае ошибки при чтении или записи файла.
         """
         # Реализация копирования файла
-        async with aio_open(file_path, 'rb') as src_file:
-            async with aio_open(backup_file_path, 'wb') as dst_file:
-                await dst_file.write(await src_file.read())
+        part_path = f'{backup_file_path}.part'
+        if preallocated_path and preallocated_path != part_path:
+            # Дата модификации БД изменилась после подготовки: переносим зарезервированный файл под новое имя
+            os_replace(preallocated_path, part_path)
+        reuse_part = (preallocated_path is not None or resume_offset > 0) and os_path.exists(part_path)
+        if not reuse_part:
+            resume_offset = 0
+
+        source_stat = os_stat(file_path)
+        self._journal_record(
+            'copy_start', src=file_path, dst=backup_file_path, part=part_path, size=source_stat.st_size,
+            mtime=source_stat.st_mtime, offset=resume_offset)
+        progress = self.progress
+        progress.skip(resume_offset)
+        progress.start_file(file_path, source_stat.st_size - resume_offset)
+        try:
+            io_mode, chunk_size = self._files_io_mode, self._copy_chunk_size
+            dst_mode = 'r+b' if reuse_part else 'wb'
+            if self._network.is_remote(part_path):
+                # Сетевой ресурс: несколько записей в работе одновременно, блоки крупнее (см. `netio.py`)
+                chunk_size = self._network.chunk_size
+                dst_opener = self._network.aio_open(part_path, dst_mode)
+            else:
+                dst_opener = aio_open_bulk(part_path, dst_mode, io_mode, chunk_size)
+            async with aio_open_bulk(file_path, 'rb', io_mode, chunk_size) as src_file:
+                async with dst_opener as dst_file:
+                    if resume_offset:
+                        await dst_file.seek(resume_offset)
+                    reader = AsyncSparseReader(src_file, SparseMap.from_path(file_path), resume_offset)
+                    # В новом файле незаписанные участки читаются как нули
+                    writer = AsyncSparseWriter(dst_file, resume_offset, zeroed=not reuse_part)
+                    copied = journaled = resume_offset
+                    while True:
+                        chunk = await reader.read(chunk_size)
+                        if not chunk:
+                            break
+                        await writer.write(chunk, known_zero=reader.hole)
+                        copied += len(chunk)
+                        progress.advance(file_path, len(chunk))
+                        if self._journal is not None and copied - journaled >= self._journal_block_size:
+                            # Блок считается завершенным только после сброса буфера
+                            await dst_file.flush()
+                            self._journal_record('copy_block', src=file_path, offset=copied)
+                            journaled = copied
+                        if deadline is not None and monotonic() > deadline:
+                            raise DowntimeBudgetExceeded(file_path)
+                    # Отбрасываем зарезервированный хвост, если файл БД стал меньше
+                    await writer.finish()
+            current_span().add_bytes(copied - resume_offset)
+            get_metrics().add('sparse_bytes', writer.zero_bytes, phase='copy')
+        except DowntimeBudgetExceeded:
+            progress.finish_file(file_path, completed=False)
+            await self._delete_file(part_path)
+            raise
+        except Exception:
+            progress.finish_file(file_path, completed=False)
+            raise
+        progress.finish_file(file_path)
+        await self._durability.sync_data(part_path)
+        os_replace(part_path, backup_file_path)
         
         # Установка времени последней модификации для нового файла
         # os_utime(backup_file_path, times=(stat_info.st_atime, mtime))
         await self.set_file_times(file_path, backup_file_path)
+        await self._durability.commit(backup_file_path)
         
-        log_message = {
-            'en': 'File: "{file_path}" copied to "{backup_file_path}".',
-            'ru': 'Файл: "{file_path}" скопирован в "{backup_file_path}".',
-        }
-        logging.info(log_message.get(self._language, 'en').format(
-            file_path=file_path, backup_file_path=backup_file_path))
+        logging.info(self._messages['file_copied'], {'file_path': file_path, 'backup_file_path': backup_file_path})
+        self._journal_record('copy_done', src=file_path, dst=backup_file_path)
+        self._catalog_add(backup_file_path)
         return backup_file_path
 
     async def _delete_file(self, file_path: str) -> None:
@@ -440,17 +1207,10 @@ class BackupManager:
         """
         try:
             os_remove(file_path)
-            log_message = {
-                'en': 'Successfully deleted: "{file_path}".',
-                'ru': 'Успешно удалено: "{file_path}".'
-            }
-            logging.warning(log_message.get(self._language, 'en').format(file_path=file_path))
+            self._catalog_remove(file_path)
+            logging.warning(self._messages['file_deleted'], {'file_path': file_path})
         except Exception as e:
-            log_message = {
-                'en': 'Error deleting backup "{file_path}": {error}.',
-                'ru': 'Ошибка удаления резервной копии "{file_path}": {error}.',
-            }
-            logging.error(log_message.get(self._language, 'en').format(file_path=file_path, error=e))
+            logging.error(self._messages['file_delete_error'], {'file_path': file_path, 'error': e})
             raise
     
     async def _has_sufficient_space(
@@ -477,27 +1237,17 @@ class BackupManager:
         if min_required_space_gb is None:
             min_required_space_gb = self._files_min_required_space_gb
         
-        log_message = {
-            'en': 'Free disk space: {free_space_gb:.2f} GB, Required size: {db_size_gb:.2f} GB, '
-                  'Minimum required space: {min_required_space_gb:.2f} GB.',
-            'ru': 'Свободное место на диске: {free_space_gb:.2f} ГБ, Требуемый размер: {db_size_gb:.2f} ГБ, '
-                  'Минимально необходимое место: {min_required_space_gb:.2f} ГБ.',
-        }
-        logging.info(log_message.get(self._language, 'en').format(
-            free_space_gb=free_space_gb, db_size_gb=db_size_gb, min_required_space_gb=min_required_space_gb))
+        logging.info(self._messages['disk_space'], {
+            'free_space_gb': free_space_gb, 'db_size_gb': db_size_gb, 'min_required_space_gb': min_required_space_gb})
         
         # Проверка, достаточно ли места для резервной копии с учетом минимально необходимого места
         has_sufficient_space = free_space_gb > (db_size_gb + min_required_space_gb)
         
         # Логируем результат проверки
-        log_message = {
-            'en': f'{"Sufficient" if {has_sufficient_space} else "Not enough"} space for backup',
-            'ru': f'{"Достаточно" if {has_sufficient_space} else "Недостаточно"} места для резервной копии',
-        }
         if has_sufficient_space:
-            logging.info(log_message.get(self._language, 'en'))
+            logging.info(self._messages['disk_space_sufficient'])
         else:
-            logging.warning(log_message.get(self._language, 'en'))
+            logging.warning(self._messages['disk_space_insufficient'])
         
         return has_sufficient_space
     
@@ -543,159 +1293,568 @@ class BackupManager:
     #
     #     await self._delete_file(oldest_backup)
     
-    async def _delete_oldest_backup(self, backup_file_path: str, skip_conditions: List[str] = None) -> None:
+    def _get_backup_directory(self, file_path: str) -> str:
+        """
+        Возвращает каталог резервных копий БД (`<FILES_BACKUP_DIR>/<имя БД>`).
+
+        Имя БД определяется по имени файла без расширения, даты копии и суффикса "копия", поэтому метод принимает
+        как путь к исходному файлу БД, так и путь к его резервной копии.
+
+        :param file_path: Путь к файлу БД или к резервной копии.
+        :return: Путь к каталогу резервных копий БД.
+        """
+        return os_path.join(self._files_backup_dir, self._get_db_name(file_path))
+
+    def _get_db_name(self, file_path: str) -> str:
+        """
+        Возвращает имя БД по пути к файлу БД или к его резервной копии.
+
+        :param file_path: Путь к файлу БД или к резервной копии.
+        :return: Имя БД.
+        """
+        file_name = os_path.basename(file_path)
+        match = self._backup_timestamp_pattern.search(file_name)
+        db_name = file_name[:match.start()] if match else os_path.splitext(file_name)[0]
+        return re_sub(self._copy_pattern, '', db_name)
+
+    async def _delete_oldest_backup(self, backup_file_path: str, skip_conditions: List[str] = None) -> bool:
         """
         Удаляет самую старую резервную копию для указанного файла.
 
         Этот метод ищет все резервные копии для заданного файла в директории
         резервных копий, определяет самую старую резервную копию и удаляет её.
         Это необходимо для управления пространством хранения и предотвращения
-        переполнения диска.
+        переполнения диска. Самая новая копия БД никогда не удаляется. Копии БД выбираются по каталогу
+        резервных копий; копии, удаленные в обход каталога, исключаются из него.
 
-        :param backup_file_path: Путь к файлу, для которого нужно удалить резервную копию.
+        :param backup_file_path: Путь к файлу БД (или его копии), для которого нужно удалить резервную копию.
         :param skip_conditions: Список условий для пропуска архивов.
+        :return: True, если копия удалена; False, если удалять нечего (осталась единственная копия).
         :raises FileNotFoundError: Если резервные копии не найдены.
         :raises Exception: В случае ошибки при удалении резервной копии.
         """
         # Получаем директорию резервных копий
-        try:
-            backup_dir = self._get_backup_directory(backup_file_path)
-        except Exception as e:
-            # Временно, пока метод не дописан и self._get_backup_directory метод не реализован
-            logging.error(e)
-            # raise e
-            return
-        
-        # Получаем список всех резервных копий для данного файла
-        backups: List[str] = []
-        for dirpath, _, filenames in os_walk(backup_dir):
-            for filename in filenames:
-                if filename.startswith(os_path.basename(backup_file_path)):
-                    # Проверяем условия для пропуска архива
-                    if skip_conditions and any(condition in filename for condition in skip_conditions):
-                        continue
-                    backups.append(os_path.join(dirpath, filename))
-        
+        backup_dir = self._get_backup_directory(backup_file_path)
+        db_name = os_path.basename(backup_dir)
+
+        # Получаем список всех резервных копий для данного файла с датой копии из имени файла
+        backups: List[Tuple[str, datetime]] = []
+        catalog = self._get_catalog()
+        for backup in catalog.list(db_name):
+            filename = os_path.basename(backup['path'])
+            # Проверяем условия для пропуска архива
+            if skip_conditions and any(condition in filename for condition in skip_conditions):
+                continue
+            if not os_path.exists(backup['path']):
+                # Копия удалена в обход каталога
+                catalog.remove(backup['path'])
+                continue
+            backups.append((backup['path'], backup['timestamp']))
+
         if not backups:
-            log_message = {
-                'en': 'No backups found for "{file_path}".',
-                'ru': 'Резервные копии для "{file_path}" не найдены.',
-            }
-            logging.error(log_message.get(self._language, 'en').format(file_path=backup_file_path))
+            logging.error(self._messages['no_backups_found'], {'file_path': backup_file_path})
             raise FileNotFoundError(f'No backups found for "{backup_file_path}".')
-        
-        # Группируем резервные копии по уникальным именам файлов
-        filename_groups = {}
-        for backup in backups:
-            base_filename = os_path.splitext(os_path.basename(backup))[0]
-        # timestamp_match = re_search(r'_(\d{4}\.\d{2}\.\d{2}_\d{2}\.\d{2})$', base_filename)
-        timestamp_match = re_search(self._date_pattern, base_filename)
-        if timestamp_match:
-            timestamp_str = timestamp_match.group(1)
-            timestamp = datetime.strptime(timestamp_str, self._date_format)
-            if base_filename not in filename_groups:
-                filename_groups[base_filename] = []
-            filename_groups[base_filename].append((backup, timestamp))
-    
-        # Удаляем самые старые резервные копии, оставляя минимум одну
-        for base_filename, backups in filename_groups.items():
-            if len(backups) > 1:
-                oldest_backup = min(backups, key=lambda x: x[1])[0]
-                log_message = {
-                    'en': 'Deleting oldest backup: "{oldest_backup}".',
-                    'ru': 'Удаление самой старой резервной копии: "{oldest_backup}".',
-                }
-                logging.warning(log_message.get(self._language, 'en').format(oldest_backup=oldest_backup))
-                await self._delete_file(oldest_backup)
-            else:
-                logging.info(f'Keeping backup: "{backups[0][0]}" for "{base_filename}".')
-    
-    async def perform_file_restoration(self, backup_file_path: str, restore_path: str) -> None:
+
+        # Удаляем самую старую резервную копию, оставляя минимум одну
+        if len(backups) > 1:
+            oldest_backup = min(backups, key=lambda x: x[1])[0]
+            logging.warning(self._messages['delete_oldest'], {'oldest_backup': oldest_backup})
+            await self._delete_file(oldest_backup)
+            get_metrics().add('backups_deleted')
+            return True
+
+        logging.info(self._messages['keep_backup'], {'backup_path': backups[0][0], 'db_name': db_name})
+        return False
+
+    @timed('restore_file', file_arg='backup_file_path')
+    async def perform_file_restoration(self, backup_file_path: str, restore_path: str) -> Dict[str, Any]:
         """
         Выполняет восстановление файлов из резервной копии.
 
         Этот метод принимает путь к архиву резервной копии и директорию, в которую
-        будут восстановлены файлы. Он проверяет целостность архива и распаковывает
-        файлы в указанную директорию. Если возникает ошибка, она будет обработана
-        и залогирована.
+        будут восстановлены файлы. Архив (zip / 7z) распаковывается потоком во временный файл рядом с целевым
+        с одновременной проверкой хэша, записанного при архивации. После успешной проверки временный файл атомарно
+        заменяет целевой, а время модификации восстанавливается по архиву. Если возникает ошибка, она будет
+        обработана и залогирована, а целевой файл останется нетронутым.
 
         :param backup_file_path: Путь к архиву резервной копии, который необходимо восстановить.
-        :param restore_path: Путь к директории, в которую будут восстановлены файлы.
+        :param restore_path: Путь к директории, в которую будут восстановлены файлы (файл получает исходное имя
+                             БД), или полный путь к восстанавливаемому файлу.
+        :return: Сводка восстановления: 'archive', 'target', 'bytes', 'seconds', 'throughput_mbps', 'verified'.
         :raises Exception: В случае ошибки при восстановлении файлов из резервной копии.
         """
-        # Логика восстановления файлов из архива будет реализована здесь.
-        pass
-    
+        member_name = get_member_name(backup_file_path)
+        if os_path.isdir(restore_path):
+            _, file_extension = os_path.splitext(member_name)
+            target_path = os_path.join(restore_path, f'{self._get_db_name(member_name)}{file_extension}')
+        else:
+            target_path = restore_path
+        tmp_path = f'{target_path}.restore.part'
+        recorded_hash = read_recorded_hash(self._files_backup_dir, backup_file_path)
+
+        logging.warning(self._messages['restore_start'], {'archive_path': backup_file_path, 'target_path': target_path})
+
+        started = monotonic()
+        try:
+            current_hash, restored_bytes = await to_thread(
+                self._restore_to_file, backup_file_path, tmp_path)
+            if recorded_hash is not None and current_hash != recorded_hash:
+                raise Exception(
+                    f'hash mismatch for "{backup_file_path}": expected {recorded_hash}, got {current_hash}')
+            # Хэш вычислен по потоку распаковки: размер файла подтверждает, что записано все
+            written_bytes = os_path.getsize(tmp_path)
+            if written_bytes != restored_bytes:
+                raise Exception(
+                    f'size mismatch for "{tmp_path}": unpacked {restored_bytes} byte(s), written {written_bytes}')
+            os_replace(tmp_path, target_path)
+            current_span().add_bytes(restored_bytes)
+            archive_stat = os_stat(backup_file_path)
+            os_utime(target_path, times=(archive_stat.st_atime, archive_stat.st_mtime))
+        except Exception as e:
+            if os_path.exists(tmp_path):
+                os_remove(tmp_path)
+            logging.error(self._messages['restore_error'], {'archive_path': backup_file_path, 'error': e})
+            raise
+
+        seconds = monotonic() - started
+        summary = {
+            'archive': backup_file_path, 'target': target_path, 'bytes': restored_bytes,
+            'seconds': round(seconds, 3), 'throughput_mbps': round(restored_bytes / 1024 ** 2 / max(seconds, 1e-6), 1),
+            'verified': recorded_hash is not None,
+        }
+        logging.warning(self._messages['restore_done'], {
+            'target_path': target_path, 'size_mb': restored_bytes / 1024 ** 2, 'seconds': seconds,
+            'throughput_mbps': summary['throughput_mbps'], 'verified': summary['verified']})
+        return summary
+
+    def _restore_to_file(self, archive_path: str, tmp_path: str) -> Tuple[str, int]:
+        """
+        Распаковывает архив во временный файл с вычислением хэша (выполняется в отдельном потоке).
+
+        :param archive_path: Путь к архиву.
+        :param tmp_path: Путь к временному файлу.
+        :return: Кортеж (хэш, размер распакованных данных).
+        """
+        with open(tmp_path, 'wb') as sink:
+            return stream_archive(
+                archive_path, sink=sink, seven_zip_path=self._files_7z_path, buffer_size=self._restore_buffer_size)
+
+    async def find_backup_version(self, db_name: str, at: Optional[datetime] = None) -> Optional[str]:
+        """
+        Находит резервную копию БД, актуальную на указанный момент.
+
+        Предпочитаются архивы; копия без архива используется, если архива с той же датой нет. Копия выбирается
+        по каталогу резервных копий (двоичный поиск по индексу) без обхода дерева каталогов.
+
+        :param db_name: Имя БД.
+        :param at: Момент времени; None - самая новая копия.
+        :return: Путь к резервной копии или None, если подходящей копии нет.
+        """
+        catalog = self._get_catalog()
+        while True:
+            best = catalog.latest(db_name, at)
+            if best is None or os_path.exists(best['path']):
+                return None if best is None else best['path']
+            # Копия удалена в обход каталога
+            catalog.remove(best['path'])
+
+    @timed('restore')
+    async def restore_databases(
+            self, db_names: List[str], restore_path: str, at: Optional[datetime] = None,
+            parallel: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Восстанавливает несколько БД параллельно и сообщает суммарную скорость восстановления (для оценки RTO).
+
+        :param db_names: Имена БД.
+        :param restore_path: Каталог, в который восстанавливаются БД.
+        :param at: Момент времени, на который выбираются копии; None - самые новые копии.
+        :param parallel: Количество одновременно восстанавливаемых БД; по умолчанию `FILES_RESTORE_PARALLEL`.
+        :return: Сводка: 'restored' (список сводок по БД), 'failed' (имена БД), 'bytes', 'seconds',
+                 'throughput_mbps'.
+        """
+        semaphore = Semaphore(max(parallel or self._files_restore_parallel, 1))
+        restored: List[Dict[str, Any]] = []
+        failed: List[str] = []
+
+        async def restore_one(db_name: str) -> None:
+            async with semaphore:
+                archive_path = await self.find_backup_version(db_name, at)
+                if archive_path is None:
+                    logging.error(self._messages['no_backups_found'], {'file_path': db_name})
+                    failed.append(db_name)
+                    self.progress.skip(0, files=1)
+                    return
+                # Объем распакованных данных заранее неизвестен: прогресс считается по размеру архивов
+                self.progress.start_file(archive_path, os_path.getsize(archive_path), add_to_total=True)
+                try:
+                    restored.append(await self.perform_file_restoration(archive_path, restore_path))
+                except Exception:
+                    failed.append(db_name)
+                finally:
+                    self.progress.finish_file(archive_path)
+
+        started = monotonic()
+        self.progress.start_phase('restore', total_bytes=0, total_files=len(db_names))
+        await gather(*(restore_one(db_name) for db_name in db_names))
+        self.progress.finish_phase()
+        seconds = monotonic() - started
+        total_bytes = sum(item['bytes'] for item in restored)
+        summary = {
+            'restored': restored, 'failed': failed, 'bytes': total_bytes, 'seconds': round(seconds, 3),
+            'throughput_mbps': round(total_bytes / 1024 ** 2 / max(seconds, 1e-6), 1),
+        }
+        logging.warning(self._messages['restore_completed'], {
+            'restored': len(restored), 'failed': len(failed), 'size_mb': total_bytes / 1024 ** 2, 'seconds': seconds,
+            'throughput_mbps': summary['throughput_mbps']})
+        if self.report is not None:
+            self.report.set('restore', summary)
+        return summary
+
+    @timed('verify_file', file_arg='backup_file_path')
     async def _check_backup_integrity(self, backup_file_path: str) -> bool:
         """
         Проверяет целостность резервной копии.
 
-        Этот метод проверяет, не поврежден ли архив резервной копии, и может
-        использовать различные методы проверки, такие как проверка контрольной суммы
-        или проверка наличия необходимых файлов. Возвращает True, если резервная
+        Этот метод распаковывает архив потоком (без записи на диск), вычисляет SHA-256 распакованных данных
+        и сравнивает его с хэшем, записанным при архивации. Если хэш-файла нет, проверяется только то, что архив
+        полностью распаковывается (zip проверяет CRC, 7z - код возврата). Возвращает True, если резервная
         копия целостна, иначе False.
     
         :param backup_file_path: Путь к архиву резервной копии для проверки.
         :return: True, если резервная копия целостна, иначе False.
         """
-        # Логика проверки целостности архива будет реализована здесь.
-        pass
+        ok, _ = await self._governor.run(self._verify_archive, backup_file_path)
+        current_span().add_bytes(os_path.getsize(backup_file_path))
+        return ok
+
+    def _verify_archive(self, backup_file_path: str) -> Tuple[bool, Optional[str]]:
+        """
+        Проверяет архив (выполняется в рабочем потоке ограничителя ресурсов, чтение распакованных данных
+        ограничивается его скоростью).
 
+        :param backup_file_path: Путь к архиву.
+        :return: Кортеж (архив целостен, описание ошибки).
+        """
+        recorded_hash = read_recorded_hash(self._files_backup_dir, backup_file_path)
+        try:
+            current_hash, _ = stream_archive(
+                backup_file_path, seven_zip_path=self._files_7z_path, buffer_size=self._restore_buffer_size,
+                on_chunk=self._governor.throttle_sync if self._governor.enabled else None)
+        except Exception as e:
+            return False, str(e)
+        if recorded_hash is not None and current_hash != recorded_hash:
+            return False, f'hash mismatch: expected {recorded_hash}, got {current_hash}'
+        return True, None
+
+    @timed('verify')
+    async def perform_integrity_check(
+            self, time_budget_seconds: Optional[float] = None, io_budget_bytes: Optional[int] = None,
+            workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Проверяет очередную порцию архивов в пределах бюджета времени и объема чтения.
+
+        Архивы проверяются пулом рабочих потоков (распаковка и хэширование освобождают GIL). Порядок - сначала
+        архивы, не прошедшие прошлую проверку, затем непроверенные и измененные, затем проверенные раньше всех,
+        поэтому за несколько запусков по кругу проверяются все архивы, а каждый запуск читает только свою порцию.
+        Время последней проверки каждого архива хранится в `<FILES_BACKUP_DIR>/.verify_state.json`.
+
+        :param time_budget_seconds: Бюджет времени (сек); по умолчанию `FILES_VERIFY_TIME_BUDGET_SECONDS`, 0 - без
+                                    ограничения.
+        :param io_budget_bytes: Бюджет объема читаемых архивов (байт); по умолчанию `FILES_VERIFY_IO_BUDGET_GB`,
+                                0 - без ограничения.
+        :param workers: Количество рабочих потоков; по умолчанию `FILES_VERIFY_WORKERS`.
+        :return: Сводка: 'checked', 'corrupted' (список архивов с ошибками, в том числе известных по прошлым
+                 проверкам и не проверенных в этот раз - с ключом 'verified_at'), 'bytes', 'seconds', 'pending'.
+        """
+        if time_budget_seconds is None:
+            time_budget_seconds = self._files_verify_time_budget_seconds
+        if io_budget_bytes is None:
+            io_budget_bytes = int(self._files_verify_io_budget_gb * 1024 ** 3)
+        workers = max(workers or self._files_verify_workers, 1)
+
+        started = monotonic()
+        state = VerifyState(os_path.join(self._files_backup_dir, '.verify_state.json'))
+        archives = [
+            backup for backup in self._get_catalog().list()
+            if backup['format'] and os_path.exists(backup['path'])]
+        state.prune([os_path.relpath(archive['path'], self._files_backup_dir) for archive in archives])
+        ordered = order_for_verification(archives, state, self._files_backup_dir)
+
+        semaphore = Semaphore(workers)
+        checked: List[str] = []
+        corrupted: List[Dict[str, Any]] = []
+        scheduled_bytes = 0
+        # Скорость проверки одним рабочим потоком по статистике запусков
+        verify_throughput = self._get_run_stats().throughput('verify') if time_budget_seconds else None
+
+        async def verify_one(archive: Dict[str, Any]) -> None:
+            self.progress.start_file(archive['path'], archive['size'])
+            try:
+                ok, error = await self._governor.run(self._verify_archive, archive['path'])
+            finally:
+                semaphore.release()
+                self.progress.finish_file(archive['path'])
+            state.mark(archive['key'], archive['size'], archive['mtime'], ok, error)
+            checked.append(archive['path'])
+            if not ok:
+                corrupted.append({'archive': archive['path'], 'error': error})
+                logging.error(self._messages['verify_failed'], {'archive_path': archive['path'], 'error': error})
+
+        tasks = []
+        self.progress.start_phase(
+            'verify', total_bytes=sum(archive['size'] for archive in ordered), total_files=len(ordered))
+        for archive in ordered:
+            # Новый архив ставится в работу только при свободном рабочем потоке, чтобы бюджет времени соблюдался
+            await semaphore.acquire()
+            elapsed = monotonic() - started
+            if (time_budget_seconds and elapsed >= time_budget_seconds) or (
+                    io_budget_bytes and tasks and scheduled_bytes + archive['size'] > io_budget_bytes) or (
+                    # Архив, проверка которого по прогнозу не успеет до конца бюджета, оставляем следующему запуску
+                    verify_throughput and tasks and
+                    elapsed + archive['size'] / verify_throughput > time_budget_seconds):
+                semaphore.release()
+                break
+            scheduled_bytes += archive['size']
+            tasks.append(create_task(verify_one(archive)))
+        # Архивы, оставленные следующим запускам, исключаются из объема фазы
+        self.progress.skip(
+            sum(archive['size'] for archive in ordered) - scheduled_bytes, files=len(ordered) - len(tasks))
+        await gather(*tasks)
+        self.progress.finish_phase()
+        # Поврежденные архивы, не попавшие в порцию (бюджет исчерпан), сообщаются по результату прошлой проверки
+        checked_paths = set(checked)
+        for archive in ordered:
+            failure = None if archive['path'] in checked_paths else state.failed(
+                archive['key'], archive['size'], archive['mtime'])
+            if failure is not None:
+                corrupted.append({
+                    'archive': archive['path'], 'error': failure.get('error'),
+                    'verified_at': failure.get('verified_at')})
+
+        try:
+            state.save()
+        except OSError as e:
+            logging.error(self._messages['verify_state_save_error'], {'state_path': state.state_path, 'error': e})
+
+        summary = {
+            'checked': len(checked), 'corrupted': corrupted, 'bytes': scheduled_bytes,
+            'seconds': round(monotonic() - started, 3), 'pending': len(ordered) - len(checked),
+        }
+        (logging.error if corrupted else logging.warning)(self._messages['verify_summary'], {
+            'checked': summary['checked'], 'size_mb': scheduled_bytes / 1024 ** 2, 'seconds': summary['seconds'],
+            'corrupted': len(corrupted), 'pending': summary['pending']})
+        if self.report is not None:
+            self.report.set('integrity_check', summary)
+        return summary
+
+    @timed('replicate')
+    async def perform_replication(self) -> Dict[str, Any]:
+        """
+        Реплицирует архивы и хэш-файлы на цели `REPLICATION_TARGETS` (см. `replication.py`).
+
+        Файлы, уже переданные на цель в текущей версии (по манифесту цели), пропускаются без обращения к ее
+        каталогам. Передачи выполняются параллельно (`REPLICATION_PARALLEL`) в рабочих потоках ограничителя
+        ресурсов, начиная с самых старых файлов, со скоростью не выше `REPLICATION_BANDWIDTH_MBPS` на каждую цель.
+        Ошибка передачи на цель не прерывает передачу остальных файлов.
+
+        :return: Сводка: 'targets' - по каждой цели ('files', 'bytes', 'pending_files', 'lag_seconds' и т.д.).
+        """
+        sources = self._collect_replication_sources()
+        semaphore = Semaphore(self._replication_parallel)
+        targets = [
+            ReplicationTarget(open_storage(target_uri, self.instance), self._replication_bandwidth_mbps)
+            for target_uri in self._replication_targets]
+        # Файлы, которых нет на цели в текущей версии: {цель: {ключ: источник}}
+        pending: Dict[str, Dict[str, Dict[str, Any]]] = {
+            target.path: {
+                key: source for key, source in sources.items()
+                if not target.manifest.is_current(key, source['size'], source['mtime'])}
+            for target in targets}
+
+        async def replicate_one(target: ReplicationTarget, key: str, source: Dict[str, Any]) -> None:
+            target_path = target.storage.describe(key)
+            async with semaphore:
+                self.progress.start_file(target_path, source['size'])
+                completed = False
+                try:
+                    await self._governor.run(
+                        target.transfer, source['path'], key, source['size'], source['mtime'],
+                        partial(self.progress.advance, target_path))
+                    del pending[target.path][key]
+                    completed = True
+                except OSError as e:
+                    target.errors += 1
+                    logging.error(self._messages['replication_error'], {
+                        'file_path': source['path'], 'target': target.path, 'error': e})
+                finally:
+                    self.progress.finish_file(target_path, completed=completed)
+
+        jobs = [
+            (target, key, source) for target in targets
+            for key, source in sorted(pending[target.path].items(), key=lambda item: item[1]['mtime'])]
+        self.progress.start_phase(
+            'replicate', total_bytes=sum(source['size'] for _, _, source in jobs), total_files=len(jobs))
+        await gather(*(replicate_one(*job) for job in jobs))
+        self.progress.finish_phase()
+
+        summary = {'files': len(sources), 'targets': []}
+        metrics = get_metrics()
+        for target in targets:
+            try:
+                target.manifest.save()
+            except OSError as e:
+                logging.error(self._messages['replication_error'], {
+                    'file_path': target.storage.describe(MANIFEST_NAME), 'target': target.path, 'error': e})
+            target.storage.close()
+            target_summary = target.summary(pending[target.path])
+            summary['targets'].append(target_summary)
+            metrics.add('replication_bytes', target_summary['bytes'], target=target.path)
+            metrics.set('replication_pending_files', target_summary['pending_files'], target=target.path)
+            metrics.set('replication_lag_seconds', target_summary['lag_seconds'], target=target.path)
+            (logging.error if target_summary['pending_files'] else logging.warning)(
+                self._messages['replication_summary'], {
+                    'target': target.path, 'files': target_summary['files'],
+                    'size_mb': target_summary['bytes'] / 1024 ** 2, 'seconds': target_summary['seconds'],
+                    'pending': target_summary['pending_files'], 'lag': target_summary['lag_seconds']})
+        if self.report is not None:
+            self.report.set('replication', summary)
+        return summary
+
+    def _collect_replication_sources(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Собирает файлы для репликации: архивы из каталога резервных копий и хэш-файлы.
+
+        :return: Файлы по пути относительно `FILES_BACKUP_DIR`: {ключ: {'path', 'size', 'mtime'}}.
+        """
+        paths = [backup['path'] for backup in self._get_catalog().list() if backup['format']]
+        paths.extend(
+            os_path.join(self._files_backup_dir, name) for name in os_listdir(self._files_backup_dir)
+            if name.lower().endswith('.sha256'))
+        sources: Dict[str, Dict[str, Any]] = {}
+        for file_path in paths:
+            try:
+                file_stat = os_stat(file_path)
+            except FileNotFoundError:
+                continue
+            sources[os_path.relpath(file_path, self._files_backup_dir).replace(os_path.sep, '/')] = {
+                'path': file_path, 'size': file_stat.st_size, 'mtime': file_stat.st_mtime}
+        return sources
+
+    @timed('archive')
     async def perform_file_archiving(self) -> None:
         """
-        Выполняет архивирование файлов в указанной директории.
+        Выполняет архивирование файлов в директории резервных копий.
 
-        Этот метод проходит по всем файлам в заданной директории, фильтрует их по заданным
+        Этот метод проходит по всем файлам в директории резервных копий, фильтрует их по заданным
         расширениям и обрабатывает каждый файл для создания резервной копии. Если файл
         требует архивирования (например, если его хэш изменился), вызывается метод
-        `_handle_backup_archive`.
+        `_handle_backup_archive`. Обходится именно `FILES_BACKUP_DIR`, поэтому архивация может выполняться
+        отдельно от копирования (см. `run_phase`) и не затрагивает рабочие файлы БД.
 
         :raises Exception: В случае ошибки при обработке файлов или создании резервной копии
         """
         # Обход всех файлов в указанной директории
-        for root, _, files in os_walk(self._files_dir):
+        backup_file_paths: List[str] = []
+        for root, _, files in os_walk(self._files_backup_dir):
             # Фильтруем файлы по расширениям заранее
             # filtered_files = [file for file in files if file.endswith(tuple(self._files_extensions))]
             # Фильтруем файлы по расширениям независимо от регистра
             filtered_files = [
                 file for file in files if file.lower().endswith(tuple(ext.lower() for ext in self._files_extensions))]
-            
-            for file in filtered_files:
-                backup_file_path = os_path.join(root, file)
-                log_message = {
-                    'en': 'Processing file path: "{file_path}". File: "{file}".',
-                    'ru': 'Обработка пути к файлу: "{file_path}". Файл: "{file}".',
-                }
-                logging.info(log_message.get(self._language, 'en').format(file_path=backup_file_path, file=file))
+            backup_file_paths.extend(os_path.join(root, file) for file in filtered_files)
+
+        sizes = await self._get_file_sizes(backup_file_paths)
+        self._forecast_archiving(sizes)
+        # Каждый файл читается дважды (хэширование и архивация), поэтому объем фазы - удвоенный размер копий
+        file_sizes = {file_path: 2 * size for file_path, size in sizes.items()}
+        self.progress.start_phase('archive', total_bytes=sum(file_sizes.values()), total_files=len(file_sizes))
+        try:
+            for backup_file_path in backup_file_paths:
+                logging.info(self._messages['processing_file'], {
+                    'file_path': backup_file_path, 'file': os_path.basename(backup_file_path)})
 
                 # Проверяем хэш и создаем архив, если необходимо
                 # вынести в отдельный цикл по директории с бэкапами
-                await self._handle_backup_archive(backup_file_path)
-
-        log_message = {
-            'en': 'The archiving is completed.',
-            'ru': 'Архивация завершена.',
-        }
-        logging.warning(log_message.get(self._language, 'en'))
+                self.progress.start_file(backup_file_path, file_sizes[backup_file_path])
+                completed = False
+                try:
+                    completed = await self._handle_backup_archive(backup_file_path)
+                finally:
+                    # Пропущенный файл исключается из объема фазы
+                    self.progress.finish_file(backup_file_path, completed=completed)
+                if self._durability.pending_bytes >= self._durability.batch_bytes:
+                    # Ограничиваем объем несброшенных архивов и место, занятое еще не удаленными копиями
+                    await self._sync_durable('archive')
+        finally:
+            self._close_stream_targets()
+        await self._flush_file_times()
+        await self._sync_durable('archive')
+        self.progress.finish_phase()
+
+        logging.warning(self._messages['archive_completed'])
     
-    async def _handle_backup_archive(self, backup_file_path: str) -> None:
+    def _forecast_archiving(self, file_sizes: Dict[str, int]) -> Optional[float]:
+        """
+        Прогнозирует длительность архивации по скорости хэширования и архивации в предыдущих запусках.
+
+        :param file_sizes: Размеры файлов, ожидающих архивации: {путь: байт}.
+        :return: Прогноз (сек) или None, если истории нет.
+        """
+        total_bytes = sum(file_sizes.values())
+        run_stats = self._get_run_stats()
+        hash_throughput = run_stats.throughput('hash')
+        archive_throughput = run_stats.throughput('archive')
+        if not total_bytes or not hash_throughput or not archive_throughput:
+            return None
+        # Хэшируются все копии; архивируются только измененные, но прогноз берется с запасом
+        forecast = total_bytes / hash_throughput + total_bytes / archive_throughput
+        logging.warning(self._messages['archive_forecast'], {
+            'count': len(file_sizes), 'size_mb': total_bytes / 1024 ** 2, 'seconds': forecast})
+        if self.report is not None:
+            self.report.set('archive_forecast', {
+                'files': len(file_sizes), 'bytes': total_bytes, 'seconds': round(forecast, 1)})
+        return forecast
+
+    async def _handle_backup_archive(self, backup_file_path: str) -> bool:
         """
         Сравнивает хэши и создает архив, если резервной копии с таким хэшем еще нет.
     
         Этот метод проверяет, существует ли уже резервная копия для указанного файла,
         сравнивая его хэш с ранее сохраненными хэшами. Если резервная копия отсутствует,
         создается новый архив, а исходный файл удаляется.
+
+        Хэш записывается в файл только после того, как архив создан, поэтому хэш-файл всегда соответствует
+        существующему архиву, а копия удаляется только после успешной архивации. Если архив был создан до
+        прерывания предыдущего запуска (по журналу заданий), архивация не повторяется.
     
+        В режиме `FILES_DURABILITY=batch` копия удаляется после сброса архива на диск (`_sync_durable`).
+
         :param backup_file_path: Путь к файлу, для которого необходимо создать резервную копию.
+        :return: True, если копия обработана (заархивирована или не изменилась), False - архив не создан.
         :raises Exception: В случае ошибки при создании архива или удалении файла.
         """
-        if await self._should_skip_backup(backup_file_path):
-            return  # Пропускаем, если резервная копия уже существует
-        
-        # Создаем архив
-        await self._create_backup_archive(backup_file_path)
+        archive_file_path = None if self._journal is None else self._journal.get_archive(backup_file_path)
+        if archive_file_path is None:
+            if await self._should_skip_backup(backup_file_path):
+                return True  # Пропускаем, если резервная копия уже существует
+
+            # Создаем архив
+            archive_file_path = await self._create_backup_archive(backup_file_path)
+            if archive_file_path is None:
+                return False  # Копию не удаляем: архив не создан
+            await self._write_hash_file(backup_file_path)
+            self._journal_record('archive_done', file=backup_file_path, archive=archive_file_path)
+        else:
+            logging.warning(self._messages['archive_already_done'], {
+                'file_path': backup_file_path, 'archive_path': archive_file_path})
+
+        if self._durability.mode == 'batch':
+            self._pending_deletes.append(backup_file_path)
+            return True
         # Удаляем файл после создания архива
         await self._delete_file(backup_file_path)
+        self._journal_record('delete_done', file=backup_file_path)
+        return True
 
     async def _should_skip_backup(self, backup_file_path: str) -> bool:
         """
@@ -705,7 +1864,9 @@ class BackupManager:
         сохраненным в отдельном файле резервной копии. Если хэши совпадают, это
         означает, что файл не изменился с момента последнего резервирования, и
         создание новой резервной копии не требуется. В противном случае текущий хэш
-        будет записан в файл, и резервное копирование будет выполнено.
+        запоминается и записывается в файл после создания архива (`_write_hash_file`).
+
+        Хэш, вычисленный до прерывания предыдущего запуска, берется из журнала заданий, если файл не изменился.
 
         :param backup_file_path: Путь к файлу для резервного копирования / архивирования.
         :return: True, если резервная копия не требуется; False в противном случае.
@@ -713,64 +1874,61 @@ class BackupManager:
         file_name = os_path.basename(backup_file_path)
 
         await self.get_file_times(backup_file_path)
-        
-        current_hash, self._hash_extension = await self._calculate_file_hash(backup_file_path)
+
+        file_stat = os_stat(backup_file_path)
+        hash_state = None if self._journal is None else self._journal.get_hash(
+            backup_file_path, file_stat.st_size, file_stat.st_mtime)
+        if hash_state is not None:
+            current_hash, self._hash_extension = hash_state['hash'], hash_state['hash_type']
+        else:
+            current_hash, self._hash_extension = await self._calculate_file_hash(backup_file_path)
+            self._journal_record(
+                'hash_done', file=backup_file_path, hash=current_hash, hash_type=self._hash_extension,
+                size=file_stat.st_size, mtime=file_stat.st_mtime)
         hash_file_path = os_path.join(self._files_backup_dir, f'{file_name}.{self._hash_extension}')
 
         if os_path.exists(hash_file_path):
             async with aio_open(hash_file_path, 'r') as hash_file:
                 last_hash = await hash_file.read()
-                log_message = {
-                    'en': 'Compare the current and last hashes of the file: "{file_path}". '
-                          # 'Current hash: {current_hash}. Last hash: {last_hash}.'
-                    ,
-                    'ru': 'Сравниваем текущий и последний хэши файла: "{file_path}". '
-                          # 'Текущий хэш: {current_hash}. Последний хэш: {last_hash}.'
-                    ,
-                }
-                logging.info(log_message.get(self._language, 'en').format(
-                    file_path=backup_file_path, current_hash=current_hash, last_hash=last_hash))
+                logging.info(self._messages['hash_compare'], {'file_path': backup_file_path})
                 if current_hash == last_hash:
-                    log_message = {
-                        'en': 'No changes in file: "{file_path}", skipping backup.',
-                        'ru': 'Нет изменений в файле: "{file_path}", резервное копирование пропускается.',
-                    }
-                    logging.info(log_message.get(self._language, 'en').format(file_path=backup_file_path))
-
-                    log_message = {
-                        'en': 'Delete a copy of the file: "{file_path}".',
-                        'ru': 'Удаляем копию файла: "{file_path}".',
-                    }
-                    logging.warning(log_message.get(self._language, 'en').format(file_path=backup_file_path))
+                    logging.info(self._messages['hash_unchanged'], {'file_path': backup_file_path})
+
+                    logging.warning(self._messages['copy_delete'], {'file_path': backup_file_path})
                     await self._delete_file(backup_file_path)
+                    self._journal_record('delete_done', file=backup_file_path)
+                    get_metrics().add('files_unchanged')
                     
                     return True
-        
-        log_message = {
-            'en': 'Write the file hash: "{file_path}", to the file: "{hash_file_path}".',
-            'ru': 'Записываем хэш файла: "{file_path}", в файл: "{hash_file_path}".',
-        }
-        logging.info(log_message.get(self._language, 'en').format(file_path=backup_file_path, hash_file_path=hash_file_path))
-        
-        async with aio_open(hash_file_path, 'w') as hash_file:
+
+        self._pending_hashes[backup_file_path] = (current_hash, hash_file_path)
+        return False
+
+    async def _write_hash_file(self, backup_file_path: str) -> None:
+        """
+        Атомарно записывает хэш заархивированного файла в хэш-файл (через временный файл и переименование).
+
+        :param backup_file_path: Путь к заархивированному файлу, хэш которого был вычислен в `_should_skip_backup`.
+        """
+        current_hash, hash_file_path = self._pending_hashes.pop(backup_file_path)
+        logging.info(self._messages['hash_write'], {'file_path': backup_file_path, 'hash_file_path': hash_file_path})
+
+        tmp_hash_file_path = f'{hash_file_path}.part'
+        async with aio_open(tmp_hash_file_path, 'w') as hash_file:
             await hash_file.write(current_hash)
+        await self._durability.sync_data(tmp_hash_file_path)
+        os_replace(tmp_hash_file_path, hash_file_path)
             
         # Устанавливаем дату хэш файла равной дате архивируемого файла
         modification_time = self._file_times.get(backup_file_path.upper(), {}).get('modification_time', None)
         # os_utime(hash_file_path, times=(modification_time, modification_time))
         await self.set_file_times(backup_file_path, hash_file_path)
+        await self._durability.commit(hash_file_path)
 
-        log_message = {
-            'en': 'Install the date of the Hash file "{hash_file_path}" equal to the date "{time}" of the archive file '
-                  '"{file_path}".',
-            'ru': 'Устанавливаем дату хэш файла "{hash_file_path}" равной дате "{time}" архивируемого файла '
-                  '"{file_path}".',
-        }
-        logging.info(log_message.get(self._language, 'en').format(
-            hash_file_path=hash_file_path, time=modification_time, file_path=backup_file_path))
-
-        return False
+        logging.info(self._messages['hash_file_times'], {
+            'hash_file_path': hash_file_path, 'time': modification_time, 'file_path': backup_file_path})
 
+    @timed('hash', file_arg='file_path')
     async def _calculate_file_hash(self, file_path: str) -> tuple:
         """
         Вычисляет SHA-256 хэш для указанного файла.
@@ -790,33 +1948,84 @@ class BackupManager:
         # message = log_message.get(self._language, 'en').format(hash_type=hash_type, basename=os_path.basename(backup_file_path))
         # logging.info(message)
 
+        if self._governor.enabled:
+            # Архивация идет после запуска сервера: читаем в рабочем потоке с ограничением скорости
+            hash_sha256 = await self._governor.run(self._hash_file, file_path)
+        else:
+            hash_sha256 = sha256()
+            # Без обхода кэша читаем мелкими блоками через aiofiles, иначе - блоками копирования; на сетевом
+            # ресурсе - крупными блоками с опережением
+            chunk_size = 4096 if self._files_io_mode == 'buffered' else self._copy_chunk_size
+            if self._network.is_remote(file_path):
+                chunk_size = self._network.chunk_size
+                opener = self._network.aio_open(file_path, 'rb')
+            else:
+                opener = aio_open_bulk(file_path, "rb", self._files_io_mode, chunk_size)
+            async with opener as f:
+                # Дыры файла хэшируются как нули без чтения
+                reader = AsyncSparseReader(f, SparseMap.from_path(file_path))
+                while True:
+                    chunk = await reader.read(chunk_size)
+                    # chunk = await f.read(65536)  # Чтение файла порциями (alternative)
+                    if not chunk:
+                        break
+                    hash_sha256.update(chunk)
+                    self.progress.advance(file_path, len(chunk))
+            get_metrics().add('sparse_bytes', reader.hole_bytes, phase='hash')
+
+        current_span().add_bytes(os_path.getsize(file_path))
+        hash_digest = hash_sha256.hexdigest()
+        logging.info(self._messages['hash_calculated'], {
+            'hash_type': hash_type, 'basename': os_path.basename(file_path), 'hash_digest': hash_digest})
+        return hash_sha256.hexdigest(), hash_type
+
+    def _hash_file(self, file_path: str) -> Any:
+        """
+        Вычисляет SHA-256 файла в рабочем потоке ограничителя ресурсов.
+
+        :param file_path: Путь к файлу.
+        :return: Объект хэша.
+        """
         hash_sha256 = sha256()
-        async with aio_open(file_path, "rb") as f:
+        f, chunk_size = self._open_backup_source(file_path)
+        with f:
+            reader = SparseReader(f, SparseMap.from_path(file_path))
             while True:
-                chunk = await f.read(4096)
-                # chunk = await f.read(65536)  # Чтение файла порциями (alternative)
+                chunk = reader.read(chunk_size)
                 if not chunk:
                     break
+                if not reader.hole:
+                    # Дыры не читаются с диска и не расходуют скорость ограничителя
+                    self._governor.throttle_sync(len(chunk))
                 hash_sha256.update(chunk)
-        
-        hash_digest = hash_sha256.hexdigest()
-        log_message = {
-            'en': 'Calculate "{hash_type}" hash: File: {basename} | Hash: {hash_digest}',
-            'ru': 'Вычисляем хэш "{hash_type}": Файл: {basename} | Хэш: {hash_digest}',
-        }
-        logging.info(log_message.get(self._language, 'en').format(
-            hash_type=hash_type, basename=os_path.basename(file_path), hash_digest=hash_digest))
-        return hash_sha256.hexdigest(), hash_type
+                self.progress.advance(file_path, len(chunk))
+        get_metrics().add('sparse_bytes', reader.hole_bytes, phase='hash')
+        return hash_sha256
 
-    async def _create_backup_archive(self, backup_file_path: str) -> None:
+    def _open_backup_source(self, file_path: str) -> Tuple[Any, int]:
+        """
+        Открывает файл для чтения в рабочем потоке: на сетевом ресурсе - с чтением крупными блоками с опережением
+        (`netio.PipelinedFile`), иначе - в режиме `FILES_IO_MODE` (`bulkio.BulkFile`).
+
+        :param file_path: Путь к файлу.
+        :return: Кортеж (файл, размер блока чтения).
+        """
+        if self._network.is_remote(file_path):
+            return self._network.open(file_path, 'rb'), self._network.chunk_size
+        return open_bulk(file_path, 'rb', self._files_io_mode, self._governor_chunk_size), self._governor_chunk_size
+
+    @timed('archive_file', file_arg='backup_file_path')
+    async def _create_backup_archive(self, backup_file_path: str) -> Optional[str]:
         """
         Создает архив с резервной копией файла.
 
         Этот метод принимает путь к файлу и создает его резервную копию в формате, указанном в параметрах. Если
-        доступен 7z, используется этот формат, в противном случае создается zip-архив.
+        доступен 7z, используется этот формат, в противном случае создается zip-архив. Архив создается во временном
+        файле `<архив>.part` и атомарно переименовывается после завершения. Zip-архив при этом передается на цели
+        репликации по мере сжатия (`REPLICATION_STREAM_ARCHIVES`).
 
         :param backup_file_path: Путь до файла для резервного копирования.
-        :raises Exception: В случае ошибки при создании архива.
+        :return: Путь к созданному архиву или None, если архив создать не удалось.
         """
         backup_directory = os_path.dirname(backup_file_path)
         file_name = os_path.basename(backup_file_path)
@@ -824,61 +2033,134 @@ class BackupManager:
         archive_format = self._files_archive_format.lower()
         archive_name = f"{file_name}.{archive_format}"
         archive_file_path = os_path.join(backup_directory, archive_name)
+        streams: List[ArchiveStream] = []
 
         try:
             if archive_format == '7z':
                 # Проверяем наличие 7z.exe
                 if not await self._is_7z_available():
-                    log_message = {
-                        'en': '7z executable not found, switching to zip format.',
-                        'ru': 'Исполняемый файл 7z не найден, переключение на формат zip.', }
-                    logging.warning(log_message.get(self._language, 'en'))
+                    logging.warning(self._messages['seven_zip_missing'])
                     archive_format = 'zip'
                     archive_name = f"{file_name}.zip"
                     archive_file_path = os_path.join(backup_directory, archive_name)
 
-            log_message = {
-                'en': 'Creating archive: "{archive_path}" from file: "{file_path}".',
-                'ru': 'Создаем архив: "{archive_path}" из файла: "{file_path}".',
-            }
-            logging.info(log_message.get(self._language, 'en').format(
-                archive_path=archive_file_path, file_path=backup_file_path))
+            logging.info(self._messages['archive_create'], {
+                'archive_path': archive_file_path, 'file_path': backup_file_path})
+
+            tmp_archive_file_path = f'{archive_file_path}.part'
+            if os_path.exists(tmp_archive_file_path):
+                # Остаток прерванной архивации (7z дописал бы файл в существующий архив)
+                os_remove(tmp_archive_file_path)
 
             if archive_format == 'zip':
-                await self._create_zip_archive(backup_file_path, archive_file_path)
+                streams = self._open_archive_streams(archive_file_path, backup_file_path)
+                await self._create_zip_archive(backup_file_path, tmp_archive_file_path, streams)
             elif archive_format == '7z':
-                await self._create_7z_archive(backup_file_path, archive_file_path)
+                await self._create_7z_archive(backup_file_path, tmp_archive_file_path)
+            await self._durability.sync_data(tmp_archive_file_path)
+            os_replace(tmp_archive_file_path, archive_file_path)
+            self._catalog_add(archive_file_path)
+            source_size = os_path.getsize(backup_file_path)
+            current_span().add_bytes(source_size)
+            metrics = get_metrics()
+            metrics.add('archives_created')
+            metrics.add('archive_source_bytes', source_size)
+            metrics.add('archive_bytes', os_path.getsize(archive_file_path))
 
             # Устанавливаем дату архива равной дате архивируемого файла
             modification_time = self._file_times.get(backup_file_path.upper(), {}).get('modification_time', None)
 
             # os_utime(archive_path, times=(modification_time, modification_time))
             await self.set_file_times(backup_file_path, archive_file_path)
+            await self._durability.commit(archive_file_path)
+            if streams:
+                finished, streams = streams, []
+                await to_thread(self._finish_archive_streams, finished, archive_file_path)
 
-            log_message = {
-                'en': 'Backup completed for "{file_path}".',
-                'ru': 'Резервное копирование для "{file_path}" завершено.',
-            }
-            logging.info(log_message.get(self._language, 'en').format(file_path=backup_file_path))
+            logging.info(self._messages['archive_done'], {'file_path': backup_file_path})
+            return archive_file_path
 
         except Exception as e:
-            log_message = {
-                'en': 'Failed to backup "{file_path}": {error}.',
-                'ru': 'Не удалось создать резервную копию "{file_path}": {error}.',
-            }
-            logging.error(log_message.get(self._language, 'en').format(file_path=backup_file_path, error=e))
-
-            await self._delete_oldest_backup(backup_file_path)
+            logging.error(self._messages['archive_error'], {'file_path': backup_file_path, 'error': e})
+            for stream in streams:
+                stream.abort()
+
+            try:
+                # Освобождаем место, не затрагивая сам архивируемый файл
+                await self._delete_oldest_backup(backup_file_path, skip_conditions=[file_name])
+            except FileNotFoundError:
+                pass
+            return None
     
+    def _open_archive_streams(self, archive_file_path: str, backup_file_path: str) -> List[ArchiveStream]:
+        """
+        Открывает передачу создаваемого zip-архива на цели репликации (`REPLICATION_STREAM_ARCHIVES`).
+
+        Цель, передачу на которую открыть не удалось, получит архив в фазе репликации.
+
+        :param archive_file_path: Путь к архиву (итоговое имя).
+        :param backup_file_path: Путь к архивируемой копии.
+        :return: Открытые передачи.
+        """
+        if not self._replication_targets or not self._replication_stream_archives:
+            return []
+        if self._stream_targets is None:
+            self._stream_targets = [
+                ReplicationTarget(open_storage(target_uri, self.instance), self._replication_bandwidth_mbps)
+                for target_uri in self._replication_targets]
+        key = os_path.relpath(archive_file_path, self._files_backup_dir).replace(os_path.sep, '/')
+        # Дата архива будет равна дате копии (см. `set_file_times`)
+        modification_time = self._file_times.get(backup_file_path.upper(), {}).get('modification_time')
+        streams = []
+        for target in self._stream_targets:
+            try:
+                streams.append(ArchiveStream(
+                    target, key, None if modification_time is None else modification_time.timestamp()))
+            except OSError as e:
+                logging.error(self._messages['replication_error'], {
+                    'file_path': archive_file_path, 'target': target.path, 'error': e})
+        return streams
+
+    def _finish_archive_streams(self, streams: List[ArchiveStream], archive_file_path: str) -> None:
+        """
+        Завершает передачу готового архива на цели (в рабочем потоке) и записывает ее в манифесты целей.
+
+        :param streams: Передачи архива.
+        :param archive_file_path: Путь к готовому архиву.
+        """
+        archive_stat = os_stat(archive_file_path)
+        for stream in streams:
+            if stream.finish(archive_stat.st_size, archive_stat.st_mtime):
+                get_metrics().add('replication_bytes', archive_stat.st_size, target=stream.target.path)
+                logging.info(self._messages['archive_streamed'], {
+                    'archive_path': archive_file_path, 'target': stream.target.path})
+            else:
+                # Фаза репликации продолжит передачу с последней контрольной точки
+                logging.error(self._messages['replication_error'], {
+                    'file_path': archive_file_path, 'target': stream.target.path, 'error': stream.error})
+
+    def _close_stream_targets(self) -> None:
+        """Закрывает хранилища целей, на которые передавались архивы во время сжатия."""
+        for target in self._stream_targets or []:
+            target.storage.close()
+        self._stream_targets = None
+
     async def _is_7z_available(self) -> bool:
         """
         Проверяет наличие 7z.exe в системе.
 
         Этот метод запускает исполняемый файл 7z с параметром 'i' для проверки его доступности.
-        Возвращает True, если 7z доступен, и False в противном случае.
+        Возвращает True, если 7z доступен, и False в противном случае. Результат запоминается: 7z проверяется
+        один раз за время жизни менеджера (в режиме службы - до изменения `FILES_7Z_PATH`).
 
         :return: True, если 7z доступен, иначе False.
         """
+        if self._seven_zip_available is None:
+            self._seven_zip_available = await self._probe_7z()
+        return self._seven_zip_available
+
+    async def _probe_7z(self) -> bool:
+        """Запускает 7z для проверки его доступности."""
         try:
             # Запускаем 7z с параметром 'd' для проверки его доступности
             process = await create_subprocess_exec(
@@ -891,14 +2173,10 @@ class BackupManager:
 
             return process.returncode==0
         except FileNotFoundError:
-            logging.error(f'FileNotFoundError')
+            logging.error(self._messages['seven_zip_not_found'], {'path': self._files_7z_path})
             return False
         except Exception as e:
-            log_message = {
-                'en': 'Error while checking 7z availability: {error}.',
-                'ru': 'Ошибка при проверке доступности 7z: {error}.',
-            }
-            logging.error(log_message.get(self._language, 'en').format(error=e))
+            logging.error(self._messages['seven_zip_check_error'], {'error': e})
             return False
     
     async def _create_7z_archive(self, backup_file_path: str, archive_path: str) -> None:
@@ -917,15 +2195,26 @@ class BackupManager:
             'a', '-t7z', archive_path, backup_file_path,
             stdout=subprocess.PIPE, stderr=subprocess.PIPE
         )
-        # await process.communicate()
-        stdout, stderr = await process.communicate()
+        # Скорость 7z ограничить нельзя: понижаем его приоритет и приостанавливаем при высокой задержке дисков
+        supervisor = create_task(self._governor.supervise_process(process.pid))
+        try:
+            # await process.communicate()
+            stdout, stderr = await process.communicate()
+        finally:
+            supervisor.cancel()
+            await gather(supervisor, return_exceptions=True)
         
         if process.returncode != 0:
-            logging.error(f'7z: {stdout=}; 7z: {stderr=}')
+            logging.error(self._messages['seven_zip_archive_error'], {
+                'returncode': process.returncode, 'stdout': stdout, 'stderr': stderr})
             raise Exception(f'Ошибка при создании архива: {stderr.decode().strip()}')
+        if self._files_io_mode != 'buffered':
+            # 7z читает и пишет через страничный кэш: выгружаем копию и архив
+            await to_thread(drop_file_cache, archive_path)
+            await to_thread(drop_file_cache, backup_file_path)
 
-    @staticmethod
-    async def _create_zip_archive(backup_file_path: str, archive_path: str) -> None:
+    async def _create_zip_archive(
+            self, backup_file_path: str, archive_path: str, streams: Optional[List[ArchiveStream]] = None) -> None:
         """
         Создает архив zip с помощью ZipFile.
 
@@ -934,11 +2223,61 @@ class BackupManager:
 
         :param backup_file_path: Путь к файлу для архивирования.
         :param archive_path: Путь для сохранения созданного zip-архива.
+        :param streams: Передачи архива на цели репликации, в которые сжатые данные пишутся одновременно с файлом.
         :raises Exception: В случае ошибки при создании zip-архива.
         """
+        from zipfile import ZipFile, ZIP_DEFLATED
+
+        if (self._governor.enabled or self._files_io_mode != 'buffered' or self._network.is_remote(archive_path)
+                or has_holes(backup_file_path) or streams):
+            # Сжатие выполняется в рабочем потоке (с пониженным приоритетом и ограничением скорости чтения, если
+            # включен ограничитель ресурсов) с чтением блоками в режиме `FILES_IO_MODE` (на сетевом ресурсе - с
+            # несколькими запросами в работе) и без чтения дыр
+            await self._governor.run(self._write_zip_archive, backup_file_path, archive_path, streams)
+            return
         with ZipFile(archive_path, 'w', compression=ZIP_DEFLATED) as archive:
             archive.write(backup_file_path, os_path.basename(backup_file_path))
 
+    def _write_zip_archive(
+            self, backup_file_path: str, archive_path: str, streams: Optional[List[ArchiveStream]] = None) -> None:
+        """
+        Создает zip-архив блоками, ожидая ограничителя ресурсов перед чтением каждого блока; дыры файла сжимаются
+        как нули без чтения. Вне режима 'buffered' созданный архив сбрасывается на диск и выгружается из страничного
+        кэша. С передачами `streams` архив пишется через `ArchiveTee` - в файл и на цели репликации одновременно.
+
+        :param backup_file_path: Путь к файлу для архивирования.
+        :param archive_path: Путь для сохранения созданного zip-архива.
+        :param streams: Передачи архива на цели репликации.
+        """
+        from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED
+
+        info = ZipInfo.from_file(backup_file_path, os_path.basename(backup_file_path))
+        info.compress_type = ZIP_DEFLATED
+        source, chunk_size = self._open_backup_source(backup_file_path)
+        if self._network.is_remote(archive_path):
+            archive_file = self._network.open(archive_path, 'wb')
+        elif streams:
+            archive_file = open(archive_path, 'wb')
+        else:
+            archive_file = nullcontext(archive_path)
+        with source, archive_file as archive_target, \
+                ZipFile(
+                    ArchiveTee(archive_target, streams) if streams else archive_target, 'w',
+                    compression=ZIP_DEFLATED) as archive, \
+                archive.open(info, 'w', force_zip64=True) as target:
+            reader = SparseReader(source, SparseMap.from_path(backup_file_path))
+            while True:
+                chunk = reader.read(chunk_size)
+                if not chunk:
+                    break
+                if not reader.hole:
+                    self._governor.throttle_sync(len(chunk))
+                target.write(chunk)
+                self.progress.advance(backup_file_path, len(chunk))
+        get_metrics().add('sparse_bytes', reader.hole_bytes, phase='archive')
+        if self._files_io_mode != 'buffered':
+            drop_file_cache(archive_path)
+
 
 
 
@@ -0,0 +1,18 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Development'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+"""
+Бенчмарки резервного копирования на синтетических данных.
+
+Запуск из корня проекта: `python -m bench --help`. Результаты выводятся в JSON для сравнения между коммитами.
+Проверка времени запуска CLI (`-X importtime`) с бюджетом: `python -m bench.startup --budget-ms 250`.
+Проверка хранилища S3 (составная загрузка, продолжение, передача zip-архивов во время сжатия) на moto или
+S3-совместимом сервере: `python -m bench.s3 [--endpoint-url URL]`.
+"""
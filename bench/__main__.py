@@ -0,0 +1,602 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Development'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+from argparse import ArgumentParser, Namespace
+from asyncio import run as aio_run
+from contextlib import redirect_stderr
+from json import dumps as json_dumps, load as json_load
+from os import devnull as os_devnull, environ, makedirs as os_makedirs, path as os_path, walk as os_walk
+from platform import platform, python_version
+from shutil import rmtree, which as shutil_which
+from statistics import median
+from subprocess import run as subprocess_run, DEVNULL, PIPE
+from sys import stderr
+from tempfile import mkdtemp
+from time import perf_counter
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+try:
+    from os import sync as os_sync
+except ImportError:  # Windows
+    os_sync = None
+
+from bench.dataset import generate_dataset, mutate_dataset, generate_backup_history
+
+
+BENCHMARKS: List[str] = [
+    'copy', 'hash', 'zip', '7z', 'delete_oldest', 'execute', 'log', 'cache', 'network', 'durability']
+
+
+def configure_environment(workdir: str, args: Namespace) -> Dict[str, str]:
+    """
+    Настраивает переменные окружения на каталоги бенчмарка.
+
+    Вызывается до импорта модулей проекта: `Config` читает окружение один раз при первом создании.
+
+    :param workdir: Рабочий каталог бенчмарка.
+    :param args: Аргументы командной строки.
+    :return: Пути к каталогам 'files_dir', 'backup_dir', 'log_dir'.
+    """
+    paths = {
+        'files_dir': os_path.join(workdir, 'db'),
+        'backup_dir': os_path.join(workdir, 'backup'),
+        'log_dir': os_path.join(workdir, 'logs'),
+    }
+    environ.update({
+        'FILES_DIR': paths['files_dir'],
+        'FILES_BACKUP_DIR': paths['backup_dir'],
+        'FILES_EXTENSIONS': '.DBX',
+        'FILES_IN_USE_EXTENSIONS': '.PRE,.TTS',
+        # Занятые файлы набора не освобождаются: не ждем их
+        'FILES_IN_USE_WAIT_SECONDS': '0',
+        'FILES_IGNORE_BACKUP_FILES': 'True',
+        'FILES_MIN_REQUIRED_SPACE_GB': '0',
+        'FILES_ARCHIVE_FORMAT': args.archive_format,
+        'FILES_7Z_PATH': args.seven_zip,
+        'FILES_MAX_DOWNTIME_SECONDS': '0',
+        'FILES_VERIFY_TIME_BUDGET_SECONDS': '0',
+        'FILES_VERIFY_IO_BUDGET_GB': '0',
+        'SERVER_WAIT_SECONDS': '1',
+        'LOG_DIR': paths['log_dir'],
+        'LOG_LEVEL_CONSOLE': args.log_level,
+        'LOG_LEVEL_FILE': args.log_level,
+    })
+    environ.setdefault('LOG_FORMAT_CONSOLE', '%(asctime)s | %(levelname)-8s| %(name)-8s | %(message)s')
+    environ.setdefault('LOG_FORMAT_FILE', '%(asctime)s | %(levelname)-8s| %(name)-8s | %(message)s')
+    return paths
+
+
+def summarize(runs: List[float], processed_bytes: int = 0, **extra: Any) -> Dict[str, Any]:
+    """
+    Сводит замеры одного бенчмарка.
+
+    :param runs: Время каждого повтора (сек).
+    :param processed_bytes: Объем данных, обработанных за один повтор (байт).
+    :param extra: Дополнительные поля результата.
+    :return: Результат бенчмарка.
+    """
+    result = {
+        'runs': [round(seconds, 6) for seconds in runs],
+        'median_seconds': round(median(runs), 6) if runs else None,
+        'min_seconds': round(min(runs), 6) if runs else None,
+        'bytes': processed_bytes,
+        'mb_per_s': round(processed_bytes / 1024 ** 2 / median(runs), 2) if runs and processed_bytes else None,
+    }
+    result.update(extra)
+    return result
+
+
+def reset_directory(directory: str) -> None:
+    """Удаляет и создает каталог заново."""
+    rmtree(directory, ignore_errors=True)
+    os_makedirs(directory, exist_ok=True)
+
+
+def require_copies(paths: Dict[str, str], dataset: List[Dict[str, Any]]) -> int:
+    """
+    Проверяет, что копирование создало копии файлов БД в каталоге копий.
+
+    Бенчмарк, в котором все БД отложены как занятые (например, из-за оставшихся файлов блокировки), ничего не
+    копирует и замеряет пустой запуск.
+
+    :param paths: Пути каталогов бенчмарка.
+    :param dataset: Набор файлов БД.
+    :return: Количество копий.
+    :raises RuntimeError: Если свободные БД есть, а копий нет.
+    """
+    extensions = tuple({os_path.splitext(item['path'])[1] for item in dataset})
+    copies = sum(
+        1 for _, _, names in os_walk(paths['backup_dir']) for name in names if name.endswith(extensions))
+    if not copies and any(not item['in_use'] for item in dataset):
+        raise RuntimeError(f'No database copies were created in "{paths["backup_dir"]}".')
+    return copies
+
+
+def git_commit() -> Optional[str]:
+    """Возвращает текущий коммит проекта или None вне git."""
+    try:
+        result = subprocess_run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os_path.dirname(os_path.dirname(os_path.abspath(__file__))),
+            stdout=PIPE, stderr=DEVNULL, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+async def bench_copy(args: Namespace, paths: Dict[str, str], dataset: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Замеряет `BackupManager.perform_copy_files` (копирование всех свободных БД в пустой каталог копий)."""
+    from backup import BackupManager
+
+    runs = []
+    for _ in range(args.repeat):
+        reset_directory(paths['backup_dir'])
+        backup_manager = BackupManager(language='en')
+        started = perf_counter()
+        await backup_manager.perform_copy_files()
+        runs.append(perf_counter() - started)
+        require_copies(paths, dataset)
+    return summarize(runs, sum(item['size'] for item in dataset if not item['in_use']))
+
+
+async def bench_hash(args: Namespace, paths: Dict[str, str], dataset: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Замеряет `BackupManager._calculate_file_hash` по всем файлам БД."""
+    from backup import BackupManager
+
+    backup_manager = BackupManager(language='en')
+    runs = []
+    for _ in range(args.repeat):
+        started = perf_counter()
+        for item in dataset:
+            await backup_manager._calculate_file_hash(item['path'])
+        runs.append(perf_counter() - started)
+    return summarize(runs, sum(item['size'] for item in dataset))
+
+
+async def _bench_archive(
+        args: Namespace, paths: Dict[str, str], dataset: List[Dict[str, Any]], archive_format: str
+) -> Dict[str, Any]:
+    """Замеряет создание архивов всех файлов БД в формате `archive_format`."""
+    from backup import BackupManager
+
+    backup_manager = BackupManager(language='en')
+    if archive_format == '7z' and not await backup_manager._is_7z_available():
+        return {'skipped': f'7z executable "{args.seven_zip}" is not available'}
+    create_archive = (
+        backup_manager._create_7z_archive if archive_format == '7z' else backup_manager._create_zip_archive)
+    archive_dir = os_path.join(paths['backup_dir'], 'archives')
+    runs = []
+    archived_bytes = 0
+    for _ in range(args.repeat):
+        reset_directory(archive_dir)
+        started = perf_counter()
+        for item in dataset:
+            archive_path = os_path.join(archive_dir, f'{os_path.basename(item["path"])}.{archive_format}')
+            await create_archive(item['path'], archive_path)
+        runs.append(perf_counter() - started)
+        archived_bytes = sum(
+            os_path.getsize(os_path.join(archive_dir, f'{os_path.basename(item["path"])}.{archive_format}'))
+            for item in dataset)
+    total = sum(item['size'] for item in dataset)
+    return summarize(
+        runs, total, archive_bytes=archived_bytes, ratio=round(archived_bytes / total, 4) if total else None)
+
+
+async def bench_zip(args: Namespace, paths: Dict[str, str], dataset: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Замеряет `BackupManager._create_zip_archive`."""
+    return await _bench_archive(args, paths, dataset, 'zip')
+
+
+async def bench_7z(args: Namespace, paths: Dict[str, str], dataset: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Замеряет `BackupManager._create_7z_archive`."""
+    return await _bench_archive(args, paths, dataset, '7z')
+
+
+async def bench_delete_oldest(
+        args: Namespace, paths: Dict[str, str], dataset: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Замеряет `BackupManager._delete_oldest_backup` на истории из `--history-dbs` x `--history-backups` копий.
+
+    Первый вызов (включая построение каталога копий) выводится отдельно в 'cold_seconds'.
+    """
+    from backup import BackupManager
+
+    reset_directory(paths['backup_dir'])
+    count = generate_backup_history(paths['backup_dir'], args.history_dbs, args.history_backups)
+    backup_manager = BackupManager(language='en')
+    db_names = [f'HIST{index:04d}' for index in range(args.history_dbs)]
+
+    started = perf_counter()
+    await backup_manager._delete_oldest_backup(os_path.join(paths['files_dir'], f'{db_names[0]}.DBX'))
+    cold_seconds = perf_counter() - started
+
+    runs = []
+    for index in range(args.repeat * len(db_names)):
+        file_path = os_path.join(paths['files_dir'], f'{db_names[index % len(db_names)]}.DBX')
+        started = perf_counter()
+        await backup_manager._delete_oldest_backup(file_path)
+        runs.append(perf_counter() - started)
+    return summarize(runs, history=count, cold_seconds=round(cold_seconds, 6))
+
+
+async def bench_execute(args: Namespace, paths: Dict[str, str], dataset: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Замеряет полный запуск `run.execute` с имитацией сервера.
+
+    Первый повтор - полное копирование в пустой каталог копий ('full'), следующие - после изменения
+    `--change-rate` файлов БД ('incremental').
+    """
+    from backup import BackupManager
+    from report import RunReport
+    from run import execute
+
+    from bench.server import SimulatedServerManager
+
+    reset_directory(paths['backup_dir'])
+    full: List[float] = []
+    incremental: List[float] = []
+    downtime: List[float] = []
+    for index in range(max(args.repeat, 2)):
+        if index:
+            mutate_dataset(dataset, args.change_rate, args.compressibility, seed=index, minutes=index)
+        server_manager = SimulatedServerManager(
+            paths['files_dir'], ['.DBX'], stop_seconds=args.server_seconds, start_seconds=args.server_seconds)
+        backup_manager = BackupManager(language='en', report=RunReport())
+        started = perf_counter()
+        try:
+            await execute(server_manager=server_manager, backup_manager=backup_manager)
+            (incremental if index else full).append(perf_counter() - started)
+        finally:
+            # `execute` запускает "сервер" снова: его файлы блокировки не должны остаться для следующих бенчмарков
+            await server_manager.stop_server()
+        downtime.append(backup_manager.report.data.get('downtime_seconds') or 0.0)
+    return {
+        'full': summarize(full, sum(item['size'] for item in dataset if not item['in_use'])),
+        'incremental': summarize(incremental, change_rate=args.change_rate),
+        'downtime_seconds': downtime,
+    }
+
+
+async def bench_log(args: Namespace, paths: Dict[str, str], dataset: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Замеряет стоимость записи журнала в вызывающем потоке: через очередь (`LOG_QUEUE=True`) и синхронно.
+
+    Консоль и файл принимают все записи (уровень DEBUG), консоль перенаправлена в `os.devnull`. 'drain_seconds' -
+    время, за которое поток записи журнала дописывает очередь после последнего повтора; 'suppressed' - стоимость
+    записи отфильтрованного уровня.
+    """
+    import logging
+    from logger import setup_logger, change_log_levels, stop_logging
+
+    logger = logging.getLogger('bench')
+    records = args.log_records
+    results: Dict[str, Any] = {}
+    try:
+        # Консольный обработчик пишет в поток sys.stderr, заданный при настройке журнала
+        with open(os_devnull, 'w') as devnull_file, redirect_stderr(devnull_file):
+            for mode, use_queue in (('queue', True), ('sync', False)):
+                setup_logger(use_queue=use_queue, force=True)
+                change_log_levels('DEBUG')
+                runs = []
+                for _ in range(args.repeat):
+                    started = perf_counter()
+                    for index in range(records):
+                        logger.warning('Copy file: %s to %s.', index, mode)
+                    runs.append(perf_counter() - started)
+                started = perf_counter()
+                stop_logging()
+                drain_seconds = perf_counter() - started
+                results[mode] = summarize(
+                    runs, records=records, per_record_us=round(median(runs) / records * 1e6, 3),
+                    drain_seconds=round(drain_seconds, 6))
+
+            logger.setLevel(logging.INFO)
+            runs = []
+            for _ in range(args.repeat):
+                started = perf_counter()
+                for index in range(records):
+                    logger.debug('Copy file: %s to %s.', index, 'suppressed')
+                runs.append(perf_counter() - started)
+            logger.setLevel(logging.NOTSET)
+            results['suppressed'] = summarize(
+                runs, records=records, per_record_us=round(median(runs) / records * 1e6, 3))
+    finally:
+        setup_logger(force=True)
+    return results
+
+
+async def bench_cache(args: Namespace, paths: Dict[str, str], dataset: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Замеряет копирование и архивацию (`perform_copy_files` и `perform_file_archiving`) в каждом режиме
+    `FILES_IO_MODE` и объем страничного кэша, занятый резервным копированием.
+
+    Перед каждым повтором файлы БД выгружаются из кэша, кроме первого файла, который читается целиком и изображает
+    рабочий набор сервера. 'hot_resident' - доля этого файла в кэше после повтора, 'source_cache_mb' - объем
+    остальных файлов БД в кэше, 'backup_cache_mb' - объем файлов каталога копий в кэше. Режимы, не поддерживаемые
+    системой, пропускаются; без `mincore` объемы кэша равны None.
+    """
+    from backup import BackupManager
+    from bulkio import IO_MODES, resolve_io_mode, drop_file_cache, page_cache_residency
+
+    def cached_mb(file_paths: List[str]) -> Optional[float]:
+        sizes = [page_cache_residency(file_path) for file_path in file_paths]
+        return None if None in sizes else round(sum(sizes) / 1024 ** 2, 3)
+
+    hot_path = dataset[0]['path']
+    results: Dict[str, Any] = {}
+    for io_mode in IO_MODES:
+        if resolve_io_mode(io_mode) != io_mode:
+            continue
+        runs: List[float] = []
+        residency: Dict[str, Any] = {}
+        for _ in range(args.repeat):
+            reset_directory(paths['backup_dir'])
+            for item in dataset:
+                drop_file_cache(item['path'])
+            with open(hot_path, 'rb') as hot_file:
+                while hot_file.read(8 * 1024 ** 2):
+                    pass
+            backup_manager = BackupManager(language='en')
+            backup_manager._files_io_mode = io_mode
+            started = perf_counter()
+            await backup_manager.perform_copy_files()
+            copy_seconds = perf_counter() - started
+            require_copies(paths, dataset)
+            started = perf_counter()
+            await backup_manager.perform_file_archiving()
+            runs.append(copy_seconds + perf_counter() - started)
+
+            hot_cached = page_cache_residency(hot_path)
+            backup_files = [
+                os_path.join(root, name) for root, _, names in os_walk(paths['backup_dir']) for name in names]
+            residency = {
+                'hot_resident': None if hot_cached is None else round(hot_cached / max(dataset[0]['size'], 1), 4),
+                'source_cache_mb': cached_mb([item['path'] for item in dataset[1:]]),
+                'backup_cache_mb': cached_mb(backup_files),
+            }
+        results[io_mode] = summarize(runs, sum(item['size'] for item in dataset if not item['in_use']), **residency)
+    return results
+
+
+async def bench_network(args: Namespace, paths: Dict[str, str], dataset: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Замеряет копирование и архивацию в каталог резервных копий на имитации сетевого ресурса (`bench/netfs.py`:
+    задержка `--network-latency-ms` на запрос, канал `--network-bandwidth-mbps`).
+
+    'sequential' - один запрос в работе (последовательный цикл чтения и записи, метаданные по одному),
+    'pipelined' - `--network-depth` запросов в работе. Копирование ('copy') и архивация ('archive') замеряются
+    отдельно: время сжатия архивации не зависит от задержки и скрывает эффект конвейера. 'requests' - количество
+    запросов к ресурсу за повтор.
+    """
+    from backup import BackupManager
+    from bench.netfs import LatencyFileOps
+    from netio import NetworkIO
+
+    results: Dict[str, Any] = {}
+    copied_bytes = sum(item['size'] for item in dataset if not item['in_use'])
+    for name, depth in (('sequential', 1), ('pipelined', args.network_depth)):
+        copy_runs: List[float] = []
+        archive_runs: List[float] = []
+        copy_requests = archive_requests = 0
+        for _ in range(args.repeat):
+            reset_directory(paths['backup_dir'])
+            ops = LatencyFileOps(args.network_latency_ms, args.network_bandwidth_mbps)
+            backup_manager = BackupManager(language='en')
+            backup_manager._network = NetworkIO(
+                True, paths['backup_dir'], depth=depth, chunk_size=int(args.network_chunk_mb * 1024 ** 2), ops=ops)
+            started = perf_counter()
+            await backup_manager.perform_copy_files()
+            copy_runs.append(perf_counter() - started)
+            copy_requests = ops.requests
+            require_copies(paths, dataset)
+            started = perf_counter()
+            await backup_manager.perform_file_archiving()
+            archive_runs.append(perf_counter() - started)
+            backup_manager._network.close()
+            archive_requests = ops.requests - copy_requests
+        results[name] = {
+            'depth': depth,
+            'copy': summarize(copy_runs, copied_bytes, requests=copy_requests),
+            'archive': summarize(archive_runs, copied_bytes, requests=archive_requests),
+            'total': summarize(
+                [copy + archive for copy, archive in zip(copy_runs, archive_runs)], copied_bytes,
+                requests=copy_requests + archive_requests),
+        }
+    return results
+
+
+def dirty_limit_bytes() -> Optional[int]:
+    """
+    Возвращает порог грязных страниц, после которого Linux заставляет пишущий процесс ждать записи на диск
+    (`vm.dirty_bytes` или `vm.dirty_ratio` доступной памяти).
+
+    :return: Порог (байт); None, если его не удалось определить (не Linux).
+    """
+    try:
+        with open('/proc/sys/vm/dirty_bytes', 'r') as dirty_bytes_file:
+            dirty_bytes = int(dirty_bytes_file.read())
+        if dirty_bytes:
+            return dirty_bytes
+        with open('/proc/sys/vm/dirty_ratio', 'r') as dirty_ratio_file:
+            dirty_ratio = int(dirty_ratio_file.read())
+        with open('/proc/meminfo', 'r') as meminfo_file:
+            available_kb = next(
+                int(line.split()[1]) for line in meminfo_file if line.startswith('MemAvailable:'))
+        return available_kb * 1024 * dirty_ratio // 100
+    except (OSError, ValueError, StopIteration):
+        return None
+
+
+async def bench_durability(args: Namespace, paths: Dict[str, str], dataset: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Замеряет стоимость режимов `FILES_DURABILITY`: копирование и архивацию с завершающим сбросом на диск, как в
+    `BackupManager.run_backup`.
+
+    На наборе меньше порога грязных страниц запись заканчивается в страничном кэше, и сброс на диск ничего не
+    стоит: поэтому бенчмарк создает отдельный набор `--durability-mb` (по умолчанию полтора порога, см.
+    `dirty_limit_bytes`). Перед каждым повтором данные предыдущего сбрасываются на диск вне замера.
+
+    'copy_seconds' и 'sync_seconds' - медианы копирования (окно простоя сервера, в режиме 'strict' включает `fsync`
+    копий) и сброса на диск за повтор; время повтора включает пакетный сброс копий и архивов.
+    """
+    from asyncio import create_task
+    from backup import BackupManager
+    from durability import DURABILITY_MODES
+
+    dirty_limit = dirty_limit_bytes()
+    total_mb = args.durability_mb or (dirty_limit * 1.5 / 1024 ** 2 if dirty_limit else 2048)
+    files_dir = f'{paths["files_dir"]}_durability'
+    reset_directory(files_dir)
+    results: Dict[str, Any] = {'dirty_limit_bytes': dirty_limit}
+    try:
+        durability_dataset = generate_dataset(
+            files_dir, files=args.files, size_mb=total_mb / max(args.files, 1), compressibility=args.compressibility,
+            seed=args.seed)
+        processed_bytes = sum(item['size'] for item in durability_dataset)
+        for mode in DURABILITY_MODES:
+            runs: List[float] = []
+            copy_runs: List[float] = []
+            sync_runs: List[float] = []
+            synced_files = 0
+            filesystems: List[str] = []
+            for _ in range(max(args.repeat, 3)):
+                reset_directory(paths['backup_dir'])
+                if os_sync is not None:
+                    # Грязные страницы предыдущего повтора не должны сбрасываться во время замера
+                    os_sync()
+                backup_manager = BackupManager(language='en')
+                backup_manager._files_dir = files_dir
+                backup_manager._durability.mode = mode
+                started = perf_counter()
+                await backup_manager.perform_copy_files()
+                copy_runs.append(perf_counter() - started)
+                require_copies(paths, durability_dataset)
+                # Как в `run_backup`: копии сбрасываются параллельно с архивацией
+                copy_sync = create_task(backup_manager._sync_durable('copy', backup_manager._durability.take()))
+                await backup_manager.perform_file_archiving()
+                await copy_sync
+                runs.append(perf_counter() - started)
+                summary = backup_manager._durability.summary()
+                sync_runs.append(summary['seconds'])
+                synced_files, filesystems = summary['files'], summary['filesystems']
+            results[mode] = summarize(
+                runs, processed_bytes, copy_seconds=round(median(copy_runs), 6),
+                sync_seconds=round(median(sync_runs), 6), sync_runs=[round(seconds, 6) for seconds in sync_runs],
+                synced_files=synced_files, filesystems=filesystems)
+    finally:
+        rmtree(files_dir, ignore_errors=True)
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """
+    Сравнивает медианы с результатами другого коммита.
+
+    :param results: Текущие результаты.
+    :param baseline: Результаты для сравнения (JSON, записанный ранее).
+    :return: Строки отчета 'бенчмарк: база -> текущий (отношение)'.
+    """
+    lines = []
+
+    def walk(current: Dict[str, Any], previous: Dict[str, Any], prefix: str) -> None:
+        for name, value in current.items():
+            if not isinstance(value, dict) or not isinstance(previous.get(name), dict):
+                continue
+            if 'median_seconds' in value and previous[name].get('median_seconds'):
+                ratio = value['median_seconds'] / previous[name]['median_seconds']
+                lines.append(
+                    f'{prefix}{name}: {previous[name]["median_seconds"]:.4f} s -> {value["median_seconds"]:.4f} s '
+                    f'(x{ratio:.2f})')
+            else:
+                walk(value, previous[name], f'{prefix}{name}.')
+
+    walk(results.get('results', {}), baseline.get('results', {}), '')
+    return lines
+
+
+def main() -> int:
+    parser = ArgumentParser(prog='python -m bench', description='Benchmark backup stages on a synthetic DBX dataset.')
+    parser.add_argument('benchmarks', nargs='*', help=f'Benchmarks to run: {", ".join(BENCHMARKS)} (default: all).')
+    parser.add_argument('--files', type=int, default=8, help='Number of database files.')
+    parser.add_argument('--size-mb', type=float, default=16, help='Average database file size in MB.')
+    parser.add_argument('--compressibility', type=float, default=0.5, help='Share of compressible data (0..1).')
+    parser.add_argument('--change-rate', type=float, default=0.25, help='Share of files changed between runs.')
+    parser.add_argument('--in-use', type=float, default=0.0, help='Share of files locked by the server.')
+    parser.add_argument('--history-dbs', type=int, default=20, help='Databases in the backup history.')
+    parser.add_argument('--history-backups', type=int, default=100, help='Backups per database in the history.')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetitions of each benchmark.')
+    parser.add_argument('--server-seconds', type=float, default=0.2, help='Simulated server stop/start time.')
+    parser.add_argument('--archive-format', default='zip', choices=['zip', '7z'], help='FILES_ARCHIVE_FORMAT.')
+    parser.add_argument('--seven-zip', default=shutil_which('7z') or '7z', help='Path to the 7z executable.')
+    parser.add_argument('--seed', type=int, default=0, help='Dataset random seed.')
+    parser.add_argument('--workdir', help='Working directory (default: a temporary directory, removed at exit).')
+    parser.add_argument('--output', help='Write the JSON results to this file instead of stdout.')
+    parser.add_argument('--compare', help='JSON results of another commit to compare medians with.')
+    parser.add_argument('--log-level', default='ERROR', help='Log level of the benchmarked code.')
+    parser.add_argument('--log-records', type=int, default=20000, help='Records per repetition of "log".')
+    parser.add_argument('--network-latency-ms', type=float, default=5, help='Request latency of "network".')
+    parser.add_argument('--network-bandwidth-mbps', type=float, default=100, help='Link bandwidth of "network".')
+    parser.add_argument('--network-depth', type=int, default=4, help='Requests in flight in "network".')
+    parser.add_argument('--network-chunk-mb', type=float, default=8, help='Request size of "network" in MB.')
+    parser.add_argument(
+        '--durability-mb', type=float, default=0,
+        help='Dataset size of "durability" in MB (default: 1.5x the dirty page limit).')
+    args = parser.parse_args()
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f'unknown benchmark(s): {", ".join(unknown)}')
+
+    workdir = args.workdir or mkdtemp(prefix='sls_bench_')
+    paths = configure_environment(workdir, args)
+    try:
+        reset_directory(paths['files_dir'])
+        dataset = generate_dataset(
+            paths['files_dir'], files=args.files, size_mb=args.size_mb, compressibility=args.compressibility,
+            in_use=args.in_use, seed=args.seed)
+
+        from logger import setup_logger
+        setup_logger()
+
+        results: Dict[str, Any] = {}
+        for name in args.benchmarks or BENCHMARKS:
+            print(f'Running "{name}"...', file=stderr)
+            results[name] = aio_run(globals()[f'bench_{name}'](args, paths, dataset))
+
+        output = {
+            'commit': git_commit(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': python_version(),
+            'platform': platform(),
+            'params': {
+                key: getattr(args, key) for key in (
+                    'files', 'size_mb', 'compressibility', 'change_rate', 'in_use', 'history_dbs', 'history_backups',
+                    'repeat', 'server_seconds', 'archive_format', 'seed')},
+            'dataset_bytes': sum(item['size'] for item in dataset),
+            'results': results,
+        }
+    finally:
+        if not args.workdir:
+            rmtree(workdir, ignore_errors=True)
+
+    text = json_dumps(output, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(text + '\n')
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as baseline_file:
+            for line in compare(output, json_load(baseline_file)):
+                print(line, file=stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
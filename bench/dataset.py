@@ -0,0 +1,131 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Development'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+from os import makedirs as os_makedirs, path as os_path, utime as os_utime
+from random import Random
+from datetime import datetime, timedelta
+from typing import Dict, Any, List
+
+
+BLOCK_SIZE: int = 1024 ** 2
+_FILLER: bytes = b'SLS DBX record 0000000000 ' * (BLOCK_SIZE // 26 + 1)
+
+
+def _make_block(rng: Random, compressibility: float, size: int = BLOCK_SIZE) -> bytes:
+    """
+    Создает блок данных с заданной долей сжимаемых данных.
+
+    :param rng: Генератор случайных чисел.
+    :param compressibility: Доля повторяющихся (хорошо сжимаемых) данных в блоке, от 0 до 1.
+    :param size: Размер блока (байт).
+    :return: Блок данных.
+    """
+    random_size = int(size * (1 - min(max(compressibility, 0.0), 1.0)))
+    return rng.randbytes(random_size) + _FILLER[:size - random_size]
+
+
+def generate_dataset(
+        files_dir: str, files: int = 10, size_mb: float = 16, compressibility: float = 0.5, in_use: float = 0.0,
+        extension: str = '.DBX', in_use_extension: str = '.PRE', seed: int = 0,
+        modified: datetime = None) -> List[Dict[str, Any]]:
+    """
+    Создает каталог с синтетическими файлами БД.
+
+    Размеры файлов распределены от половины до полуторного `size_mb`. Для доли `in_use` файлов создаются файлы
+    блокировки `<файл><in_use_extension>`, как у БД, открытых сервером.
+
+    :param files_dir: Каталог БД (`FILES_DIR`).
+    :param files: Количество файлов БД.
+    :param size_mb: Средний размер файла (МБ).
+    :param compressibility: Доля сжимаемых данных (0 - случайные данные, 1 - полностью повторяющиеся).
+    :param in_use: Доля файлов, занятых сервером.
+    :param extension: Расширение файлов БД.
+    :param in_use_extension: Расширение файлов блокировки.
+    :param seed: Начальное значение генератора случайных чисел.
+    :param modified: Время модификации файлов; по умолчанию текущее время.
+    :return: Список файлов с ключами 'path', 'size', 'in_use'.
+    """
+    rng = Random(seed)
+    os_makedirs(files_dir, exist_ok=True)
+    modified = modified or datetime.now()
+    in_use_count = round(files * in_use)
+    dataset: List[Dict[str, Any]] = []
+    for index in range(files):
+        file_path = os_path.join(files_dir, f'BENCH{index:04d}{extension}')
+        size = int(size_mb * BLOCK_SIZE * rng.uniform(0.5, 1.5))
+        with open(file_path, 'wb') as db_file:
+            remaining = size
+            while remaining > 0:
+                block = _make_block(rng, compressibility, min(BLOCK_SIZE, remaining))
+                db_file.write(block)
+                remaining -= len(block)
+        mtime = modified.timestamp()
+        os_utime(file_path, (mtime, mtime))
+        is_in_use = index < in_use_count
+        if is_in_use:
+            open(file_path + in_use_extension, 'wb').close()
+        dataset.append({'path': file_path, 'size': size, 'in_use': is_in_use})
+    return dataset
+
+
+def mutate_dataset(
+        dataset: List[Dict[str, Any]], change_rate: float, compressibility: float = 0.5, seed: int = 1,
+        minutes: int = 1) -> List[str]:
+    """
+    Изменяет долю файлов БД, как изменил бы их сервер за время между запусками.
+
+    В каждом изменяемом файле перезаписывается один блок, а время модификации сдвигается на `minutes` минут вперед,
+    чтобы копия получила новое имя (дата копии в имени файла с точностью до минуты).
+
+    :param dataset: Файлы, созданные `generate_dataset`.
+    :param change_rate: Доля изменяемых файлов, от 0 до 1.
+    :param compressibility: Доля сжимаемых данных в перезаписываемом блоке.
+    :param seed: Начальное значение генератора случайных чисел.
+    :param minutes: Сдвиг времени модификации (мин).
+    :return: Пути к измененным файлам.
+    """
+    rng = Random(seed)
+    changed = rng.sample(dataset, round(len(dataset) * change_rate))
+    for item in changed:
+        offset = rng.randrange(0, max(item['size'] - BLOCK_SIZE, 1))
+        with open(item['path'], 'r+b') as db_file:
+            db_file.seek(offset)
+            db_file.write(_make_block(rng, compressibility, min(BLOCK_SIZE, item['size'])))
+        mtime = (datetime.fromtimestamp(os_path.getmtime(item['path'])) + timedelta(minutes=minutes)).timestamp()
+        os_utime(item['path'], (mtime, mtime))
+    return [item['path'] for item in changed]
+
+
+def generate_backup_history(
+        backup_dir: str, databases: int = 20, backups_per_db: int = 100, size: int = 1024,
+        extension: str = '.DBX.zip', start: datetime = None) -> int:
+    """
+    Создает дерево старых резервных копий `<db>/<YYYY>/<YYYY.MM>/<db>_<YYYY.MM.DD_HH.MM><ext>` (по копии в день).
+
+    :param backup_dir: Корневой каталог резервных копий (`FILES_BACKUP_DIR`).
+    :param databases: Количество БД.
+    :param backups_per_db: Количество копий каждой БД.
+    :param size: Размер каждой копии (байт).
+    :param extension: Расширение копий.
+    :param start: Дата самой старой копии; по умолчанию `backups_per_db` дней назад.
+    :return: Количество созданных копий.
+    """
+    start = start or datetime.now() - timedelta(days=backups_per_db)
+    payload = b'\x00' * size
+    for db_index in range(databases):
+        db_name = f'HIST{db_index:04d}'
+        for backup_index in range(backups_per_db):
+            timestamp = start + timedelta(days=backup_index)
+            directory = os_path.join(backup_dir, db_name, timestamp.strftime('%Y'), timestamp.strftime('%Y.%m'))
+            os_makedirs(directory, exist_ok=True)
+            file_path = os_path.join(directory, f'{db_name}_{timestamp:%Y.%m.%d_%H.%M}{extension}')
+            with open(file_path, 'wb') as backup_file:
+                backup_file.write(payload)
+    return databases * backups_per_db
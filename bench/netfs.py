@@ -0,0 +1,81 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Development'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+from threading import Lock
+from time import monotonic, sleep
+from typing import Any, Tuple
+
+from netio import FileOps
+
+
+class LatencyFileOps(FileOps):
+    """
+    Имитация сетевого ресурса (SMB) на локальном диске с интерфейсом `netio.FileOps`.
+
+    Каждая операция ждет `latency_ms` (задержка запроса, запросы в работе ждут одновременно), а данные
+    передаются по общему каналу `bandwidth_mbps`: передачи разных запросов выполняются по очереди.
+
+    :ivar latency_ms (float): Задержка одного запроса (мс).
+    :ivar bandwidth_mbps (float): Пропускная способность канала (МБ/с); 0 - без ограничения.
+    :ivar requests (int): Количество выполненных запросов.
+    """
+
+    def __init__(self, latency_ms: float = 5.0, bandwidth_mbps: float = 0.0) -> None:
+        self.latency_ms: float = latency_ms
+        self.bandwidth_mbps: float = bandwidth_mbps
+        self.requests: int = 0
+        self._lock: Lock = Lock()
+        self._link_free_at: float = 0.0
+
+    def _request(self, size: int = 0) -> None:
+        """Ждет задержку запроса и передачу `size` байт по каналу."""
+        with self._lock:
+            self.requests += 1
+        sleep(self.latency_ms / 1000)
+        if not size or not self.bandwidth_mbps:
+            return
+        with self._lock:
+            now = monotonic()
+            self._link_free_at = max(self._link_free_at, now) + size / (self.bandwidth_mbps * 1024 ** 2)
+            delay = self._link_free_at - now
+        sleep(delay)
+
+    def open(self, path: str, flags: int) -> int:
+        self._request()
+        return super().open(path, flags)
+
+    def read_at(self, fd: int, size: int, offset: int) -> bytes:
+        data = super().read_at(fd, size, offset)
+        self._request(len(data))
+        return data
+
+    def write_at(self, fd: int, data: Any, offset: int) -> int:
+        self._request(len(data))
+        return super().write_at(fd, data, offset)
+
+    def truncate(self, fd: int, size: int) -> None:
+        self._request()
+        super().truncate(fd, size)
+
+    def size(self, fd: int) -> int:
+        self._request()
+        return super().size(fd)
+
+    def makedirs(self, path: str) -> None:
+        self._request()
+        super().makedirs(path)
+
+    def getsize(self, path: str) -> int:
+        self._request()
+        return super().getsize(path)
+
+    def utime(self, path: str, times: Tuple[float, float]) -> None:
+        self._request()
+        super().utime(path, times)
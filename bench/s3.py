@@ -0,0 +1,222 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Development'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+from argparse import ArgumentParser, Namespace
+from asyncio import run as aio_run
+from contextlib import nullcontext
+from hashlib import sha256
+from os import environ, listdir as os_listdir, path as os_path, urandom
+from shutil import rmtree
+from sys import stderr
+from tempfile import mkdtemp
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bench.__main__ import configure_environment, require_copies
+from bench.dataset import generate_dataset
+
+
+BUCKET: str = 'sls-backup-check'
+
+
+class Interrupted(Exception):
+    """Прерывание загрузки после первой контрольной точки (имитация сбоя)."""
+
+
+def check_objects(storage: Any, workdir: str) -> Dict[str, Any]:
+    """Проверяет запись, чтение, перечисление и удаление небольших и пустых объектов."""
+    storage.write_bytes('small/manifest.json', b'{"files": {}}')
+    empty_path = os_path.join(workdir, 'empty.bin')
+    open(empty_path, 'wb').close()
+    storage.upload(empty_path, 'small/empty.bin')
+    small_path = os_path.join(workdir, 'small.bin')
+    with open(small_path, 'wb') as small_file:
+        small_file.write(urandom(1024))
+    storage.upload(small_path, 'small/small.bin')
+    listed = dict(storage.list('small/'))
+    assert storage.read_bytes('small/manifest.json') == b'{"files": {}}', 'write_bytes / read_bytes'
+    assert storage.read_bytes('small/missing') is None, 'read_bytes of a missing object'
+    assert listed == {'small/manifest.json': 13, 'small/empty.bin': 0, 'small/small.bin': 1024}, f'list: {listed}'
+    storage.remove('small/small.bin')
+    storage.remove('small/missing')
+    assert storage.stat('small/small.bin') is None, 'remove'
+    return {'objects': len(listed)}
+
+
+def check_multipart(storage: Any, source_path: str) -> Dict[str, Any]:
+    """Проверяет составную загрузку файла несколькими частями, загружаемыми параллельно."""
+    _, resumed = storage.upload(source_path, 'multipart/source.bin')
+    assert not resumed, 'a new upload must start at offset 0'
+    assert storage.read_bytes('multipart/source.bin') == read_file(source_path), 'multipart object content'
+    parts = parts_count(storage, 'multipart/source.bin')
+    expected = -(-os_path.getsize(source_path) // storage.part_size)
+    assert parts == expected, f'{parts} part(s) instead of {expected}'
+    return {'parts': parts, 'part_size': storage.part_size, 'concurrency': storage.concurrency}
+
+
+def check_resume(storage_factory: Callable[[], Any], source_path: str) -> Dict[str, Any]:
+    """Проверяет продолжение загрузки, прерванной после первой контрольной точки, новым клиентом."""
+    checkpoints: List[Dict[str, Any]] = []
+
+    def interrupt(checkpoint: Dict[str, Any]) -> None:
+        checkpoints.append(checkpoint)
+        raise Interrupted
+
+    storage = storage_factory()
+    try:
+        storage.upload(source_path, 'resume/source.bin', on_checkpoint=interrupt, chunk_size=1024 ** 2)
+    except Interrupted:
+        pass
+    finally:
+        storage.close()
+    assert checkpoints, 'no checkpoint was reported before the interruption'
+    storage = storage_factory()
+    try:
+        _, resumed = storage.upload(source_path, 'resume/source.bin', state=checkpoints[0], chunk_size=1024 ** 2)
+        assert resumed == checkpoints[0]['offset'], f'resumed at {resumed}, checkpoint {checkpoints[0]["offset"]}'
+        assert storage.read_bytes('resume/source.bin') == read_file(source_path), 'resumed object content'
+    finally:
+        storage.close()
+    return {'resumed_offset': resumed}
+
+
+def check_part_limit(storage: Any, source_path: str, max_parts: int) -> Dict[str, Any]:
+    """Проверяет увеличение части, чтобы объект известного размера уместился в ограничение количества частей."""
+    import storage as storage_module
+
+    saved_max_parts = storage_module.MAX_PARTS
+    storage_module.MAX_PARTS = max_parts
+    try:
+        storage.upload(source_path, 'limit/source.bin')
+    finally:
+        storage_module.MAX_PARTS = saved_max_parts
+    assert storage.read_bytes('limit/source.bin') == read_file(source_path), 'object content'
+    parts = parts_count(storage, 'limit/source.bin')
+    assert parts <= max_parts, f'{parts} part(s) with the limit of {max_parts}'
+    return {'max_parts': max_parts, 'parts': parts}
+
+
+def check_streamed_archives(args: Namespace) -> Dict[str, Any]:
+    """
+    Проверяет передачу zip-архивов в бакет во время сжатия (`REPLICATION_STREAM_ARCHIVES`): объекты совпадают с
+    архивами, а фаза репликации передает только хэш-файлы.
+    """
+    from backup import BackupManager
+    from replication import ReplicationManifest
+
+    paths = {'files_dir': environ['FILES_DIR'], 'backup_dir': environ['FILES_BACKUP_DIR']}
+    dataset = generate_dataset(paths['files_dir'], files=3, size_mb=args.size_mb, seed=1)
+    backup_manager = BackupManager(language='en')
+    aio_run(backup_manager.perform_copy_files())
+    require_copies(paths, dataset)
+    aio_run(backup_manager.perform_file_archiving())
+
+    archives = [backup for backup in backup_manager._get_catalog().list() if backup['format']]
+    storage = create_storage(args, prefix='replica')
+    try:
+        manifest = ReplicationManifest(storage)
+        for archive in archives:
+            key = os_path.relpath(archive['path'], paths['backup_dir']).replace(os_path.sep, '/')
+            content = read_file(archive['path'])
+            assert storage.read_bytes(key) == content, f'streamed archive {key}'
+            assert manifest.files.get(key, {}).get('sha256') == sha256(content).hexdigest(), f'manifest entry {key}'
+    finally:
+        storage.close()
+    hash_files = [name for name in os_listdir(paths['backup_dir']) if name.lower().endswith('.sha256')]
+    summary = aio_run(backup_manager.perform_replication())
+    transferred = summary['targets'][0]['files']
+    assert transferred == len(hash_files), f'replication transferred {transferred} file(s) besides the hash files'
+    return {'archives': len(archives), 'replicated_after': transferred}
+
+
+def create_storage(args: Namespace, concurrency: Optional[int] = None, prefix: str = '') -> Any:
+    """Создает хранилище проверочного бакета."""
+    from storage import S3Storage
+
+    return S3Storage(
+        BUCKET, prefix, endpoint_url=args.endpoint_url, region=args.region, part_size=int(args.part_size_mb * 1024 ** 2),
+        concurrency=concurrency or args.concurrency)
+
+
+def parts_count(storage: Any, key: str) -> int:
+    """Возвращает количество частей объекта (1 - объект записан одним запросом)."""
+    return storage.client.head_object(Bucket=storage.bucket, Key=key, PartNumber=1).get('PartsCount', 1)
+
+
+def read_file(path: str) -> bytes:
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+def main() -> int:
+    parser = ArgumentParser(
+        prog='python -m bench.s3',
+        description='Check the S3 storage backend against moto (in-process) or an S3-compatible server.')
+    parser.add_argument('--endpoint-url', help='S3-compatible server, e.g. a moto server or MinIO (default: moto).')
+    parser.add_argument('--region', default='us-east-1', help='Region.')
+    parser.add_argument('--size-mb', type=float, default=24, help='Size of the uploaded file in MB.')
+    parser.add_argument('--part-size-mb', type=float, default=5, help='Multipart upload part size in MB.')
+    parser.add_argument('--concurrency', type=int, default=4, help='Parts uploaded in parallel.')
+    parser.add_argument('--archive-format', default='zip', help='FILES_ARCHIVE_FORMAT of the archive check.')
+    parser.add_argument('--seven-zip', default='7z', help='FILES_7Z_PATH of the archive check.')
+    parser.add_argument('--log-level', default='ERROR', help='Log level of the checked code.')
+    args = parser.parse_args()
+
+    if args.endpoint_url:
+        mock = nullcontext()
+    else:
+        try:
+            from moto import mock_aws
+        except ImportError:
+            print('moto is not installed: pass --endpoint-url of an S3-compatible server', file=stderr)
+            return 2
+        environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+        environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+        mock = mock_aws()
+    environ.setdefault('AWS_DEFAULT_REGION', args.region)
+
+    workdir = mkdtemp(prefix='sls_s3_')
+    # `Config` читает окружение один раз: цель репликации задается до импорта модулей проекта
+    configure_environment(os_path.join(workdir, 'backup'), args)
+    environ.update({'REPLICATION_TARGETS': f's3://{BUCKET}/replica', 'REPLICATION_STREAM_ARCHIVES': 'True'})
+    from logger import setup_logger
+    setup_logger()
+    source_path = os_path.join(workdir, 'source.bin')
+    with open(source_path, 'wb') as source_file:
+        source_file.write(urandom(int(args.size_mb * 1024 ** 2)))
+    results: Dict[str, Any] = {}
+    failed: List[Tuple[str, str]] = []
+    try:
+        with mock:
+            storage = create_storage(args)
+            storage.client.create_bucket(Bucket=BUCKET)
+            checks: List[Tuple[str, Callable[[], Dict[str, Any]]]] = [
+                ('objects', lambda: check_objects(storage, workdir)),
+                ('multipart', lambda: check_multipart(storage, source_path)),
+                ('resume', lambda: check_resume(
+                    # Одна часть в работе: контрольная точка сообщается после каждой части
+                    lambda: create_storage(args, concurrency=1), source_path)),
+                ('part_limit', lambda: check_part_limit(storage, source_path, max_parts=2)),
+                ('streamed_archives', lambda: check_streamed_archives(args)),
+            ]
+            for name, check in checks:
+                try:
+                    results[name] = check()
+                    print(f'ok   {name}: {results[name]}', file=stderr)
+                except (AssertionError, OSError) as e:
+                    failed.append((name, str(e)))
+                    print(f'FAIL {name}: {e}', file=stderr)
+            storage.close()
+    finally:
+        rmtree(workdir, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,75 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Development'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+from asyncio import sleep as aio_sleep
+from os import path as os_path, remove as os_remove, walk as os_walk
+from typing import List
+
+
+class SimulatedServerManager:
+    """
+    Имитация сервера SLS с интерфейсом `server.ServerManager`.
+
+    Пока "сервер" запущен, для каждого файла БД существует файл блокировки `<файл><lock_extension>`, как у БД,
+    открытых сервером; остановка удаляет эти файлы, запуск создает их снова. Остановка и запуск занимают
+    `stop_seconds` и `start_seconds`.
+
+    :ivar files_dir (str): Каталог БД.
+    :ivar server_wait_seconds (int): Время ожидания сервера (сек), как `SERVER_WAIT_SECONDS`.
+    :ivar running (bool): Запущен ли "сервер".
+    """
+
+    def __init__(
+            self, files_dir: str, extensions: List[str], lock_extension: str = '.TTS', stop_seconds: float = 0.5,
+            start_seconds: float = 0.5, server_wait_seconds: int = 10, running: bool = True) -> None:
+        self.files_dir: str = files_dir
+        self.extensions: List[str] = extensions
+        self.lock_extension: str = lock_extension
+        self.stop_seconds: float = stop_seconds
+        self.start_seconds: float = start_seconds
+        self.server_wait_seconds: int = server_wait_seconds
+        self.running: bool = False
+        if running:
+            self._create_locks()
+            self.running = True
+
+    async def start_server(self) -> bool:
+        """Запускает "сервер": создает файлы блокировки."""
+        if not self.running:
+            await aio_sleep(self.start_seconds)
+            self._create_locks()
+            self.running = True
+        return True
+
+    async def stop_server(self) -> bool:
+        """Останавливает "сервер": удаляет файлы блокировки."""
+        if self.running:
+            await aio_sleep(self.stop_seconds)
+            for lock_path in self._lock_paths():
+                if os_path.exists(lock_path):
+                    os_remove(lock_path)
+            self.running = False
+        return True
+
+    async def is_server_running(self, process_name: str = None) -> bool:
+        """Проверяет, запущен ли "сервер"."""
+        return self.running
+
+    def _create_locks(self) -> None:
+        """Создает файлы блокировки для всех файлов БД."""
+        for lock_path in self._lock_paths():
+            open(lock_path, 'wb').close()
+
+    def _lock_paths(self) -> List[str]:
+        """Возвращает пути файлов блокировки для всех файлов БД."""
+        return [
+            os_path.join(root, file + self.lock_extension)
+            for root, _, files in os_walk(self.files_dir)
+            for file in files if file.endswith(tuple(self.extensions))]
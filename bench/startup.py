@@ -0,0 +1,113 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Development'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+from argparse import ArgumentParser
+from json import dumps as json_dumps
+from os import environ, path as os_path, pathsep as os_pathsep
+from site import getsitepackages, getusersitepackages
+from statistics import median
+from subprocess import run as subprocess_run, PIPE
+from sys import executable as sys_executable, stderr
+from typing import Dict, Any, List, Tuple
+
+
+PROJECT_DIR: str = os_path.dirname(os_path.dirname(os_path.abspath(__file__)))
+# Модули, которые импортируются только при использовании: их появление при импорте CLI - регрессия
+LAZY_MODULES: List[str] = [
+    'psutil', 'colorlog', 'zipfile', 'http.server', 'socketserver', 'dotenv', 'jsonlog', 'ctypes']
+
+
+def child_path() -> str:
+    """
+    Возвращает PYTHONPATH дочернего интерпретатора: каталог проекта и каталоги установленных пакетов.
+
+    Дочерний интерпретатор запускается без модуля `site` (`-S`): импорты `.pth`-файлов и `sitecustomize` не должны
+    попадать в замер импорта проекта, поэтому каталоги пакетов передаются явно.
+    """
+    paths = [PROJECT_DIR, *getsitepackages(), getusersitepackages()]
+    return os_pathsep.join(path for path in paths if os_path.isdir(path))
+
+
+def measure_import(module: str) -> Tuple[float, Dict[str, Tuple[int, int]]]:
+    """
+    Импортирует модуль в отдельном интерпретаторе с `-X importtime`.
+
+    Учитываются только импорты проекта: запуск интерпретатора (`site`, `.pth`-файлы) в замер не входит.
+
+    :param module: Имя модуля (например, 'run').
+    :return: Общее время импорта (мс) и время импорта по модулям: {имя: (собственное, с вложенными) мкс}.
+    :raises RuntimeError: Если импорт завершился с ошибкой.
+    """
+    result = subprocess_run(
+        [sys_executable, '-S', '-X', 'importtime', '-c', f'import {module}'], cwd=PROJECT_DIR, stdout=PIPE,
+        stderr=PIPE, text=True, env={**environ, 'PYTHONPATH': child_path()})
+    if result.returncode != 0:
+        raise RuntimeError(f'"import {module}" failed:\n{result.stderr}')
+
+    modules: Dict[str, Tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # заголовок таблицы
+        modules[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+    return modules.get(module, (0, 0))[1] / 1000, modules
+
+
+def main() -> int:
+    parser = ArgumentParser(
+        prog='python -m bench.startup', description='Check the import time of the CLI against a startup budget.')
+    parser.add_argument('--module', default='run', help='Module imported by the CLI entry point.')
+    parser.add_argument('--budget-ms', type=float, default=250, help='Maximum median import time (ms).')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of measurements.')
+    parser.add_argument('--top', type=int, default=10, help='Number of slowest modules to report.')
+    parser.add_argument('--output', help='Write the JSON results to this file.')
+    args = parser.parse_args()
+
+    runs: List[float] = []
+    modules: Dict[str, Tuple[int, int]] = {}
+    for _ in range(args.repeat):
+        total_ms, modules = measure_import(args.module)
+        runs.append(total_ms)
+    median_ms = median(runs)
+    eager = [name for name in LAZY_MODULES if name in modules]
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+
+    print(f'import {args.module}: median {median_ms:.1f} ms (budget {args.budget_ms:.0f} ms), '
+          f'runs: {", ".join(f"{value:.1f}" for value in runs)}', file=stderr)
+    for name, (self_us, cumulative_us) in slowest:
+        print(f'  {name}: self {self_us / 1000:.1f} ms, cumulative {cumulative_us / 1000:.1f} ms', file=stderr)
+
+    output: Dict[str, Any] = {
+        'module': args.module,
+        'budget_ms': args.budget_ms,
+        'median_ms': round(median_ms, 3),
+        'runs_ms': [round(value, 3) for value in runs],
+        'eager_modules': eager,
+        'slowest': [{'module': name, 'self_ms': self_us / 1000, 'cumulative_ms': cumulative_us / 1000}
+                    for name, (self_us, cumulative_us) in slowest],
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(json_dumps(output, ensure_ascii=False, indent=2) + '\n')
+
+    failed = False
+    if eager:
+        print(f'FAIL: imported eagerly: {", ".join(eager)}', file=stderr)
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f'FAIL: import time {median_ms:.1f} ms exceeds the budget of {args.budget_ms:.0f} ms', file=stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,369 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+"""
+Массовое чтение и запись файлов без вытеснения страничного кэша (`FILES_IO_MODE`).
+
+- 'buffered' - обычный буферизованный ввод-вывод (aiofiles / `open`).
+- 'fadvise' - чтение с `POSIX_FADV_SEQUENTIAL`; после каждого блока из кэша выгружаются (`POSIX_FADV_DONTNEED`)
+  только страницы, которых в нем не было при открытии файла (по `mincore`), поэтому страницы БД, которые уже были
+  в кэше у сервера SLS, остаются на месте. Записанные данные периодически сбрасываются на диск (`fdatasync`)
+  и выгружаются из кэша.
+- 'direct' - как 'fadvise', но блоки, выровненные по `DIRECT_ALIGNMENT`, читаются и пишутся с `O_DIRECT` через
+  выровненный буфер в обход кэша; невыровненный хвост файла обрабатывается как в 'fadvise'.
+
+Режимы 'fadvise' и 'direct' требуют `os.posix_fadvise` (Linux); на других системах используется 'buffered'.
+"""
+
+from asyncio import to_thread
+from mmap import mmap, PAGESIZE
+from os import (
+    open as os_open, close as os_close, fstat as os_fstat, pread as os_pread, pwrite as os_pwrite,
+    ftruncate as os_ftruncate, O_RDONLY, O_RDWR, O_WRONLY, O_CREAT, O_TRUNC)
+import os
+from re import finditer as re_finditer
+from typing import Any, Optional, Union, BinaryIO
+
+from aiofiles import open as aio_open
+
+
+IO_MODES = ('buffered', 'fadvise', 'direct')
+# Выравнивание смещений, размеров и буфера для O_DIRECT (байт)
+DIRECT_ALIGNMENT: int = 4096
+# Объем записанных данных, после которого они сбрасываются на диск и выгружаются из кэша (байт)
+WRITE_DROP_INTERVAL: int = 64 * 1024 ** 2
+
+# Признак наличия страницы в кэше - младший бит байта `mincore`
+_RESIDENT_TABLE: bytes = bytes(value & 1 for value in range(256))
+
+_libc: Any = None
+
+
+def resolve_io_mode(io_mode: str) -> str:
+    """
+    Возвращает режим ввода-вывода, поддерживаемый системой.
+
+    :param io_mode: Запрошенный режим ('buffered', 'fadvise', 'direct').
+    :return: Режим; 'buffered', если `posix_fadvise` недоступен.
+    :raises ValueError: Если режим неизвестен.
+    """
+    io_mode = io_mode.lower()
+    if io_mode not in IO_MODES:
+        raise ValueError(f'Unknown FILES_IO_MODE "{io_mode}": use {", ".join(IO_MODES)}.')
+    if io_mode != 'buffered' and not hasattr(os, 'posix_fadvise'):
+        return 'buffered'
+    if io_mode == 'direct' and not hasattr(os, 'O_DIRECT'):
+        return 'fadvise'
+    return io_mode
+
+
+def get_libc() -> Any:
+    """Загружает libc с прототипами `mmap`, `munmap`, `mincore` и `fallocate` (None, если недоступна)."""
+    global _libc
+    if _libc is None:
+        try:
+            import ctypes
+
+            libc = ctypes.CDLL(None, use_errno=True)
+            libc.mmap.restype = ctypes.c_void_p
+            libc.mmap.argtypes = [
+                ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_long]
+            libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+            libc.mincore.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_void_p]
+            if hasattr(libc, 'fallocate'):
+                libc.fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_long, ctypes.c_long]
+            _libc = libc
+        except (ImportError, OSError, AttributeError):
+            _libc = False
+    return _libc or None
+
+
+def resident_pages(fd: int, offset: int, length: int) -> Optional[bytes]:
+    """
+    Возвращает признаки наличия страниц файла в страничном кэше (`mincore`).
+
+    :param fd: Дескриптор файла.
+    :param offset: Смещение начала диапазона (байт).
+    :param length: Длина диапазона (байт).
+    :return: По байту на страницу, начиная со страницы, содержащей `offset`: 1 - в кэше, 0 - нет; None, если
+             `mincore` недоступен.
+    """
+    libc = get_libc()
+    if libc is None or length <= 0:
+        return None
+    import ctypes
+    from mmap import PROT_READ, MAP_SHARED
+
+    start = offset - offset % PAGESIZE
+    length += offset - start
+    address = libc.mmap(None, length, PROT_READ, MAP_SHARED, fd, start)
+    if address in (None, ctypes.c_void_p(-1).value):
+        return None
+    try:
+        vector = (ctypes.c_ubyte * ((length + PAGESIZE - 1) // PAGESIZE))()
+        if libc.mincore(address, length, vector) != 0:
+            return None
+        return bytes(vector).translate(_RESIDENT_TABLE)
+    finally:
+        libc.munmap(address, length)
+
+
+def page_cache_residency(path: str) -> Optional[int]:
+    """
+    Возвращает объем файла в страничном кэше.
+
+    :param path: Путь к файлу.
+    :return: Объем (байт) или None, если `mincore` недоступен.
+    """
+    fd = os_open(path, O_RDONLY)
+    try:
+        size = os_fstat(fd).st_size
+        if not size:
+            return 0
+        vector = resident_pages(fd, 0, size)
+        return None if vector is None else min(vector.count(1) * PAGESIZE, size)
+    finally:
+        os_close(fd)
+
+
+def drop_file_cache(path: str) -> None:
+    """
+    Сбрасывает файл на диск и выгружает его страницы из кэша (для файлов, записанных не через `BulkFile`, например
+    архивов zip и 7z).
+
+    :param path: Путь к файлу.
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    fd = os_open(path, O_RDONLY)
+    try:
+        os.fdatasync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os_close(fd)
+
+
+class BulkFile:
+    """
+    Файл для последовательного чтения или записи большими блоками в режимах 'fadvise' и 'direct'.
+
+    Поддерживает подмножество интерфейса файла, используемое при копировании, хэшировании и архивации: `read`,
+    `write`, `seek`, `flush`, `truncate`, `close`.
+
+    :ivar path (str): Путь к файлу.
+    :ivar io_mode (str): Режим ввода-вывода.
+    :ivar direct (bool): Файл открыт с `O_DIRECT` (сбрасывается при невыровненной операции).
+    """
+
+    def __init__(
+            self, path: str, mode: str = 'rb', io_mode: str = 'fadvise', buffer_size: int = 8 * 1024 ** 2) -> None:
+        self.path: str = path
+        self.io_mode: str = io_mode
+        self._writable: bool = mode != 'rb'
+        flags = {'rb': O_RDONLY, 'wb': O_WRONLY | O_CREAT | O_TRUNC, 'r+b': O_RDWR}[mode]
+        self.direct: bool = False
+        self._fd: int = -1
+        if io_mode == 'direct':
+            try:
+                self._fd = os_open(path, flags | os.O_DIRECT, 0o666)
+                self.direct = True
+            except OSError:
+                # Файловая система не поддерживает O_DIRECT (например, tmpfs)
+                pass
+        if self._fd < 0:
+            self._fd = os_open(path, flags, 0o666)
+        self._size: int = os_fstat(self._fd).st_size
+        self._position: int = 0
+        self._dropped: int = 0
+        self._buffer: Optional[mmap] = None
+        self._resident: Optional[bytes] = None
+        if self.direct:
+            # Анонимное отображение выровнено по странице
+            self._buffer = mmap(-1, -(-buffer_size // DIRECT_ALIGNMENT) * DIRECT_ALIGNMENT)
+        if not self._writable:
+            os.posix_fadvise(self._fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            # Снимок кэша до чтения: опережающее чтение загружает страницы следующих блоков, и проверка перед
+            # каждым блоком приняла бы их за страницы сервера
+            self._resident = resident_pages(self._fd, 0, self._size)
+
+    def _disable_direct(self) -> None:
+        """Снимает `O_DIRECT` для невыровненных операций."""
+        if self.direct:
+            from fcntl import fcntl, F_GETFL, F_SETFL
+
+            fcntl(self._fd, F_SETFL, fcntl(self._fd, F_GETFL) & ~os.O_DIRECT)
+            self.direct = False
+
+    def _drop_loaded_pages(self, offset: int, length: int) -> None:
+        """
+        Выгружает из кэша страницы диапазона, которых в нем не было при открытии файла.
+
+        :param offset: Смещение начала диапазона (байт).
+        :param length: Длина диапазона (байт).
+        """
+        if self._resident is None:
+            os.posix_fadvise(self._fd, offset, length, os.POSIX_FADV_DONTNEED)
+            return
+        first_page, end_page = offset // PAGESIZE, -(-(offset + length) // PAGESIZE)
+        before = self._resident[first_page:end_page]
+        # Файл мог вырасти после открытия: страниц за концом снимка в кэше не было
+        before += b'\x00' * (end_page - first_page - len(before))
+        start = first_page * PAGESIZE
+        for match in re_finditer(b'\x00+', before):
+            os.posix_fadvise(
+                self._fd, start + match.start() * PAGESIZE, (match.end() - match.start()) * PAGESIZE,
+                os.POSIX_FADV_DONTNEED)
+
+    def seek(self, offset: int) -> int:
+        if offset % DIRECT_ALIGNMENT:
+            self._disable_direct()
+        self._position = offset
+        self._dropped = min(self._dropped, offset)
+        return offset
+
+    def read(self, size: int) -> bytes:
+        if self.direct and size % DIRECT_ALIGNMENT == 0 and size <= len(self._buffer):
+            view = memoryview(self._buffer)[:size]
+            try:
+                read = os.preadv(self._fd, [view], self._position)
+                data = bytes(view[:read])
+            finally:
+                view.release()
+        else:
+            self._disable_direct()
+            data = os_pread(self._fd, size, self._position)
+            if data:
+                self._drop_loaded_pages(self._position, len(data))
+        self._position += len(data)
+        return data
+
+    def write(self, data: Union[bytes, bytearray, memoryview]) -> int:
+        size = len(data)
+        if self.direct and size % DIRECT_ALIGNMENT == 0 and size <= len(self._buffer):
+            self._buffer[:size] = data
+            view = memoryview(self._buffer)[:size]
+            try:
+                written = 0
+                while written < size:
+                    written += os.pwritev(self._fd, [view[written:]], self._position + written)
+            finally:
+                view.release()
+        else:
+            self._disable_direct()
+            written = 0
+            while written < size:
+                written += os_pwrite(self._fd, data[written:], self._position + written)
+        self._position += size
+        if self._position - self._dropped >= WRITE_DROP_INTERVAL:
+            self._drop_written()
+        return size
+
+    def _drop_written(self) -> None:
+        """Сбрасывает записанные данные на диск и выгружает их из кэша (грязные страницы выгрузить нельзя)."""
+        if self._position > self._dropped:
+            os.fdatasync(self._fd)
+            os.posix_fadvise(self._fd, self._dropped, self._position - self._dropped, os.POSIX_FADV_DONTNEED)
+            self._dropped = self._position
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def flush(self) -> None:
+        # Данные пишутся без буфера процесса и уже находятся в кэше ОС (или на диске при O_DIRECT)
+        pass
+
+    def truncate(self) -> int:
+        os_ftruncate(self._fd, self._position)
+        return self._position
+
+    def close(self) -> None:
+        if self._fd < 0:
+            return
+        try:
+            if self._writable:
+                self._drop_written()
+        finally:
+            os_close(self._fd)
+            self._fd = -1
+            if self._buffer is not None:
+                self._buffer.close()
+                self._buffer = None
+
+    def __enter__(self) -> 'BulkFile':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class AsyncBulkFile:
+    """
+    Асинхронная обертка `BulkFile` с интерфейсом aiofiles (`async with`, `await read(...)` и т.д.): операции
+    выполняются в рабочем потоке.
+    """
+
+    def __init__(self, path: str, mode: str, io_mode: str, buffer_size: int) -> None:
+        self._args = (path, mode, io_mode, buffer_size)
+        self._file: Optional[BulkFile] = None
+
+    async def __aenter__(self) -> 'AsyncBulkFile':
+        self._file = await to_thread(BulkFile, *self._args)
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await to_thread(self._file.close)
+
+    async def read(self, size: int) -> bytes:
+        return await to_thread(self._file.read, size)
+
+    async def write(self, data: bytes) -> int:
+        return await to_thread(self._file.write, data)
+
+    async def seek(self, offset: int) -> int:
+        return self._file.seek(offset)
+
+    async def flush(self) -> None:
+        self._file.flush()
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    async def truncate(self) -> int:
+        return await to_thread(self._file.truncate)
+
+
+def open_bulk(path: str, mode: str = 'rb', io_mode: str = 'buffered', buffer_size: int = 8 * 1024 ** 2) -> BinaryIO:
+    """
+    Открывает файл для массового чтения или записи (в рабочем потоке).
+
+    :param path: Путь к файлу.
+    :param mode: 'rb', 'wb' или 'r+b'.
+    :param io_mode: Режим ввода-вывода (`resolve_io_mode`).
+    :param buffer_size: Наибольший размер блока (байт), для буфера O_DIRECT.
+    :return: Файл (`BulkFile` или обычный файл для 'buffered').
+    """
+    if io_mode == 'buffered':
+        return open(path, mode)
+    return BulkFile(path, mode, io_mode, buffer_size)
+
+
+def aio_open_bulk(path: str, mode: str = 'rb', io_mode: str = 'buffered', buffer_size: int = 8 * 1024 ** 2) -> Any:
+    """
+    Открывает файл для массового чтения или записи в цикле событий (`async with`).
+
+    :param path: Путь к файлу.
+    :param mode: 'rb', 'wb' или 'r+b'.
+    :param io_mode: Режим ввода-вывода (`resolve_io_mode`).
+    :param buffer_size: Наибольший размер блока (байт), для буфера O_DIRECT.
+    :return: Асинхронный файл (aiofiles для 'buffered', иначе `AsyncBulkFile`).
+    """
+    if io_mode == 'buffered':
+        return aio_open(path, mode)
+    return AsyncBulkFile(path, mode, io_mode, buffer_size)
@@ -0,0 +1,371 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+from json import dumps as json_dumps, loads as json_loads
+from mmap import mmap, ACCESS_READ
+from os import path as os_path, remove as os_remove, replace as os_replace
+from struct import Struct
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterator, Pattern, Tuple, BinaryIO
+
+from planner import collect_backups
+
+
+FORMATS: Tuple[str, ...] = ('', 'zip', '7z')
+MAGIC: bytes = b'SLSCAT1\x00'
+NAME_SIZE: int = 64
+
+_HEADER = Struct('<8sI4x')
+# Имя БД, дата копии (YYYYMMDDHHMM), размер, формат, смещение и длина относительного пути в блоке строк.
+# Порядок байт big-endian: ключ (имя БД, дата) сравнивается побайтно прямо в отображенном файле
+_RECORD = Struct(f'>{NAME_SIZE}sQqBIH')
+_KEY = Struct(f'>{NAME_SIZE}sQ')
+
+
+def _encode_name(db_name: str) -> bytes:
+    """Кодирует имя БД в поле фиксированной длины (сортируемое побайтно)."""
+    return db_name.encode('utf-8')[:NAME_SIZE].ljust(NAME_SIZE, b'\x00')
+
+
+def _encode_timestamp(timestamp: datetime) -> int:
+    """Кодирует дату копии в сортируемое целое YYYYMMDDHHMM (без учета часового пояса)."""
+    return int(timestamp.strftime('%Y%m%d%H%M'))
+
+
+def _decode_timestamp(value: int) -> datetime:
+    """Декодирует дату копии из целого YYYYMMDDHHMM."""
+    date_part, minute = divmod(value, 100)
+    date_part, hour = divmod(date_part, 100)
+    date_part, day = divmod(date_part, 100)
+    year, month = divmod(date_part, 100)
+    return datetime(year, month, day, hour, minute)
+
+
+def _format_of(file_path: str) -> str:
+    """Возвращает формат копии по расширению: 'zip', '7z' или '' для копии без архива."""
+    extension = os_path.splitext(file_path)[1].lower().lstrip('.')
+    return extension if extension in FORMATS else ''
+
+
+class BackupCatalog:
+    """
+    Каталог резервных копий: компактный отсортированный индекс (имя БД, дата, размер, путь, формат).
+
+    Индекс хранится в файле `<FILES_BACKUP_DIR>/.catalog.idx` (заголовок, записи фиксированной длины,
+    отсортированные по имени БД и дате, и блок строк с относительными путями) и отображается в память,
+    поэтому выборки по БД и диапазону дат выполняются двоичным поиском без чтения всего файла. Изменения
+    текущего запуска дописываются в журнал `.catalog.log` и накладываются на индекс при чтении; `compact()`
+    сливает их в новый индекс.
+
+    :ivar backup_dir (str): Корневой каталог резервных копий.
+    :ivar index_path (str): Путь к файлу индекса.
+    :ivar log_path (str): Путь к журналу изменений.
+    """
+
+    def __init__(self, backup_dir: str) -> None:
+        self.backup_dir: str = backup_dir
+        self.index_path: str = os_path.join(backup_dir, '.catalog.idx')
+        self.log_path: str = os_path.join(backup_dir, '.catalog.log')
+        self._file: Optional[BinaryIO] = None
+        self._map: Optional[mmap] = None
+        self._count: int = 0
+        self._strings_offset: int = 0
+        self._valid: bool = False
+        self._added: Dict[str, Dict[str, Any]] = {}
+        self._removed: set = set()
+
+    def exists(self) -> bool:
+        """Возвращает True, если индекс каталога построен (файл индекса существует и имеет верный формат)."""
+        return self._valid
+
+    def open(self) -> 'BackupCatalog':
+        """Отображает индекс в память и загружает журнал изменений."""
+        self.close()
+        if os_path.exists(self.index_path):
+            self._file = open(self.index_path, 'rb')
+            header = self._file.read(_HEADER.size)
+            if len(header) == _HEADER.size:
+                magic, count = _HEADER.unpack(header)
+                self._valid = magic == MAGIC
+                if self._valid and count:
+                    self._map = mmap(self._file.fileno(), 0, access=ACCESS_READ)
+                    self._count = count
+                    self._strings_offset = _HEADER.size + count * _RECORD.size
+        self._load_log()
+        return self
+
+    def close(self) -> None:
+        """Закрывает отображение индекса (на Windows без этого файл индекса нельзя заменить)."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._count = 0
+        self._valid = False
+        self._added.clear()
+        self._removed.clear()
+
+    def __enter__(self) -> 'BackupCatalog':
+        return self.open()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # Запросы
+
+    def list(
+            self, db_name: Optional[str] = None, start: Optional[datetime] = None,
+            end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Возвращает копии, отсортированные по имени БД и дате.
+
+        :param db_name: Имя БД; None - все БД.
+        :param start: Начало диапазона дат (включительно).
+        :param end: Конец диапазона дат (включительно).
+        :return: Список копий с ключами 'db', 'timestamp', 'size', 'path', 'format'.
+        """
+        entries = list(self._iter_index(db_name, start, end))
+        for relative_path, entry in self._added.items():
+            if db_name is not None and entry['db'] != db_name:
+                continue
+            if (start is not None and entry['timestamp'] < start) or (end is not None and entry['timestamp'] > end):
+                continue
+            entries.append(self._with_absolute_path(entry))
+        if self._added:
+            entries.sort(key=lambda item: (_encode_name(item['db']), item['timestamp']))
+        return entries
+
+    def latest(self, db_name: str, at: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает самую новую копию БД не новее `at` (архив предпочтительнее копии без архива той же даты).
+
+        Индекс читается с конца диапазона БД, поэтому декодируются только записи с самой новой датой.
+
+        :param db_name: Имя БД.
+        :param at: Момент времени; None - самая новая копия.
+        :return: Копия или None.
+        """
+        candidates = [
+            self._with_absolute_path(entry) for entry in self._added.values()
+            if entry['db'] == db_name and (at is None or entry['timestamp'] <= at)]
+        if self._map is not None:
+            first, last = self._range(db_name, None, at)
+            newest = None
+            for index in range(last - 1, first - 1, -1):
+                entry = self._read_record(index)
+                if newest is not None and entry['timestamp'] < newest:
+                    break
+                if not self._is_visible(entry, db_name):
+                    continue
+                newest = entry['timestamp']
+                candidates.append(self._with_absolute_path(entry))
+        if not candidates:
+            return None
+        return max(candidates, key=lambda item: (item['timestamp'], item['format'] != ''))
+
+    def databases(self) -> List[str]:
+        """Возвращает отсортированный список имен БД в каталоге."""
+        return sorted({entry['db'] for entry in self.list()})
+
+    # Изменения
+
+    def add(self, file_path: str, db_name: str, timestamp: datetime, size: int) -> None:
+        """
+        Добавляет копию в каталог (запись в журнал изменений).
+
+        :param file_path: Путь к файлу копии.
+        :param db_name: Имя БД.
+        :param timestamp: Дата копии (из имени файла).
+        :param size: Размер файла (байт).
+        """
+        relative_path = os_path.relpath(file_path, self.backup_dir)
+        record = {'op': 'add', 'path': relative_path, 'db': db_name, 'ts': _encode_timestamp(timestamp), 'size': size}
+        self._apply(record)
+        self._append_log(record)
+
+    def remove(self, file_path: str) -> None:
+        """Удаляет копию из каталога (запись в журнал изменений)."""
+        record = {'op': 'remove', 'path': os_path.relpath(file_path, self.backup_dir)}
+        self._apply(record)
+        self._append_log(record)
+
+    def compact(self) -> None:
+        """Сливает журнал изменений с индексом в новый индекс (атомарная замена файла)."""
+        if not self._added and not self._removed and self.exists():
+            return
+        entries = self.list()
+        self.close()
+        self._write_index(entries)
+        if os_path.exists(self.log_path):
+            os_remove(self.log_path)
+        self.open()
+
+    def rebuild(self, pattern: Pattern) -> int:
+        """
+        Строит каталог заново обходом дерева резервных копий.
+
+        :param pattern: Регулярное выражение с группой даты копии в формате '%Y.%m.%d_%H.%M'.
+        :return: Количество копий в каталоге.
+        """
+        entries = []
+        for backup in collect_backups(self.backup_dir, pattern):
+            backup['format'] = _format_of(backup['path'])
+            entries.append(backup)
+        entries.sort(key=lambda item: (_encode_name(item['db']), item['timestamp']))
+        self.close()
+        self._write_index(entries)
+        if os_path.exists(self.log_path):
+            os_remove(self.log_path)
+        self.open()
+        return len(entries)
+
+    # Внутренние методы
+
+    def _bisect(self, key: bytes) -> int:
+        """Возвращает индекс первой записи с ключом (имя, дата) не меньше `key`."""
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            offset = _HEADER.size + middle * _RECORD.size
+            if self._map[offset:offset + _KEY.size] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _range(self, db_name: str, start: Optional[datetime], end: Optional[datetime]) -> Tuple[int, int]:
+        """Возвращает границы [first, last) записей БД в диапазоне дат (двоичный поиск)."""
+        name = _encode_name(db_name)
+        first = self._bisect(_KEY.pack(name, _encode_timestamp(start) if start else 0))
+        last = self._bisect(_KEY.pack(name, _encode_timestamp(end) + 1 if end else 2 ** 64 - 1))
+        return first, last
+
+    def _is_visible(self, entry: Dict[str, Any], db_name: Optional[str]) -> bool:
+        """Проверяет, что запись индекса не перекрыта журналом изменений и относится к БД `db_name`."""
+        if entry['relative_path'] in self._removed or entry['relative_path'] in self._added:
+            return False
+        # Ключ индекса совпадает только по усеченному до NAME_SIZE байт имени
+        return db_name is None or entry['db'] == db_name
+
+    def _iter_index(
+            self, db_name: Optional[str], start: Optional[datetime], end: Optional[datetime]
+    ) -> Iterator[Dict[str, Any]]:
+        """Перебирает записи индекса в диапазоне (двоичный поиск начала и конца диапазона)."""
+        if self._map is None:
+            return
+        first, last = (0, self._count) if db_name is None else self._range(db_name, start, end)
+        for index in range(first, last):
+            entry = self._read_record(index)
+            if db_name is None and (
+                    (start is not None and entry['timestamp'] < start) or (end is not None and entry['timestamp'] > end)):
+                continue
+            if self._is_visible(entry, db_name):
+                yield self._with_absolute_path(entry)
+
+    def _read_record(self, index: int) -> Dict[str, Any]:
+        """Читает запись индекса по номеру."""
+        name, timestamp, size, fmt, path_offset, path_length = _RECORD.unpack_from(
+            self._map, _HEADER.size + index * _RECORD.size)
+        start = self._strings_offset + path_offset
+        relative_path = self._map[start:start + path_length].decode('utf-8')
+        db_name = relative_path.replace('\\', '/').split('/', 1)[0]
+        return {
+            'db': db_name, 'timestamp': _decode_timestamp(timestamp), 'size': size,
+            'relative_path': relative_path, 'format': FORMATS[fmt]}
+
+    def _with_absolute_path(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Возвращает копию записи с абсолютным путем в ключе 'path'."""
+        result = {key: value for key, value in entry.items() if key != 'relative_path'}
+        result['path'] = os_path.join(self.backup_dir, entry['relative_path'])
+        return result
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        """Применяет запись журнала изменений к наложению поверх индекса."""
+        relative_path = record['path']
+        if record['op'] == 'add':
+            self._removed.discard(relative_path)
+            self._added[relative_path] = {
+                'db': record['db'], 'timestamp': _decode_timestamp(record['ts']), 'size': record['size'],
+                'relative_path': relative_path, 'format': _format_of(relative_path)}
+        elif record['op'] == 'remove':
+            self._added.pop(relative_path, None)
+            self._removed.add(relative_path)
+
+    def _append_log(self, record: Dict[str, Any]) -> None:
+        """Дописывает запись в журнал изменений."""
+        with open(self.log_path, 'a', encoding='utf-8') as log_file:
+            log_file.write(json_dumps(record, ensure_ascii=False) + '\n')
+
+    def _load_log(self) -> None:
+        """Загружает журнал изменений, накопленный с последнего слияния."""
+        try:
+            with open(self.log_path, 'r', encoding='utf-8') as log_file:
+                for line in log_file:
+                    try:
+                        self._apply(json_loads(line))
+                    except (ValueError, KeyError):
+                        continue
+        except FileNotFoundError:
+            pass
+
+    def _write_index(self, entries: List[Dict[str, Any]]) -> None:
+        """Записывает отсортированные записи в новый файл индекса и атомарно заменяет старый."""
+        records, strings = bytearray(), bytearray()
+        for entry in entries:
+            relative_path = os_path.relpath(entry['path'], self.backup_dir).encode('utf-8')
+            records += _RECORD.pack(
+                _encode_name(entry['db']), _encode_timestamp(entry['timestamp']), entry['size'],
+                FORMATS.index(entry.get('format') or _format_of(entry['path'])), len(strings), len(relative_path))
+            strings += relative_path
+        tmp_path = f'{self.index_path}.tmp'
+        with open(tmp_path, 'wb') as index_file:
+            index_file.write(_HEADER.pack(MAGIC, len(entries)))
+            index_file.write(records)
+            index_file.write(strings)
+        os_replace(tmp_path, self.index_path)
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+    from re import compile as re_compile
+    from time import perf_counter
+
+    from config import Config
+
+    parser = ArgumentParser(description='Query the backup catalog.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    list_parser = subparsers.add_parser('list', help='List backups of a database (or all databases).')
+    list_parser.add_argument('db', nargs='?', help='Database name.')
+    list_parser.add_argument('--from', dest='start', help='Range start "YYYY.MM.DD_HH.MM".')
+    list_parser.add_argument('--to', dest='end', help='Range end "YYYY.MM.DD_HH.MM".')
+    subparsers.add_parser('dbs', help='List database names.')
+    subparsers.add_parser('rebuild', help='Rebuild the catalog from the backup tree.')
+    args = parser.parse_args()
+
+    files_backup_dir = Config().get_config('files')['files_backup_dir']
+    with BackupCatalog(files_backup_dir) as catalog:
+        if args.command == 'rebuild' or not catalog.exists():
+            count = catalog.rebuild(re_compile(r'_(\d{4}\.\d{2}\.\d{2}_\d{2}\.\d{2})'))
+            print(f'{count} backup(s) indexed in "{catalog.index_path}".')
+        if args.command == 'dbs':
+            print('\n'.join(catalog.databases()))
+        elif args.command == 'list':
+            query_started = perf_counter()
+            result = catalog.list(
+                args.db,
+                datetime.strptime(args.start, '%Y.%m.%d_%H.%M') if args.start else None,
+                datetime.strptime(args.end, '%Y.%m.%d_%H.%M') if args.end else None)
+            query_ms = (perf_counter() - query_started) * 1000
+            for item in result:
+                print(f"{item['db']}\t{item['timestamp']:%Y.%m.%d_%H.%M}\t{item['size']}\t{item['format'] or '-'}\t"
+                      f"{item['path']}")
+            print(f'{len(result)} backup(s), query {query_ms:.3f} ms.')
@@ -7,12 +7,11 @@
 # __status__ = 'Development'  # 'Production / Development'
 # __version__ = '1.0.5.0'
 
-from os import getenv
-from typing import Dict, Any
+from os import getenv as os_getenv
+from typing import Dict, Any, Callable, Optional
 
 # from os.path import join as os_join
 # from decouple import __config
-from dotenv import load_dotenv
 from datetime import datetime as dt
 import logging
 
@@ -41,16 +40,59 @@ class Config:
         if not hasattr(self, '_initialized'):
             self._initialized = True  # Устанавливаем флаг инициализации
             logging.info('Загрузка переменных окружения из файла .env')
+            # python-dotenv импортируется при первом создании конфигурации, а не при импорте модуля
+            from dotenv import load_dotenv
+
             load_dotenv()
             self._current_date = dt.now()
             self._env = self._load_env()
+            self._instances: Dict[str, Dict[str, Any]] = {}
+    
+    def reload(self, read_dotenv: bool = True) -> None:
+        """
+        Перечитывает конфигурацию без перезапуска процесса (режим службы, см. `daemon.py`).
+
+        Пути с шаблонами даты (`LOG_DIR`, `LOG_FILE`) пересчитываются на текущую дату.
+
+        :param read_dotenv: Перечитать файл .env; его значения заменяют загруженные ранее.
+        """
+        if read_dotenv:
+            from dotenv import load_dotenv
+
+            logging.info('Повторная загрузка переменных окружения из файла .env')
+            load_dotenv(override=True)
+        self._current_date = dt.now()
+        self._env = self._load_env()
+        self._instances = {}
+    
+    @staticmethod
+    def _get_instance_getenv(instance: Optional[str]) -> Callable[..., Optional[str]]:
+        """
+        Возвращает функцию чтения переменной окружения для профиля экземпляра.
+
+        Переменная `<ЭКЗЕМПЛЯР>__<ПАРАМЕТР>` (например, `BRANCH2__FILES_DIR`) заменяет общий параметр; параметры,
+        не заданные для экземпляра, берутся из общего блока.
+
+        :param instance: Имя экземпляра; None - общий блок.
+        :return: Функция с сигнатурой `os.getenv`.
+        """
+        if instance is None:
+            return os_getenv
+        prefix = f'{instance.upper()}__'
+
+        def getenv(key: str, default: Optional[str] = None) -> Optional[str]:
+            value = os_getenv(prefix + key)
+            return os_getenv(key, default) if value is None else value
+        return getenv
     
-    def _load_env(self) -> Dict[str, Any]:
+    def _load_env(self, instance: Optional[str] = None) -> Dict[str, Any]:
         """
         Загрузка переменных окружения из файла .env.
 
+        :param instance: Имя экземпляра сервера (см. `ORCHESTRATOR_INSTANCES`); None - общий блок параметров.
         :return: Возвращает словарь с параметрами из файла .env.
         """
+        getenv = self._get_instance_getenv(instance)
         current_date = self._current_date
         try:
             return {
@@ -66,18 +108,148 @@ class Config:
                 'FILES_EXTENSIONS': [ext.strip() for ext in getenv('FILES_EXTENSIONS', '.DBX').split(',')],
                 'FILES_IN_USE_EXTENSIONS': [
                     ext.strip() for ext in getenv('FILES_IN_USE_EXTENSIONS', '.PRE').split(',')],
+                # Занятые клиентами БД повторно проверяются во время копирования: первый и максимальный интервал
+                # проверки (сек, интервал удваивается) и максимальное ожидание одной БД (сек, 0 - не ожидать; только
+                # при заданном FILES_MAX_DOWNTIME_SECONDS)
+                'FILES_IN_USE_RETRY_SECONDS': (
+                    float(getenv('FILES_IN_USE_RETRY_SECONDS')) if getenv(
+                        'FILES_IN_USE_RETRY_SECONDS', '').replace('.', '', 1).isdigit() else 2.0),
+                'FILES_IN_USE_RETRY_MAX_SECONDS': (
+                    float(getenv('FILES_IN_USE_RETRY_MAX_SECONDS')) if getenv(
+                        'FILES_IN_USE_RETRY_MAX_SECONDS', '').replace('.', '', 1).isdigit() else 30.0),
+                'FILES_IN_USE_WAIT_SECONDS': (
+                    float(getenv('FILES_IN_USE_WAIT_SECONDS')) if getenv(
+                        'FILES_IN_USE_WAIT_SECONDS', '').replace('.', '', 1).isdigit() else 600.0),
                 'FILES_IGNORE_BACKUP_FILES': getenv('FILES_IGNORE_BACKUP_FILES', 'False').lower() in ('true', '1'),
                 'FILES_MIN_REQUIRED_SPACE_GB': (
                     float(getenv('FILES_MIN_REQUIRED_SPACE_GB', '10')) if getenv(
                         'FILES_MIN_REQUIRED_SPACE_GB', '').replace('.', '', 1).isdigit() else 10.0),
                 'FILES_ARCHIVE_FORMAT': getenv('FILES_ARCHIVE_FORMAT', 'zip'),
                 'FILES_7Z_PATH': getenv('FILES_7Z_PATH', r'c:\Program Files\7-Zip\7z'),
+                'FILES_PREALLOCATE': getenv('FILES_PREALLOCATE', 'True').lower() in ('true', '1'),
+                # Сброс записанных копий, хэш-файлов и архивов на диск: 'none', 'batch' (пакетом в конце фазы, вне
+                # окна простоя) или 'strict' (каждый файл); объем несброшенных архивов, при котором пакет сбрасывается
+                # до конца фазы (МБ)
+                'FILES_DURABILITY': getenv('FILES_DURABILITY', 'batch').lower(),
+                'FILES_DURABILITY_BATCH_MB': (
+                    float(getenv('FILES_DURABILITY_BATCH_MB')) if getenv(
+                        'FILES_DURABILITY_BATCH_MB', '').replace('.', '', 1).isdigit() else 1024.0),
+                # Ввод-вывод при копировании, хэшировании и архивации: 'buffered', 'fadvise' (без вытеснения
+                # страничного кэша сервера) или 'direct' (O_DIRECT)
+                'FILES_IO_MODE': getenv('FILES_IO_MODE', 'buffered').lower(),
+                # Каталог резервных копий на сетевом ресурсе: 'auto' (определяется по пути), 'on' или 'off';
+                # количество одновременных запросов на файл и размер запроса (МБ)
+                'FILES_NETWORK_MODE': getenv('FILES_NETWORK_MODE', 'auto').lower(),
+                'FILES_NETWORK_DEPTH':
+                    int(getenv('FILES_NETWORK_DEPTH')) if getenv('FILES_NETWORK_DEPTH', '').isdigit() else 4,
+                'FILES_NETWORK_CHUNK_MB': (
+                    float(getenv('FILES_NETWORK_CHUNK_MB', '8')) if getenv(
+                        'FILES_NETWORK_CHUNK_MB', '').replace('.', '', 1).isdigit() else 8.0),
+                'FILES_RESTORE_PARALLEL':
+                    int(getenv('FILES_RESTORE_PARALLEL')) if getenv('FILES_RESTORE_PARALLEL', '').isdigit() else 2,
+                # Проверка целостности архивов после архивации: бюджет за запуск (0 - проверка не выполняется)
+                'FILES_VERIFY_TIME_BUDGET_SECONDS':
+                    int(getenv('FILES_VERIFY_TIME_BUDGET_SECONDS')) if getenv(
+                        'FILES_VERIFY_TIME_BUDGET_SECONDS', '').isdigit() else 0,
+                'FILES_VERIFY_IO_BUDGET_GB': (
+                    float(getenv('FILES_VERIFY_IO_BUDGET_GB')) if getenv(
+                        'FILES_VERIFY_IO_BUDGET_GB', '').replace('.', '', 1).isdigit() else 0.0),
+                'FILES_VERIFY_WORKERS':
+                    int(getenv('FILES_VERIFY_WORKERS')) if getenv('FILES_VERIFY_WORKERS', '').isdigit() else 2,
+                # Максимальное окно простоя сервера (сек); 0 - без ограничения
+                'FILES_MAX_DOWNTIME_SECONDS':
+                    int(getenv('FILES_MAX_DOWNTIME_SECONDS')) if getenv(
+                        'FILES_MAX_DOWNTIME_SECONDS', '').isdigit() else 0,
+                'FILES_DEFAULT_THROUGHPUT_MBPS': (
+                    float(getenv('FILES_DEFAULT_THROUGHPUT_MBPS')) if getenv(
+                        'FILES_DEFAULT_THROUGHPUT_MBPS', '').replace('.', '', 1).isdigit() else 50.0),
+                # Статистика запусков: окно сравнения и минимум запусков для поиска регрессий
+                'FILES_STATS_WINDOW':
+                    int(getenv('FILES_STATS_WINDOW')) if getenv('FILES_STATS_WINDOW', '').isdigit() else 30,
+                'FILES_STATS_MIN_RUNS':
+                    int(getenv('FILES_STATS_MIN_RUNS')) if getenv('FILES_STATS_MIN_RUNS', '').isdigit() else 5,
                 # 'FILES_PATH_SEPARATOR': getenv('FILES_PATH_SEPARATOR', ' '),
                 
                 'MSG_LANGUAGE': getenv('MSG_LANGUAGE', 'en').lower(),
                 
+                # Метрики запуска: файл для textfile-коллектора Prometheus (относительный путь - от LOG_DIR)
+                'METRICS_ENABLED': getenv('METRICS_ENABLED', 'True').lower() in ('true', '1'),
+                'METRICS_TEXTFILE': getenv('METRICS_TEXTFILE', 'sls_backup.prom'),
+                
+                # Режим службы (daemon.py): расписания фаз в формате cron ('' - фаза по расписанию не выполняется)
+                'DAEMON_SCHEDULE_BACKUP': getenv('DAEMON_SCHEDULE_BACKUP', '0 2 * * *'),
+                'DAEMON_SCHEDULE_ARCHIVE': getenv('DAEMON_SCHEDULE_ARCHIVE', ''),
+                'DAEMON_SCHEDULE_RETENTION': getenv('DAEMON_SCHEDULE_RETENTION', ''),
+                'DAEMON_SCHEDULE_VERIFY': getenv('DAEMON_SCHEDULE_VERIFY', ''),
+                'DAEMON_SCHEDULE_REPLICATE': getenv('DAEMON_SCHEDULE_REPLICATE', ''),
+                
+                # Репликация архивов и хэш-файлов: цели через запятую - каталоги и s3://бакет/префикс ('' - не
+                # выполняется), количество одновременных передач и скорость передачи на каждую цель (МБ/с, 0 - без
+                # ограничения)
+                'REPLICATION_TARGETS': [
+                    target.strip() for target in getenv('REPLICATION_TARGETS', '').split(',') if target.strip()],
+                'REPLICATION_PARALLEL':
+                    int(getenv('REPLICATION_PARALLEL')) if getenv('REPLICATION_PARALLEL', '').isdigit() else 2,
+                'REPLICATION_BANDWIDTH_MBPS': (
+                    float(getenv('REPLICATION_BANDWIDTH_MBPS')) if getenv(
+                        'REPLICATION_BANDWIDTH_MBPS', '').replace('.', '', 1).isdigit() else 0.0),
+                # Zip-архивы передаются на цели во время сжатия, а не после создания
+                'REPLICATION_STREAM_ARCHIVES':
+                    getenv('REPLICATION_STREAM_ARCHIVES', 'True').lower() in ('true', '1'),
+                
+                # Хранилище S3 (цели s3:// репликации): адрес S3-совместимого сервера ('' - AWS), регион, размер части
+                # составной загрузки (МБ), количество одновременно загружаемых частей и размер пула соединений.
+                # Учетные данные - стандартные для boto3 (AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY, профиль AWS)
+                'STORAGE_S3_ENDPOINT_URL': getenv('STORAGE_S3_ENDPOINT_URL', ''),
+                'STORAGE_S3_REGION': getenv('STORAGE_S3_REGION', ''),
+                'STORAGE_S3_PART_SIZE_MB': (
+                    float(getenv('STORAGE_S3_PART_SIZE_MB')) if getenv(
+                        'STORAGE_S3_PART_SIZE_MB', '').replace('.', '', 1).isdigit() else 8.0),
+                'STORAGE_S3_CONCURRENCY':
+                    int(getenv('STORAGE_S3_CONCURRENCY')) if getenv('STORAGE_S3_CONCURRENCY', '').isdigit() else 4,
+                'STORAGE_S3_MAX_CONNECTIONS': (
+                    int(getenv('STORAGE_S3_MAX_CONNECTIONS')) if getenv(
+                        'STORAGE_S3_MAX_CONNECTIONS', '').isdigit() else 10),
+                
+                # Несколько экземпляров сервера (orchestrator.py): имена профилей через запятую, число одновременных
+                # экземпляров на одном физическом устройстве (0 - без ограничения) и интервал между остановками (сек)
+                'ORCHESTRATOR_INSTANCES': [
+                    name.strip() for name in getenv('ORCHESTRATOR_INSTANCES', '').split(',') if name.strip()],
+                'ORCHESTRATOR_DEVICE_PARALLEL':
+                    int(getenv('ORCHESTRATOR_DEVICE_PARALLEL')) if getenv(
+                        'ORCHESTRATOR_DEVICE_PARALLEL', '').isdigit() else 2,
+                'ORCHESTRATOR_STOP_STAGGER_SECONDS': (
+                    float(getenv('ORCHESTRATOR_STOP_STAGGER_SECONDS')) if getenv(
+                        'ORCHESTRATOR_STOP_STAGGER_SECONDS', '').replace('.', '', 1).isdigit() else 0.0),
+                
+                # Ограничитель ресурсов фоновых фаз (архивация и проверка архивов после запуска сервера): скорость
+                # чтения (МБ/с, 0 - без ограничения), минимальная скорость и целевая задержка дисков (мс, 0 - скорость
+                # не подстраивается), пониженный приоритет рабочих потоков и процессов 7z
+                'GOVERNOR_ENABLED': getenv('GOVERNOR_ENABLED', 'False').lower() in ('true', '1'),
+                'GOVERNOR_IO_RATE_MBPS': (
+                    float(getenv('GOVERNOR_IO_RATE_MBPS')) if getenv(
+                        'GOVERNOR_IO_RATE_MBPS', '').replace('.', '', 1).isdigit() else 50.0),
+                'GOVERNOR_MIN_IO_RATE_MBPS': (
+                    float(getenv('GOVERNOR_MIN_IO_RATE_MBPS')) if getenv(
+                        'GOVERNOR_MIN_IO_RATE_MBPS', '').replace('.', '', 1).isdigit() else 5.0),
+                'GOVERNOR_LATENCY_TARGET_MS': (
+                    float(getenv('GOVERNOR_LATENCY_TARGET_MS')) if getenv(
+                        'GOVERNOR_LATENCY_TARGET_MS', '').replace('.', '', 1).isdigit() else 50.0),
+                'GOVERNOR_SAMPLE_SECONDS': (
+                    float(getenv('GOVERNOR_SAMPLE_SECONDS')) if getenv(
+                        'GOVERNOR_SAMPLE_SECONDS', '').replace('.', '', 1).isdigit() else 1.0),
+                'GOVERNOR_LOW_PRIORITY': getenv('GOVERNOR_LOW_PRIORITY', 'True').lower() in ('true', '1'),
+                
+                # Ход выполнения: строка в консоли и локальный адрес состояния ('' - не запускать)
+                'PROGRESS_CONSOLE': getenv('PROGRESS_CONSOLE', 'False').lower() in ('true', '1'),
+                'PROGRESS_STATUS_ADDRESS': getenv('PROGRESS_STATUS_ADDRESS', ''),
+                'PROGRESS_INTERVAL_SECONDS': (
+                    float(getenv('PROGRESS_INTERVAL_SECONDS')) if getenv(
+                        'PROGRESS_INTERVAL_SECONDS', '').replace('.', '', 1).isdigit() else 1.0),
+                
                 'LOG_DIR': current_date.strftime(getenv('LOG_DIR', r'logs\%Y\%Y.%m')),
                 'LOG_FILE': current_date.strftime(getenv('LOG_FILE', 'backup_log_%Y.%m.%d.log')),
+                'LOG_REPORT_FILE': getenv('LOG_REPORT_FILE', 'run_report_%Y.%m.%d_%H.%M.%S.json'),
                 'LOG_LEVEL_ROOT': getenv('LOG_LEVEL_ROOT', 'INFO').upper(),
                 'LOG_LEVEL_CONSOLE': getenv('LOG_LEVEL_CONSOLE', 'INFO').upper(),
                 'LOG_LEVEL_FILE': getenv('LOG_LEVEL_FILE', 'WARNING').upper(),
@@ -85,23 +257,40 @@ class Config:
                 'LOG_FORMAT_CONSOLE': getenv('LOG_FORMAT_CONSOLE').replace(r'\t', '\t').replace(r'\n', '\n'),
                 'LOG_FORMAT_FILE': getenv('LOG_FORMAT_FILE').replace(r'\t', '\t').replace(r'\n', '\n'),
                 'LOG_DATE_FORMAT': getenv('LOG_DATE_FORMAT', '%Y.%m.%d %H:%M:%S'),  # Default: None
+                # Структурированный журнал JSON Lines (шаблон strftime; относительный путь - от LOG_DIR)
+                'LOG_JSON_ENABLED': getenv('LOG_JSON_ENABLED', 'False').lower() in ('true', '1'),
+                'LOG_JSON_FILE': getenv('LOG_JSON_FILE', 'events_%Y.%m.%d.jsonl'),
+                'LOG_JSON_LEVEL': getenv('LOG_JSON_LEVEL', 'INFO').upper(),
+                # Запись журнала в отдельном потоке через очередь с пакетной записью в файл
+                'LOG_QUEUE': getenv('LOG_QUEUE', 'True').lower() in ('true', '1'),
+                'LOG_FILE_BATCH_SIZE':
+                    int(getenv('LOG_FILE_BATCH_SIZE')) if getenv('LOG_FILE_BATCH_SIZE', '').isdigit() else 100,
+                'LOG_FLUSH_INTERVAL_SECONDS': (
+                    float(getenv('LOG_FLUSH_INTERVAL_SECONDS')) if getenv(
+                        'LOG_FLUSH_INTERVAL_SECONDS', '').replace('.', '', 1).isdigit() else 1.0),
                 'LOG_CONSOLE_LANGUAGE': getenv('MSG_LANGUAGE', 'en').lower(),  # temp
             }
         except (TypeError, ValueError) as e:
             logging.error(e)
             exit()
     
-    def get_config(self, *config_types: str) -> Dict[str, Any]:
+    def get_config(self, *config_types: str, instance: Optional[str] = None) -> Dict[str, Any]:
         """
         Получение конфигурации по указанным типам.
 
         :param config_types: Префиксы для поиска переменных окружения.
+        :param instance: Имя экземпляра сервера: параметры `<ЭКЗЕМПЛЯР>__<ПАРАМЕТР>` заменяют общие.
         :return: Возвращает словарь с параметрами, соответствующими указанным префиксам.
         """
+        env = self._env
+        if instance is not None:
+            if instance not in self._instances:
+                self._instances[instance] = self._load_env(instance)
+            env = self._instances[instance]
         result = {}
         for config_type in config_types:
             result.update(
-                {key.lower(): self._env[key] for key in self._env.keys() if key.startswith(config_type.upper() + '_')})
+                {key.lower(): env[key] for key in env.keys() if key.startswith(config_type.upper() + '_')})
         return result
 
 
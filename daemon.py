@@ -0,0 +1,302 @@
+__author__ = 'InfSub'
+__contact__ = 'ADmin@TkYD.ru'
+__copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+__date__ = '2025/06/01'
+__deprecated__ = False
+__email__ = 'ADmin@TkYD.ru'
+__maintainer__ = 'InfSub'
+__status__ = 'Production'  # 'Production / Development'
+__version__ = '1.0.6.0'
+
+from argparse import ArgumentParser
+from asyncio import (
+    run as aio_run, Event as aio_Event, wait_for as aio_wait_for, TimeoutError as aio_TimeoutError, get_running_loop)
+from datetime import date, datetime, timedelta
+from os import environ
+from time import monotonic
+from typing import Dict, List, Optional, Set, Tuple
+import signal
+
+from backup import BackupManager
+from server import ServerManager
+from report import RunReport
+from config import Config
+from metrics import reset_metrics
+from run import execute
+
+from logger import logging, setup_logger
+
+
+logging = logging.getLogger(__name__)
+
+# Фазы в порядке выполнения, если несколько фаз наступили одновременно
+PHASES: List[str] = ['backup', 'archive', 'retention', 'verify', 'replicate']
+# Максимальный интервал сна: переход часов и выход из спящего режима замечаются не позже чем через минуту
+MAX_SLEEP_SECONDS: float = 60.0
+
+
+class CronSchedule:
+    """
+    Расписание в формате cron: 'минута час день_месяца месяц день_недели' (день недели 0-6, 0 и 7 - воскресенье).
+
+    Поля поддерживают '*', значения, диапазоны 'a-b', списки 'a,b' и шаг '*/n', 'a-b/n'; также допускаются
+    сокращения '@hourly', '@daily', '@weekly', '@monthly'. Если ограничены и день месяца, и день недели, достаточно
+    совпадения одного из них (как в cron).
+
+    :ivar expression (str): Исходное выражение.
+    """
+
+    ALIASES: Dict[str, str] = {
+        '@hourly': '0 * * * *', '@daily': '0 0 * * *', '@midnight': '0 0 * * *', '@weekly': '0 0 * * 0',
+        '@monthly': '0 0 1 * *'}
+    RANGES: List[Tuple[int, int]] = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression: str) -> None:
+        self.expression: str = expression.strip()
+        fields = self.ALIASES.get(self.expression.lower(), self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f'Cron expression must have 5 fields: "{expression}".')
+        self._minutes, self._hours, self._days, self._months, weekdays = (
+            self._parse_field(field, low, high) for field, (low, high) in zip(fields, self.RANGES))
+        self._weekdays: Set[int] = {weekday % 7 for weekday in weekdays}
+        self._any_day: bool = fields[2] == '*'
+        self._any_weekday: bool = fields[4] == '*'
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> Set[int]:
+        """Разбирает поле cron в множество допустимых значений."""
+        values: Set[int] = set()
+        for part in field.split(','):
+            value_range, _, step = part.partition('/')
+            if value_range == '*':
+                start, end = low, high
+            elif '-' in value_range:
+                start, end = (int(value) for value in value_range.split('-', 1))
+            else:
+                start = end = int(value_range)
+                if step:
+                    end = high
+            step_value = int(step) if step else 1
+            if start < low or end > high or start > end or step_value < 1:
+                raise ValueError(f'Invalid cron field "{field}" (allowed {low}-{high}).')
+            values.update(range(start, end + 1, step_value))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        """Проверяет день месяца и день недели."""
+        day = moment.day in self._days
+        weekday = (moment.weekday() + 1) % 7 in self._weekdays
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, moment: datetime) -> datetime:
+        """
+        Возвращает ближайший момент запуска строго после `moment`.
+
+        :param moment: Время отсчета.
+        :return: Время следующего запуска (с точностью до минуты).
+        :raises ValueError: Если выражение не совпадает ни с одной датой (например, '0 0 31 2 *').
+        """
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self._months:
+                month_start = candidate.replace(day=1, hour=0, minute=0)
+                candidate = (month_start + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self._hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self._minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f'Cron expression never matches: "{self.expression}".')
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, CronSchedule) and other.expression == self.expression
+
+    def __repr__(self) -> str:
+        return f"CronSchedule('{self.expression}')"
+
+
+def load_schedules() -> Dict[str, CronSchedule]:
+    """
+    Загружает расписания фаз из `DAEMON_SCHEDULE_<ФАЗА>` (пустое значение - фаза по расписанию не выполняется).
+
+    :return: Расписания по имени фазы.
+    :raises ValueError: Если выражение некорректно.
+    """
+    env = Config().get_config('daemon')
+    schedules: Dict[str, CronSchedule] = {}
+    for phase in PHASES:
+        expression = env.get(f'daemon_schedule_{phase}', '')
+        if expression:
+            schedules[phase] = CronSchedule(expression)
+    return schedules
+
+
+class BackupDaemon:
+    """
+    Служба резервного копирования: выполняет фазы по расписаниям cron в одном процессе.
+
+    В отличие от запуска `run.py` планировщиком ОС, между запусками сохраняются кэши менеджеров: каталог резервных
+    копий, состояние планировщика копирования, статистика запусков, результат проверки 7z и найденные процессы
+    сервера. Фазы выполняются последовательно; пропущенные за время выполнения моменты запуска не накапливаются.
+
+    При смене даты журнал и метрики перенастраиваются на пути с новой датой (`LOG_DIR`, `LOG_FILE`), по сигналу
+    SIGHUP перечитывается .env без перезапуска процесса. SIGINT и SIGTERM завершают службу после текущей фазы,
+    чтобы сервер не остался остановленным. Переключение происходит между фазами: фаза, начатая до полуночи, пишет
+    журнал в файл прежней даты.
+
+    :ivar schedules (Dict[str, CronSchedule]): Расписания фаз.
+    :ivar next_runs (Dict[str, datetime]): Время следующего запуска каждой фазы.
+    :ivar server_manager (Optional[ServerManager]): Менеджер сервера.
+    :ivar backup_manager (Optional[BackupManager]): Менеджер резервного копирования.
+    """
+
+    def __init__(self) -> None:
+        self.schedules: Dict[str, CronSchedule] = {}
+        self.next_runs: Dict[str, datetime] = {}
+        self.server_manager: Optional[ServerManager] = None
+        self.backup_manager: Optional[BackupManager] = None
+        self._log_date: Optional[date] = None
+        self._reload_requested: bool = False
+        self._stopping: bool = False
+        self._wakeup: Optional[aio_Event] = None
+
+    def load(self, read_dotenv: bool = False) -> None:
+        """
+        Загружает (или перечитывает) конфигурацию, перенастраивает журнал и метрики и пересоздает менеджеры
+        с переносом кэшей.
+
+        :param read_dotenv: Перечитать файл .env (по сигналу SIGHUP); иначе пересчитываются только пути с датой.
+        :raises ValueError: Если расписание некорректно при первой загрузке.
+        """
+        if self.backup_manager is not None:
+            Config().reload(read_dotenv=read_dotenv)
+        reset_metrics()
+        language = setup_logger(force=True)
+        self._log_date = datetime.now().date()
+
+        server_manager = ServerManager(language=language)
+        backup_manager = BackupManager(language=language)
+        if self.server_manager is not None:
+            server_manager.reuse_caches(self.server_manager)
+        if self.backup_manager is not None:
+            backup_manager.reuse_caches(self.backup_manager)
+        self.server_manager, self.backup_manager = server_manager, backup_manager
+
+        try:
+            schedules = load_schedules()
+        except ValueError as e:
+            if not self.schedules:
+                raise
+            logging.error(f"Invalid schedule, keeping the previous schedules: {e}")
+            return
+        # Время следующего запуска пересчитывается только для измененных расписаний
+        now = datetime.now()
+        self.next_runs = {
+            phase: self.next_runs[phase] if self.schedules.get(phase) == schedule and phase in self.next_runs
+            else schedule.next_after(now) for phase, schedule in schedules.items()}
+        self.schedules = schedules
+        for phase in PHASES:
+            if phase in self.schedules:
+                logging.warning(
+                    f"Schedule {phase}: '{self.schedules[phase].expression}', next run at "
+                    f"{self.next_runs[phase]:%Y.%m.%d %H:%M}.")
+
+    def request_reload(self) -> None:
+        """Запрашивает перечитывание конфигурации (обработчик SIGHUP)."""
+        self._reload_requested = True
+        self._wakeup.set()
+
+    def request_stop(self) -> None:
+        """Запрашивает завершение службы после текущей фазы (обработчик SIGINT и SIGTERM)."""
+        self._stopping = True
+        self._wakeup.set()
+
+    def _install_signal_handlers(self) -> None:
+        """Устанавливает обработчики сигналов (на Windows сигналы цикла событий не поддерживаются)."""
+        loop = get_running_loop()
+        handlers = [(signal.SIGINT, self.request_stop), (signal.SIGTERM, self.request_stop)]
+        if hasattr(signal, 'SIGHUP'):
+            handlers.append((signal.SIGHUP, self.request_reload))
+        for signal_number, handler in handlers:
+            try:
+                loop.add_signal_handler(signal_number, handler)
+            except (NotImplementedError, RuntimeError):
+                logging.warning(f"Signal {signal_number!r} is not supported; restart the daemon to reload .env.")
+
+    async def run_job(self, phase: str) -> None:
+        """
+        Выполняет фазу; ошибка фазы записывается в журнал и не останавливает службу.
+
+        :param phase: 'backup' - полный запуск (`run.execute`: остановка сервера, копирование, архивация),
+                      'archive', 'retention', 'verify', 'replicate' - отдельные фазы без остановки сервера.
+        """
+        started = monotonic()
+        logging.warning(f"Daemon: start {phase}.")
+        try:
+            if phase == 'backup':
+                self.backup_manager.begin_run(report=RunReport())
+                await execute(self.server_manager, self.backup_manager)
+            else:
+                self.backup_manager.begin_run()
+                await self.backup_manager.run_phase(phase)
+        except Exception as e:
+            logging.error(f"Daemon: {phase} failed: {e}")
+        logging.warning(f"Daemon: {phase} finished in {monotonic() - started:.1f} s.")
+
+    async def serve(self) -> None:
+        """Выполняет фазы по расписаниям до получения SIGINT или SIGTERM."""
+        self._wakeup = aio_Event()
+        # Время старта загрузчика относится только к первому запуску процесса, а не к запускам службы
+        environ.pop('SLS_LAUNCHER_STARTED', None)
+        self.load()
+        if not self.schedules:
+            logging.error("No DAEMON_SCHEDULE_* is set, nothing to run.")
+            return
+        self._install_signal_handlers()
+
+        while not self._stopping:
+            if self._reload_requested:
+                self._reload_requested = False
+                logging.warning("Daemon: reloading configuration.")
+                self.load(read_dotenv=True)
+            elif datetime.now().date() != self._log_date:
+                self.load()
+
+            now = datetime.now()
+            for phase in PHASES:
+                if self._stopping or phase not in self.next_runs or self.next_runs[phase] > now:
+                    continue
+                await self.run_job(phase)
+                self.next_runs[phase] = self.schedules[phase].next_after(datetime.now())
+            if self._stopping:
+                break
+
+            now = datetime.now()
+            midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+            wake_at = min([midnight, *self.next_runs.values()])
+            self._wakeup.clear()
+            try:
+                await aio_wait_for(
+                    self._wakeup.wait(), timeout=min(max((wake_at - now).total_seconds(), 0), MAX_SLEEP_SECONDS))
+            except aio_TimeoutError:
+                pass
+        logging.warning("Daemon stopped.")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description='Run the backup phases on cron schedules (DAEMON_SCHEDULE_*).')
+    parser.add_argument('--next', action='store_true', help='Print the next run time of each phase and exit.')
+    args = parser.parse_args()
+
+    if args.next:
+        current = datetime.now()
+        for phase_name, phase_schedule in load_schedules().items():
+            print(f'{phase_name}\t{phase_schedule.expression}\t{phase_schedule.next_after(current):%Y.%m.%d %H:%M}')
+    else:
+        aio_run(BackupDaemon().serve())
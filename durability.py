@@ -0,0 +1,218 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+"""
+Сохранность записанных копий, хэш-файлов и архивов на диске при внезапном отключении питания.
+
+Режимы (`FILES_DURABILITY`):
+
+* `none` - данные остаются в кэше ОС, пока она не запишет их сама;
+* `batch` - записанные файлы запоминаются и сбрасываются на диск пакетом в конце фазы (после запуска сервера,
+  вне окна простоя): `syncfs` на Linux, если на той же файловой системе нет рабочих БД (иначе был бы сброшен и
+  кэш сервера), или `fsync` файлов в нескольких потоках, затем `fsync` их каталогов;
+* `strict` - каждый файл сбрасывается на диск перед переименованием из `.part`, а каталог - после.
+"""
+
+from asyncio import to_thread
+from concurrent.futures import ThreadPoolExecutor
+from os import O_RDONLY, O_RDWR, close as os_close, fsync as os_fsync, name as os_name, open as os_open, \
+    path as os_path, stat as os_stat
+from threading import Lock
+from time import monotonic
+from typing import Any, Dict, List, Optional, Set
+
+from config import Config
+
+
+DURABILITY_MODES: tuple = ('none', 'batch', 'strict')
+# Потоки `fsync` пакетного сброса: устройство объединяет одновременные запросы
+SYNC_WORKERS: int = 4
+
+
+def fsync_file(path: str) -> bool:
+    """
+    Сбрасывает данные файла на диск.
+
+    :return: False, если файла уже нет (копия удалена после архивации).
+    """
+    try:
+        # На Windows FlushFileBuffers требует дескриптор с правом записи
+        fd = os_open(path, O_RDWR if os_name == 'nt' else O_RDONLY)
+    except FileNotFoundError:
+        return False
+    try:
+        os_fsync(fd)
+    finally:
+        os_close(fd)
+    return True
+
+
+def fsync_directory(path: str) -> None:
+    """Сбрасывает на диск записи каталога (новые имена после переименования); на Windows не требуется."""
+    if os_name == 'nt':
+        return
+    try:
+        fd = os_open(path, O_RDONLY)
+    except FileNotFoundError:
+        return
+    try:
+        os_fsync(fd)
+    finally:
+        os_close(fd)
+
+
+def syncfs(path: str) -> bool:
+    """
+    Сбрасывает на диск всю файловую систему, содержащую `path` (Linux, `syncfs(2)`).
+
+    :return: False, если вызов недоступен.
+    """
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc_syncfs = libc.syncfs
+    except (OSError, AttributeError):
+        return False
+    fd = os_open(path, O_RDONLY)
+    try:
+        if libc_syncfs(fd) != 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f'syncfs failed for {path}')
+    finally:
+        os_close(fd)
+    return True
+
+
+class Durability:
+    """
+    Сброс на диск файлов, записанных фазами резервного копирования.
+
+    :ivar mode (str): Режим: 'none', 'batch' или 'strict'.
+    :ivar batch_bytes (int): Объем несброшенных файлов, при котором пакет сбрасывается до конца фазы (байт).
+    :ivar shared_dirs (List[str]): Каталоги с данными сервера: файловые системы с ними не сбрасываются `syncfs`.
+    :ivar files (int): Количество сброшенных файлов.
+    :ivar directories (int): Количество сброшенных каталогов.
+    :ivar filesystems (int): Количество вызовов `syncfs`.
+    :ivar seconds (float): Суммарное время сброса (сек).
+    """
+
+    def __init__(
+            self, mode: str = 'batch', batch_bytes: int = 1024 ** 3, shared_dirs: Optional[List[str]] = None) -> None:
+        self.mode: str = mode if mode in DURABILITY_MODES else 'batch'
+        self.batch_bytes: int = batch_bytes
+        self.shared_dirs: List[str] = [path for path in (shared_dirs or []) if path]
+        self.files: int = 0
+        self.directories: int = 0
+        self.filesystems: int = 0
+        self.seconds: float = 0.0
+        self._pending: Dict[str, int] = {}
+        self._lock: Lock = Lock()
+
+    @property
+    def pending_bytes(self) -> int:
+        """Объем файлов, ожидающих пакетного сброса (байт)."""
+        return sum(self._pending.values())
+
+    async def sync_data(self, path: str) -> None:
+        """Сбрасывает данные временного файла перед переименованием (режим 'strict')."""
+        if self.mode != 'strict':
+            return
+        started = monotonic()
+        await to_thread(fsync_file, path)
+        self._count(files=1, seconds=monotonic() - started)
+
+    async def commit(self, path: str) -> None:
+        """
+        Фиксирует записанный файл: в режиме 'strict' сбрасывает его каталог, в режиме 'batch' запоминает файл для
+        пакетного сброса.
+
+        :param path: Путь к файлу под итоговым именем.
+        """
+        if self.mode == 'strict':
+            started = monotonic()
+            await to_thread(fsync_directory, os_path.dirname(path) or '.')
+            self._count(directories=1, seconds=monotonic() - started)
+        elif self.mode == 'batch':
+            try:
+                size = os_path.getsize(path)
+            except OSError:
+                return
+            with self._lock:
+                self._pending[path] = size
+
+    def take(self) -> List[str]:
+        """Забирает файлы, ожидающие пакетного сброса (для сброса в фоне, пока запоминаются новые)."""
+        with self._lock:
+            pending, self._pending = list(self._pending), {}
+        return pending
+
+    async def flush(self, paths: Optional[List[str]] = None) -> None:
+        """
+        Сбрасывает на диск файлы, запомненные в режиме 'batch' (в рабочих потоках).
+
+        :param paths: Файлы, забранные ранее `take`; None - все ожидающие файлы.
+        """
+        pending = self.take() if paths is None else paths
+        if not pending:
+            return
+        started = monotonic()
+        await to_thread(self._flush, pending)
+        self._count(seconds=monotonic() - started)
+
+    def _flush(self, paths: List[str]) -> None:
+        shared_devices: Set[int] = set()
+        for shared_dir in self.shared_dirs:
+            try:
+                shared_devices.add(os_stat(shared_dir).st_dev)
+            except OSError:
+                continue
+        # Файлы по файловым системам: {устройство: [пути]}
+        by_device: Dict[int, List[str]] = {}
+        for path in paths:
+            try:
+                by_device.setdefault(os_stat(path).st_dev, []).append(path)
+            except FileNotFoundError:
+                continue
+        for device, device_paths in by_device.items():
+            if device not in shared_devices and syncfs(os_path.dirname(device_paths[0]) or '.'):
+                self._count(filesystems=1)
+                continue
+            with ThreadPoolExecutor(max_workers=SYNC_WORKERS, thread_name_prefix='fsync') as executor:
+                synced = sum(executor.map(fsync_file, device_paths))
+            directories = sorted({os_path.dirname(path) or '.' for path in device_paths})
+            for directory in directories:
+                fsync_directory(directory)
+            self._count(files=synced, directories=len(directories))
+
+    def _count(self, files: int = 0, directories: int = 0, filesystems: int = 0, seconds: float = 0.0) -> None:
+        with self._lock:
+            self.files += files
+            self.directories += directories
+            self.filesystems += filesystems
+            self.seconds += seconds
+
+    def summary(self) -> Dict[str, Any]:
+        """Возвращает сводку для отчета о запуске."""
+        return {
+            'mode': self.mode, 'files': self.files, 'directories': self.directories, 'filesystems': self.filesystems,
+            'seconds': round(self.seconds, 3)}
+
+
+def create_durability(instance: Optional[str] = None) -> Durability:
+    """
+    Создает сброс на диск по настройкам `FILES_DURABILITY*`.
+
+    :param instance: Имя экземпляра сервера (см. `orchestrator.py`).
+    :return: Сброс на диск.
+    """
+    env = Config().get_config('files', instance=instance)
+    return Durability(
+        env.get('files_durability', 'batch'), int(env.get('files_durability_batch_mb', 1024) * 1024 ** 2),
+        shared_dirs=[env.get('files_dir')])
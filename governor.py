@@ -0,0 +1,325 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+from asyncio import get_running_loop, sleep as aio_sleep, to_thread
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import partial
+from os import name as os_name
+from threading import Lock, get_native_id
+from time import monotonic, sleep
+from typing import Dict, Any, Optional, Callable, Tuple
+
+from config import Config
+
+
+# Приоритет фоновых потоков и процессов в Linux / macOS (nice)
+BACKGROUND_NICE: int = 10
+
+
+class TokenBucket:
+    """
+    Ограничитель скорости «ведро токенов»: за секунду начисляется `rate` токенов (байт), но не больше `burst`.
+
+    Запрос больше доступного остатка уводит баланс в минус, а вызывающий ждет, пока долг не будет погашен, поэтому
+    крупные блоки не ждут накопления полного объема и средняя скорость не превышает `rate`.
+
+    :ivar rate (float): Скорость (байт/с).
+    :ivar burst (float): Емкость ведра (байт).
+    """
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate: float = rate
+        self.burst: float = burst
+        self._tokens: float = burst
+        self._updated: float = monotonic()
+
+    def reserve(self, amount: int) -> float:
+        """
+        Списывает `amount` токенов.
+
+        :param amount: Объем (байт).
+        :return: Время ожидания (сек), после которого операцию можно выполнять.
+        """
+        now = monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= amount
+        return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+class ResourceGovernor:
+    """
+    Ограничитель ресурсов фоновых фаз (архивация и проверка архивов после запуска сервера), чтобы они занимали
+    ограниченную долю диска и процессора и не замедляли работу пользователей с сервером SLS.
+
+    - Чтение ограничивается ведром токенов со скоростью `rate` (байт/с).
+    - Скорость подстраивается по задержке дисков (AIMD): каждые `sample_seconds` средняя задержка операции
+      ввода-вывода по счетчикам ОС сравнивается с `latency_target_ms`; при превышении скорость уменьшается вдвое
+      (не ниже `min_rate`), иначе увеличивается на 10% от `max_rate`.
+    - Рабочие потоки фоновых фаз и процессы 7z выполняются с пониженным приоритетом процессора и ввода-вывода
+      (nice / ionice, в Windows - фоновый режим потока и низкий приоритет процесса); процесс 7z, скорость которого
+      ограничить нельзя, при задержке дисков выше целевой поочередно приостанавливается и возобновляется.
+
+    :ivar max_rate (float): Максимальная скорость чтения (байт/с); 0 - без ограничения.
+    :ivar min_rate (float): Минимальная скорость при высокой задержке дисков (байт/с).
+    :ivar rate (float): Текущая скорость (байт/с).
+    :ivar latency_target_ms (float): Целевая задержка дисков (мс); 0 - скорость не подстраивается.
+    :ivar low_priority (bool): Понижать приоритет рабочих потоков и процессов.
+    :ivar workers (int): Количество рабочих потоков.
+    :ivar sample_seconds (float): Интервал измерения задержки дисков (сек).
+    """
+
+    enabled: bool = True
+
+    def __init__(
+            self, max_rate: float = 0.0, min_rate: float = 0.0, latency_target_ms: float = 0.0,
+            low_priority: bool = True, workers: int = 2, sample_seconds: float = 1.0) -> None:
+        self.max_rate: float = max_rate
+        self.min_rate: float = min(min_rate, max_rate) if max_rate else min_rate
+        self.rate: float = max_rate
+        self.latency_target_ms: float = latency_target_ms
+        self.low_priority: bool = low_priority
+        self.workers: int = max(workers, 1)
+        self.sample_seconds: float = sample_seconds
+        self._bucket: Optional[TokenBucket] = TokenBucket(max_rate, max_rate * sample_seconds) if max_rate else None
+        self._lock: Lock = Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._sampled_at: float = 0.0
+        self._disk_counters: Optional[Tuple[int, int]] = None
+        self.latency_ms: Optional[float] = None
+        self.congested: bool = False
+        self.backoffs: int = 0
+        self.throttled_seconds: float = 0.0
+        self.suspended_seconds: float = 0.0
+        self.bytes: int = 0
+
+    def _read_disk_counters(self) -> Optional[Tuple[int, int]]:
+        """Возвращает суммарное время (мс) и количество операций ввода-вывода всех дисков."""
+        try:
+            from psutil import disk_io_counters
+
+            counters = disk_io_counters()
+        except (ImportError, OSError, RuntimeError):
+            counters = None
+        if counters is None:
+            return None
+        return counters.read_time + counters.write_time, counters.read_count + counters.write_count
+
+    def _sample(self) -> None:
+        """Измеряет задержку дисков и пересчитывает скорость (вызывается под блокировкой)."""
+        now = monotonic()
+        if not self.latency_target_ms or now - self._sampled_at < self.sample_seconds:
+            return
+        self._sampled_at = now
+        counters = self._read_disk_counters()
+        previous, self._disk_counters = self._disk_counters, counters
+        if counters is None or previous is None or counters[1] <= previous[1]:
+            return
+        self.latency_ms = (counters[0] - previous[0]) / (counters[1] - previous[1])
+        self.congested = self.latency_ms > self.latency_target_ms
+        if self._bucket is None:
+            return
+        if self.congested:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.backoffs += 1
+        else:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.1)
+        self._bucket.rate = self.rate
+
+    def _reserve(self, size: int) -> float:
+        """Учитывает прочитанный объем и возвращает время ожидания (сек)."""
+        with self._lock:
+            self._sample()
+            self.bytes += size
+            if self._bucket is None:
+                return 0.0
+            delay = self._bucket.reserve(size)
+            self.throttled_seconds += delay
+            return delay
+
+    async def throttle(self, size: int) -> None:
+        """
+        Ожидает разрешения на обработку `size` байт (в цикле событий).
+
+        :param size: Объем (байт).
+        """
+        delay = self._reserve(size)
+        if delay:
+            await aio_sleep(delay)
+
+    def throttle_sync(self, size: int) -> None:
+        """
+        Ожидает разрешения на обработку `size` байт (в рабочем потоке).
+
+        :param size: Объем (байт).
+        """
+        delay = self._reserve(size)
+        if delay:
+            sleep(delay)
+
+    async def run(self, function: Callable, *args: Any) -> Any:
+        """
+        Выполняет функцию в рабочем потоке с пониженным приоритетом (контекст метрик сохраняется).
+
+        :param function: Блокирующая функция.
+        :param args: Аргументы функции.
+        :return: Результат функции.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix='governor',
+                initializer=self._lower_thread_priority if self.low_priority else None)
+        return await get_running_loop().run_in_executor(
+            self._executor, partial(copy_context().run, function, *args))
+
+    @staticmethod
+    def _lower_thread_priority() -> None:
+        """
+        Понижает приоритет текущего рабочего потока.
+
+        В Linux nice и ionice задаются для потока (повысить их обратно без прав администратора нельзя, поэтому
+        потоки пула используются только фоновыми фазами), в Windows поток переводится в фоновый режим.
+        """
+        try:
+            if os_name == 'nt':
+                from ctypes import windll
+
+                # THREAD_MODE_BACKGROUND_BEGIN: низкий приоритет процессора и ввода-вывода для потока
+                windll.kernel32.SetThreadPriority(windll.kernel32.GetCurrentThread(), 0x00010000)
+                return
+            from os import setpriority, PRIO_PROCESS
+
+            thread_id = get_native_id()
+            setpriority(PRIO_PROCESS, thread_id, BACKGROUND_NICE)
+            from psutil import Process, IOPRIO_CLASS_IDLE
+
+            Process(thread_id).ionice(IOPRIO_CLASS_IDLE)
+        except (ImportError, AttributeError, OSError, ValueError):
+            pass
+
+    def lower_process_priority(self, pid: int) -> None:
+        """
+        Понижает приоритет процессора и ввода-вывода дочернего процесса (7z).
+
+        :param pid: Идентификатор процесса.
+        """
+        if not self.low_priority:
+            return
+        try:
+            import psutil
+
+            process = psutil.Process(pid)
+            if os_name == 'nt':
+                process.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)
+                process.ionice(psutil.IOPRIO_LOW)
+            else:
+                process.nice(BACKGROUND_NICE)
+                if hasattr(psutil, 'IOPRIO_CLASS_IDLE'):
+                    process.ionice(psutil.IOPRIO_CLASS_IDLE)
+        except (ImportError, AttributeError, OSError, ValueError):
+            pass
+
+    async def supervise_process(self, pid: int) -> None:
+        """
+        Понижает приоритет дочернего процесса и, пока задержка дисков выше целевой, поочередно приостанавливает
+        и возобновляет его на интервал измерения.
+
+        Выполняется отдельной задачей до завершения процесса (задача отменяется вызывающим); приостановленный
+        процесс всегда возобновляется.
+
+        :param pid: Идентификатор процесса.
+        """
+        self.lower_process_priority(pid)
+        if not self.latency_target_ms:
+            return
+        try:
+            from psutil import Process, Error as PsutilError
+        except ImportError:
+            return
+        try:
+            process = Process(pid)
+        except PsutilError:
+            return
+        while True:
+            await aio_sleep(self.sample_seconds)
+            with self._lock:
+                self._sample()
+                congested = self.congested
+            if not congested:
+                continue
+            # Приостанавливаем процесс на интервал, затем он работает не меньше интервала: при долгой перегрузке
+            # дисков 7z получает не менее половины времени и архивация не останавливается полностью
+            try:
+                process.suspend()
+            except PsutilError:
+                return
+            self.backoffs += 1
+            suspended_at = monotonic()
+            try:
+                await aio_sleep(self.sample_seconds)
+            finally:
+                self.suspended_seconds += monotonic() - suspended_at
+                try:
+                    process.resume()
+                except PsutilError:
+                    pass
+
+    def summary(self) -> Dict[str, Any]:
+        """Возвращает сводку для отчета о запуске."""
+        return {
+            'max_rate_mbps': round(self.max_rate / 1024 ** 2, 3), 'rate_mbps': round(self.rate / 1024 ** 2, 3),
+            'latency_ms': None if self.latency_ms is None else round(self.latency_ms, 3),
+            'backoffs': self.backoffs, 'throttled_seconds': round(self.throttled_seconds, 3),
+            'suspended_seconds': round(self.suspended_seconds, 3), 'bytes': self.bytes,
+        }
+
+    def close(self) -> None:
+        """Завершает рабочие потоки."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+class NullGovernor(ResourceGovernor):
+    """Ограничитель при `GOVERNOR_ENABLED=False`: фоновые фазы выполняются без ограничений."""
+
+    enabled: bool = False
+
+    def _reserve(self, size: int) -> float:
+        return 0.0
+
+    async def run(self, function: Callable, *args: Any) -> Any:
+        return await to_thread(function, *args)
+
+    def lower_process_priority(self, pid: int) -> None:
+        pass
+
+    async def supervise_process(self, pid: int) -> None:
+        pass
+
+
+def create_governor(instance: Optional[str] = None) -> ResourceGovernor:
+    """
+    Создает ограничитель по настройкам `GOVERNOR_*`.
+
+    :param instance: Имя экземпляра сервера (см. `orchestrator.py`).
+    :return: Ограничитель (или `NullGovernor`, если ограничение отключено).
+    """
+    env: Dict[str, Any] = Config().get_config('governor', 'files', instance=instance)
+    if not env.get('governor_enabled'):
+        return NullGovernor()
+    return ResourceGovernor(
+        max_rate=env.get('governor_io_rate_mbps', 50.0) * 1024 ** 2,
+        min_rate=env.get('governor_min_io_rate_mbps', 5.0) * 1024 ** 2,
+        latency_target_ms=env.get('governor_latency_target_ms', 50.0),
+        low_priority=env.get('governor_low_priority', True),
+        workers=env.get('files_verify_workers', 2),
+        sample_seconds=env.get('governor_sample_seconds', 1.0))
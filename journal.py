@@ -0,0 +1,144 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+from json import dumps as json_dumps, loads as json_loads
+from os import path as os_path, remove as os_remove
+from datetime import datetime
+from typing import Dict, Any, Optional, TextIO
+
+
+class JobJournal:
+    """
+    Журнал заданий резервного копирования (write-ahead log).
+
+    Каждая завершенная стадия обработки файла (копирование и его блоки, вычисление хэша, архивация, удаление копии)
+    дописывается в JSON Lines файл до того, как запуск перейдет к следующей стадии. Если запуск был прерван,
+    журнал не очищается, и следующий запуск восстанавливает по нему состояние и продолжает работу с места
+    остановки. После успешного завершения запуска журнал удаляется.
+
+    Стадии: 'run_start', 'copy_start', 'copy_block', 'copy_done', 'hash_done', 'archive_done', 'delete_done',
+    'run_done'.
+
+    :ivar journal_path (str): Путь к файлу журнала.
+    :ivar resumed (bool): Журнал содержал записи незавершенного запуска.
+    """
+
+    def __init__(self, journal_path: str) -> None:
+        self.journal_path: str = journal_path
+        self.resumed: bool = False
+        self._file: Optional[TextIO] = None
+        self._copies: Dict[str, Dict[str, Any]] = {}
+        self._hashes: Dict[str, Dict[str, Any]] = {}
+        self._archives: Dict[str, Dict[str, Any]] = {}
+
+    def open(self) -> bool:
+        """
+        Загружает незавершенный запуск (если есть) и открывает журнал для дозаписи.
+
+        :return: True, если найден незавершенный запуск и состояние восстановлено.
+        """
+        records = 0
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as journal_file:
+                for line in journal_file:
+                    try:
+                        record = json_loads(line)
+                    except ValueError:
+                        # Последняя строка могла быть записана не полностью
+                        continue
+                    self._apply(record)
+                    records += 1
+        except FileNotFoundError:
+            pass
+
+        self.resumed = records > 0
+        self._file = open(self.journal_path, 'a', encoding='utf-8')
+        self.record('run_start', resumed=self.resumed)
+        return self.resumed
+
+    def close(self, completed: bool = True) -> None:
+        """
+        Закрывает журнал.
+
+        :param completed: Запуск завершен успешно: журнал удаляется. Иначе он сохраняется для продолжения.
+        """
+        if self._file is None:
+            return
+        if completed:
+            self.record('run_done')
+        self._file.close()
+        self._file = None
+        if completed:
+            try:
+                os_remove(self.journal_path)
+            except OSError:
+                pass
+        self._copies.clear()
+        self._hashes.clear()
+        self._archives.clear()
+
+    def record(self, stage: str, **data: Any) -> None:
+        """
+        Дописывает запись о стадии в журнал и сбрасывает буфер на диск ОС.
+
+        :param stage: Имя стадии.
+        :param data: Данные стадии.
+        """
+        record = {'stage': stage, 'time': datetime.now().isoformat(timespec='seconds'), **data}
+        self._apply(record)
+        if self._file is not None:
+            self._file.write(json_dumps(record, ensure_ascii=False) + '\n')
+            self._file.flush()
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        """Применяет запись журнала к восстановленному состоянию."""
+        stage = record.get('stage')
+        if stage == 'copy_start':
+            self._copies[record['src']] = {
+                'dst': record['dst'], 'part': record['part'], 'size': record['size'], 'mtime': record['mtime'],
+                'offset': record.get('offset', 0), 'done': False}
+        elif stage == 'copy_block' and record.get('src') in self._copies:
+            self._copies[record['src']]['offset'] = record['offset']
+        elif stage == 'copy_done' and record.get('src') in self._copies:
+            self._copies[record['src']]['done'] = True
+        elif stage == 'hash_done':
+            self._hashes[record['file']] = {
+                'hash': record['hash'], 'hash_type': record['hash_type'], 'size': record['size'],
+                'mtime': record['mtime']}
+        elif stage == 'archive_done':
+            self._archives[record['file']] = {'archive': record['archive']}
+
+    def get_copy(self, src: str, size: int, mtime: float) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает состояние копирования файла, если исходный файл не изменился с момента записи.
+
+        :param src: Путь к исходному файлу.
+        :param size: Текущий размер исходного файла.
+        :param mtime: Текущее время модификации исходного файла.
+        :return: Словарь с ключами 'dst', 'part', 'offset', 'done' или None.
+        """
+        copy_state = self._copies.get(src)
+        if copy_state is None or copy_state['size'] != size or abs(copy_state['mtime'] - mtime) > 1e-3:
+            return None
+        return copy_state
+
+    def get_hash(self, file_path: str, size: int, mtime: float) -> Optional[Dict[str, Any]]:
+        """Возвращает вычисленный ранее хэш файла, если файл не изменился."""
+        hash_state = self._hashes.get(file_path)
+        if hash_state is None or hash_state['size'] != size or abs(hash_state['mtime'] - mtime) > 1e-3:
+            return None
+        return hash_state
+
+    def get_archive(self, file_path: str) -> Optional[str]:
+        """Возвращает путь к архиву файла, созданному до прерывания запуска, если архив существует."""
+        archive_state = self._archives.get(file_path)
+        if archive_state is None or not os_path.exists(archive_state['archive']):
+            return None
+        return archive_state['archive']
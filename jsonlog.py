@@ -0,0 +1,321 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+import logging
+from argparse import ArgumentParser
+from collections.abc import Mapping
+from glob import glob
+from json import dumps as json_dumps, loads as json_loads
+from os import makedirs as os_makedirs, path as os_path
+from re import sub as re_sub
+from threading import Lock
+from time import monotonic
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterable, TextIO
+
+from messages import MESSAGES
+from metrics import Span, get_metrics, current_span
+
+
+# Идентификатор события по шаблону сообщения (на любом языке)
+_EVENT_IDS: Dict[str, str] = {text: message_id for message_id, texts in MESSAGES.items() for text in texts.values()}
+# Аргументы сообщений, которые выносятся в общие поля записи
+_FIELD_ALIASES: Dict[str, str] = {
+    'file_path': 'file', 'archive_path': 'file', 'backup_file_path': 'file',
+    'size': 'bytes', 'bytes': 'bytes', 'seconds': 'duration'}
+_BACKUP_SUFFIX_PATTERN: str = r'_\d{4}\.\d{2}\.\d{2}_\d{2}\.\d{2}.*$'
+
+
+def get_db_name(file_path: str) -> str:
+    """
+    Возвращает имя БД по пути к файлу БД, копии или архиву ('DB_2025.06.01_10.00.DBX.zip' -> 'DB').
+
+    :param file_path: Путь или имя файла.
+    :return: Имя БД.
+    """
+    name = re_sub(_BACKUP_SUFFIX_PATTERN, '', os_path.basename(file_path))
+    return os_path.splitext(name)[0]
+
+
+def _json_value(value: Any) -> Any:
+    """Приводит значение к типу, допустимому в JSON."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+class JsonlWriter:
+    """
+    Буферизованная запись событий в JSON Lines с ежедневной ротацией.
+
+    Записи копятся в памяти и дописываются в файл пакетом, когда их становится `batch_size` или с последней записи
+    в файл прошло `flush_interval` секунд, а также при `flush()` и `close()`. Имя файла - шаблон `strftime`
+    (по умолчанию 'events_%Y.%m.%d.jsonl'), поэтому с началом нового дня записи идут в новый файл.
+    Методы можно вызывать из нескольких потоков.
+
+    :ivar path_pattern (str): Шаблон пути к файлу.
+    :ivar batch_size (int): Количество записей в пакете.
+    :ivar flush_interval (float): Максимальное время ожидания записи в буфере (сек).
+    """
+
+    def __init__(self, path_pattern: str, batch_size: int = 100, flush_interval: float = 1.0) -> None:
+        self.path_pattern: str = path_pattern
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        self._buffer: List[str] = []
+        self._lock: Lock = Lock()
+        self._last_flush: float = monotonic()
+        self._stream: Optional[TextIO] = None
+        self._stream_path: Optional[str] = None
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Добавляет запись."""
+        line = json_dumps(record, ensure_ascii=False, separators=(',', ':'), default=str)
+        with self._lock:
+            self._buffer.append(line + '\n')
+            if len(self._buffer) < self.batch_size and monotonic() - self._last_flush < self.flush_interval:
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        """Дописывает буфер в файл текущего дня."""
+        with self._lock:
+            self._last_flush = monotonic()
+            if not self._buffer:
+                return
+            path = datetime.now().strftime(self.path_pattern)
+            try:
+                if path != self._stream_path:
+                    self._close_stream()
+                    directory = os_path.dirname(path)
+                    if directory:
+                        os_makedirs(directory, exist_ok=True)
+                    self._stream = open(path, 'a', encoding='utf-8')
+                    self._stream_path = path
+                self._stream.write(''.join(self._buffer))
+                self._stream.flush()
+            except OSError:
+                self._close_stream()
+            finally:
+                self._buffer.clear()
+
+    def close(self) -> None:
+        """Дописывает буфер и закрывает файл."""
+        self.flush()
+        with self._lock:
+            self._close_stream()
+
+    def _close_stream(self) -> None:
+        if self._stream is not None:
+            self._stream.close()
+        self._stream = None
+        self._stream_path = None
+
+
+class RecordContextFilter(logging.Filter):
+    """
+    Сохраняет в записи шаблон и аргументы сообщения и текущую фазу (интервал метрик).
+
+    Фильтр подключается к обработчику, который получает запись в вызывающем потоке (`QueueHandler`), так как
+    `QueueHandler` подставляет аргументы в сообщение, а интервал метрик виден только в вызывающем потоке.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.template = record.msg
+        record.fields = record.args if isinstance(record.args, Mapping) else None
+        span = current_span()
+        record.phase = span.path if isinstance(span, Span) else None
+        return True
+
+
+class JsonlLogHandler(logging.Handler):
+    """
+    Обработчик журнала, записывающий события в JSON Lines.
+
+    Запись: 'ts', 'level', 'logger', 'event' (идентификатор сообщения из `messages.MESSAGES`), 'phase', 'file', 'db',
+    'bytes', 'duration', 'msg' и 'fields' (остальные аргументы сообщения). Пока обработчик открыт, в тот же файл
+    записываются завершенные интервалы метрик ('event': 'span', см. `span_record`).
+
+    :ivar writer (JsonlWriter): Буферизованная запись в файл.
+    """
+
+    def __init__(self, writer: JsonlWriter, level: int = logging.NOTSET) -> None:
+        super().__init__(level)
+        self.writer: JsonlWriter = writer
+        self._metrics = get_metrics()
+        self._metrics.add_listener(self.write_span)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.writer.write(self.log_record(record))
+        except Exception:
+            self.handleError(record)
+
+    def write_span(self, span: Span) -> None:
+        """Записывает завершенный интервал метрик."""
+        self.writer.write(span_record(span))
+
+    @staticmethod
+    def log_record(record: logging.LogRecord) -> Dict[str, Any]:
+        """Формирует JSON-запись по записи журнала."""
+        template = getattr(record, 'template', record.msg)
+        fields = dict(getattr(record, 'fields', None) or {})
+        result: Dict[str, Any] = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': _EVENT_IDS.get(template) if isinstance(template, str) else None,
+            'phase': getattr(record, 'phase', None),
+        }
+        for name, alias in _FIELD_ALIASES.items():
+            if name in fields and alias not in result:
+                result[alias] = _json_value(fields.pop(name))
+        if result.get('file'):
+            result['db'] = get_db_name(result['file'])
+        result['msg'] = record.getMessage()
+        if fields:
+            result['fields'] = {name: _json_value(value) for name, value in fields.items()}
+        return result
+
+    def flush(self) -> None:
+        self.writer.flush()
+
+    def close(self) -> None:
+        self._metrics.remove_listener(self.write_span)
+        self.writer.close()
+        super().close()
+
+
+def span_record(span: Span) -> Dict[str, Any]:
+    """
+    Формирует JSON-запись по завершенному интервалу метрик.
+
+    :param span: Интервал.
+    :return: Запись: 'ts', 'event' ('span'), 'phase' (путь интервала), 'op' (имя интервала), 'file', 'db', 'bytes',
+             'duration' (сек).
+    """
+    result: Dict[str, Any] = {
+        'ts': datetime.now().isoformat(timespec='milliseconds'), 'event': 'span', 'phase': span.path, 'op': span.name}
+    file_name = span.labels.get('file')
+    if file_name:
+        result['file'] = file_name
+        result['db'] = get_db_name(file_name)
+    result['bytes'] = span.bytes
+    result['duration'] = round(span.seconds, 6)
+    return result
+
+
+def create_json_handler(env: Dict[str, Any]) -> JsonlLogHandler:
+    """
+    Создает обработчик JSON Lines по настройкам `LOG_JSON_FILE`, `LOG_JSON_LEVEL`, `LOG_FILE_BATCH_SIZE`
+    и `LOG_FLUSH_INTERVAL_SECONDS`.
+
+    :param env: Настройки с префиксом 'log'.
+    :return: Обработчик.
+    """
+    path_pattern = env.get('log_json_file', 'events_%Y.%m.%d.jsonl')
+    if not os_path.isabs(path_pattern):
+        path_pattern = os_path.join(env.get('log_dir', 'logs'), path_pattern)
+    writer = JsonlWriter(
+        path_pattern, batch_size=env.get('log_file_batch_size', 100),
+        flush_interval=env.get('log_flush_interval_seconds', 1.0))
+    return JsonlLogHandler(writer, level=env.get('log_json_level', 'INFO'))
+
+
+def load_events(paths: Iterable[str]) -> Iterable[Dict[str, Any]]:
+    """
+    Читает записи из файлов JSON Lines (поврежденные строки пропускаются).
+
+    :param paths: Пути к файлам.
+    :return: Записи в порядке файлов.
+    """
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as events_file:
+            for line in events_file:
+                try:
+                    yield json_loads(line)
+                except ValueError:
+                    continue
+
+
+def aggregate_by_db(events: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Сводит интервалы операций над файлами по БД.
+
+    :param events: Записи журнала JSON Lines.
+    :return: Таблица: БД -> операция ('copy_file', 'hash', 'archive_file', ...) -> 'count', 'seconds' (сумма),
+             'max_seconds', 'bytes'.
+    """
+    table: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for event in events:
+        if event.get('event') != 'span' or not event.get('db'):
+            continue
+        row = table.setdefault(event['db'], {}).setdefault(
+            event['op'], {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'bytes': 0})
+        row['count'] += 1
+        row['seconds'] = round(row['seconds'] + event.get('duration', 0.0), 6)
+        row['max_seconds'] = max(row['max_seconds'], event.get('duration', 0.0))
+        row['bytes'] += event.get('bytes', 0)
+    return table
+
+
+def month_paths(path_pattern: str, month: str, directory: Optional[str] = None) -> List[str]:
+    """
+    Находит файлы журнала JSON Lines за месяц.
+
+    :param path_pattern: Шаблон пути `LOG_JSON_FILE`.
+    :param month: Месяц 'YYYY.MM'.
+    :param directory: Каталог файлов вместо каталога из шаблона (журналы прошлых месяцев лежат в других каталогах
+                      `LOG_DIR`).
+    :return: Отсортированный список путей.
+    """
+    year, month_number = month.split('.')
+    pattern = path_pattern.replace('%Y', year).replace('%m', month_number).replace('%d', '*')
+    if directory is not None:
+        pattern = os_path.join(directory, os_path.basename(pattern))
+    return sorted(glob(pattern))
+
+
+def format_table(table: Dict[str, Dict[str, Dict[str, float]]]) -> str:
+    """
+    Форматирует сводку по БД: суммарное время операций (сек) и количество запусков.
+
+    :param table: Результат `aggregate_by_db`.
+    :return: Текстовая таблица.
+    """
+    operations = sorted({operation for row in table.values() for operation in row})
+    header = ['db'] + [f'{operation} s (n)' for operation in operations]
+    rows = [header]
+    for db_name in sorted(table):
+        cells = [db_name]
+        for operation in operations:
+            row = table[db_name].get(operation)
+            cells.append(f'{row["seconds"]:.1f} ({row["count"]})' if row else '-')
+        rows.append(cells)
+    widths = [max(len(row[index]) for row in rows) for index in range(len(header))]
+    return '\n'.join('  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
+
+
+if __name__ == '__main__':
+    from config import Config
+
+    parser = ArgumentParser(description='Aggregate structured JSONL logs into per-DB timing tables.')
+    parser.add_argument('paths', nargs='*', help='JSONL files (default: the files of --month).')
+    parser.add_argument('--month', default=datetime.now().strftime('%Y.%m'), help='Month "YYYY.MM".')
+    parser.add_argument('--dir', help='Directory with the JSONL files of the month (default: from LOG_JSON_FILE).')
+    parser.add_argument('--json', action='store_true', help='Print the table as JSON.')
+    args = parser.parse_args()
+
+    log_env: Dict[str, Any] = Config().get_config('log')
+    json_path_pattern = log_env.get('log_json_file', 'events_%Y.%m.%d.jsonl')
+    if not os_path.isabs(json_path_pattern):
+        json_path_pattern = os_path.join(log_env.get('log_dir', 'logs'), json_path_pattern)
+    db_table = aggregate_by_db(load_events(args.paths or month_paths(json_path_pattern, args.month, args.dir)))
+    print(json_dumps(db_table, ensure_ascii=False, indent=2) if args.json else format_table(db_table))
@@ -8,9 +8,11 @@
 # __version__ = '1.0.6.0'
 
 import logging
-import logging.config
-from colorlog import ColoredFormatter
+import logging.handlers
+from atexit import register as atexit_register
 from pathlib import Path
+from queue import Queue, Empty
+from time import monotonic
 from typing import List, Optional
 from os.path import join as os_join
 from datetime import datetime as dt
@@ -18,14 +20,156 @@ from datetime import datetime as dt
 from config import Config
 
 
-def setup_logger(log_path: Optional[str] = None) -> str:
+class BatchingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Rotating file handler that writes formatted records in batches.
+
+    Records are buffered and written with a single `write` call when the batch is full, when a record of
+    `flush_level` or higher arrives, or when `flush()` is called (the queue listener does this when the queue is idle
+    for `flush_interval` seconds, and at shutdown). The size limit is checked once per batch, so a file may exceed
+    `maxBytes` by up to one batch before it is rotated.
+    """
+
+    def __init__(
+            self, filename: str, mode: str = 'a', maxBytes: int = 0, backupCount: int = 0,
+            encoding: Optional[str] = None, delay: bool = False, batch_size: int = 100,
+            flush_level: int = logging.ERROR, flush_interval: float = 1.0) -> None:
+        super().__init__(filename, mode, maxBytes, backupCount, encoding, delay)
+        self.batch_size: int = batch_size
+        self.flush_level: int = flush_level
+        self.flush_interval: float = flush_interval
+        self._buffer: List[str] = []
+        self._last_flush: float = monotonic()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._buffer.append(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+            return
+        if (len(self._buffer) >= self.batch_size or record.levelno >= self.flush_level or
+                monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            self._last_flush = monotonic()
+            if not self._buffer:
+                return
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(''.join(self._buffer))
+            self._buffer.clear()
+            self.stream.flush()
+            if self.maxBytes > 0 and self.stream.tell() >= self.maxBytes:
+                self.doRollover()
+        except Exception:
+            self._buffer.clear()
+            self.handleError(None)
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        self.flush()
+        super().close()
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """
+    Queue listener that flushes its handlers when the queue has been idle for `flush_interval` seconds,
+    so batched records never wait in a buffer for long.
+    """
+
+    def __init__(self, queue: Queue, *handlers: logging.Handler, flush_interval: float = 1.0) -> None:
+        super().__init__(queue, *handlers, respect_handler_level=True)
+        self.flush_interval: float = flush_interval
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        while True:
+            try:
+                return self.queue.get(block, self.flush_interval if block else None)
+            except Empty:
+                if not block:
+                    raise
+                for handler in self.handlers:
+                    handler.flush()
+
+
+_listener: Optional[BatchingQueueListener] = None
+_root_level: int = logging.INFO
+# Аргументы последней успешной настройки (путь к файлу, очередь) и язык консоли, который она вернула
+_configured: Optional[tuple] = None
+_console_language: Optional[str] = None
+
+
+def stop_logging() -> None:
+    """
+    Stops the queue listener: records already queued are written and the file buffers are flushed.
+
+    Registered with `atexit`, so it also runs on a normal interpreter exit.
+
+    :return: None
+    """
+    global _listener, _configured
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    # Обработчики очереди остановлены: следующий вызов setup_logger() настраивает журнал заново
+    _configured = None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.flush()
+
+
+atexit_register(stop_logging)
+
+
+def get_log_handlers() -> List[logging.Handler]:
+    """
+    Returns the handlers that write log records: the queue listener handlers, or the root handlers
+    when logging is synchronous.
+
+    :return: List of handlers.
+    """
+    if _listener is not None:
+        return list(_listener.handlers)
+    return list(logging.getLogger().handlers)
+
+
+def _apply_root_level() -> None:
+    """
+    Raises the root logger level to the lowest handler level, so records that no handler would write are dropped
+    by the logger before a `LogRecord` is created or queued.
+
+    :return: None
+    """
+    handler_levels = [handler.level for handler in get_log_handlers()]
+    logging.getLogger().setLevel(max(_root_level, min(handler_levels)) if handler_levels else _root_level)
+
+
+def setup_logger(log_path: Optional[str] = None, use_queue: Optional[bool] = None, force: bool = False) -> str:
     """
     Configures the logging settings, including file paths and formats.
 
+    With `LOG_QUEUE=True` (default) the root logger only gets a `QueueHandler`, and the console and file handlers run
+    in a `QueueListener` thread, so logging calls on the event-loop thread do no console or disk I/O. File records are
+    written in batches of `LOG_FILE_BATCH_SIZE` (errors are written immediately) and flushed at least every
+    `LOG_FLUSH_INTERVAL_SECONDS` and at exit. With `LOG_JSON_ENABLED=True` a structured JSON Lines sink
+    (see `jsonlog.py`) is added next to the console and file handlers.
+
+    The call is idempotent: modules no longer configure logging at import time, each entry point calls this function
+    explicitly, and a repeated call with the same resolved file path and queue mode returns the cached console
+    language without touching the handlers. A new day in the file name pattern, different arguments or `force=True`
+    configure logging again.
+
     :param log_path: The file path for logging; if not provided, it defaults to the environment setting.
+    :param use_queue: Use the queue listener; if not provided, it defaults to the `LOG_QUEUE` setting.
+    :param force: Reconfigure logging even if it is already configured with the same arguments.
 
-    :return: None
+    :return: The console language (`LOG_CONSOLE_LANGUAGE`), or None if logging could not be configured.
     """
+    global _listener, _root_level, _configured, _console_language
     env: dict = Config().get_config('log')
 
     log_level_console: str = env.get('log_level_console')
@@ -37,11 +181,17 @@ def setup_logger(log_path: Optional[str] = None) -> str:
     log_console_language: str = env.get('log_console_language')
     log_dir = env.get('log_dir', r'logs\%Y\%Y.%m')
     log_file = env.get('log_file', 'backup_log_%Y.%m.%d.log')
+    log_file_batch_size: int = env.get('log_file_batch_size', 100)
+    log_flush_interval: float = env.get('log_flush_interval_seconds', 1.0)
+    if use_queue is None:
+        use_queue = env.get('log_queue', True)
 
     if log_path is None:
         log_path = os_join(log_dir, log_file)
 
     log_path = dt.now().strftime(log_path)
+    if not force and _configured == (log_path, use_queue):
+        return _console_language
 
     try:
         log_dir = Path(log_path).parent
@@ -55,6 +205,12 @@ def setup_logger(log_path: Optional[str] = None) -> str:
         logging.error(f'Failed to create log directory: {e}')
         return None
 
+    # Записи, уже стоящие в очереди, пишутся прежними обработчиками до их замены
+    stop_logging()
+
+    import logging.config
+    from colorlog import ColoredFormatter
+
     try:
         logging.config.dictConfig(
             {
@@ -84,12 +240,14 @@ def setup_logger(log_path: Optional[str] = None) -> str:
                         'level': log_level_console,
                     },
                     'rotating_file': {
-                        'class': 'logging.handlers.RotatingFileHandler',
+                        '()': BatchingRotatingFileHandler,
                         'formatter': 'standard',
                         'level': log_level_file,
                         'filename': log_path,
                         'maxBytes': 10 * 1024 * 1024,
                         'backupCount': 5,
+                        'batch_size': log_file_batch_size if use_queue else 1,
+                        'flush_interval': log_flush_interval,
                     },
                 },
                 'root': {
@@ -102,6 +260,31 @@ def setup_logger(log_path: Optional[str] = None) -> str:
         logging.error(f'Error configuring logging: {e}')
         return None
 
+    _root_level = logging.getLevelName(log_level_root) if isinstance(log_level_root, str) else log_level_root
+    root_logger = logging.getLogger()
+    context_filter = None
+    if env.get('log_json_enabled'):
+        from jsonlog import create_json_handler, RecordContextFilter
+
+        context_filter = RecordContextFilter()
+        json_handler = create_json_handler(env)
+        root_logger.addHandler(json_handler)
+        if not use_queue:
+            json_handler.addFilter(context_filter)
+    if use_queue:
+        handlers = list(root_logger.handlers)
+        log_queue: Queue = Queue()
+        for handler in handlers:
+            root_logger.removeHandler(handler)
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        if context_filter is not None:
+            # Шаблон, аргументы и фаза сохраняются до того, как QueueHandler подставит аргументы в сообщение
+            queue_handler.addFilter(context_filter)
+        root_logger.addHandler(queue_handler)
+        _listener = BatchingQueueListener(log_queue, *handlers, flush_interval=log_flush_interval)
+        _listener.start()
+    _apply_root_level()
+
     log_ignore_list: List[str] = [
         # 'smbprotocol'
     ]
@@ -109,6 +292,7 @@ def setup_logger(log_path: Optional[str] = None) -> str:
     for logger_name in log_ignore_list:
         logging.getLogger(logger_name).setLevel(logging.WARNING)
 
+    _configured, _console_language = (log_path, use_queue), log_console_language
     return log_console_language
 
 
@@ -124,22 +308,22 @@ def change_log_levels(console_level: str, file_level: Optional[str] = None) -> N
 
     :return: None
     """
-    root_logger = logging.getLogger()
     if file_level is None:
         file_level = console_level
 
-    for handler in root_logger.handlers:
-        if isinstance(handler, logging.StreamHandler):
-            logging.info(f'Set logger level {console_level} to console.')
-            handler.setLevel(console_level)
-        elif isinstance(handler, logging.handlers.RotatingFileHandler):
+    for handler in get_log_handlers():
+        # FileHandler is a subclass of StreamHandler, so the file handler is checked first
+        if isinstance(handler, logging.FileHandler):
             logging.info(f'Set logger level {file_level} to log file.')
             handler.setLevel(file_level)
+        elif isinstance(handler, logging.StreamHandler):
+            logging.info(f'Set logger level {console_level} to console.')
+            handler.setLevel(console_level)
+    _apply_root_level()
 
 
-setup_logger()
-
 if __name__ == '__main__':
+    setup_logger()
     log_levels: list = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
 
     # Example on how to change log levels dynamically
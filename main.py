@@ -7,17 +7,26 @@ __maintainer__ = 'InfSub'
 __status__ = 'Production'  # 'Production / Development'
 __version__ = '1.7.6'
 
-from sys import platform
+from time import time
+
+LAUNCHER_STARTED = time()
+
+from sys import path as sys_path, platform, prefix as sys_prefix, version_info as sys_version_info
 from subprocess import check_call
+from hashlib import sha256
+from json import dumps as json_dumps, loads as json_loads
 import logging
-from os import getlogin
-from os.path import exists, join as os_join
+from os import environ, execv, getlogin
+from os.path import abspath, exists, join as os_join
+from runpy import run_path
+from site import addsitedir
 from venv import create as venv_create
 
 # Константы
 MAIN_SCRIPT = "run"
 REQUIREMENTS_FILE = 'requirements.txt'
 VENV_PATH = '.venv'
+STAMP_FILE = '.requirements.stamp'
 LOG_FORMAT = '%(filename)s:%(lineno)d\n%(asctime)-20s| %(levelname)-8s| %(name)-10s| %(funcName)-27s| %(message)s'
 LOG_DATE_FORMAT = '%Y.%m.%d %H:%M:%S'
 LOG_LANGUAGE = 'en'  # en / ru
@@ -33,6 +42,13 @@ LOG_MESSAGE = {
     'requirements': {
         'en': 'Installing dependencies (requirements)...', 'ru': 'Устанавливаем зависимости...',
     },
+    'requirements_unchanged': {
+        'en': 'Dependencies are up to date, skipping installation.',
+        'ru': 'Зависимости не изменились, установка пропущена.',
+    },
+    'launcher_overhead': {
+        'en': f'Launcher overhead: {{seconds:.3f}} s.', 'ru': f'Время работы загрузчика: {{seconds:.3f}} с.',
+    },
     'run_script': {
         'en': f'Running script "{{file}}"...', 'ru': f'Запускаем скрипт "{{file}}"...',
     },
@@ -55,6 +71,79 @@ logging.basicConfig(level=logging.INFO, format=LOG_FORMAT, datefmt=LOG_DATE_FORM
 class VirtualEnvironmentManager:
     def __init__(self, venv_path: str, individual: bool = True) -> None:
         self.venv_path = venv_path if not individual else f'{venv_path}_{getlogin()}'
+        self.stamp_path = os_join(self.venv_path, STAMP_FILE)
+    
+    def get_python_version(self) -> str:
+        """
+        Возвращает версию интерпретатора виртуального окружения из `pyvenv.cfg`, не запуская его.
+
+        :return: Версия (например, '3.12.3'); пустая строка, если окружение не создано.
+        """
+        try:
+            with open(os_join(self.venv_path, 'pyvenv.cfg'), 'r', encoding='utf-8') as config_file:
+                for line in config_file:
+                    key, _, value = line.partition('=')
+                    if key.strip().lower() in ('version', 'version_info'):
+                        return value.strip()
+        except OSError:
+            pass
+        return ''
+    
+    def get_site_packages(self) -> str:
+        """Возвращает каталог site-packages виртуального окружения."""
+        if platform == "win32":
+            return os_join(self.venv_path, 'Lib', 'site-packages')
+        return os_join(
+            self.venv_path, 'lib', f'python{sys_version_info.major}.{sys_version_info.minor}', 'site-packages')
+    
+    def load_site_packages(self) -> bool:
+        """
+        Подключает site-packages окружения к текущему процессу, если интерпретатор окружения той же версии
+        (major.minor), что и интерпретатор загрузчика: тогда скрипт выполняется без запуска интерпретатора окружения.
+
+        Каталог обрабатывается `site.addsitedir` (с файлами `.pth`) и ставится в начало `sys.path`, чтобы пакеты
+        окружения имели приоритет над пакетами интерпретатора загрузчика.
+
+        :return: True, если site-packages окружения подключены.
+        """
+        version = self.get_python_version().split('.')
+        site_packages = self.get_site_packages()
+        if version[:2] != [str(sys_version_info.major), str(sys_version_info.minor)] or not exists(site_packages):
+            return False
+        known_paths = list(sys_path)
+        addsitedir(site_packages)
+        added = [entry for entry in sys_path if entry not in known_paths]
+        sys_path[:] = added + known_paths
+        return True
+    
+    def get_stamp(self) -> str:
+        """
+        Возвращает отметку окружения: хэш файла зависимостей и версия интерпретатора окружения (из `pyvenv.cfg`;
+        окружение может быть создано не тем интерпретатором, которым запущен загрузчик).
+
+        :return: Отметка в виде JSON-строки.
+        """
+        with open(REQUIREMENTS_FILE, 'rb') as requirements_file:
+            requirements_hash = sha256(requirements_file.read()).hexdigest()
+        return json_dumps({'requirements_sha256': requirements_hash, 'python': self.get_python_version(), 'platform': platform})
+    
+    def is_up_to_date(self) -> bool:
+        """Проверяет, установлены ли зависимости для текущих requirements.txt и интерпретатора."""
+        try:
+            with open(self.stamp_path, 'r', encoding='utf-8') as stamp_file:
+                return json_loads(stamp_file.read()) == json_loads(self.get_stamp())
+        except (OSError, ValueError):
+            return False
+    
+    def write_stamp(self) -> None:
+        """Сохраняет отметку окружения после успешной установки зависимостей."""
+        with open(self.stamp_path, 'w', encoding='utf-8') as stamp_file:
+            stamp_file.write(self.get_stamp())
+    
+    def get_python_executable(self) -> str:
+        """Возвращает путь к интерпретатору виртуального окружения."""
+        return os_join(self.venv_path, 'Scripts', 'python.exe') if platform == "win32" else os_join(
+            self.venv_path, 'bin', 'python')
     
     def create_virtual_environment(self) -> None:
         """Создает виртуальное окружение в указанной директории."""
@@ -72,26 +161,50 @@ class VirtualEnvironmentManager:
         logging.info(LOG_MESSAGE['requirements'][LOG_LANGUAGE])
         
         try:
+            check_call([self.get_python_executable(), "-m", "pip", "install", "--upgrade", "pip"])
             check_call([pip_executable, "install", "-r", REQUIREMENTS_FILE])
+            self.write_stamp()
         except Exception as e:
             logging.error(LOG_MESSAGE['file_not_found'][LOG_LANGUAGE].format(file=pip_executable, error=e))
     
     def run_main_script(self) -> None:
-        """Запускает основной скрипт проекта в виртуальном окружении."""
-        python_executable = os_join(self.venv_path, 'Scripts', 'python') if platform == "win32" else os_join(
-            self.venv_path, 'bin', 'python')
+        """
+        Запускает основной скрипт проекта в виртуальном окружении.
+
+        Если загрузчик уже запущен интерпретатором окружения или интерпретатором той же версии (тогда подключаются
+        site-packages окружения, см. `load_site_packages`), скрипт выполняется в этом же процессе. Иначе процесс
+        загрузчика заменяется интерпретатором окружения (`os.execv`); на Windows, где `execv` запускает новый процесс
+        и сразу завершает текущий, скрипт выполняется дочерним процессом.
+        Время старта загрузчика передается в `SLS_LAUNCHER_STARTED`: запуск записывает время старта в отчет.
+        """
+        python_executable = self.get_python_executable()
+        script_path = f'{MAIN_SCRIPT}.py'
+        environ['SLS_LAUNCHER_STARTED'] = repr(LAUNCHER_STARTED)
+        logging.info(LOG_MESSAGE['run_script'][LOG_LANGUAGE].format(file=MAIN_SCRIPT))
+        logging.info(LOG_MESSAGE['launcher_overhead'][LOG_LANGUAGE].format(seconds=time() - LAUNCHER_STARTED))
         
         try:
-            check_call([python_executable, "-m", "pip", "install", "--upgrade", "pip"])
-            logging.info(LOG_MESSAGE['run_script'][LOG_LANGUAGE].format(file=MAIN_SCRIPT))
-            check_call([python_executable, f'{MAIN_SCRIPT}.py'])
+            if abspath(sys_prefix) == abspath(self.venv_path) or self.load_site_packages():
+                run_path(script_path, run_name='__main__')
+            elif platform != "win32":
+                execv(python_executable, [python_executable, script_path])
+            else:
+                check_call([python_executable, script_path])
         except KeyboardInterrupt:
             logging.error(LOG_MESSAGE['task_cancelled'][LOG_LANGUAGE])
         except Exception as e:
             logging.error(LOG_MESSAGE['file_not_found'][LOG_LANGUAGE].format(file=python_executable, error=e))
     
     def setup(self) -> None:
-        """Запускает процесс создания виртуального окружения и установки зависимостей."""
+        """
+        Запускает процесс создания виртуального окружения и установки зависимостей.
+
+        Зависимости устанавливаются, только если изменился requirements.txt или интерпретатор (см. `get_stamp`).
+        """
+        if self.is_up_to_date():
+            logging.info(LOG_MESSAGE['requirements_unchanged'][LOG_LANGUAGE])
+            self.run_main_script()
+            return
         self.create_virtual_environment()
         if exists(os_join(self.venv_path, 'Scripts')) or exists(os_join(self.venv_path, 'bin')):
             self.install_dependencies()
@@ -0,0 +1,352 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+from functools import lru_cache
+from typing import Dict
+
+
+# Сообщения журнала `BackupManager` по идентификатору и языку. Аргументы подставляются модулем logging
+# ('%(name)s'), то есть только для записей, которые действительно будут выведены.
+MESSAGES: Dict[str, Dict[str, str]] = {
+    'run_resume_journal': {
+        'en': 'The previous run was interrupted, resuming from the job journal "%(journal_path)s".',
+        'ru': 'Предыдущий запуск был прерван, продолжаем по журналу заданий "%(journal_path)s".',
+    },
+    'file_times_read': {
+        'en': 'Metadata from the file "%(file_path)s". Time of the last modification: %(mod_time)s; Last access time: '
+              '%(acc_time)s.',
+        'ru': 'Получены метаданные из файла "%(file_path)s". Время последней модификации: %(mod_time)s; Время '
+              'последнего доступа: %(acc_time)s.',
+    },
+    'file_times_not_found': {
+        'en': 'File not found:"%(file_path)s". No data was added to "_file_times".',
+        'ru': 'Файл не найден: "%(file_path)s". В переменную "_file_times" ничего не добавлено.',
+    },
+    'file_times_error': {
+        'en': 'Error getting file times of "%(file_path)s": %(error)s',
+        'ru': 'Ошибка при получении временных меток файла "%(file_path)s": %(error)s',
+    },
+    'file_times_missing': {
+        'en': 'No time data available for source file: %(file_path)s.',
+        'ru': 'Нет данных о времени исходного файла: %(file_path)s.',
+    },
+    'file_times_set_error': {
+        'en': 'Error setting file times for "%(target_path)s": "%(error)s".',
+        'ru': 'Ошибка установки времени файла для "%(target_path)s": "%(error)s".',
+    },
+    'copy_plan': {
+        'en': 'Copy plan: budget %(budget)s s, predicted throughput %(throughput).1f MB/s, selected %(selected)s '
+              'file(s), deferred %(deferred)s file(s).',
+        'ru': 'План копирования: бюджет %(budget)s с, прогноз скорости %(throughput).1f МБ/с, выбрано файлов: '
+              '%(selected)s, отложено файлов: %(deferred)s.',
+    },
+    'copy_already_done': {
+        'en': 'File "%(file_path)s" was already copied to "%(backup_path)s" before the interruption, skipping.',
+        'ru': 'Файл "%(file_path)s" уже скопирован в "%(backup_path)s" до прерывания, пропускаем.',
+    },
+    'copy_file': {
+        'en': 'Copy file: %(file_path)s to %(backup_path)s.',
+        'ru': 'Копируем файл: %(file_path)s в %(backup_path)s.',
+    },
+    'copy_name_changed': {
+        'en': 'The new file name "%(file_path)s" is not equal to the old "%(file_name)s". Deleting file: '
+              '"%(file_path)s".',
+        'ru': 'Новое имя файла "%(file_path)s" не равно старому "%(file_name)s". Удаляем файл: "%(file_path)s".',
+    },
+    'copy_state_save_error': {
+        'en': 'Failed to save the copy scheduler state "%(state_path)s": %(error)s.',
+        'ru': 'Не удалось сохранить состояние планировщика копирования "%(state_path)s": %(error)s.',
+    },
+    'copy_completed': {
+        'en': 'Copying is completed.',
+        'ru': 'Копирование завершено.',
+    },
+    'processing_file': {
+        'en': 'Processing file path: "%(file_path)s". File: "%(file)s".',
+        'ru': 'Обработка пути к файлу: "%(file_path)s". Файл: "%(file)s".',
+    },
+    'file_in_use': {
+        'en': 'File "%(file_path)s" is in use, the backup will be retried once it is released.',
+        'ru': 'Файл "%(file_path)s" используется, резервное копирование будет повторено после его освобождения.',
+    },
+    'file_in_use_released': {
+        'en': 'File "%(file_path)s" was released after %(seconds).1f s (%(checks)s check(s)), copying.',
+        'ru': 'Файл "%(file_path)s" освобожден через %(seconds).1f с (проверок: %(checks)s), копирование.',
+    },
+    'durability_sync_error': {
+        'en': 'Failed to flush the written backups to disk (FILES_DURABILITY=%(mode)s), the archived copies are kept: '
+              '%(error)s.',
+        'ru': 'Не удалось сбросить записанные резервные копии на диск (FILES_DURABILITY=%(mode)s), заархивированные '
+              'копии сохранены: %(error)s.',
+    },
+    'file_in_use_timeout': {
+        'en': 'File "%(file_path)s" is still in use after %(seconds).1f s (%(checks)s check(s)), giving up.',
+        'ru': 'Файл "%(file_path)s" используется и через %(seconds).1f с (проверок: %(checks)s), ожидание прекращено.',
+    },
+    'file_is_original': {
+        'en': 'File is original (not a copy): "%(is_original)s". Ignore backup files: "%(ignore_backup)s". File '
+              '"%(file_path)s".',
+        'ru': 'Файл является оригиналом (не копией): "%(is_original)s". Игнорировать файлы резервных копий: '
+              '"%(ignore_backup)s". Файл "%(file_path)s".',
+    },
+    'file_is_backup': {
+        'en': 'This file "%(file_path)s" is a backup, skipping backup.',
+        'ru': 'Этот файл "%(file_path)s" является резервной копией, резервное копирование пропускается.',
+    },
+    'copy_deferred': {
+        'en': 'Backup of "%(file_path)s" (%(size_mb).1f MB, predicted %(predicted)s s) is deferred to the next '
+              'window: %(reason)s. Last backup: %(last_backup)s.',
+        'ru': 'Резервное копирование "%(file_path)s" (%(size_mb).1f МБ, прогноз %(predicted)s с) отложено до '
+              'следующего окна: %(reason)s. Последняя копия: %(last_backup)s.',
+    },
+    'preflight': {
+        'en': 'Pre-flight: %(count)s file(s) to back up, %(total_gb).2f GB in total, required %(required_gb).2f GB, '
+              'free %(free_gb).2f GB.',
+        'ru': 'Подготовка: файлов для резервного копирования: %(count)s, всего %(total_gb).2f ГБ, требуется '
+              '%(required_gb).2f ГБ, свободно %(free_gb).2f ГБ.',
+    },
+    'io_mode_unsupported': {
+        'en': 'FILES_IO_MODE "%(io_mode)s" is not supported on this system, using "%(fallback)s".',
+        'ru': 'FILES_IO_MODE "%(io_mode)s" не поддерживается в этой системе, используется "%(fallback)s".',
+    },
+    'retention_completed': {
+        'en': 'Retention completed: %(deleted)s backups deleted, %(freed_gb).2f GB freed, %(free_gb).2f GB free.',
+        'ru': 'Очистка завершена: удалено резервных копий: %(deleted)s, освобождено %(freed_gb).2f ГБ, свободно '
+              '%(free_gb).2f ГБ.',
+    },
+    'preflight_no_space': {
+        'en': 'Not enough space after deleting old backups: free %(free_gb).2f GB, required %(required_gb).2f GB.',
+        'ru': 'Недостаточно места после удаления старых резервных копий: свободно %(free_gb).2f ГБ, требуется '
+              '%(required_gb).2f ГБ.',
+    },
+    'preallocate_error': {
+        'en': 'Failed to preallocate "%(file_path)s": %(error)s.',
+        'ru': 'Не удалось зарезервировать место под "%(file_path)s": %(error)s.',
+    },
+    'preflight_completed': {
+        'en': 'Pre-flight completed in %(seconds)s s: deleted %(deleted)s old backup(s) (%(freed_gb).2f GB), '
+              'preallocated %(preallocated)s file(s).',
+        'ru': 'Подготовка завершена за %(seconds)s с: удалено старых копий: %(deleted)s (%(freed_gb).2f ГБ), '
+              'зарезервировано файлов: %(preallocated)s.',
+    },
+    'catalog_built': {
+        'en': 'The backup catalog was built: %(count)s backup(s) indexed in "%(index_path)s".',
+        'ru': 'Каталог резервных копий построен: проиндексировано копий: %(count)s в "%(index_path)s".',
+    },
+    'stats_save_error': {
+        'en': 'Failed to save the run statistics "%(stats_path)s": %(error)s.',
+        'ru': 'Не удалось сохранить статистику запуска "%(stats_path)s": %(error)s.',
+    },
+    'regression': {
+        'en': 'Performance regression: %(metric)s = %(value)s s is above p95 = %(threshold)s s of the last %(runs)s '
+              'run(s) of the same dataset size.',
+        'ru': 'Регрессия производительности: %(metric)s = %(value)s с выше p95 = %(threshold)s с последних запусков '
+              '(%(runs)s) с набором данных того же размера.',
+    },
+    'catalog_add_error': {
+        'en': 'Failed to add "%(file_path)s" to the backup catalog: %(error)s.',
+        'ru': 'Не удалось добавить "%(file_path)s" в каталог резервных копий: %(error)s.',
+    },
+    'catalog_open_error': {
+        'en': 'Failed to open the backup catalog in "%(backup_dir)s", backup directories are scanned instead: '
+              '%(error)s.',
+        'ru': 'Не удалось открыть каталог резервных копий в "%(backup_dir)s", выполняется обход каталогов копий: '
+              '%(error)s.',
+    },
+    'catalog_compact_error': {
+        'en': 'Failed to compact the backup catalog "%(index_path)s": %(error)s.',
+        'ru': 'Не удалось обновить индекс каталога резервных копий "%(index_path)s": %(error)s.',
+    },
+    'backup_name_date': {
+        'en': 'Getting backup name and date for "%(file_path)s": %(date_pattern)s',
+        'ru': 'Получение имени и даты резервной копии для "%(file_path)s": %(date_pattern)s',
+    },
+    'backup_name_no_date': {
+        'en': 'Date not found in file name: "%(old_file_name)s". New file name: "%(new_file_name)s".',
+        'ru': 'Дата не найдена в имени файла: "%(old_file_name)s". Новое имя файла: "%(new_file_name)s".',
+    },
+    'backup_name_with_date': {
+        'en': 'Date found in file name: "%(old_file_name)s". File name without date: "%(new_file_name)s"',
+        'ru': 'Дата найдена в имени файла: "%(old_file_name)s". Имя файла без даты: "%(new_file_name)s"',
+    },
+    'directory_created': {
+        'en': 'Create directory: "%(backup_path)s".',
+        'ru': 'Создаем каталог: "%(backup_path)s".',
+    },
+    'space_free_failed': {
+        'en': 'Unable to free space for "%(file_path)s": no old backups left to delete.',
+        'ru': 'Не удалось освободить место для "%(file_path)s": старых резервных копий для удаления нет.',
+    },
+    'file_copied': {
+        'en': 'File: "%(file_path)s" copied to "%(backup_file_path)s".',
+        'ru': 'Файл: "%(file_path)s" скопирован в "%(backup_file_path)s".',
+    },
+    'file_deleted': {
+        'en': 'Successfully deleted: "%(file_path)s".',
+        'ru': 'Успешно удалено: "%(file_path)s".',
+    },
+    'file_delete_error': {
+        'en': 'Error deleting backup "%(file_path)s": %(error)s.',
+        'ru': 'Ошибка удаления резервной копии "%(file_path)s": %(error)s.',
+    },
+    'disk_space': {
+        'en': 'Free disk space: %(free_space_gb).2f GB, Required size: %(db_size_gb).2f GB, Minimum required space: '
+              '%(min_required_space_gb).2f GB.',
+        'ru': 'Свободное место на диске: %(free_space_gb).2f ГБ, Требуемый размер: %(db_size_gb).2f ГБ, Минимально '
+              'необходимое место: %(min_required_space_gb).2f ГБ.',
+    },
+    'disk_space_sufficient': {
+        'en': 'Sufficient space for backup',
+        'ru': 'Достаточно места для резервной копии',
+    },
+    'disk_space_insufficient': {
+        'en': 'Not enough space for backup',
+        'ru': 'Недостаточно места для резервной копии',
+    },
+    'no_backups_found': {
+        'en': 'No backups found for "%(file_path)s".',
+        'ru': 'Резервные копии для "%(file_path)s" не найдены.',
+    },
+    'delete_oldest': {
+        'en': 'Deleting oldest backup: "%(oldest_backup)s".',
+        'ru': 'Удаление самой старой резервной копии: "%(oldest_backup)s".',
+    },
+    'keep_backup': {
+        'en': 'Keeping backup: "%(backup_path)s" for "%(db_name)s".',
+        'ru': 'Сохраняем резервную копию: "%(backup_path)s" для "%(db_name)s".',
+    },
+    'restore_start': {
+        'en': 'Restoring "%(archive_path)s" to "%(target_path)s".',
+        'ru': 'Восстанавливаем "%(archive_path)s" в "%(target_path)s".',
+    },
+    'restore_error': {
+        'en': 'Failed to restore "%(archive_path)s": %(error)s.',
+        'ru': 'Не удалось восстановить "%(archive_path)s": %(error)s.',
+    },
+    'restore_done': {
+        'en': 'Restored "%(target_path)s": %(size_mb).1f MB in %(seconds).1f s (%(throughput_mbps)s MB/s), hash '
+              'verified: %(verified)s.',
+        'ru': 'Восстановлен "%(target_path)s": %(size_mb).1f МБ за %(seconds).1f с (%(throughput_mbps)s МБ/с), хэш '
+              'проверен: %(verified)s.',
+    },
+    'restore_completed': {
+        'en': 'Restore completed: %(restored)s DB(s), %(failed)s failed, %(size_mb).1f MB in %(seconds).1f s '
+              '(%(throughput_mbps)s MB/s).',
+        'ru': 'Восстановление завершено: БД: %(restored)s, с ошибками: %(failed)s, %(size_mb).1f МБ за %(seconds).1f '
+              'с (%(throughput_mbps)s МБ/с).',
+    },
+    'verify_failed': {
+        'en': 'Backup integrity check FAILED for "%(archive_path)s": %(error)s.',
+        'ru': 'Проверка целостности резервной копии НЕ ПРОЙДЕНА для "%(archive_path)s": %(error)s.',
+    },
+    'verify_state_save_error': {
+        'en': 'Failed to save the integrity check state "%(state_path)s": %(error)s.',
+        'ru': 'Не удалось сохранить состояние проверки целостности "%(state_path)s": %(error)s.',
+    },
+    'verify_summary': {
+        'en': 'Integrity check: %(checked)s archive(s) verified (%(size_mb).1f MB) in %(seconds)s s, %(corrupted)s '
+              'corrupted, %(pending)s left for the next runs.',
+        'ru': 'Проверка целостности: проверено архивов: %(checked)s (%(size_mb).1f МБ) за %(seconds)s с, повреждено: '
+              '%(corrupted)s, осталось на следующие запуски: %(pending)s.',
+    },
+    'replication_error': {
+        'en': 'Failed to replicate "%(file_path)s" to "%(target)s": %(error)s.',
+        'ru': 'Не удалось передать "%(file_path)s" на цель репликации "%(target)s": %(error)s.',
+    },
+    'replication_summary': {
+        'en': 'Replication to "%(target)s": %(files)s file(s) transferred (%(size_mb).1f MB) in %(seconds)s s, '
+              '%(pending)s pending, lag %(lag)s s.',
+        'ru': 'Репликация на "%(target)s": передано файлов: %(files)s (%(size_mb).1f МБ) за %(seconds)s с, '
+              'не передано: %(pending)s, отставание %(lag)s с.',
+    },
+    'archive_completed': {
+        'en': 'The archiving is completed.',
+        'ru': 'Архивация завершена.',
+    },
+    'archive_forecast': {
+        'en': 'Archiving forecast: %(count)s file(s), %(size_mb).1f MB, about %(seconds).0f s.',
+        'ru': 'Прогноз архивации: файлов: %(count)s, %(size_mb).1f МБ, около %(seconds).0f с.',
+    },
+    'archive_already_done': {
+        'en': 'File "%(file_path)s" was already archived to "%(archive_path)s" before the interruption.',
+        'ru': 'Файл "%(file_path)s" уже заархивирован в "%(archive_path)s" до прерывания.',
+    },
+    'hash_compare': {
+        'en': 'Compare the current and last hashes of the file: "%(file_path)s". ',
+        'ru': 'Сравниваем текущий и последний хэши файла: "%(file_path)s". ',
+    },
+    'hash_unchanged': {
+        'en': 'No changes in file: "%(file_path)s", skipping backup.',
+        'ru': 'Нет изменений в файле: "%(file_path)s", резервное копирование пропускается.',
+    },
+    'copy_delete': {
+        'en': 'Delete a copy of the file: "%(file_path)s".',
+        'ru': 'Удаляем копию файла: "%(file_path)s".',
+    },
+    'hash_write': {
+        'en': 'Write the file hash: "%(file_path)s", to the file: "%(hash_file_path)s".',
+        'ru': 'Записываем хэш файла: "%(file_path)s", в файл: "%(hash_file_path)s".',
+    },
+    'hash_file_times': {
+        'en': 'Install the date of the Hash file "%(hash_file_path)s" equal to the date "%(time)s" of the archive '
+              'file "%(file_path)s".',
+        'ru': 'Устанавливаем дату хэш файла "%(hash_file_path)s" равной дате "%(time)s" архивируемого файла '
+              '"%(file_path)s".',
+    },
+    'hash_calculated': {
+        'en': 'Calculate "%(hash_type)s" hash: File: %(basename)s | Hash: %(hash_digest)s',
+        'ru': 'Вычисляем хэш "%(hash_type)s": Файл: %(basename)s | Хэш: %(hash_digest)s',
+    },
+    'seven_zip_missing': {
+        'en': '7z executable not found, switching to zip format.',
+        'ru': 'Исполняемый файл 7z не найден, переключение на формат zip.',
+    },
+    'archive_create': {
+        'en': 'Creating archive: "%(archive_path)s" from file: "%(file_path)s".',
+        'ru': 'Создаем архив: "%(archive_path)s" из файла: "%(file_path)s".',
+    },
+    'archive_done': {
+        'en': 'Backup completed for "%(file_path)s".',
+        'ru': 'Резервное копирование для "%(file_path)s" завершено.',
+    },
+    'archive_streamed': {
+        'en': 'The archive "%(archive_path)s" was uploaded to "%(target)s" while it was compressed.',
+        'ru': 'Архив "%(archive_path)s" передан на "%(target)s" во время сжатия.',
+    },
+    'archive_error': {
+        'en': 'Failed to backup "%(file_path)s": %(error)s.',
+        'ru': 'Не удалось создать резервную копию "%(file_path)s": %(error)s.',
+    },
+    'seven_zip_check_error': {
+        'en': 'Error while checking 7z availability: %(error)s.',
+        'ru': 'Ошибка при проверке доступности 7z: %(error)s.',
+    },
+    'seven_zip_not_found': {
+        'en': '7z executable "%(path)s" not found.',
+        'ru': 'Исполняемый файл 7z "%(path)s" не найден.',
+    },
+    'seven_zip_archive_error': {
+        'en': '7z failed with exit code %(returncode)s: stdout: %(stdout)r; stderr: %(stderr)r.',
+        'ru': '7z завершился с кодом %(returncode)s: stdout: %(stdout)r; stderr: %(stderr)r.',
+    },
+}
+
+
+@lru_cache(maxsize=None)
+def get_messages(language: str) -> Dict[str, str]:
+    """
+    Возвращает сообщения журнала на указанном языке (сообщения без перевода - на английском).
+
+    Пример: `logging.warning(messages['copy_file'], {'file_path': file_path, 'backup_path': backup_path})`.
+
+    :param language: Язык сообщений ('en', 'ru').
+    :return: Словарь: идентификатор сообщения -> шаблон.
+    """
+    return {message_id: texts.get(language, texts['en']) for message_id, texts in MESSAGES.items()}
@@ -0,0 +1,375 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+from contextvars import ContextVar
+from functools import wraps
+from os import makedirs as os_makedirs, path as os_path, replace as os_replace
+from time import perf_counter, time
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+from config import Config
+
+
+_current_span: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+# Метрики экземпляра сервера, которые задача orchestrator.py использует вместо метрик процесса
+_context_metrics: ContextVar[Optional['Metrics']] = ContextVar('context_metrics', default=None)
+
+
+class Span:
+    """
+    Интервал времени фазы или операции над файлом.
+
+    Интервалы вкладываются друг в друга: родителем становится интервал, активный в момент входа (в том числе
+    в задаче asyncio, созданной внутри интервала), а путь интервала имеет вид 'run/copy/copy_file'.
+
+    :ivar name (str): Имя интервала.
+    :ivar path (str): Путь интервала от корневого.
+    :ivar labels (Dict[str, str]): Метки (например, 'file').
+    :ivar seconds (float): Длительность (сек).
+    :ivar bytes (int): Объем обработанных данных (байт).
+    """
+
+    __slots__ = ('_metrics', '_token', '_started', 'name', 'path', 'labels', 'offset', 'seconds', 'bytes')
+
+    def __init__(self, metrics: 'Metrics', name: str, labels: Dict[str, str]) -> None:
+        self._metrics = metrics
+        self._token = None
+        self._started: float = 0.0
+        self.name: str = name
+        self.path: str = name
+        self.labels: Dict[str, str] = labels
+        self.offset: float = 0.0
+        self.seconds: float = 0.0
+        self.bytes: int = 0
+
+    def __enter__(self) -> 'Span':
+        parent = _current_span.get()
+        if parent is not None:
+            self.path = f'{parent.path}/{self.name}'
+        self._token = _current_span.set(self)
+        self._started = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.seconds = perf_counter() - self._started
+        self.offset = self._started - self._metrics.started
+        _current_span.reset(self._token)
+        self._metrics.spans.append(self)
+        for listener in self._metrics.listeners:
+            listener(self)
+
+    def add_bytes(self, size: int) -> None:
+        """Добавляет объем обработанных данных."""
+        self.bytes += size
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Возвращает интервал в виде словаря для отчета о запуске."""
+        result = {
+            'path': self.path, 'offset': round(self.offset, 6), 'seconds': round(self.seconds, 6), 'bytes': self.bytes}
+        if self.labels:
+            result['labels'] = self.labels
+        if self.bytes and self.seconds:
+            result['mb_per_s'] = round(self.bytes / 1024 ** 2 / self.seconds, 2)
+        return result
+
+
+class _NullSpan:
+    """Интервал-заглушка при отключенных метриках."""
+
+    __slots__ = ()
+    bytes = 0
+    seconds = 0.0
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def add_bytes(self, size: int) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Metrics:
+    """
+    Метрики запуска: вложенные интервалы времени, счетчики и значения.
+
+    В конце запуска метрики записываются в файл для textfile-коллектора Prometheus (`METRICS_TEXTFILE`) и в раздел
+    'metrics' отчета о запуске.
+
+    :ivar spans (List[Span]): Завершенные интервалы в порядке завершения.
+    :ivar counters (Dict[Tuple[str, Tuple], float]): Счетчики по имени и меткам.
+    :ivar gauges (Dict[Tuple[str, Tuple], float]): Значения по имени и меткам.
+    :ivar listeners (List[Callable[[Span], None]]): Функции, вызываемые с каждым завершенным интервалом.
+    :ivar const_labels (Dict[str, str]): Метки всех значений в файле Prometheus (например, 'instance').
+    """
+
+    enabled: bool = True
+
+    def __init__(
+            self, textfile_path: Optional[str] = None, prefix: str = 'sls_backup',
+            const_labels: Optional[Dict[str, str]] = None) -> None:
+        self.textfile_path: Optional[str] = textfile_path
+        self.prefix: str = prefix
+        self.const_labels: Dict[str, str] = const_labels or {}
+        self.started: float = perf_counter()
+        self.spans: List[Span] = []
+        self.counters: Dict[Tuple[str, Tuple], float] = {}
+        self.gauges: Dict[Tuple[str, Tuple], float] = {}
+        self.listeners: List[Callable[[Span], None]] = []
+
+    def reset(self) -> None:
+        """Очищает метрики перед новым запуском."""
+        self.started = perf_counter()
+        self.spans.clear()
+        self.counters.clear()
+        self.gauges.clear()
+
+    def add_listener(self, listener: Callable[[Span], None]) -> None:
+        """Добавляет функцию, вызываемую с каждым завершенным интервалом (например, для журнала JSON Lines)."""
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Span], None]) -> None:
+        """Удаляет функцию, добавленную `add_listener`."""
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def span(self, name: str, **labels: str) -> Span:
+        """
+        Создает интервал для использования в `with`.
+
+        :param name: Имя интервала (фаза или операция).
+        :param labels: Метки интервала.
+        :return: Интервал.
+        """
+        return Span(self, name, labels)
+
+    def add(self, name: str, value: float = 1, **labels: str) -> None:
+        """Увеличивает счетчик."""
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        """Устанавливает значение."""
+        self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Возвращает метрики для отчета о запуске."""
+        return {
+            'spans': [span.to_dict() for span in sorted(self.spans, key=lambda span: span.offset)],
+            'counters': [self._sample_dict(key, value) for key, value in self.counters.items()],
+            'gauges': [self._sample_dict(key, value) for key, value in self.gauges.items()],
+        }
+
+    def render_textfile(self) -> str:
+        """
+        Формирует метрики в текстовом формате Prometheus.
+
+        Интервалы агрегируются по пути (без меток файлов); интервалы с меткой 'file' дополнительно выводятся
+        по файлам.
+
+        :return: Текст для textfile-коллектора.
+        """
+        prefix = self.prefix
+        lines: List[str] = []
+        totals: Dict[str, List[float]] = {}
+        for span in self.spans:
+            total = totals.setdefault(span.path, [0, 0.0, 0])
+            total[0] += 1
+            total[1] += span.seconds
+            total[2] += span.bytes
+
+        def metric(name: str, metric_type: str, help_text: str, samples: List[Tuple[Dict[str, str], float]]) -> None:
+            if not samples:
+                return
+            lines.append(f'# HELP {prefix}_{name} {help_text}')
+            lines.append(f'# TYPE {prefix}_{name} {metric_type}')
+            for labels, value in samples:
+                lines.append(f'{prefix}_{name}{self._format_labels({**self.const_labels, **labels})} {value:.15g}')
+
+        metric('span_seconds', 'gauge', 'Total time spent in the span during the last run.',
+               [({'span': path}, total[1]) for path, total in totals.items()])
+        metric('span_count', 'gauge', 'Number of times the span was entered during the last run.',
+               [({'span': path}, total[0]) for path, total in totals.items()])
+        metric('span_bytes', 'gauge', 'Bytes processed inside the span during the last run.',
+               [({'span': path}, total[2]) for path, total in totals.items() if total[2]])
+        metric('span_throughput_bytes_per_second', 'gauge', 'Average throughput of the span during the last run.',
+               [({'span': path}, total[2] / total[1]) for path, total in totals.items() if total[2] and total[1]])
+        file_spans = [span for span in self.spans if 'file' in span.labels]
+        metric('file_seconds', 'gauge', 'Time spent on a file in the span during the last run.',
+               [({'span': span.path, **span.labels}, span.seconds) for span in file_spans])
+        metric('file_bytes', 'gauge', 'Bytes of a file processed in the span during the last run.',
+               [({'span': span.path, **span.labels}, span.bytes) for span in file_spans if span.bytes])
+        for name in sorted({key[0] for key in self.counters}):
+            metric(f'{name}_total', 'counter', f'{name.replace("_", " ").capitalize()} during the last run.',
+                   [(dict(key[1]), value) for key, value in self.counters.items() if key[0] == name])
+        for name in sorted({key[0] for key in self.gauges}):
+            metric(name, 'gauge', f'{name.replace("_", " ").capitalize()}.',
+                   [(dict(key[1]), value) for key, value in self.gauges.items() if key[0] == name])
+        metric('last_run_timestamp_seconds', 'gauge', 'Time the last run finished.', [({}, time())])
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self) -> Optional[str]:
+        """
+        Записывает метрики в файл для textfile-коллектора Prometheus (атомарно: коллектор не видит частичный файл).
+
+        :return: Путь к файлу или None, если путь не задан или записать не удалось.
+        """
+        if not self.textfile_path:
+            return None
+        try:
+            directory = os_path.dirname(self.textfile_path)
+            if directory:
+                os_makedirs(directory, exist_ok=True)
+            tmp_path = f'{self.textfile_path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as textfile:
+                textfile.write(self.render_textfile())
+            os_replace(tmp_path, self.textfile_path)
+        except OSError:
+            return None
+        return self.textfile_path
+
+    @staticmethod
+    def _sample_dict(key: Tuple[str, Tuple], value: float) -> Dict[str, Any]:
+        """Возвращает счетчик или значение в виде словаря."""
+        result = {'name': key[0], 'value': value}
+        if key[1]:
+            result['labels'] = dict(key[1])
+        return result
+
+    @staticmethod
+    def _format_labels(labels: Dict[str, str]) -> str:
+        """Форматирует метки Prometheus с экранированием значений."""
+        if not labels:
+            return ''
+        pairs = []
+        for key, value in sorted(labels.items()):
+            value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            pairs.append(f'{key}="{value}"')
+        return '{' + ','.join(pairs) + '}'
+
+
+class NullMetrics(Metrics):
+    """Метрики при `METRICS_ENABLED=False`: все операции ничего не делают."""
+
+    enabled: bool = False
+
+    def span(self, name: str, **labels: str) -> _NullSpan:
+        return _NULL_SPAN
+
+    def add(self, name: str, value: float = 1, **labels: str) -> None:
+        pass
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        pass
+
+    def write_textfile(self) -> Optional[str]:
+        return None
+
+
+_metrics: Optional[Metrics] = None
+
+
+def create_metrics(instance: Optional[str] = None) -> Metrics:
+    """
+    Создает метрики по настройкам `METRICS_ENABLED` и `METRICS_TEXTFILE`.
+
+    Метрики экземпляра сервера записываются в файл `<METRICS_TEXTFILE>_<экземпляр>.prom` с меткой 'instance',
+    чтобы textfile-коллектор не получил одинаковые серии из файлов разных экземпляров.
+
+    :param instance: Имя экземпляра сервера (см. `orchestrator.py`); None - метрики процесса.
+    :return: Метрики (или `NullMetrics`, если метрики отключены).
+    """
+    env: Dict[str, Any] = Config().get_config('metrics', 'log', instance=instance)
+    if not env.get('metrics_enabled', True):
+        return NullMetrics()
+    textfile_path = env.get('metrics_textfile')
+    if textfile_path and not os_path.isabs(textfile_path):
+        textfile_path = os_path.join(env.get('log_dir', 'logs'), textfile_path)
+    if instance is None:
+        return Metrics(textfile_path)
+    if textfile_path:
+        root, extension = os_path.splitext(textfile_path)
+        textfile_path = f'{root}_{instance.lower()}{extension}'
+    return Metrics(textfile_path, const_labels={'instance': instance})
+
+
+def get_metrics() -> Metrics:
+    """
+    Возвращает метрики текущей задачи (см. `use_metrics`) или метрики процесса, создавая их при первом обращении.
+
+    :return: Метрики (или `NullMetrics`, если метрики отключены).
+    """
+    global _metrics
+    context_metrics = _context_metrics.get()
+    if context_metrics is not None:
+        return context_metrics
+    if _metrics is None:
+        _metrics = create_metrics()
+    return _metrics
+
+
+def use_metrics(metrics: Metrics) -> None:
+    """
+    Задает метрики для текущего контекста: `get_metrics()` в нем и в созданных из него задачах asyncio возвращает
+    `metrics`. Функции, подписанные на интервалы метрик процесса (журнал JSON Lines), подписываются и на них.
+
+    :param metrics: Метрики экземпляра (см. `create_metrics`).
+    """
+    if _metrics is not None:
+        for listener in _metrics.listeners:
+            metrics.add_listener(listener)
+    _context_metrics.set(metrics)
+
+
+def reset_metrics() -> None:
+    """Сбрасывает метрики процесса: следующий `get_metrics()` создает их по текущим настройкам."""
+    global _metrics
+    _metrics = None
+
+
+def current_span() -> Any:
+    """Возвращает активный интервал (или заглушку, если интервала нет или метрики отключены)."""
+    return _current_span.get() or _NULL_SPAN
+
+
+def timed(name: str, file_arg: Optional[str] = None) -> Callable:
+    """
+    Декоратор корутины: выполняет ее внутри интервала `name` метрик процесса.
+
+    :param name: Имя интервала.
+    :param file_arg: Имя аргумента с путем к файлу; имя файла записывается в метку 'file' интервала.
+    :return: Декоратор.
+    """
+    def decorator(function: Callable) -> Callable:
+        # Сигнатура вычисляется при первом вызове: декоратор применяется при импорте модулей
+        function_signature = []
+
+        @wraps(function)
+        async def wrapper(*args, **kwargs):
+            metrics = get_metrics()
+            if not metrics.enabled:
+                return await function(*args, **kwargs)
+            labels = {}
+            if file_arg:
+                if not function_signature:
+                    from inspect import signature
+
+                    function_signature.append(signature(function))
+                file_path = function_signature[0].bind(*args, **kwargs).arguments.get(file_arg)
+                if file_path:
+                    labels['file'] = os_path.basename(file_path)
+            with metrics.span(name, **labels):
+                return await function(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,424 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+"""
+Ввод-вывод с каталогом резервных копий на сетевом ресурсе (UNC / SMB, NFS).
+
+На сетевом ресурсе каждая операция стоит как минимум одну задержку сети, поэтому последовательный цикл
+«прочитать блок -> записать блок» упирается в задержку, а не в пропускную способность. `PipelinedFile` держит
+в работе до `depth` запросов на файл: чтение идет с опережением на несколько блоков, запись не ждет завершения
+предыдущих блоков (`flush` ждет все). Метаданные (создание каталогов, размеры, даты файлов) обрабатываются пакетами
+параллельно.
+
+Все операции с сетевым ресурсом выполняются через `FileOps`; бенчмарк подменяет его имитацией сетевой задержки
+(`bench/netfs.py`).
+"""
+
+from asyncio import get_running_loop, gather, to_thread
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from os import path as os_path
+import os
+from threading import Lock, local
+from typing import Any, Deque, Dict, List, Optional, Tuple, Iterable
+
+from config import Config
+
+
+# Типы файловых систем Linux, которые считаются сетевыми
+NETWORK_FILESYSTEMS = {
+    'cifs', 'smb3', 'smbfs', 'nfs', 'nfs4', 'fuse.sshfs', '9p', 'afs', 'ceph', 'glusterfs', 'fuse.glusterfs'}
+
+
+def is_network_path(path: str) -> bool:
+    """
+    Определяет, находится ли путь на сетевом ресурсе.
+
+    UNC-путь (`\\\\сервер\\ресурс`) - всегда сетевой; в Windows сетевой диск определяется по типу диска, в Linux -
+    по типу файловой системы точки монтирования (`/proc/mounts`).
+
+    :param path: Путь.
+    :return: True, если путь сетевой.
+    """
+    if path.startswith('\\\\') or path.startswith('//'):
+        return True
+    path = os_path.abspath(path)
+    if os.name == 'nt':
+        try:
+            from ctypes import windll
+
+            # DRIVE_REMOTE
+            return windll.kernel32.GetDriveTypeW(os_path.splitdrive(path)[0] + '\\') == 4
+        except (ImportError, AttributeError, OSError):
+            return False
+    try:
+        with open('/proc/mounts', 'r', encoding='utf-8') as mounts_file:
+            mounts = [line.split()[1:3] for line in mounts_file if len(line.split()) > 2]
+    except OSError:
+        return False
+    best, fs_type = '', ''
+    for mount_point, mount_type in mounts:
+        mount_point = mount_point.replace('\\040', ' ')
+        if (path == mount_point or path.startswith(mount_point.rstrip('/') + '/')) and len(mount_point) > len(best):
+            best, fs_type = mount_point, mount_type
+    return fs_type in NETWORK_FILESYSTEMS
+
+
+class FileOps:
+    """
+    Операции с файлами сетевого ресурса (функции `os`).
+
+    :ivar positional (bool): Система поддерживает позиционные `pread` / `pwrite`; иначе каждый рабочий поток
+                             открывает файл отдельно (в Windows операции с одним дескриптором выполняются по очереди).
+    """
+
+    positional: bool = hasattr(os, 'pread')
+
+    def open(self, path: str, flags: int) -> int:
+        return os.open(path, flags | getattr(os, 'O_BINARY', 0), 0o666)
+
+    def close(self, fd: int) -> None:
+        os.close(fd)
+
+    def read_at(self, fd: int, size: int, offset: int) -> bytes:
+        if self.positional:
+            return os.pread(fd, size, offset)
+        os.lseek(fd, offset, os.SEEK_SET)
+        return os.read(fd, size)
+
+    def write_at(self, fd: int, data: Any, offset: int) -> int:
+        if self.positional:
+            return os.pwrite(fd, data, offset)
+        os.lseek(fd, offset, os.SEEK_SET)
+        return os.write(fd, data)
+
+    def truncate(self, fd: int, size: int) -> None:
+        os.ftruncate(fd, size)
+
+    def size(self, fd: int) -> int:
+        return os.fstat(fd).st_size
+
+    def makedirs(self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+
+    def getsize(self, path: str) -> int:
+        return os_path.getsize(path)
+
+    def utime(self, path: str, times: Tuple[float, float]) -> None:
+        os.utime(path, times=times)
+
+
+class PipelinedFile:
+    """
+    Файл на сетевом ресурсе с несколькими одновременными запросами (интерфейс файла: `read`, `write`, `seek`,
+    `tell`, `flush`, `truncate`, `fileno`, `close`).
+
+    Последовательные записи меньше `chunk_size` собираются в буфер и отправляются одним запросом.
+
+    :ivar path (str): Путь к файлу.
+    :ivar depth (int): Количество одновременных запросов.
+    :ivar chunk_size (int): Размер запроса записи (байт).
+    """
+
+    def __init__(
+            self, path: str, mode: str, depth: int, chunk_size: int, executor: ThreadPoolExecutor,
+            ops: FileOps) -> None:
+        self.path: str = path
+        self.depth: int = max(depth, 1)
+        self.chunk_size: int = chunk_size
+        self._executor: ThreadPoolExecutor = executor
+        self._ops: FileOps = ops
+        flags = {'rb': os.O_RDONLY, 'wb': os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 'r+b': os.O_RDWR}[mode]
+        # Дополнительные дескрипторы рабочих потоков открывают уже существующий файл
+        self._thread_flags: int = flags & ~(os.O_CREAT | os.O_TRUNC)
+        self._fd: int = ops.open(path, flags)
+        self._fds: List[int] = [self._fd]
+        self._fds_lock: Lock = Lock()
+        self._local = local()
+        # Новый файл пуст: размер не запрашивается
+        self._size: int = 0 if mode == 'wb' else ops.size(self._fd)
+        self._position: int = 0
+        self._reads: Deque[Tuple[int, int, Future]] = deque()
+        self._writes: Deque[Tuple[int, int, Future]] = deque()
+        self._buffer: bytearray = bytearray()
+        self._buffer_offset: int = 0
+
+    def _thread_fd(self) -> int:
+        """Возвращает дескриптор файла для текущего рабочего потока."""
+        if self._ops.positional:
+            return self._fd
+        fd = getattr(self._local, 'fd', None)
+        if fd is None:
+            fd = self._local.fd = self._ops.open(self.path, self._thread_flags)
+            with self._fds_lock:
+                self._fds.append(fd)
+        return fd
+
+    def _read_at(self, size: int, offset: int) -> bytes:
+        return self._ops.read_at(self._thread_fd(), size, offset)
+
+    def _write_at(self, data: Any, offset: int) -> None:
+        fd = self._thread_fd()
+        view = memoryview(data)
+        written = 0
+        while written < len(view):
+            written += self._ops.write_at(fd, view[written:], offset + written)
+
+    @staticmethod
+    def _cancel(requests: Deque[Tuple[int, int, Future]]) -> None:
+        """Отменяет запросы (запросы, которые уже выполняются, дожидаются завершения)."""
+        while requests:
+            future = requests.popleft()[2]
+            if not future.cancel():
+                try:
+                    future.result()
+                except Exception:
+                    pass
+
+    def read(self, size: int = -1) -> bytes:
+        if self._buffer or self._writes:
+            self.flush()
+        if size < 0:
+            size = max(self._size - self._position, 0)
+        if self._reads and self._reads[0][:2] != (self._position, size):
+            # Смещение или размер блока изменились: опережающее чтение не подходит
+            self._cancel(self._reads)
+        if self._reads:
+            future = self._reads.popleft()[2]
+        else:
+            future = self._executor.submit(self._read_at, size, self._position)
+        next_offset = self._reads[-1][0] + size if self._reads else self._position + size
+        while len(self._reads) < self.depth - 1 and next_offset < self._size:
+            self._reads.append((next_offset, size, self._executor.submit(self._read_at, size, next_offset)))
+            next_offset += size
+        data = future.result()
+        self._position += len(data)
+        return data
+
+    def _wait_writes(self, limit: int) -> None:
+        """Ждет завершения записей, пока в работе больше `limit` запросов."""
+        while len(self._writes) > limit:
+            self._writes.popleft()[2].result()
+
+    def _submit_write(self, data: Any, offset: int) -> None:
+        """Отправляет запрос записи, если в работе меньше `depth` запросов (иначе ждет)."""
+        self._wait_writes(self.depth - 1)
+        end = offset + len(data)
+        for start, write_end, future in self._writes:
+            if start < end and offset < write_end:
+                # Перезапись диапазона, запись которого еще в работе (заголовок zip): сохраняем порядок записей
+                future.result()
+        self._writes.append((offset, end, self._executor.submit(self._write_at, data, offset)))
+
+    def _submit_buffer(self) -> None:
+        if self._buffer:
+            data, self._buffer = self._buffer, bytearray()
+            self._submit_write(data, self._buffer_offset)
+
+    def write(self, data: Any) -> int:
+        size = len(data)
+        if self._buffer and self._buffer_offset + len(self._buffer) != self._position:
+            self._submit_buffer()
+        if not self._buffer and size >= self.chunk_size:
+            self._submit_write(data, self._position)
+        else:
+            if not self._buffer:
+                self._buffer_offset = self._position
+            self._buffer += data
+            if len(self._buffer) >= self.chunk_size:
+                self._submit_buffer()
+        self._position += size
+        self._size = max(self._size, self._position)
+        return size
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            self.flush()
+            offset += self._size
+        self._position = offset
+        return offset
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        self._submit_buffer()
+        self._wait_writes(0)
+
+    def truncate(self) -> int:
+        self.flush()
+        self._ops.truncate(self._fd, self._position)
+        self._size = self._position
+        return self._position
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def close(self) -> None:
+        if not self._fds:
+            return
+        try:
+            self.flush()
+        finally:
+            self._cancel(self._reads)
+            self._cancel(self._writes)
+            self._buffer = bytearray()
+            with self._fds_lock:
+                for fd in self._fds:
+                    self._ops.close(fd)
+                self._fds = []
+
+    def __enter__(self) -> 'PipelinedFile':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class AsyncPipelinedFile:
+    """Асинхронная обертка `PipelinedFile` с интерфейсом aiofiles (ожидание запросов - в рабочем потоке)."""
+
+    def __init__(self, *args: Any) -> None:
+        self._args = args
+        self._file: Optional[PipelinedFile] = None
+
+    async def __aenter__(self) -> 'AsyncPipelinedFile':
+        self._file = await to_thread(PipelinedFile, *self._args)
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await to_thread(self._file.close)
+
+    async def read(self, size: int = -1) -> bytes:
+        return await to_thread(self._file.read, size)
+
+    async def write(self, data: Any) -> int:
+        return await to_thread(self._file.write, data)
+
+    async def seek(self, offset: int) -> int:
+        return self._file.seek(offset)
+
+    async def flush(self) -> None:
+        await to_thread(self._file.flush)
+
+    async def truncate(self) -> int:
+        return await to_thread(self._file.truncate)
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+
+class NetworkIO:
+    """
+    Ввод-вывод с каталогом резервных копий на сетевом ресурсе.
+
+    :ivar enabled (bool): Каталог резервных копий - сетевой ресурс.
+    :ivar root (str): Каталог резервных копий.
+    :ivar depth (int): Количество одновременных запросов на файл (и метаданных в пакете).
+    :ivar chunk_size (int): Размер запроса чтения и записи (байт).
+    :ivar ops (FileOps): Операции с файлами.
+    """
+
+    def __init__(
+            self, enabled: bool, root: str = '', depth: int = 4, chunk_size: int = 8 * 1024 ** 2,
+            ops: Optional[FileOps] = None) -> None:
+        self.enabled: bool = enabled
+        self.root: str = os_path.normcase(os_path.abspath(root)) if root else ''
+        self.depth: int = max(depth, 1)
+        self.chunk_size: int = chunk_size
+        self.ops: FileOps = ops if ops is not None else FileOps()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending_utimes: Dict[str, Tuple[float, float]] = {}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            # Запросы чтения и записи одного файла и пакеты метаданных
+            self._executor = ThreadPoolExecutor(max_workers=self.depth * 2, thread_name_prefix='netio')
+        return self._executor
+
+    def is_remote(self, path: str) -> bool:
+        """Проверяет, что путь находится в каталоге резервных копий на сетевом ресурсе."""
+        if not self.enabled:
+            return False
+        path = os_path.normcase(os_path.abspath(path))
+        return path == self.root or path.startswith(self.root.rstrip(os_path.sep) + os_path.sep)
+
+    def open(self, path: str, mode: str = 'rb') -> PipelinedFile:
+        """Открывает файл в рабочем потоке."""
+        return PipelinedFile(path, mode, self.depth, self.chunk_size, self._get_executor(), self.ops)
+
+    def aio_open(self, path: str, mode: str = 'rb') -> AsyncPipelinedFile:
+        """Открывает файл в цикле событий (`async with`)."""
+        return AsyncPipelinedFile(path, mode, self.depth, self.chunk_size, self._get_executor(), self.ops)
+
+    async def _map(self, function: Any, items: Iterable[Any]) -> List[Any]:
+        """Выполняет операцию над элементами параллельно (не более `depth` одновременно)."""
+        items = list(items)
+        loop = get_running_loop()
+        results: List[Any] = []
+        for start in range(0, len(items), self.depth):
+            results.extend(await gather(*(
+                loop.run_in_executor(self._get_executor(), function, item)
+                for item in items[start:start + self.depth])))
+        return results
+
+    async def makedirs(self, paths: Iterable[str]) -> None:
+        """Создает каталоги пакетом."""
+        await self._map(self.ops.makedirs, paths)
+
+    async def getsizes(self, paths: Iterable[str]) -> List[int]:
+        """Возвращает размеры файлов пакетом."""
+        return await self._map(self.ops.getsize, paths)
+
+    def defer_utime(self, path: str, times: Tuple[float, float]) -> None:
+        """Откладывает установку дат файла до `flush_utimes`."""
+        self._pending_utimes[path] = times
+
+    async def flush_utimes(self) -> List[Tuple[str, Exception]]:
+        """
+        Устанавливает отложенные даты файлов пакетом.
+
+        :return: Ошибки: [(путь, исключение)].
+        """
+        pending, self._pending_utimes = self._pending_utimes, {}
+        errors: List[Tuple[str, Exception]] = []
+
+        def set_times(item: Tuple[str, Tuple[float, float]]) -> None:
+            try:
+                self.ops.utime(*item)
+            except OSError as e:
+                errors.append((item[0], e))
+
+        await self._map(set_times, pending.items())
+        return errors
+
+    def close(self) -> None:
+        """Завершает рабочие потоки."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def create_network_io(instance: Optional[str] = None) -> NetworkIO:
+    """
+    Создает `NetworkIO` для `FILES_BACKUP_DIR` по настройкам `FILES_NETWORK_*`.
+
+    :param instance: Имя экземпляра сервера (см. `orchestrator.py`).
+    :return: `NetworkIO` (с `enabled=False`, если каталог локальный или режим отключен).
+    """
+    env: Dict[str, Any] = Config().get_config('files', instance=instance)
+    backup_dir = env.get('files_backup_dir', '')
+    mode = env.get('files_network_mode', 'auto')
+    enabled = mode == 'on' or (mode == 'auto' and is_network_path(backup_dir))
+    return NetworkIO(
+        enabled, backup_dir, depth=env.get('files_network_depth', 4),
+        chunk_size=int(env.get('files_network_chunk_mb', 8.0) * 1024 ** 2))
@@ -0,0 +1,207 @@
+__author__ = 'InfSub'
+__contact__ = 'ADmin@TkYD.ru'
+__copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+__date__ = '2025/06/01'
+__deprecated__ = False
+__email__ = 'ADmin@TkYD.ru'
+__maintainer__ = 'InfSub'
+__status__ = 'Production'  # 'Production / Development'
+__version__ = '1.0.6.0'
+
+from argparse import ArgumentParser
+from asyncio import (
+    run as aio_run, gather as aio_gather, create_task as aio_create_task, sleep as aio_sleep, Lock as aio_Lock,
+    Semaphore as aio_Semaphore)
+from contextlib import asynccontextmanager
+from os import stat as os_stat, path as os_path
+from re import fullmatch as re_fullmatch
+from time import monotonic
+from typing import Dict, Any, List, Optional, Iterable, AsyncIterator
+
+from backup import BackupManager
+from server import ServerManager
+from report import RunReport
+from config import Config
+from metrics import create_metrics, use_metrics
+from run import execute
+
+from logger import logging, setup_logger
+
+
+logging = logging.getLogger(__name__)
+
+
+class DeviceLimiter:
+    """
+    Ограничивает количество экземпляров, одновременно работающих с одним физическим устройством.
+
+    Экземпляр захватывает семафоры всех своих устройств (каталог БД и каталог резервных копий) в порядке номеров
+    устройств, поэтому экземпляры с общими устройствами не блокируют друг друга взаимно.
+
+    :ivar limit (int): Количество экземпляров на устройство; 0 - без ограничения.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit: int = limit
+        self._semaphores: Dict[int, aio_Semaphore] = {}
+
+    @asynccontextmanager
+    async def acquire(self, devices: Iterable[int]) -> AsyncIterator[None]:
+        """
+        Захватывает устройства на время блока `async with`.
+
+        :param devices: Номера устройств (`st_dev`).
+        """
+        acquired: List[aio_Semaphore] = []
+        try:
+            if self.limit:
+                for device in sorted(set(devices)):
+                    semaphore = self._semaphores.setdefault(device, aio_Semaphore(self.limit))
+                    await semaphore.acquire()
+                    acquired.append(semaphore)
+            yield
+        finally:
+            for semaphore in reversed(acquired):
+                semaphore.release()
+
+
+class StopStagger:
+    """
+    Разносит команды остановки серверов во времени: следующая остановка выполняется не раньше чем через
+    `interval` секунд после предыдущей.
+
+    :ivar interval (float): Минимальный интервал между остановками (сек); 0 - без ограничения.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval: float = interval
+        self._lock: aio_Lock = aio_Lock()
+        self._last_stop: Optional[float] = None
+
+    async def wait(self) -> None:
+        """Ожидает своей очереди на остановку сервера."""
+        if not self.interval:
+            return
+        async with self._lock:
+            if self._last_stop is not None:
+                delay = self._last_stop + self.interval - monotonic()
+                if delay > 0:
+                    await aio_sleep(delay)
+            self._last_stop = monotonic()
+
+
+def get_device(path: str) -> int:
+    """
+    Возвращает номер устройства каталога (для еще не созданного каталога - ближайшего существующего родителя).
+
+    :param path: Путь к каталогу.
+    :return: `st_dev` каталога.
+    """
+    path = os_path.abspath(path)
+    while not os_path.exists(path) and os_path.dirname(path) != path:
+        path = os_path.dirname(path)
+    return os_stat(path).st_dev
+
+
+def load_instances(names: Optional[List[str]] = None) -> List[str]:
+    """
+    Возвращает имена профилей экземпляров и проверяет их настройки.
+
+    :param names: Имена экземпляров; по умолчанию `ORCHESTRATOR_INSTANCES`.
+    :return: Имена экземпляров.
+    :raises ValueError: Если экземпляры не заданы, имя некорректно или у экземпляров общий `FILES_BACKUP_DIR`
+                        (журнал, каталог и статистика запусков хранятся в каталоге резервных копий).
+    """
+    config = Config()
+    names = names or config.get_config('orchestrator')['orchestrator_instances']
+    if not names:
+        raise ValueError('No instances: set ORCHESTRATOR_INSTANCES or pass --instances.')
+    backup_dirs: Dict[str, str] = {}
+    for name in names:
+        if not re_fullmatch(r'[A-Za-z0-9_]+', name):
+            raise ValueError(f'Invalid instance name "{name}": use letters, digits and "_".')
+        backup_dir = os_path.normcase(os_path.abspath(
+            config.get_config('files', instance=name)['files_backup_dir']))
+        if backup_dir in backup_dirs:
+            raise ValueError(
+                f'Instances "{backup_dirs[backup_dir]}" and "{name}" share FILES_BACKUP_DIR "{backup_dir}".')
+        backup_dirs[backup_dir] = name
+    return names
+
+
+async def run_instance(
+        name: str, language: Optional[str], devices: DeviceLimiter, stagger: StopStagger) -> Dict[str, Any]:
+    """
+    Выполняет запуск резервного копирования одного экземпляра (`run.execute`) со своими менеджерами, отчетом
+    и метриками.
+
+    Вызывается в отдельной задаче asyncio: метрики, заданные `use_metrics`, действуют только в ней.
+
+    :param name: Имя экземпляра.
+    :param language: Язык журнала.
+    :param devices: Ограничение по устройствам.
+    :param stagger: Очередь остановок серверов.
+    :return: Результат: 'instance', 'ok', 'seconds', 'wait_seconds', 'downtime_seconds', 'report', 'error'.
+    """
+    started = monotonic()
+    result: Dict[str, Any] = {'instance': name, 'ok': False}
+    try:
+        use_metrics(create_metrics(name))
+        env = Config().get_config('files', instance=name)
+        server_manager = ServerManager(language=language, instance=name)
+        backup_manager = BackupManager(language=language, report=RunReport(instance=name), instance=name)
+        async with devices.acquire([get_device(env['files_dir']), get_device(env['files_backup_dir'])]):
+            result['wait_seconds'] = round(monotonic() - started, 3)
+            logging.warning(f"Instance {name}: start.")
+            await execute(server_manager, backup_manager, before_stop=stagger.wait)
+        result['ok'] = True
+        result['downtime_seconds'] = backup_manager.report.data.get('downtime_seconds')
+        result['report'] = backup_manager.report.report_path
+    except Exception as e:
+        logging.error(f"Instance {name}: backup failed: {e}")
+        result['error'] = str(e)
+    result['seconds'] = round(monotonic() - started, 3)
+    logging.warning(f"Instance {name}: finished in {result['seconds']:.1f} s.")
+    return result
+
+
+async def orchestrate(names: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Выполняет резервное копирование нескольких экземпляров сервера SLS одновременно.
+
+    Профиль экземпляра - общие параметры `SERVER_*` и `FILES_*`, переопределенные переменными
+    `<ЭКЗЕМПЛЯР>__<ПАРАМЕТР>` (например, `BRANCH2__SERVER_DIR`, `BRANCH2__FILES_DIR`). Экземпляры выполняются
+    параллельно, но на одном физическом устройстве одновременно работают не более `ORCHESTRATOR_DEVICE_PARALLEL`
+    экземпляров, а остановки серверов разнесены не менее чем на `ORCHESTRATOR_STOP_STAGGER_SECONDS`. Общее время
+    определяется самым долгим экземпляром, а не суммой времени всех экземпляров.
+
+    :param names: Имена экземпляров; по умолчанию `ORCHESTRATOR_INSTANCES`.
+    :return: Сводка: 'instances' (результаты `run_instance`), 'wall_seconds', 'serial_seconds'.
+    """
+    language = setup_logger()
+    names = load_instances(names)
+    env = Config().get_config('orchestrator')
+    devices = DeviceLimiter(env.get('orchestrator_device_parallel', 2))
+    stagger = StopStagger(env.get('orchestrator_stop_stagger_seconds', 0.0))
+
+    started = monotonic()
+    results = await aio_gather(*(aio_create_task(run_instance(name, language, devices, stagger)) for name in names))
+    summary = {
+        'instances': list(results),
+        'wall_seconds': round(monotonic() - started, 3),
+        'serial_seconds': round(sum(result['seconds'] for result in results), 3),
+    }
+    logging.warning(
+        f"Instances: {len(results)}, failed: {sum(not result['ok'] for result in results)}, "
+        f"wall time {summary['wall_seconds']:.1f} s (sum of instance times {summary['serial_seconds']:.1f} s).")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description='Back up several SLS server instances concurrently.')
+    parser.add_argument('--instances', help='Comma-separated instance names (default: ORCHESTRATOR_INSTANCES).')
+    args = parser.parse_args()
+
+    instance_names = [name.strip() for name in args.instances.split(',') if name.strip()] if args.instances else None
+    orchestrate_summary = aio_run(orchestrate(instance_names))
+    raise SystemExit(0 if all(result['ok'] for result in orchestrate_summary['instances']) else 1)
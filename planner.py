@@ -0,0 +1,109 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+from os import open as os_open, close as os_close, path as os_path, walk as os_walk
+from os import ftruncate as os_ftruncate, O_WRONLY, O_CREAT
+from datetime import datetime
+from typing import Dict, Any, List, Pattern
+
+try:
+    from os import posix_fallocate
+except ImportError:  # Windows
+    posix_fallocate = None
+
+
+def collect_backups(backup_dir: str, pattern: Pattern) -> List[Dict[str, Any]]:
+    """
+    Собирает все резервные копии в дереве `<backup_dir>/<db>/<YYYY>/<YYYY.MM>` за один обход.
+
+    :param backup_dir: Корневой каталог резервных копий.
+    :param pattern: Регулярное выражение с группой даты в формате '%Y.%m.%d_%H.%M'.
+    :return: Список копий с ключами 'db', 'timestamp', 'size', 'path'.
+    """
+    backups: List[Dict[str, Any]] = []
+    for root, _, files in os_walk(backup_dir):
+        relative = os_path.relpath(root, backup_dir)
+        if relative == os_path.curdir:
+            # Корень содержит только служебные файлы (хэши, состояние)
+            continue
+        db_name = relative.split(os_path.sep, 1)[0]
+        for file in files:
+            if not file.startswith(f'{db_name}_') or file.endswith('.part'):
+                continue
+            match = pattern.search(file)
+            if not match:
+                continue
+            try:
+                timestamp = datetime.strptime(match.group(1), '%Y.%m.%d_%H.%M')
+            except ValueError:
+                continue
+            file_path = os_path.join(root, file)
+            try:
+                size = os_path.getsize(file_path)
+            except OSError:
+                continue
+            backups.append({'db': db_name, 'timestamp': timestamp, 'size': size, 'path': file_path})
+    return backups
+
+
+def select_backups_to_delete(backups: List[Dict[str, Any]], bytes_needed: int) -> List[Dict[str, Any]]:
+    """
+    Выбирает самые старые резервные копии для удаления, пока не освободится `bytes_needed` байт.
+
+    Самая новая копия каждой БД никогда не выбирается.
+
+    :param backups: Резервные копии (см. `collect_backups`).
+    :param bytes_needed: Требуемый объем освобождаемого места (байт).
+    :return: Список копий для удаления (от самых старых к новым).
+    """
+    if bytes_needed <= 0:
+        return []
+
+    newest: Dict[str, datetime] = {}
+    for backup in backups:
+        if backup['db'] not in newest or backup['timestamp'] > newest[backup['db']]:
+            newest[backup['db']] = backup['timestamp']
+
+    selected, freed = [], 0
+    for backup in sorted(backups, key=lambda item: item['timestamp']):
+        if freed >= bytes_needed:
+            break
+        if backup['timestamp'] >= newest[backup['db']]:
+            continue
+        selected.append(backup)
+        freed += backup['size']
+    return selected
+
+
+def preallocate_file(file_path: str, size: int) -> str:
+    """
+    Создает файл и резервирует под него место на диске.
+
+    Использует `posix_fallocate`, а там, где он недоступен (Windows), - расширение файла до нужного размера
+    (на NTFS место при этом выделяется сразу).
+
+    :param file_path: Путь к создаваемому файлу.
+    :param size: Размер файла (байт).
+    :return: Способ резервирования ('fallocate' / 'truncate').
+    :raises OSError: Если файл не удалось создать или расширить.
+    """
+    fd = os_open(file_path, O_WRONLY | O_CREAT, 0o644)
+    try:
+        if posix_fallocate is not None and size > 0:
+            try:
+                posix_fallocate(fd, 0, size)
+                return 'fallocate'
+            except OSError:
+                # Файловая система не поддерживает fallocate
+                pass
+        os_ftruncate(fd, size)
+        return 'truncate'
+    finally:
+        os_close(fd)
@@ -0,0 +1,341 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+from collections import deque
+from json import dumps as json_dumps
+from os import path as os_path, remove as os_remove
+from sys import stderr
+from threading import Lock, Thread
+from time import monotonic
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable, Deque, Tuple, TextIO
+
+from config import Config
+
+
+Subscriber = Callable[[Dict[str, Any]], None]
+
+
+class ProgressPublisher:
+    """
+    Публикует ход выполнения фаз (копирование, архивация, проверка, восстановление) подписчикам.
+
+    Прогресс считается в байтах: по фазе и по каждому обрабатываемому файлу (файлов может быть несколько
+    одновременно при параллельной обработке). Скорость - скользящее среднее за `window_seconds`, оставшееся время -
+    остаток фазы при этой скорости. События 'progress' и 'file_done' публикуются не чаще одного раза
+    в `min_interval` секунд, поэтому `advance()` в цикле копирования сводится к сложению и сравнению времени;
+    события 'phase_start' и 'phase_done' публикуются всегда. Методы можно вызывать из рабочих потоков.
+
+    :ivar min_interval (float): Минимальный интервал между событиями прогресса (сек).
+    :ivar window_seconds (float): Окно скользящего среднего скорости (сек).
+    """
+
+    def __init__(self, min_interval: float = 1.0, window_seconds: float = 30.0) -> None:
+        self.min_interval: float = min_interval
+        self.window_seconds: float = window_seconds
+        self._subscribers: List[Subscriber] = []
+        self._lock: Lock = Lock()
+        self._phase: Optional[str] = None
+        self._phase_started: float = 0.0
+        self._phase_total: int = 0
+        self._phase_done: int = 0
+        self._files_total: int = 0
+        self._files_done: int = 0
+        self._files: Dict[str, List[int]] = {}
+        self._samples: Deque[Tuple[float, int]] = deque()
+        self._next_publish: float = 0.0
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        """Добавляет подписчика: вызываемый объект, получающий словарь события (см. `snapshot`)."""
+        self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """Удаляет подписчика."""
+        if subscriber in self._subscribers:
+            self._subscribers.remove(subscriber)
+
+    def open(self) -> None:
+        """Запускает подписчиков, которым нужен запуск (локальный сервер состояния)."""
+        for subscriber in self._subscribers:
+            start = getattr(subscriber, 'start', None)
+            if start is not None:
+                start()
+
+    def close(self) -> None:
+        """Останавливает подписчиков."""
+        for subscriber in self._subscribers:
+            close = getattr(subscriber, 'close', None)
+            if close is not None:
+                close()
+
+    def start_phase(self, phase: str, total_bytes: int, total_files: int) -> None:
+        """
+        Начинает фазу.
+
+        :param phase: Имя фазы: 'copy', 'archive', 'verify', 'restore'.
+        :param total_bytes: Объем данных фазы (байт).
+        :param total_files: Количество файлов фазы.
+        """
+        with self._lock:
+            now = monotonic()
+            self._phase = phase
+            self._phase_started = now
+            self._phase_total = total_bytes
+            self._phase_done = 0
+            self._files_total = total_files
+            self._files_done = 0
+            self._files.clear()
+            self._samples.clear()
+            self._samples.append((now, 0))
+            self._next_publish = now + self.min_interval
+        self._publish('phase_start')
+
+    def start_file(self, file_path: str, size: int, add_to_total: bool = False) -> None:
+        """
+        Начинает обработку файла.
+
+        :param file_path: Путь к файлу.
+        :param size: Объем обработки файла (байт).
+        :param add_to_total: Добавить объем к объему фазы (если он не был известен при начале фазы).
+        """
+        with self._lock:
+            self._files[file_path] = [0, size]
+            if add_to_total:
+                self._phase_total += size
+
+    def advance(self, file_path: str, size: int) -> None:
+        """Учитывает `size` обработанных байт файла (для файла, обработка которого не начата, ничего не делает)."""
+        with self._lock:
+            progress = self._files.get(file_path)
+            if progress is None:
+                return
+            progress[0] += size
+            self._phase_done += size
+            now = monotonic()
+            if now < self._next_publish or not self._subscribers:
+                return
+            self._next_publish = now + self.min_interval
+        self._publish('progress')
+
+    def finish_file(self, file_path: str, completed: bool = True) -> None:
+        """
+        Завершает обработку файла.
+
+        :param file_path: Путь к файлу.
+        :param completed: True - необработанный остаток файла засчитывается как обработанный; False (обработка
+                          прервана) - остаток исключается из объема фазы, чтобы не завышать скорость.
+        """
+        with self._lock:
+            progress = self._files.pop(file_path, None)
+            if progress is not None and progress[1] > progress[0]:
+                if completed:
+                    self._phase_done += progress[1] - progress[0]
+                else:
+                    self._phase_total -= progress[1] - progress[0]
+            self._files_done += 1
+            now = monotonic()
+            if now < self._next_publish or not self._subscribers:
+                return
+            self._next_publish = now + self.min_interval
+        self._publish('file_done')
+
+    def skip(self, size: int, files: int = 0) -> None:
+        """
+        Исключает из объема фазы `size` байт, которые не будут обработаны (файл пропущен или отложен, часть файла
+        обработана в прерванном запуске).
+
+        :param size: Объем (байт).
+        :param files: Количество пропущенных файлов (засчитываются как завершенные).
+        """
+        with self._lock:
+            self._phase_total -= size
+            self._files_done += files
+
+    def finish_phase(self) -> None:
+        """Завершает фазу."""
+        self._publish('phase_done')
+        with self._lock:
+            self._phase = None
+            self._files.clear()
+
+    def snapshot(self, event: str = 'progress') -> Dict[str, Any]:
+        """
+        Возвращает текущее состояние.
+
+        :param event: Тип события.
+        :return: Словарь: 'event', 'time', 'phase', 'phase_done', 'phase_total', 'files_done', 'files_total',
+                 'active' (файлы в обработке: 'file', 'done', 'total'), 'throughput_bps', 'eta_seconds',
+                 'elapsed_seconds'.
+        """
+        with self._lock:
+            now = monotonic()
+            self._samples.append((now, self._phase_done))
+            while len(self._samples) > 2 and now - self._samples[1][0] >= self.window_seconds:
+                self._samples.popleft()
+            first_time, first_done = self._samples[0]
+            throughput = (self._phase_done - first_done) / (now - first_time) if now > first_time else 0.0
+            remaining = max(self._phase_total - self._phase_done, 0)
+            return {
+                'event': event,
+                'time': datetime.now().isoformat(timespec='seconds'),
+                'phase': self._phase,
+                'phase_done': self._phase_done,
+                'phase_total': self._phase_total,
+                'files_done': self._files_done,
+                'files_total': self._files_total,
+                'active': [
+                    {'file': file_path, 'done': done, 'total': total}
+                    for file_path, (done, total) in self._files.items()],
+                'throughput_bps': round(throughput, 1),
+                'eta_seconds': round(remaining / throughput, 1) if throughput > 0 else None,
+                'elapsed_seconds': round(now - self._phase_started, 3) if self._phase else None,
+            }
+
+    def _publish(self, event: str) -> None:
+        """Отправляет событие подписчикам; ошибка подписчика не прерывает резервное копирование."""
+        if not self._subscribers:
+            return
+        snapshot = self.snapshot(event)
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber(snapshot)
+            except Exception:
+                continue
+
+
+def format_progress_line(snapshot: Dict[str, Any]) -> str:
+    """
+    Форматирует событие в компактную строку прогресса.
+
+    :param snapshot: Событие (см. `ProgressPublisher.snapshot`).
+    :return: Строка вида '[copy] 3/10 files | 1.2/4.0 GB 30.0% | 150.3 MB/s | ETA 0:00:19 | DB.DBX'.
+    """
+    total = snapshot['phase_total']
+    percent = snapshot['phase_done'] / total * 100 if total else 100.0
+    eta = snapshot['eta_seconds']
+    eta_text = '-' if eta is None else f'{int(eta) // 3600}:{int(eta) % 3600 // 60:02d}:{int(eta) % 60:02d}'
+    active = ', '.join(os_path.basename(item['file']) for item in snapshot['active'])
+    return (
+        f"[{snapshot['phase']}] {snapshot['files_done']}/{snapshot['files_total']} files | "
+        f"{snapshot['phase_done'] / 1024 ** 3:.1f}/{total / 1024 ** 3:.1f} GB {percent:.1f}% | "
+        f"{snapshot['throughput_bps'] / 1024 ** 2:.1f} MB/s | ETA {eta_text}" + (f' | {active}' if active else ''))
+
+
+class ConsoleProgress:
+    """
+    Подписчик, выводящий строку прогресса в консоль (перезаписывая ее на месте).
+
+    :ivar stream (TextIO): Поток вывода.
+    """
+
+    def __init__(self, stream: TextIO = stderr) -> None:
+        self.stream: TextIO = stream
+        self._width: int = 0
+
+    def __call__(self, snapshot: Dict[str, Any]) -> None:
+        line = format_progress_line(snapshot)
+        self.stream.write('\r' + line.ljust(self._width))
+        self._width = len(line)
+        if snapshot['event'] == 'phase_done':
+            self.stream.write('\n')
+            self._width = 0
+        self.stream.flush()
+
+
+class StatusServer:
+    """
+    Подписчик, отдающий последнее событие прогресса в JSON через локальный адрес.
+
+    Адрес 'http://127.0.0.1:<port>' - HTTP GET на любой путь; 'unix:<path>' - Unix-сокет, который при подключении
+    отдает JSON и закрывается (например, `socat - UNIX-CONNECT:<path>`).
+
+    :ivar address (str): Адрес сервера состояния.
+    """
+
+    def __init__(self, address: str) -> None:
+        self.address: str = address
+        self._latest: bytes = b'{}'
+        self._server = None
+        self._thread: Optional[Thread] = None
+
+    def __call__(self, snapshot: Dict[str, Any]) -> None:
+        self._latest = json_dumps(snapshot, ensure_ascii=False).encode('utf-8')
+
+    def start(self) -> None:
+        """Запускает сервер состояния в фоновом потоке."""
+        if self._server is not None:
+            return
+        status = self
+
+        # Модули сервера импортируются только при включенном сервере состояния
+        if self.address.startswith('unix:'):
+            from socketserver import BaseRequestHandler
+            try:
+                from socketserver import ThreadingUnixStreamServer
+            except ImportError:  # Windows
+                raise OSError('Unix sockets are not supported on this platform.')
+            socket_path = self.address[len('unix:'):]
+            if os_path.exists(socket_path):
+                os_remove(socket_path)
+
+            class UnixHandler(BaseRequestHandler):
+                def handle(self) -> None:
+                    self.request.sendall(status._latest + b'\n')
+
+            self._server = ThreadingUnixStreamServer(socket_path, UnixHandler)
+        else:
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+            host, _, port = self.address.split('://', 1)[-1].rstrip('/').rpartition(':')
+
+            class HttpHandler(BaseHTTPRequestHandler):
+                def do_GET(self) -> None:
+                    body = status._latest
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/json; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args) -> None:
+                    pass
+
+            self._server = ThreadingHTTPServer((host or '127.0.0.1', int(port)), HttpHandler)
+        self._server.daemon_threads = True
+        self._thread = Thread(target=self._server.serve_forever, name='progress-status', daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Останавливает сервер состояния."""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        if self.address.startswith('unix:') and os_path.exists(self.address[len('unix:'):]):
+            os_remove(self.address[len('unix:'):])
+        self._server = None
+        self._thread = None
+
+
+def create_publisher(instance: Optional[str] = None) -> ProgressPublisher:
+    """
+    Создает издатель прогресса с подписчиками по настройкам `PROGRESS_CONSOLE`, `PROGRESS_STATUS_ADDRESS`
+    и `PROGRESS_INTERVAL_SECONDS`.
+
+    :param instance: Имя экземпляра сервера: у каждого экземпляра должен быть свой `PROGRESS_STATUS_ADDRESS`.
+    :return: Издатель прогресса.
+    """
+    env: Dict[str, Any] = Config().get_config('progress', instance=instance)
+    publisher = ProgressPublisher(min_interval=env.get('progress_interval_seconds', 1.0))
+    if env.get('progress_console'):
+        publisher.subscribe(ConsoleProgress())
+    if env.get('progress_status_address'):
+        publisher.subscribe(StatusServer(env['progress_status_address']))
+    return publisher
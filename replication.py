@@ -0,0 +1,293 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+"""
+Репликация архивов и хэш-файлов на резервные цели: каталог (локальный или смонтированный сетевой ресурс) или
+S3-совместимый бакет (`s3://бакет/префикс`, см. `storage.py`).
+
+Состояние цели хранится в манифесте `.replication.json` в ее корне: переданные файлы (размер, дата изменения,
+SHA-256) и незавершенные передачи. Актуальность цели определяется по манифесту без обхода ее содержимого. Файл
+передается потоком записи хранилища; контрольные точки записи (смещение в `<файл>.part` каталога или загруженные
+части составной загрузки S3) сохраняются в манифест, поэтому прерванная передача продолжается с последней из них.
+
+Zip-архив может передаваться на цели во время создания (`ArchiveStream`, `ArchiveTee`): сжатые данные пишутся в
+файл архива и одновременно в потоки записи целей, без повторного чтения готового архива и без временных файлов.
+"""
+
+from datetime import datetime
+from hashlib import sha256
+from json import loads as json_loads, dumps as json_dumps
+from threading import Lock
+from time import monotonic, sleep
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+
+from governor import TokenBucket
+from storage import Storage
+
+
+MANIFEST_NAME: str = '.replication.json'
+
+
+class ReplicationManifest:
+    """
+    Манифест цели репликации.
+
+    Ключ - путь файла относительно каталога резервных копий (и корня цели, разделитель '/'). Файл считается
+    переданным, если его размер и дата изменения совпадают с записью манифеста.
+
+    :ivar storage (Storage): Хранилище цели.
+    :ivar files (Dict[str, Dict[str, Any]]): Переданные файлы ('size', 'mtime', 'sha256', 'replicated_at').
+    :ivar partial (Dict[str, Dict[str, Any]]): Незавершенные передачи ('size', 'mtime', 'state' - контрольная точка
+                                               записи хранилища).
+    """
+
+    def __init__(self, storage: Storage) -> None:
+        self.storage: Storage = storage
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.partial: Dict[str, Dict[str, Any]] = {}
+        self._lock: Lock = Lock()
+        # Передачи на цель сохраняют манифест из разных потоков
+        self._save_lock: Lock = Lock()
+        try:
+            data = json_loads(storage.read_bytes(MANIFEST_NAME) or b'{}')
+            self.files = dict(data.get('files', {}))
+            self.partial = dict(data.get('partial', {}))
+        except (ValueError, OSError):
+            pass
+
+    def save(self) -> None:
+        """Атомарно сохраняет манифест."""
+        with self._save_lock:
+            with self._lock:
+                data = {'files': dict(self.files), 'partial': dict(self.partial)}
+            self.storage.write_bytes(MANIFEST_NAME, json_dumps(data, ensure_ascii=False, indent=1).encode('utf-8'))
+
+    @staticmethod
+    def _matches(entry: Optional[Dict[str, Any]], size: int, mtime: float) -> bool:
+        return entry is not None and entry.get('size') == size and abs(entry.get('mtime', 0) - mtime) <= 1e-3
+
+    def is_current(self, key: str, size: int, mtime: float) -> bool:
+        """Проверяет, что файл уже передан на цель в текущей версии."""
+        return self._matches(self.files.get(key), size, mtime)
+
+    def resume_state(self, key: str, size: int, mtime: float) -> Optional[Dict[str, Any]]:
+        """Возвращает контрольную точку прерванной передачи той же версии файла (None - передача заново)."""
+        entry = self.partial.get(key)
+        return entry.get('state') if self._matches(entry, size, mtime) else None
+
+    def mark_partial(self, key: str, size: int, mtime: float, state: Optional[Dict[str, Any]]) -> None:
+        """Записывает контрольную точку передачи."""
+        with self._lock:
+            self.partial[key] = {'size': size, 'mtime': mtime, 'state': state}
+
+    def mark_done(self, key: str, size: int, mtime: float, digest: str) -> None:
+        """Записывает переданный файл."""
+        with self._lock:
+            self.partial.pop(key, None)
+            self.files[key] = {
+                'size': size, 'mtime': mtime, 'sha256': digest,
+                'replicated_at': datetime.now().isoformat(timespec='seconds')}
+
+
+class BandwidthLimiter:
+    """
+    Ограничение скорости передачи на цель (общее для всех передач на нее, в рабочих потоках).
+
+    :ivar rate (float): Скорость (байт/с); 0 - без ограничения.
+    :ivar throttled_seconds (float): Суммарное время ожидания (сек).
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.rate: float = rate
+        self.throttled_seconds: float = 0.0
+        self._bucket: Optional[TokenBucket] = TokenBucket(rate, rate) if rate else None
+        self._lock: Lock = Lock()
+
+    def throttle(self, size: int) -> None:
+        """Ожидает разрешения на передачу `size` байт."""
+        if self._bucket is None:
+            return
+        with self._lock:
+            delay = self._bucket.reserve(size)
+            self.throttled_seconds += delay
+        if delay:
+            sleep(delay)
+
+
+class ReplicationTarget:
+    """
+    Цель репликации: хранилище, манифест, ограничение скорости и сводка последнего запуска.
+
+    :ivar storage (Storage): Хранилище цели.
+    :ivar path (str): Адрес цели (каталог или `s3://бакет/префикс`) для журнала, отчета и меток метрик.
+    :ivar manifest (ReplicationManifest): Манифест цели.
+    :ivar limiter (BandwidthLimiter): Ограничение скорости передачи.
+    """
+
+    def __init__(self, storage: Storage, bandwidth_mbps: float = 0.0) -> None:
+        self.storage: Storage = storage
+        self.path: str = storage.uri
+        self.manifest: ReplicationManifest = ReplicationManifest(storage)
+        self.limiter: BandwidthLimiter = BandwidthLimiter(bandwidth_mbps * 1024 ** 2)
+        self.files: int = 0
+        self.bytes: int = 0
+        self.resumed: int = 0
+        self.errors: int = 0
+        self._started: float = monotonic()
+
+    def transfer(
+            self, source_path: str, key: str, size: int, mtime: float,
+            on_chunk: Optional[Callable[[int], None]] = None) -> None:
+        """
+        Передает файл источника на цель (в рабочем потоке) и записывает его в манифест.
+
+        :param source_path: Путь к файлу источника.
+        :param key: Путь файла относительно каталога резервных копий (разделитель '/').
+        :param size: Размер файла источника (байт).
+        :param mtime: Дата изменения файла источника.
+        :param on_chunk: Вызывается с размером каждого переданного блока.
+        """
+        state = self.manifest.resume_state(key, size, mtime)
+        self.manifest.mark_partial(key, size, mtime, state)
+
+        def checkpoint(new_state: Dict[str, Any]) -> None:
+            self.manifest.mark_partial(key, size, mtime, new_state)
+            self.manifest.save()
+
+        digest, offset = self.storage.upload(
+            source_path, key, state, on_checkpoint=checkpoint, throttle=self.limiter.throttle, on_chunk=on_chunk)
+        if offset:
+            self.resumed += 1
+        self.manifest.mark_done(key, size, mtime, digest)
+        self.manifest.save()
+        self.files += 1
+        self.bytes += size - offset
+
+    def summary(self, pending: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Возвращает сводку запуска для отчета.
+
+        Отставание (`lag_seconds`) - возраст самого старого файла источника, еще не переданного на цель
+        (0 - цель актуальна).
+
+        :param pending: Файлы, не переданные на цель: {ключ: {'size', 'mtime'}}.
+        :return: Сводка.
+        """
+        oldest = min((entry['mtime'] for entry in pending.values()), default=None)
+        return {
+            'target': self.path, 'files': self.files, 'bytes': self.bytes, 'resumed': self.resumed,
+            'errors': self.errors, 'seconds': round(monotonic() - self._started, 3),
+            'throttled_seconds': round(self.limiter.throttled_seconds, 3), 'pending_files': len(pending),
+            'pending_bytes': sum(entry['size'] for entry in pending.values()),
+            'lag_seconds': 0.0 if oldest is None else round(max(datetime.now().timestamp() - oldest, 0.0), 1),
+        }
+
+
+class ArchiveStream:
+    """
+    Передача архива на цель во время его создания.
+
+    Данные архива передаются в поток записи хранилища цели по мере сжатия (`write`). Ошибка цели не прерывает
+    создание архива: передача останавливается, а в манифест записывается ее последняя контрольная точка
+    (`finish`), поэтому фаза репликации продолжает передачу из готового архива, а не начинает ее заново.
+
+    :ivar target (ReplicationTarget): Цель репликации.
+    :ivar key (str): Путь архива относительно каталога резервных копий (разделитель '/').
+    :ivar error (Optional[OSError]): Ошибка цели, остановившая передачу.
+    """
+
+    def __init__(self, target: ReplicationTarget, key: str, mtime: Optional[float] = None) -> None:
+        self.target: ReplicationTarget = target
+        self.key: str = key
+        self.error: Optional[OSError] = None
+        self._digest: Any = sha256()
+        self._size: int = 0
+        self._state: Optional[Dict[str, Any]] = None
+        self._writer: Any = target.storage.open_write(key, mtime=mtime)
+
+    def write(self, data: bytes) -> None:
+        """Передает блок архива (после ошибки цели ничего не делает)."""
+        if self.error is not None:
+            return
+        try:
+            self.target.limiter.throttle(len(data))
+            self._writer.write(data)
+            checkpoint = self._writer.checkpoint()
+        except OSError as e:
+            self._stop(e)
+            return
+        self._digest.update(data)
+        self._size += len(data)
+        if checkpoint is not None:
+            self._state = checkpoint
+
+    def finish(self, size: int, mtime: float) -> bool:
+        """
+        Завершает передачу готового архива и записывает ее в манифест цели.
+
+        :param size: Размер готового архива (байт).
+        :param mtime: Дата изменения готового архива.
+        :return: True, если архив передан целиком.
+        """
+        if self.error is None and self._size != size:
+            self._stop(OSError(f'{self._size} of {size} byte(s) of the archive were streamed'))
+            self._state = None
+        if self.error is None:
+            try:
+                self._writer.__exit__(None, None, None)
+            except OSError as e:
+                self.error = e
+        if self.error is None:
+            self.target.manifest.mark_done(self.key, size, mtime, self._digest.hexdigest())
+            self.target.files += 1
+            self.target.bytes += size
+        else:
+            self.target.errors += 1
+            self.target.manifest.mark_partial(self.key, size, mtime, self._state)
+        try:
+            self.target.manifest.save()
+        except OSError as e:
+            self.error = self.error or e
+        return self.error is None
+
+    def abort(self) -> None:
+        """Прекращает передачу архива, который не удалось создать (в манифест ничего не записывается)."""
+        if self.error is None:
+            self._stop(OSError('the archive was not created'))
+
+    def _stop(self, error: OSError) -> None:
+        self.error = error
+        try:
+            # Загруженные данные остаются на цели для продолжения передачи
+            self._writer.__exit__(type(error), error, None)
+        except OSError:
+            pass
+
+
+class ArchiveTee:
+    """
+    Поток записи архива: данные пишутся в файл архива и во все передачи `ArchiveStream`.
+
+    Поток не поддерживает позиционирование, поэтому zipfile пишет архив последовательно (с дескрипторами данных)
+    и в файл, и на цели одни и те же байты.
+    """
+
+    def __init__(self, file: BinaryIO, streams: List[ArchiveStream]) -> None:
+        self._file: BinaryIO = file
+        self._streams: List[ArchiveStream] = streams
+
+    def write(self, data: bytes) -> int:
+        written = self._file.write(data)
+        for stream in self._streams:
+            stream.write(data)
+        return written
+
+    def flush(self) -> None:
+        self._file.flush()
@@ -0,0 +1,75 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+from json import dump as json_dump
+from os import makedirs as os_makedirs, path as os_path, replace as os_replace
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from config import Config
+
+
+class RunReport:
+    """
+    Отчет о запуске резервного копирования.
+
+    Собирает решения и результаты фаз запуска в словарь и сохраняет их в JSON файл рядом с логами.
+
+    :ivar data (Dict[str, Any]): Данные отчета.
+    :ivar report_path (str): Путь к файлу отчета.
+    """
+
+    def __init__(self, report_path: Optional[str] = None, instance: Optional[str] = None) -> None:
+        """
+        Инициализирует отчет.
+
+        :param report_path: Путь к файлу отчета; по умолчанию `LOG_DIR`/`LOG_REPORT_FILE`.
+        :param instance: Имя экземпляра сервера (см. `orchestrator.py`): к имени файла по умолчанию добавляется
+                         `_<экземпляр>`, чтобы отчеты одновременных запусков не совпадали.
+        """
+        self.started_at: datetime = datetime.now()
+        if report_path is None:
+            env: Dict[str, Any] = Config().get_config('log', instance=instance)
+            report_path = os_path.join(
+                env.get('log_dir', 'logs'), env.get('log_report_file', 'run_report_%Y.%m.%d_%H.%M.%S.json'))
+            if instance is not None:
+                root, extension = os_path.splitext(report_path)
+                report_path = f'{root}_{instance.lower()}{extension}'
+        self.report_path: str = self.started_at.strftime(report_path)
+        self.data: Dict[str, Any] = {'started_at': self.started_at.isoformat(timespec='seconds')}
+        if instance is not None:
+            self.data['instance'] = instance
+
+    def set(self, key: str, value: Any) -> None:
+        """Устанавливает значение раздела отчета."""
+        self.data[key] = value
+
+    def append(self, key: str, value: Any) -> None:
+        """Добавляет значение в список раздела отчета."""
+        self.data.setdefault(key, []).append(value)
+
+    def write(self) -> Optional[str]:
+        """
+        Сохраняет отчет в JSON файл (атомарно).
+
+        :return: Путь к файлу отчета или None, если сохранить не удалось.
+        """
+        self.data['finished_at'] = datetime.now().isoformat(timespec='seconds')
+        try:
+            report_dir = os_path.dirname(self.report_path)
+            if report_dir:
+                os_makedirs(report_dir, exist_ok=True)
+            tmp_path = f'{self.report_path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as report_file:
+                json_dump(self.data, report_file, ensure_ascii=False, indent=2, default=str)
+            os_replace(tmp_path, self.report_path)
+        except OSError:
+            return None
+        return self.report_path
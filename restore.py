@@ -0,0 +1,54 @@
+__author__ = 'InfSub'
+__contact__ = 'ADmin@TkYD.ru'
+__copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+__date__ = '2025/06/01'
+__deprecated__ = False
+__email__ = 'ADmin@TkYD.ru'
+__maintainer__ = 'InfSub'
+__status__ = 'Production'  # 'Production / Development'
+__version__ = '1.0.6.0'
+
+from argparse import ArgumentParser
+from asyncio import run as aio_run
+from datetime import datetime
+from typing import List, Optional
+
+from backup import BackupManager
+
+from logger import logging, setup_logger
+
+
+logging = logging.getLogger(__name__)
+
+
+async def execute(db_names: List[str], restore_path: str, at: Optional[datetime], parallel: Optional[int]) -> int:
+    """
+    Восстанавливает указанные БД из резервных копий.
+
+    Сервер SLS не останавливается: восстановление в рабочий каталог БД выполняется только при остановленном сервере.
+
+    :param db_names: Имена БД.
+    :param restore_path: Каталог для восстановления.
+    :param at: Момент времени, на который выбираются копии; None - самые новые копии.
+    :param parallel: Количество одновременно восстанавливаемых БД.
+    :return: Код возврата (0 - все БД восстановлены).
+    """
+    backup_manager = BackupManager(language=setup_logger())
+    backup_manager.progress.open()
+    try:
+        summary = await backup_manager.restore_databases(db_names, restore_path, at=at, parallel=parallel)
+    finally:
+        backup_manager.progress.close()
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description='Restore SLS databases from backups.')
+    parser.add_argument('db', nargs='+', help='Database name(s), e.g. "DB" for DB.DBX.')
+    parser.add_argument('--to', required=True, help='Directory to restore the databases to.')
+    parser.add_argument('--at', help='Restore the latest backup not newer than "YYYY.MM.DD_HH.MM".')
+    parser.add_argument('--parallel', type=int, help='Number of databases restored concurrently.')
+    args = parser.parse_args()
+
+    restore_at = datetime.strptime(args.at, '%Y.%m.%d_%H.%M') if args.at else None
+    raise SystemExit(aio_run(execute(args.db, args.to, restore_at, args.parallel)))
@@ -10,40 +10,117 @@ __version__ = '1.0.6.0'
 
 
 from asyncio import run as aio_run, CancelledError as aio_CancelledError, create_task as aio_create_task
+from os import environ
+from time import monotonic, time
+from typing import Optional, Callable, Awaitable
 
 from backup import BackupManager
 from server import ServerManager
+from report import RunReport
+from metrics import get_metrics
 
 from logger import logging, setup_logger
 
 
-log_language = setup_logger()
 logging = logging.getLogger(__name__)
 
 
-async def execute():
+async def execute(
+        server_manager: Optional[ServerManager] = None, backup_manager: Optional[BackupManager] = None,
+        before_stop: Optional[Callable[[], Awaitable[None]]] = None) -> None:
     """
     Выполняет процесс резервного копирования, включая остановку и запуск сервера.
 
     Этот метод сначала останавливает сервер, затем выполняет резервное
     копирование, а после этого запускает сервер снова.
+
+    Если задан `FILES_MAX_DOWNTIME_SECONDS`, копирование ограничивается окном простоя: окно отсчитывается
+    от команды остановки сервера, а из него резервируется `SERVER_WAIT_SECONDS` на запуск сервера.
+
+    Длительности фаз, объемы и скорость копирования записываются в метрики (см. `metrics.py`), которые в конце
+    запуска сохраняются в `METRICS_TEXTFILE` и в раздел 'metrics' отчета о запуске. Статистика завершенного
+    запуска добавляется в историю запусков с проверкой на регрессии производительности. Ход выполнения
+    публикуется подписчикам `backup_manager.progress` (см. `progress.py`).
+
+    :param server_manager: Менеджер сервера; по умолчанию создается `ServerManager` (бенчмарки передают имитацию).
+    :param backup_manager: Менеджер резервного копирования; по умолчанию создается `BackupManager`.
+    :param before_stop: Корутина, которую запуск ожидает перед остановкой сервера (orchestrator.py разносит
+                        остановки нескольких серверов во времени); окно простоя отсчитывается после нее.
     """
-    server_manager = ServerManager(language=log_language)
-    backup_manager = BackupManager(language=log_language)
+    log_language = setup_logger()
+    if server_manager is None:
+        server_manager = ServerManager(language=log_language)
+    if backup_manager is None:
+        backup_manager = BackupManager(language=log_language, report=RunReport())
+    if backup_manager.report is None:
+        backup_manager.report = RunReport(instance=backup_manager.instance)
+    report = backup_manager.report
     
+    metrics = get_metrics()
+    metrics.reset()
+    launcher_started = environ.get('SLS_LAUNCHER_STARTED')
+    if launcher_started:
+        # Время от старта загрузчика main.py до начала запуска: загрузчик, интерпретатор и импорт модулей
+        startup_seconds = time() - float(launcher_started)
+        report.set('startup_seconds', round(startup_seconds, 3))
+        metrics.set('startup_seconds', startup_seconds)
+        logging.warning(f"Startup: {startup_seconds:.2f} s.")
+    try:
+        # Сервер состояния (PROGRESS_STATUS_ADDRESS) не должен мешать резервному копированию
+        backup_manager.progress.open()
+    except OSError as e:
+        logging.error(f"Failed to start the progress status endpoint: {e}")
+    completed = False
     try:
-        logging.warning(f"Stop Server.")
-        await server_manager.stop_server()
+        with metrics.span('run'):
+            # Освобождаем место, создаем каталоги и резервируем файлы копий до остановки сервера
+            logging.warning(f"Prepare Copy Plan.")
+            await backup_manager.prepare_copy_plan()
+
+            if before_stop is not None:
+                await before_stop()
+            max_downtime = backup_manager.max_downtime_seconds
+            stop_started = monotonic()
+            logging.warning(f"Stop Server.")
+            await server_manager.stop_server()
+
+            deadline = None
+            if max_downtime:
+                deadline = stop_started + max_downtime - server_manager.server_wait_seconds
+                logging.warning(
+                    f"Downtime budget: {max_downtime} s (copy deadline in {deadline - monotonic():.0f} s).")
+            report.set('max_downtime_seconds', max_downtime or None)
+
+            logging.warning(f"Perform Copy Files.")
+            backup_task = aio_create_task(backup_manager.run_backup(deadline=deadline))
+            # Ждём завершения копирования
+            await backup_manager.wait_for_copy_completion()
 
-        logging.warning(f"Perform Copy Files.")
-        aio_create_task(backup_manager.run_backup())
-        # Ждём завершения копирования
-        await backup_manager.wait_for_copy_completion()
+            logging.warning(f"Start Server.")
+            await server_manager.start_server()
+            downtime = monotonic() - stop_started
+            report.set('downtime_seconds', round(downtime, 3))
+            metrics.set('downtime_seconds', downtime)
+            logging.warning(f"Server downtime: {downtime:.1f} s.")
 
-        logging.warning(f"Start Server.")
-        await server_manager.start_server()
+            # Дожидаемся архивации, иначе задача будет отменена при завершении цикла событий
+            await backup_task
+        completed = True
     except aio_CancelledError:
         logging.warning("Task was cancelled.")
+    finally:
+        backup_manager.progress.close()
+        if completed:
+            # Прерванные запуски не сохраняются: их фазы короче и занизили бы порог регрессий
+            backup_manager.record_run_stats(metrics)
+        if metrics.enabled:
+            report.set('metrics', metrics.to_dict())
+        textfile_path = metrics.write_textfile()
+        if textfile_path:
+            logging.warning(f"Metrics: {textfile_path}")
+        report_path = report.write()
+        if report_path:
+            logging.warning(f"Run report: {report_path}")
     # finally:
     #     print("Cleanup actions.")
 
@@ -0,0 +1,267 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+from json import load as json_load, dump as json_dump
+from os import replace as os_replace, path as os_path, walk as os_walk
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+
+class DowntimeBudgetExceeded(Exception):
+    """Окно простоя сервера истекло до завершения копирования файла."""
+
+
+class ScheduleState:
+    """
+    Состояние планировщика копирования, сохраняемое между запусками.
+
+    Хранит историю измеренной скорости копирования, время последней резервной копии каждой БД и список БД,
+    отложенных до следующего окна.
+
+    :ivar state_path (str): Путь к файлу состояния.
+    :ivar throughput (List[Dict[str, float]]): Замеры скорости копирования (байты, секунды, время замера).
+    :ivar last_backup (Dict[str, str]): Время последней резервной копии по имени БД (ISO формат).
+    :ivar deferred (Dict[str, str]): Время первого откладывания по имени БД (ISO формат).
+    """
+    max_samples: int = 50
+
+    def __init__(self, state_path: str) -> None:
+        self.state_path: str = state_path
+        self.throughput: List[Dict[str, float]] = []
+        self.last_backup: Dict[str, str] = {}
+        self.deferred: Dict[str, str] = {}
+        self.load()
+
+    def load(self) -> None:
+        """Загружает состояние из файла, если он существует и читается."""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as state_file:
+                data = json_load(state_file)
+        except (FileNotFoundError, ValueError, OSError):
+            return
+        self.throughput = list(data.get('throughput', []))[-self.max_samples:]
+        self.last_backup = dict(data.get('last_backup', {}))
+        self.deferred = dict(data.get('deferred', {}))
+
+    def save(self) -> None:
+        """Атомарно сохраняет состояние (запись во временный файл и переименование)."""
+        tmp_path = f'{self.state_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as state_file:
+            json_dump(
+                {'throughput': self.throughput[-self.max_samples:], 'last_backup': self.last_backup,
+                 'deferred': self.deferred},
+                state_file, ensure_ascii=False, indent=1)
+        os_replace(tmp_path, self.state_path)
+
+    def add_sample(self, size_bytes: int, seconds: float) -> None:
+        """
+        Добавляет замер скорости копирования.
+
+        :param size_bytes: Количество скопированных байт.
+        :param seconds: Длительность копирования в секундах.
+        """
+        if size_bytes <= 0 or seconds <= 0:
+            return
+        self.throughput.append({'bytes': size_bytes, 'seconds': seconds, 'time': datetime.now().timestamp()})
+        del self.throughput[:-self.max_samples]
+
+    def mark_backed_up(self, db_name: str, when: Optional[datetime] = None) -> None:
+        """Отмечает успешное копирование БД и снимает её с отложенных."""
+        self.last_backup[db_name] = (when or datetime.now()).isoformat(timespec='seconds')
+        self.deferred.pop(db_name, None)
+
+    def mark_deferred(self, db_name: str) -> None:
+        """Отмечает БД как отложенную (сохраняет время первого откладывания)."""
+        self.deferred.setdefault(db_name, datetime.now().isoformat(timespec='seconds'))
+
+    def get_last_backup(self, db_name: str) -> Optional[datetime]:
+        """Возвращает время последней резервной копии БД или None, если копий не было."""
+        value = self.last_backup.get(db_name)
+        try:
+            return datetime.fromisoformat(value) if value else None
+        except ValueError:
+            return None
+
+
+class CopyScheduler:
+    """
+    Планировщик копирования в пределах окна простоя сервера.
+
+    Прогнозирует время копирования каждого файла по истории измеренной скорости и выбирает БД, которые
+    укладываются в окно, в порядке давности их последней резервной копии. Остальные БД откладываются.
+
+    :ivar state (ScheduleState): Состояние планировщика.
+    :ivar default_throughput (float): Скорость копирования (байт/с), если история пуста.
+    :ivar safety_factor (float): Коэффициент запаса к измеренной скорости (0..1].
+    :ivar per_file_overhead (float): Накладные расходы на один файл (сек).
+    """
+    history_window: int = 20
+
+    def __init__(
+            self, state: ScheduleState, default_throughput_mbps: float = 50.0, safety_factor: float = 0.8,
+            per_file_overhead: float = 0.5) -> None:
+        self.state: ScheduleState = state
+        self.default_throughput: float = default_throughput_mbps * 1024 ** 2
+        self.safety_factor: float = safety_factor
+        self.per_file_overhead: float = per_file_overhead
+
+    def throughput(self) -> float:
+        """
+        Возвращает прогнозируемую скорость копирования (байт/с) с учетом коэффициента запаса.
+
+        Скорость считается как сумма байт к сумме секунд по последним замерам, что не дает мелким файлам
+        с большими накладными расходами занижать оценку.
+        """
+        samples = self.state.throughput[-self.history_window:]
+        total_bytes = sum(sample['bytes'] for sample in samples)
+        total_seconds = sum(sample['seconds'] for sample in samples)
+        measured = total_bytes / total_seconds if total_bytes and total_seconds else self.default_throughput
+        return measured * self.safety_factor
+
+    def predict_seconds(self, size_bytes: int) -> float:
+        """Прогнозирует время копирования файла указанного размера (сек)."""
+        return size_bytes / self.throughput() + self.per_file_overhead
+
+    def plan(
+            self, candidates: List[Dict[str, Any]], budget_seconds: Optional[float]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Распределяет кандидатов на копируемые и отложенные.
+
+        Кандидаты сортируются по давности последней копии (БД без копий - первыми, затем самые давние),
+        при равной давности - по размеру. Затем жадно набираются все БД, прогноз которых умещается в
+        оставшийся бюджет; не уместившиеся откладываются, но меньшие файлы после них еще проверяются.
+
+        :param candidates: Список кандидатов (ключи 'clean_name', 'size').
+        :param budget_seconds: Бюджет времени на копирование (сек); None - без ограничения.
+        :return: Кортеж (копируемые, отложенные). В каждый кандидат добавляются ключи 'predicted_seconds',
+                 'last_backup' и 'decision'.
+        """
+        now = datetime.now()
+
+        def staleness(candidate: Dict[str, Any]) -> float:
+            last_backup = self.state.get_last_backup(candidate['clean_name'])
+            return float('inf') if last_backup is None else (now - last_backup).total_seconds()
+
+        ordered = sorted(candidates, key=lambda candidate: (-staleness(candidate), candidate['size']))
+        selected, deferred = [], []
+        remaining = budget_seconds
+
+        for candidate in ordered:
+            predicted = self.predict_seconds(candidate['size'])
+            last_backup = self.state.get_last_backup(candidate['clean_name'])
+            candidate['predicted_seconds'] = round(predicted, 3)
+            candidate['last_backup'] = last_backup.isoformat(timespec='seconds') if last_backup else None
+
+            if remaining is None or predicted <= remaining:
+                candidate['decision'] = 'copy'
+                selected.append(candidate)
+                if remaining is not None:
+                    remaining -= predicted
+            else:
+                candidate['decision'] = 'deferred'
+                deferred.append(candidate)
+
+        return selected, deferred
+
+
+class InUseRetryQueue:
+    """
+    Очередь БД, занятых клиентами (есть файлы-признаки `FILES_IN_USE_EXTENSIONS`), в пределах окна простоя.
+
+    Занятая БД повторно проверяется с экспоненциально растущим интервалом (от `retry_seconds` до
+    `max_retry_seconds`), пока копируются остальные файлы. БД снимается с ожидания, если она не освободилась
+    за `wait_seconds` или копирование по прогнозу (`predicted_seconds`) перестало укладываться в окно.
+
+    :ivar retry_seconds (float): Первый интервал повторной проверки (сек).
+    :ivar max_retry_seconds (float): Максимальный интервал повторной проверки (сек).
+    :ivar wait_seconds (float): Максимальное время ожидания одной БД (сек); 0 - без ожидания.
+    :ivar deadline (Optional[float]): Окончание окна простоя (по `time.monotonic()`); None - без ограничения.
+    """
+
+    def __init__(
+            self, retry_seconds: float = 2.0, max_retry_seconds: float = 30.0, wait_seconds: float = 600.0,
+            deadline: Optional[float] = None) -> None:
+        self.retry_seconds: float = retry_seconds
+        self.max_retry_seconds: float = max(max_retry_seconds, retry_seconds)
+        self.wait_seconds: float = wait_seconds
+        self.deadline: Optional[float] = deadline
+        # Ожидающие БД: {'candidate', 'blocked_since', 'next_check', 'interval', 'checks'}
+        self._entries: List[Dict[str, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, candidate: Dict[str, Any], now: float) -> None:
+        """Ставит занятую БД в очередь; первая повторная проверка - через `retry_seconds`."""
+        self._entries.append({
+            'candidate': candidate, 'blocked_since': now, 'next_check': now + self.retry_seconds,
+            'interval': self.retry_seconds, 'checks': 1})
+
+    def _give_up_at(self, entry: Dict[str, Any]) -> float:
+        """Момент, после которого ожидание БД бессмысленно."""
+        give_up_at = entry['blocked_since'] + self.wait_seconds
+        if self.deadline is not None:
+            give_up_at = min(give_up_at, self.deadline - entry['candidate'].get('predicted_seconds', 0.0))
+        return give_up_at
+
+    def due(self, now: float) -> List[Dict[str, Any]]:
+        """Возвращает записи, которые пора проверить (ожидание которых истекло - тоже)."""
+        return [entry for entry in self._entries if entry['next_check'] <= now or self._give_up_at(entry) <= now]
+
+    def expired(self, entry: Dict[str, Any], now: float) -> bool:
+        """Проверяет, что БД больше не ждем."""
+        return self._give_up_at(entry) <= now
+
+    def retry_later(self, entry: Dict[str, Any], now: float) -> None:
+        """Откладывает следующую проверку занятой БД с удвоением интервала."""
+        entry['interval'] = min(entry['interval'] * 2, self.max_retry_seconds)
+        entry['next_check'] = min(now + entry['interval'], max(self._give_up_at(entry), now))
+        entry['checks'] += 1
+
+    def remove(self, entry: Dict[str, Any], now: float) -> float:
+        """
+        Убирает БД из очереди.
+
+        :return: Время, в течение которого БД была занята (сек).
+        """
+        self._entries.remove(entry)
+        return now - entry['blocked_since']
+
+    def next_check(self) -> Optional[float]:
+        """Ближайший момент проверки (None - очередь пуста)."""
+        return min((min(entry['next_check'], self._give_up_at(entry)) for entry in self._entries), default=None)
+
+
+def find_last_backup_time(backup_dir: str, db_name: str, pattern) -> Optional[datetime]:
+    """
+    Определяет время последней резервной копии БД по именам файлов в каталоге `<backup_dir>/<db_name>`.
+
+    Используется для БД, по которым еще нет записи в состоянии планировщика, если каталог резервных копий
+    (`catalog.BackupCatalog`) недоступен.
+
+    :param backup_dir: Корневой каталог резервных копий.
+    :param db_name: Имя БД (каталог резервных копий).
+    :param pattern: Скомпилированное регулярное выражение с группой даты в формате '%Y.%m.%d_%H.%M'.
+    :return: Время последней копии или None.
+    """
+    latest = None
+    for _, _, files in os_walk(os_path.join(backup_dir, db_name)):
+        for file in files:
+            match = pattern.search(file)
+            if not match:
+                continue
+            try:
+                timestamp = datetime.strptime(match.group(1), '%Y.%m.%d_%H.%M')
+            except ValueError:
+                continue
+            if latest is None or timestamp > latest:
+                latest = timestamp
+    return latest
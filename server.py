@@ -11,15 +11,17 @@
 from asyncio import sleep as aio_sleep
 from shutil import copy as sh_copy
 
-from os import startfile as os_startfile
-from os.path import basename as os_basename
-from psutil import process_iter, NoSuchProcess, AccessDenied
+try:
+    from os import startfile as os_startfile
+except ImportError:  # не Windows (бенчмарки и тесты используют имитацию сервера)
+    os_startfile = None
+from os.path import basename as os_basename, normcase as os_normcase, abspath as os_abspath, sep as os_sep
 
-from logger import logging, setup_logger
+from logger import logging
 from config import Config
+from metrics import timed
 
 
-setup_logger()
 logging = logging.getLogger(__name__)
 
 
@@ -35,11 +37,14 @@ class ServerManager:
     :ivar server_start_file (str): Путь к файлу для запуска сервера.
     :ivar server_stop_file (str): Путь к файлу для остановки сервера.
     :ivar server_wait_seconds (int): Время ожидания сервера (сек).
+    :ivar _processes (dict): Найденные процессы по имени.
+    :ivar instance (str): Имя экземпляра сервера (см. `orchestrator.py`); None - общий блок `SERVER_*`.
     """
 
-    def __init__(self, language: str = 'en'):
+    def __init__(self, language: str = 'en', instance: str = None):
         """Инициализирует экземпляр ServerManager с настройками сервера."""
-        self.env: dict = Config().get_config('server')
+        self.instance = instance
+        self.env: dict = Config().get_config('server', instance=instance)
 
         self.server_dir: str = self.env.get('server_dir')
         self.server_start_file: str = self.env.get('server_start_file')
@@ -47,6 +52,7 @@ class ServerManager:
         self.server_process_name: str = self.env.get('server_process_name')
         self.server_wait_seconds: int = self.env.get('server_wait_seconds')
         self.language = language
+        self._processes: dict = {}
 
     def __str__(self):
         """
@@ -70,6 +76,7 @@ class ServerManager:
                 f"\tserver_stop_file='{self.server_stop_file}'\n"
                 f"\tself.server_wait_seconds='{self.server_wait_seconds}'")
             
+    @timed('server_start')
     async def start_server(self) -> bool:
         """
         Запускает сервер.
@@ -99,6 +106,7 @@ class ServerManager:
         logging.warning("Server did not start in the expected time.")
         return False
     
+    @timed('server_stop')
     async def stop_server(self) -> bool:
         """
         Останавливает сервер, если он запущен.
@@ -151,6 +159,8 @@ class ServerManager:
 
         :param process_name: Имя процесса, который необходимо завершить.
         """
+        from psutil import NoSuchProcess, AccessDenied
+
         process = await self._find_process_by_name(process_name)
         
         if process:
@@ -176,18 +186,54 @@ class ServerManager:
         await self._kill_process_by_name(os_basename(self.server_start_file))
         return True
 
-    @staticmethod
-    async def _find_process_by_name(process_name: str):
+    def reuse_caches(self, previous: 'ServerManager') -> None:
+        """
+        Переносит найденные процессы из менеджера, созданного до перечитывания конфигурации (см. `daemon.py`).
+
+        :param previous: Прежний менеджер сервера.
+        """
+        self._processes.update(previous._processes)
+
+    async def _find_process_by_name(self, process_name: str):
         """
         Находит процесс по имени.
 
+        Найденный процесс запоминается: пока он работает, повторный поиск (в режиме службы - в следующих запусках)
+        не перебирает все процессы системы. У экземпляра сервера (`instance`) процессы с тем же именем, запущенные
+        не из `server_dir`, пропускаются: на одном компьютере могут работать несколько серверов SLS.
+
         :param process_name: Имя процесса для поиска.
         :return: Процесс, если найден; иначе None.
         """
-        for process in process_iter(['name']):
-            if process.info['name'] == process_name:
+        from psutil import process_iter, Error as PsutilError
+
+        process = self._processes.get(process_name)
+        if process is not None:
+            try:
+                # is_running() сверяет время создания процесса, поэтому повторно использованный PID не совпадет
+                if process.is_running() and process.name() == process_name:
+                    return process
+            except PsutilError:
+                pass
+            del self._processes[process_name]
+
+        for process in process_iter(['name', 'exe']):
+            if process.info['name'] == process_name and self._is_own_process(process.info['exe']):
+                self._processes[process_name] = process
                 return process
         return None
+
+    def _is_own_process(self, exe_path: str) -> bool:
+        """
+        Проверяет, что процесс запущен из каталога этого сервера (проверяется только у экземпляров сервера).
+
+        :param exe_path: Путь к исполняемому файлу процесса (None, если нет доступа).
+        :return: True, если процесс относится к серверу или путь неизвестен.
+        """
+        if self.instance is None or not exe_path:
+            return True
+        server_dir = os_normcase(os_abspath(self.server_dir)).rstrip(os_sep) + os_sep
+        return os_normcase(os_abspath(exe_path)).startswith(server_dir)
     #
     # async def _kill_process_by_name(self, process_name: str) -> None:
     #     """
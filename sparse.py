@@ -0,0 +1,266 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+"""
+Разреженные файлы и области из нулей.
+
+Файлы DBX часто заранее расширяются большими областями нулей. Области без данных (дыры) определяются через
+`SEEK_DATA` / `SEEK_HOLE` и не читаются: при копировании они воссоздаются дырами в копии, а при хэшировании
+и архивации подставляются нулями без обращения к диску. Блоки из нулей, записанные в файл явно, определяются при
+копировании блоками по `ZERO_BLOCK_SIZE` и тоже не записываются в копию.
+"""
+
+from bisect import bisect_right
+from errno import ENXIO
+from os import open as os_open, close as os_close, fstat as os_fstat, lseek as os_lseek, O_RDONLY
+import os
+from typing import Any, List, Tuple, Optional
+
+
+# Размер блока, проверяемого на нули при копировании (байт)
+ZERO_BLOCK_SIZE: int = 64 * 1024
+
+_ZERO_BLOCK: bytes = bytes(ZERO_BLOCK_SIZE)
+
+
+def data_extents(path: str) -> Tuple[List[Tuple[int, int]], int]:
+    """
+    Возвращает области файла с данными.
+
+    :param path: Путь к файлу.
+    :return: Кортеж (области (начало, конец) в порядке возрастания, размер файла). Если файловая система не
+             сообщает о дырах, весь файл - одна область.
+    """
+    fd = os_open(path, O_RDONLY)
+    try:
+        size = os_fstat(fd).st_size
+        if not hasattr(os, 'SEEK_DATA') or not size:
+            return [(0, size)] if size else [], size
+        extents: List[Tuple[int, int]] = []
+        offset = 0
+        try:
+            while offset < size:
+                start = os_lseek(fd, offset, os.SEEK_DATA)
+                end = min(os_lseek(fd, start, os.SEEK_HOLE), size)
+                extents.append((start, end))
+                offset = end
+        except OSError as e:
+            if e.errno != ENXIO:
+                # SEEK_DATA не поддерживается: считаем весь файл данными
+                return [(0, size)], size
+            # ENXIO: после `offset` данных больше нет
+        return extents, size
+    finally:
+        os_close(fd)
+
+
+def has_holes(path: str) -> bool:
+    """
+    Проверяет, есть ли в файле дыры.
+
+    :param path: Путь к файлу.
+    :return: True, если хотя бы часть файла не содержит данных.
+    """
+    extents, size = data_extents(path)
+    return sum(end - start for start, end in extents) < size
+
+
+def split_zero_runs(chunk: bytes) -> List[Tuple[int, int, bool]]:
+    """
+    Делит блок на участки из нулей и с данными с точностью до `ZERO_BLOCK_SIZE`.
+
+    :param chunk: Блок данных.
+    :return: Участки (начало, конец, из нулей) в порядке следования.
+    """
+    runs: List[Tuple[int, int, bool]] = []
+    size = len(chunk)
+    for start in range(0, size, ZERO_BLOCK_SIZE):
+        end = min(start + ZERO_BLOCK_SIZE, size)
+        zero = chunk[start:end] == (_ZERO_BLOCK if end - start == ZERO_BLOCK_SIZE else bytes(end - start))
+        if runs and runs[-1][2] == zero:
+            runs[-1] = (runs[-1][0], end, zero)
+        else:
+            runs.append((start, end, zero))
+    return runs
+
+
+def punch_hole(fd: int, offset: int, length: int) -> bool:
+    """
+    Освобождает место диапазона файла, не меняя размер (`fallocate(PUNCH_HOLE | KEEP_SIZE)`, Linux): диапазон
+    читается как нули.
+
+    :param fd: Дескриптор файла, открытого на запись.
+    :param offset: Смещение (байт).
+    :param length: Длина (байт).
+    :return: True, если дыра создана; False, если система или файловая система этого не поддерживают.
+    """
+    from bulkio import get_libc
+
+    libc = get_libc()
+    if libc is None or not hasattr(libc, 'fallocate'):
+        return False
+    # FALLOC_FL_KEEP_SIZE | FALLOC_FL_PUNCH_HOLE
+    return libc.fallocate(fd, 0x01 | 0x02, offset, length) == 0
+
+
+class SparseMap:
+    """
+    Карта областей файла с данными.
+
+    :ivar extents (List[Tuple[int, int]]): Области (начало, конец) с данными.
+    :ivar size (int): Размер файла на момент построения карты (байт).
+    """
+
+    def __init__(self, extents: List[Tuple[int, int]], size: int) -> None:
+        self.extents: List[Tuple[int, int]] = extents
+        self.size: int = size
+        self._starts: List[int] = [start for start, _ in extents]
+
+    @classmethod
+    def from_path(cls, path: str) -> 'SparseMap':
+        """Строит карту файла (`data_extents`)."""
+        return cls(*data_extents(path))
+
+    @property
+    def hole_bytes(self) -> int:
+        """Объем дыр (байт)."""
+        return self.size - sum(end - start for start, end in self.extents)
+
+    def hole_end(self, offset: int) -> int:
+        """
+        Возвращает конец дыры, содержащей `offset`, или сам `offset`, если по нему есть данные (или он за концом
+        файла).
+        """
+        if offset >= self.size:
+            return offset
+        index = bisect_right(self._starts, offset) - 1
+        if index >= 0 and offset < self.extents[index][1]:
+            return offset
+        return self.extents[index + 1][0] if index + 1 < len(self.extents) else self.size
+
+    def data_end(self, offset: int) -> Optional[int]:
+        """Возвращает конец области данных, содержащей `offset` (None - за концом карты, файл мог вырасти)."""
+        index = bisect_right(self._starts, offset) - 1
+        if index >= 0 and offset < self.extents[index][1] and self.extents[index][1] < self.size:
+            return self.extents[index][1]
+        return None
+
+
+class _SparseCursor:
+    """Общая часть чтения с пропуском дыр: определяет, что возвращает следующее чтение."""
+
+    def __init__(self, file: Any, sparse_map: SparseMap, offset: int = 0) -> None:
+        self.file: Any = file
+        self.map: SparseMap = sparse_map
+        self.position: int = offset
+        self.hole: bool = False
+        self.hole_bytes: int = 0
+        self._seek_needed: bool = offset > 0
+
+    def _plan(self, size: int) -> Tuple[bool, int]:
+        """Возвращает (следующий участок - дыра, длина участка)."""
+        hole_end = self.map.hole_end(self.position)
+        if hole_end > self.position:
+            return True, min(size, hole_end - self.position)
+        data_end = self.map.data_end(self.position)
+        return False, size if data_end is None else min(size, data_end - self.position)
+
+    def _hole(self, length: int) -> bytes:
+        self.hole = True
+        self.hole_bytes += length
+        self.position += length
+        self._seek_needed = True
+        return bytes(length)
+
+
+class SparseReader(_SparseCursor):
+    """
+    Чтение файла, при котором дыры возвращаются нулями без обращения к диску (в рабочем потоке).
+
+    После `read` атрибут `hole` показывает, что возвращенный блок - дыра (не читался с диска).
+    """
+
+    def read(self, size: int) -> bytes:
+        hole, length = self._plan(size)
+        if hole:
+            return self._hole(length)
+        self.hole = False
+        if self._seek_needed:
+            self.file.seek(self.position)
+            self._seek_needed = False
+        data = self.file.read(length)
+        self.position += len(data)
+        return data
+
+
+class AsyncSparseReader(_SparseCursor):
+    """Асинхронный вариант `SparseReader` для файлов aiofiles и `bulkio.AsyncBulkFile`."""
+
+    async def read(self, size: int) -> bytes:
+        hole, length = self._plan(size)
+        if hole:
+            return self._hole(length)
+        self.hole = False
+        if self._seek_needed:
+            await self.file.seek(self.position)
+            self._seek_needed = False
+        data = await self.file.read(length)
+        self.position += len(data)
+        return data
+
+
+class AsyncSparseWriter:
+    """
+    Запись копии, при которой участки из нулей не записываются.
+
+    В новом файле пропущенные участки остаются дырами. В существующем файле (подготовленном заранее или
+    продолжаемом после прерывания) они могут содержать старые данные, поэтому в них пробиваются дыры, а если
+    это невозможно - записываются нули.
+
+    :ivar file (Any): Асинхронный файл (aiofiles или `bulkio.AsyncBulkFile`).
+    :ivar position (int): Смещение следующей записи (байт).
+    :ivar zeroed (bool): Незаписанные участки файла читаются как нули (файл создан заново).
+    :ivar zero_bytes (int): Объем незаписанных нулей (байт).
+    """
+
+    def __init__(self, file: Any, offset: int = 0, zeroed: bool = True) -> None:
+        self.file: Any = file
+        self.position: int = offset
+        self.zeroed: bool = zeroed
+        self.zero_bytes: int = 0
+        self._file_position: int = offset
+
+    async def write(self, chunk: bytes, known_zero: bool = False) -> None:
+        """
+        Записывает блок по текущему смещению.
+
+        :param chunk: Блок данных.
+        :param known_zero: Блок заведомо из нулей (дыра источника), проверка не нужна.
+        """
+        runs = [(0, len(chunk), True)] if known_zero else split_zero_runs(chunk)
+        view = memoryview(chunk)
+        for start, end, zero in runs:
+            offset = self.position + start
+            if zero:
+                self.zero_bytes += end - start
+                if self.zeroed or punch_hole(self.file.fileno(), offset, end - start):
+                    continue
+            if self._file_position != offset:
+                await self.file.seek(offset)
+            await self.file.write(view[start:end])
+            self._file_position = offset + end - start
+        self.position += len(chunk)
+
+    async def finish(self) -> None:
+        """Задает размер файла (хвост из нулей не записывался) и отбрасывает лишние данные за ним."""
+        if self._file_position != self.position:
+            await self.file.seek(self.position)
+            self._file_position = self.position
+        await self.file.truncate()
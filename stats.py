@@ -0,0 +1,198 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+from json import dumps as json_dumps, loads as json_loads
+from math import ceil, log2
+from os import replace as os_replace
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from metrics import Metrics
+from report import RunReport
+
+
+# Операции над файлами (интервалы метрик) и фазы, к которым относится их скорость
+OPERATIONS: Dict[str, str] = {
+    'copy_file': 'copy', 'hash': 'hash', 'archive_file': 'archive', 'verify_file': 'verify',
+    'restore_file': 'restore'}
+COUNTERS: List[str] = ['files_copied', 'files_unchanged', 'files_deferred', 'archives_created', 'backups_deleted']
+
+
+def size_bucket(size_bytes: int) -> int:
+    """
+    Возвращает группу размера набора данных: запуски сравниваются только с запусками той же группы.
+
+    Группы - степени двойки, то есть размеры в пределах группы различаются не более чем вдвое.
+
+    :param size_bytes: Размер набора данных (байт).
+    :return: Номер группы.
+    """
+    return int(log2(size_bytes)) if size_bytes > 0 else 0
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Вычисляет процентиль методом ближайшего ранга.
+
+    :param values: Значения (непустой список).
+    :param percent: Процентиль, от 0 до 100.
+    :return: Значение процентиля.
+    """
+    ordered = sorted(values)
+    return ordered[max(ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+def build_run_record(metrics: Metrics, report: Optional[RunReport] = None) -> Dict[str, Any]:
+    """
+    Формирует запись статистики запуска по метрикам и отчету о запуске.
+
+    :param metrics: Метрики завершенного запуска.
+    :param report: Отчет о запуске (размер набора данных, окно простоя, отложенные БД).
+    :return: Запись: 'time', 'dataset_bytes', 'size_bucket', 'phases' (сек), 'bytes' и 'op_seconds' по операциям,
+             'counts', 'compression_ratio', 'downtime_seconds'.
+    """
+    data = report.data if report is not None else {}
+    phases: Dict[str, float] = {}
+    processed: Dict[str, int] = {}
+    op_seconds: Dict[str, float] = {}
+    for span in metrics.spans:
+        parts = span.path.split('/')
+        if len(parts) == 1 or (len(parts) == 2 and parts[0] == 'run'):
+            phases[parts[-1]] = round(phases.get(parts[-1], 0.0) + span.seconds, 6)
+        phase = OPERATIONS.get(span.name)
+        if phase is not None and span.bytes:
+            processed[phase] = processed.get(phase, 0) + span.bytes
+            op_seconds[phase] = round(op_seconds.get(phase, 0.0) + span.seconds, 6)
+
+    counters: Dict[str, float] = {}
+    for (name, _), value in metrics.counters.items():
+        counters[name] = counters.get(name, 0) + value
+    if not metrics.enabled:
+        counters['files_copied'] = len(data.get('copied', []))
+        counters['files_deferred'] = len(data.get('deferred', []))
+
+    dataset_bytes = (data.get('preflight') or {}).get('total_bytes') or processed.get('copy', 0)
+    downtime = data.get('downtime_seconds')
+    return {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'dataset_bytes': dataset_bytes,
+        'size_bucket': size_bucket(dataset_bytes),
+        'phases': phases,
+        'bytes': processed,
+        'op_seconds': op_seconds,
+        'counts': {name: counters.get(name, 0) for name in COUNTERS},
+        'compression_ratio': (
+            round(counters['archive_bytes'] / counters['archive_source_bytes'], 4)
+            if counters.get('archive_source_bytes') else None),
+        'downtime_seconds': downtime,
+    }
+
+
+class RunStats:
+    """
+    Хранилище статистики запусков: по одной JSON-записи на запуск в файле `<FILES_BACKUP_DIR>/.run_stats.jsonl`.
+
+    По истории определяются регрессии производительности (запуск медленнее p95 последних запусков с набором
+    данных того же размера) и прогнозируется скорость операций для планировщиков.
+
+    :ivar store_path (str): Путь к файлу статистики.
+    :ivar max_records (int): Количество хранимых записей; более старые записи удаляются.
+    """
+
+    def __init__(self, store_path: str, max_records: int = 2000) -> None:
+        self.store_path: str = store_path
+        self.max_records: int = max_records
+        self._records: Optional[List[Dict[str, Any]]] = None
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Возвращает записи в порядке запусков (поврежденные строки пропускаются)."""
+        if self._records is None:
+            self._records = []
+            try:
+                with open(self.store_path, 'r', encoding='utf-8') as store_file:
+                    for line in store_file:
+                        try:
+                            self._records.append(json_loads(line))
+                        except ValueError:
+                            continue
+            except OSError:
+                pass
+        return self._records
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """
+        Добавляет запись о запуске.
+
+        Когда записей становится больше `max_records` на 10%, файл переписывается с последними `max_records`
+        записями.
+        """
+        records = self.load()
+        records.append(record)
+        if len(records) > self.max_records * 1.1:
+            del records[:-self.max_records]
+            tmp_path = f'{self.store_path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as store_file:
+                store_file.writelines(json_dumps(item, ensure_ascii=False) + '\n' for item in records)
+            os_replace(tmp_path, self.store_path)
+        else:
+            with open(self.store_path, 'a', encoding='utf-8') as store_file:
+                store_file.write(json_dumps(record, ensure_ascii=False) + '\n')
+
+    def throughput(self, phase: str, window: int = 10) -> Optional[float]:
+        """
+        Прогнозирует скорость операции по последним запускам.
+
+        Скорость считается как сумма байт к сумме времени операций над файлами, то есть для одного файла
+        (для параллельной проверки - для одного рабочего потока).
+
+        :param phase: Фаза: 'copy', 'hash', 'archive', 'verify', 'restore'.
+        :param window: Количество последних запусков с этой фазой.
+        :return: Скорость (байт/с) или None, если истории нет.
+        """
+        samples = [
+            record for record in self.load()
+            if record.get('bytes', {}).get(phase) and record.get('op_seconds', {}).get(phase)][-window:]
+        total_bytes = sum(record['bytes'][phase] for record in samples)
+        total_seconds = sum(record['op_seconds'][phase] for record in samples)
+        return total_bytes / total_seconds if total_bytes and total_seconds else None
+
+    def check_regressions(
+            self, record: Dict[str, Any], window: int = 30, min_runs: int = 5, percent: float = 95,
+            tolerance: float = 0.1) -> List[Dict[str, Any]]:
+        """
+        Находит фазы, которые в запуске `record` длились дольше p95 предыдущих запусков того же размера.
+
+        :param record: Запись проверяемого запуска (еще не добавленная в хранилище).
+        :param window: Количество последних запусков той же группы размера для сравнения.
+        :param min_runs: Минимальное количество запусков для сравнения.
+        :param percent: Процентиль.
+        :param tolerance: Допустимое превышение процентиля (доля), чтобы не реагировать на шум измерений.
+        :return: Список регрессий: 'metric', 'value', 'threshold', 'runs'.
+        """
+        history = [item for item in self.load() if item.get('size_bucket') == record['size_bucket']][-window:]
+        values: Dict[str, float] = {f'phase:{name}': seconds for name, seconds in record['phases'].items()}
+        if record.get('downtime_seconds') is not None:
+            values['downtime_seconds'] = record['downtime_seconds']
+
+        regressions: List[Dict[str, Any]] = []
+        for metric, value in values.items():
+            if metric == 'downtime_seconds':
+                previous = [item['downtime_seconds'] for item in history if item.get('downtime_seconds') is not None]
+            else:
+                name = metric.split(':', 1)[1]
+                previous = [item['phases'][name] for item in history if name in item.get('phases', {})]
+            if len(previous) < min_runs:
+                continue
+            threshold = percentile(previous, percent)
+            if value > threshold * (1 + tolerance):
+                regressions.append({
+                    'metric': metric, 'value': round(value, 3), 'threshold': round(threshold, 3),
+                    'runs': len(previous)})
+        return regressions
@@ -0,0 +1,531 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+"""
+Хранилища резервных копий: каталог файловой системы и S3-совместимый бакет.
+
+Объекты адресуются ключами с разделителем '/' относительно корня хранилища (каталога или префикса бакета).
+Запись выполняется потоком (`open_write`): в каталоге - через `<файл>.part` с переименованием при закрытии, в
+бакете - составной загрузкой (multipart upload), части которой загружаются параллельно по мере поступления
+данных, без временных файлов. Оба писателя сообщают контрольные точки (`checkpoint`), по которым прерванная
+загрузка продолжается (`upload`).
+"""
+
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, Future
+from functools import wraps
+from hashlib import sha256
+from math import ceil
+from os import fsync as os_fsync, makedirs as os_makedirs, path as os_path, remove as os_remove, \
+    replace as os_replace, utime as os_utime, walk as os_walk
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import Config
+
+
+# Шаг контрольных точек записи в каталог (байт)
+CHECKPOINT_BYTES: int = 64 * 1024 ** 2
+# Минимальный размер части составной загрузки S3 (кроме последней)
+MIN_PART_SIZE: int = 5 * 1024 ** 2
+# Максимальное количество частей составной загрузки S3
+MAX_PARTS: int = 10000
+
+
+class StorageError(OSError):
+    """Ошибка обращения к хранилищу (к ней приводятся ошибки клиента S3)."""
+
+
+def _s3_errors(func: Callable) -> Callable:
+    """Приводит исключения boto3 / botocore к `StorageError`."""
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        try:
+            return func(*args, **kwargs)
+        except OSError:
+            raise
+        except Exception as e:
+            if type(e).__module__.split('.')[0] in ('botocore', 'boto3'):
+                raise StorageError(str(e)) from e
+            raise
+    return wrapper
+
+
+class Storage(ABC):
+    """
+    Хранилище резервных копий.
+
+    :ivar uri (str): Адрес хранилища (путь к каталогу или `s3://бакет/префикс`).
+    """
+
+    uri: str = ''
+
+    def describe(self, key: str) -> str:
+        """Возвращает адрес объекта для журнала."""
+        return f'{self.uri.rstrip("/")}/{key}'
+
+    @abstractmethod
+    def read_bytes(self, key: str) -> Optional[bytes]:
+        """Читает объект целиком (None - объекта нет)."""
+
+    @abstractmethod
+    def write_bytes(self, key: str, data: bytes) -> None:
+        """Атомарно записывает небольшой объект целиком."""
+
+    @abstractmethod
+    def stat(self, key: str) -> Optional[int]:
+        """Возвращает размер объекта (None - объекта нет)."""
+
+    @abstractmethod
+    def list(self, prefix: str = '') -> List[Tuple[str, int]]:
+        """Перечисляет объекты с префиксом ключа: [(ключ, размер)]."""
+
+    @abstractmethod
+    def remove(self, key: str) -> None:
+        """Удаляет объект (отсутствующий объект не является ошибкой)."""
+
+    @abstractmethod
+    def open_write(
+            self, key: str, state: Optional[Dict[str, Any]] = None, mtime: Optional[float] = None,
+            size: Optional[int] = None) -> Any:
+        """
+        Открывает объект на запись потоком.
+
+        :param key: Ключ объекта.
+        :param state: Контрольная точка прерванной записи (см. `checkpoint` писателя); None - запись заново.
+        :param mtime: Дата изменения, которая сохраняется вместе с объектом.
+        :param size: Ожидаемый размер объекта (байт), если известен; None - неизвестен.
+        :return: Писатель: `write`, `checkpoint`, `offset` (смещение, с которого продолжается запись), контекстный
+                 менеджер (при выходе без исключения запись завершается, с исключением - остается продолжаемой).
+        """
+
+    def upload(
+            self, source_path: str, key: str, state: Optional[Dict[str, Any]] = None,
+            on_checkpoint: Optional[Callable[[Dict[str, Any]], None]] = None,
+            throttle: Optional[Callable[[int], None]] = None, on_chunk: Optional[Callable[[int], None]] = None,
+            chunk_size: int = 8 * 1024 ** 2) -> Tuple[str, int]:
+        """
+        Загружает файл в хранилище (в рабочем потоке), продолжая прерванную загрузку с контрольной точки.
+
+        Уже загруженная часть не передается повторно: она только читается из файла для вычисления SHA-256.
+
+        :param source_path: Путь к файлу.
+        :param key: Ключ объекта.
+        :param state: Контрольная точка прерванной загрузки.
+        :param on_checkpoint: Вызывается с новой контрольной точкой, когда данные надежно сохранены.
+        :param throttle: Ограничение скорости: вызывается перед записью каждого блока с его размером.
+        :param on_chunk: Вызывается с размером каждого переданного блока.
+        :param chunk_size: Размер блока чтения (байт).
+        :return: Кортеж (SHA-256 файла, смещение, с которого продолжена загрузка).
+        """
+        digest = sha256()
+        with open(source_path, 'rb') as source, \
+                self.open_write(
+                    key, state, mtime=os_path.getmtime(source_path), size=os_path.getsize(source_path)) as writer:
+            resumed = position = writer.offset
+            while position > 0:
+                chunk = source.read(min(chunk_size, position))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                position -= len(chunk)
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                if throttle is not None:
+                    throttle(len(chunk))
+                writer.write(chunk)
+                digest.update(chunk)
+                if on_chunk is not None:
+                    on_chunk(len(chunk))
+                if on_checkpoint is not None:
+                    checkpoint = writer.checkpoint()
+                    if checkpoint is not None:
+                        on_checkpoint(checkpoint)
+        return digest.hexdigest(), resumed
+
+    def close(self) -> None:
+        """Освобождает соединения и рабочие потоки."""
+
+
+class _FileWriter:
+    """Запись в каталог через `<файл>.part`: контрольная точка - смещение, сброшенное на диск."""
+
+    def __init__(self, path: str, state: Optional[Dict[str, Any]], mtime: Optional[float]) -> None:
+        self.path: str = path
+        self.part_path: str = f'{path}.part'
+        self.mtime: Optional[float] = mtime
+        os_makedirs(os_path.dirname(path), exist_ok=True)
+        offset = int((state or {}).get('offset', 0))
+        if offset and (not os_path.exists(self.part_path) or os_path.getsize(self.part_path) < offset):
+            offset = 0
+        self.offset: int = offset
+        self._file = open(self.part_path, 'r+b' if offset else 'wb')
+        self._file.seek(offset)
+        self._position: int = offset
+        self._checkpoint: int = offset
+
+    def write(self, data: Any) -> int:
+        self._file.write(data)
+        self._position += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def checkpoint(self) -> Optional[Dict[str, Any]]:
+        if self._position - self._checkpoint < CHECKPOINT_BYTES:
+            return None
+        self._file.flush()
+        os_fsync(self._file.fileno())
+        self._checkpoint = self._position
+        return {'offset': self._position}
+
+    def __enter__(self) -> '_FileWriter':
+        return self
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        try:
+            if exc_type is None:
+                # Отбрасываем хвост прежней версии файла
+                self._file.truncate()
+                self._file.flush()
+                os_fsync(self._file.fileno())
+        finally:
+            self._file.close()
+        if exc_type is None:
+            os_replace(self.part_path, self.path)
+            if self.mtime is not None:
+                os_utime(self.path, times=(self.mtime, self.mtime))
+
+
+class FileSystemStorage(Storage):
+    """
+    Хранилище в каталоге (локальный диск или смонтированный сетевой ресурс).
+
+    :ivar root (str): Каталог хранилища.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root: str = root
+        self.uri = root
+
+    def describe(self, key: str) -> str:
+        return self._path(key)
+
+    def _path(self, key: str) -> str:
+        return os_path.join(self.root, *key.split('/'))
+
+    def read_bytes(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), 'rb') as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def write_bytes(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os_makedirs(os_path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os_fsync(file.fileno())
+        os_replace(tmp_path, path)
+
+    def stat(self, key: str) -> Optional[int]:
+        try:
+            return os_path.getsize(self._path(key))
+        except FileNotFoundError:
+            return None
+
+    def list(self, prefix: str = '') -> List[Tuple[str, int]]:
+        objects = []
+        for root, _, files in os_walk(self.root):
+            for name in files:
+                key = os_path.relpath(os_path.join(root, name), self.root).replace(os_path.sep, '/')
+                if key.startswith(prefix):
+                    objects.append((key, os_path.getsize(os_path.join(root, name))))
+        return objects
+
+    def remove(self, key: str) -> None:
+        try:
+            os_remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def open_write(
+            self, key: str, state: Optional[Dict[str, Any]] = None, mtime: Optional[float] = None,
+            size: Optional[int] = None) -> Any:
+        return _FileWriter(self._path(key), state, mtime)
+
+
+class _MultipartWriter:
+    """
+    Потоковая запись объекта S3 составной загрузкой.
+
+    Данные собираются в части по `part_size` байт; до `concurrency` частей загружаются одновременно, запись ждет,
+    только когда все они в работе. Объект меньше одной части записывается одним запросом. Если размер объекта
+    известен, часть увеличивается так, чтобы объект уместился в `MAX_PARTS` частей. Контрольная точка -
+    идентификатор загрузки, размер части и непрерывный ряд загруженных частей: при продолжении загрузка
+    дописывается со следующей части тем же размером части (если загрузка на сервере уже удалена - начинается
+    заново).
+    """
+
+    def __init__(
+            self, storage: 'S3Storage', key: str, state: Optional[Dict[str, Any]], mtime: Optional[float],
+            size: Optional[int] = None) -> None:
+        self._storage: 'S3Storage' = storage
+        self.key: str = storage._key(key)
+        self.mtime: Optional[float] = mtime
+        self.part_size: int = max(storage.part_size, ceil(size / MAX_PARTS)) if size else storage.part_size
+        self._upload_id: Optional[str] = None
+        # Загруженные части: [{'PartNumber', 'ETag', 'Size'}]
+        self._parts: List[Dict[str, Any]] = []
+        self._in_flight: List[Tuple[int, int, Future]] = []
+        self._buffer: bytearray = bytearray()
+        self._reported: int = 0
+        self.offset: int = 0
+        if state and state.get('upload_id'):
+            self._resume(state)
+
+    def _resume(self, state: Dict[str, Any]) -> None:
+        """Продолжает загрузку: проверяет на сервере части из контрольной точки."""
+        client = self._storage.client
+        try:
+            response = client.list_parts(Bucket=self._storage.bucket, Key=self.key, UploadId=state['upload_id'])
+        except Exception as e:
+            if S3Storage.error_code(e) == 'NoSuchUpload':
+                # Загрузка завершена, удалена или истекла
+                return
+            raise
+        uploaded = {part['PartNumber']: part for part in response.get('Parts', [])}
+        parts = []
+        for part in state.get('parts', []):
+            on_server = uploaded.get(part['PartNumber'])
+            if on_server is None or on_server['ETag'] != part['ETag'] or len(parts) + 1 != part['PartNumber']:
+                break
+            parts.append(part)
+        self._upload_id = state['upload_id']
+        self._parts = parts
+        # Части продолжаемой загрузки должны быть одного размера с уже загруженными
+        self.part_size = int(state.get('part_size') or (parts[0]['Size'] if parts else self.part_size))
+        self.offset = self._reported = sum(part['Size'] for part in parts)
+
+    def _upload_part(self, number: int, data: bytes) -> Dict[str, Any]:
+        response = self._storage.client.upload_part(
+            Bucket=self._storage.bucket, Key=self.key, UploadId=self._upload_id, PartNumber=number, Body=bytes(data))
+        return {'PartNumber': number, 'ETag': response['ETag'], 'Size': len(data)}
+
+    def _collect(self, limit: int) -> None:
+        """Ждет завершения частей, пока в работе больше `limit`."""
+        while len(self._in_flight) > limit:
+            _, _, future = self._in_flight.pop(0)
+            self._parts.append(future.result())
+
+    def _submit(self, data: bytearray) -> None:
+        if self._upload_id is None:
+            response = self._storage.client.create_multipart_upload(
+                Bucket=self._storage.bucket, Key=self.key, Metadata=self._metadata())
+            self._upload_id = response['UploadId']
+        self._collect(self._storage.concurrency - 1)
+        number = len(self._parts) + len(self._in_flight) + 1
+        if number > MAX_PARTS:
+            raise StorageError(
+                f's3://{self._storage.bucket}/{self.key}: more than {MAX_PARTS} parts of {self.part_size} bytes')
+        self._in_flight.append((number, len(data), self._storage.executor.submit(self._upload_part, number, data)))
+
+    def _metadata(self) -> Dict[str, str]:
+        return {} if self.mtime is None else {'mtime': repr(self.mtime)}
+
+    @_s3_errors
+    def write(self, data: Any) -> int:
+        self._buffer += data
+        while len(self._buffer) >= self.part_size:
+            part, self._buffer = self._buffer[:self.part_size], self._buffer[self.part_size:]
+            self._submit(part)
+        return len(data)
+
+    def flush(self) -> None:
+        """Части отправляются по мере заполнения: сброс не требуется."""
+
+    @_s3_errors
+    def checkpoint(self) -> Optional[Dict[str, Any]]:
+        # Части завершаются по порядку отправки: забираем уже готовые, не ожидая остальных
+        while self._in_flight and self._in_flight[0][2].done():
+            self._parts.append(self._in_flight.pop(0)[2].result())
+        uploaded = sum(part['Size'] for part in self._parts)
+        if uploaded == self._reported:
+            return None
+        self._reported = uploaded
+        return {
+            'offset': uploaded, 'upload_id': self._upload_id, 'part_size': self.part_size, 'parts': list(self._parts)}
+
+    def __enter__(self) -> '_MultipartWriter':
+        return self
+
+    @_s3_errors
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        client, bucket = self._storage.client, self._storage.bucket
+        if exc_type is not None:
+            # Загруженные части остаются на сервере для продолжения (незавершенные загрузки удаляются правилом
+            # жизненного цикла бакета)
+            for _, _, future in self._in_flight:
+                future.cancel()
+            return
+        if self._upload_id is None:
+            client.put_object(Bucket=bucket, Key=self.key, Body=bytes(self._buffer), Metadata=self._metadata())
+            return
+        try:
+            if self._buffer or not (self._parts or self._in_flight):
+                self._submit(self._buffer)
+                self._buffer = bytearray()
+            self._collect(0)
+            client.complete_multipart_upload(
+                Bucket=bucket, Key=self.key, UploadId=self._upload_id, MultipartUpload={'Parts': [
+                    {'PartNumber': part['PartNumber'], 'ETag': part['ETag']} for part in self._parts]})
+        except Exception:
+            client.abort_multipart_upload(Bucket=bucket, Key=self.key, UploadId=self._upload_id)
+            raise
+
+
+class S3Storage(Storage):
+    """
+    Хранилище в S3-совместимом бакете (AWS S3, MinIO, moto). Требует пакет boto3, который импортируется при первом
+    обращении; учетные данные - стандартные для boto3 (`AWS_ACCESS_KEY_ID` / `AWS_SECRET_ACCESS_KEY`, профиль).
+
+    Один клиент с пулом соединений (`max_connections`) используется всеми загрузками; части загружаются общим
+    пулом рабочих потоков.
+
+    :ivar bucket (str): Бакет.
+    :ivar prefix (str): Префикс ключей (без завершающего '/').
+    :ivar endpoint_url (Optional[str]): Адрес S3-совместимого сервера (None - AWS).
+    :ivar region (Optional[str]): Регион.
+    :ivar part_size (int): Размер части составной загрузки (байт).
+    :ivar concurrency (int): Количество одновременно загружаемых частей одного объекта.
+    :ivar max_connections (int): Размер пула соединений.
+    """
+
+    def __init__(
+            self, bucket: str, prefix: str = '', endpoint_url: Optional[str] = None, region: Optional[str] = None,
+            part_size: int = 8 * 1024 ** 2, concurrency: int = 4, max_connections: int = 10) -> None:
+        self.bucket: str = bucket
+        self.prefix: str = prefix.strip('/')
+        self.uri = f's3://{bucket}/{self.prefix}' if self.prefix else f's3://{bucket}'
+        self.endpoint_url: Optional[str] = endpoint_url or None
+        self.region: Optional[str] = region or None
+        self.part_size: int = max(part_size, MIN_PART_SIZE)
+        self.concurrency: int = max(concurrency, 1)
+        self.max_connections: int = max(max_connections, self.concurrency)
+        self._client: Any = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock: Lock = Lock()
+
+    @property
+    def client(self) -> Any:
+        """Клиент S3 (создается при первом обращении)."""
+        with self._lock:
+            if self._client is None:
+                try:
+                    from boto3.session import Session
+                    from botocore.config import Config as BotoConfig
+                except ImportError as e:
+                    raise StorageError(f'boto3 is required for {self.uri}: {e}') from e
+
+                self._client = Session().client(
+                    's3', endpoint_url=self.endpoint_url, region_name=self.region,
+                    config=BotoConfig(
+                        max_pool_connections=self.max_connections, retries={'max_attempts': 5, 'mode': 'standard'}))
+            return self._client
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Пул рабочих потоков загрузки частей."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_connections, thread_name_prefix='s3')
+            return self._executor
+
+    def _key(self, key: str) -> str:
+        return f'{self.prefix}/{key}' if self.prefix else key
+
+    @staticmethod
+    def error_code(error: Exception) -> Optional[str]:
+        """Возвращает код ошибки ответа S3 (None - ошибка не от сервера)."""
+        response = getattr(error, 'response', None) or {}
+        return response.get('Error', {}).get('Code')
+
+    def _is_missing(self, error: Exception) -> bool:
+        return self.error_code(error) in ('404', 'NoSuchKey', 'NotFound')
+
+    @_s3_errors
+    def read_bytes(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))['Body'].read()
+        except Exception as e:
+            if self._is_missing(e):
+                return None
+            raise
+
+    @_s3_errors
+    def write_bytes(self, key: str, data: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data)
+
+    @_s3_errors
+    def stat(self, key: str) -> Optional[int]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(key))['ContentLength']
+        except Exception as e:
+            if self._is_missing(e):
+                return None
+            raise
+
+    @_s3_errors
+    def list(self, prefix: str = '') -> List[Tuple[str, int]]:
+        start = len(self.prefix) + 1 if self.prefix else 0
+        paginator = self.client.get_paginator('list_objects_v2')
+        return [
+            (item['Key'][start:], item['Size'])
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix))
+            for item in page.get('Contents', [])]
+
+    @_s3_errors
+    def remove(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    @_s3_errors
+    def open_write(
+            self, key: str, state: Optional[Dict[str, Any]] = None, mtime: Optional[float] = None,
+            size: Optional[int] = None) -> Any:
+        return _MultipartWriter(self, key, state, mtime, size)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def open_storage(uri: str, instance: Optional[str] = None) -> Storage:
+    """
+    Открывает хранилище по адресу: `s3://бакет/префикс` - бакет с настройками `STORAGE_S3_*`, иначе - каталог.
+
+    :param uri: Адрес хранилища.
+    :param instance: Имя экземпляра сервера (см. `orchestrator.py`).
+    :return: Хранилище.
+    """
+    if not uri.lower().startswith('s3://'):
+        return FileSystemStorage(uri)
+    bucket, _, prefix = uri[5:].partition('/')
+    env: Dict[str, Any] = Config().get_config('storage', instance=instance)
+    return S3Storage(
+        bucket, prefix, endpoint_url=env.get('storage_s3_endpoint_url'), region=env.get('storage_s3_region'),
+        part_size=int(env.get('storage_s3_part_size_mb', 8.0) * 1024 ** 2),
+        concurrency=env.get('storage_s3_concurrency', 4), max_connections=env.get('storage_s3_max_connections', 10))
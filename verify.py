@@ -0,0 +1,132 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/01'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '1.0.6.0'
+
+from json import load as json_load, dump as json_dump
+from os import replace as os_replace, path as os_path
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+
+class VerifyState:
+    """
+    Состояние проверки целостности архивов: время последней проверки и ее результат по каждому архиву.
+
+    Ключ - путь к архиву относительно каталога резервных копий. Архив считается непроверенным, если с момента
+    проверки изменились его размер или время модификации.
+
+    :ivar state_path (str): Путь к файлу состояния.
+    :ivar archives (Dict[str, Dict[str, Any]]): Результаты проверок ('verified_at', 'ok', 'size', 'mtime', 'error').
+    """
+
+    def __init__(self, state_path: str) -> None:
+        self.state_path: str = state_path
+        self.archives: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as state_file:
+                self.archives = dict(json_load(state_file).get('archives', {}))
+        except (FileNotFoundError, ValueError, OSError):
+            pass
+
+    def save(self) -> None:
+        """Атомарно сохраняет состояние."""
+        tmp_path = f'{self.state_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as state_file:
+            json_dump({'archives': self.archives}, state_file, ensure_ascii=False, indent=1)
+        os_replace(tmp_path, self.state_path)
+
+    def last_verified(self, key: str, size: int, mtime: float) -> Optional[datetime]:
+        """
+        Возвращает время последней успешной или неуспешной проверки архива, если архив с тех пор не менялся.
+
+        :param key: Относительный путь к архиву.
+        :param size: Текущий размер архива.
+        :param mtime: Текущее время модификации архива.
+        :return: Время проверки или None.
+        """
+        entry = self._current(key, size, mtime)
+        if entry is None:
+            return None
+        try:
+            return datetime.fromisoformat(entry['verified_at'])
+        except (KeyError, ValueError):
+            return None
+
+    def failed(self, key: str, size: int, mtime: float) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает результат последней проверки архива, если она была неуспешной и архив с тех пор не менялся.
+
+        :param key: Относительный путь к архиву.
+        :param size: Текущий размер архива.
+        :param mtime: Текущее время модификации архива.
+        :return: Запись состояния ('verified_at', 'error' и т.д.) или None.
+        """
+        entry = self._current(key, size, mtime)
+        return entry if entry is not None and entry.get('ok') is False else None
+
+    def _current(self, key: str, size: int, mtime: float) -> Optional[Dict[str, Any]]:
+        """Возвращает запись об архиве, если архив с момента проверки не менялся."""
+        entry = self.archives.get(key)
+        if entry is None or entry.get('size') != size or abs(entry.get('mtime', 0) - mtime) > 1e-3:
+            return None
+        return entry
+
+    def mark(self, key: str, size: int, mtime: float, ok: bool, error: Optional[str] = None) -> None:
+        """Записывает результат проверки архива."""
+        self.archives[key] = {
+            'verified_at': datetime.now().isoformat(timespec='seconds'), 'ok': ok, 'size': size, 'mtime': mtime,
+            'error': error}
+
+    def prune(self, keys: List[str]) -> None:
+        """Удаляет записи об архивах, которых больше нет."""
+        existing = set(keys)
+        for key in [key for key in self.archives if key not in existing]:
+            del self.archives[key]
+
+
+def order_for_verification(
+        archives: List[Dict[str, Any]], state: VerifyState, backup_dir: str) -> List[Dict[str, Any]]:
+    """
+    Упорядочивает архивы для очередной порции проверки: сначала архивы, не прошедшие последнюю проверку, затем
+    непроверенные и измененные, затем проверенные раньше всех. Так за несколько запусков по кругу проверяются все
+    архивы, а поврежденный архив не уходит в конец очереди после неуспешной проверки.
+
+    :param archives: Архивы (ключи 'path', 'size'; см. `planner.collect_backups`).
+    :param state: Состояние проверки.
+    :param backup_dir: Корневой каталог резервных копий.
+    :return: Архивы с добавленными ключами 'key', 'mtime', 'last_verified' в порядке проверки.
+    """
+    for archive in archives:
+        archive['key'] = os_path.relpath(archive['path'], backup_dir)
+        archive['mtime'] = os_path.getmtime(archive['path'])
+        archive['last_verified'] = state.last_verified(archive['key'], archive['size'], archive['mtime'])
+    return sorted(archives, key=lambda archive: (
+        state.failed(archive['key'], archive['size'], archive['mtime']) is None,
+        archive['last_verified'] or datetime.min))
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+    from asyncio import run as aio_run
+
+    from backup import BackupManager
+    from logger import setup_logger
+
+    parser = ArgumentParser(description='Verify a slice of backup archives against their recorded SHA-256.')
+    parser.add_argument('--time-budget', type=float, help='Time budget in seconds (0 - unlimited).')
+    parser.add_argument('--io-budget-gb', type=float, help='Archive bytes to read in GB (0 - unlimited).')
+    parser.add_argument('--workers', type=int, help='Number of worker threads.')
+    args = parser.parse_args()
+
+    backup_manager = BackupManager(language=setup_logger())
+    summary = aio_run(backup_manager.perform_integrity_check(
+        time_budget_seconds=args.time_budget,
+        io_budget_bytes=None if args.io_budget_gb is None else int(args.io_budget_gb * 1024 ** 3),
+        workers=args.workers))
+    raise SystemExit(1 if summary['corrupted'] else 0)